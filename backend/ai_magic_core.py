@@ -11,6 +11,11 @@ from datetime import datetime, timedelta
 from collections import defaultdict
 import hashlib
 
+from entity_extractor import extract_entities
+from hindi_normalizer import script_letter_counts, split_hinglish_words
+from llm_cache import LLM_CACHE_TTL
+from llm_gateway import get_llm_gateway
+
 class ConversationMemory:
     """Manages conversational context and user memory"""
     
@@ -206,36 +211,13 @@ class NaturalLanguageProcessor:
             'conditions': []
         }
         
-        query_lower = query.lower()
-        
-        # Parse actions
-        if any(word in query_lower for word in ['turn off', 'shut down', 'disable']):
-            parsed['action'] = 'turn_off'
-        elif any(word in query_lower for word in ['turn on', 'enable', 'activate']):
-            parsed['action'] = 'turn_on'
-        elif any(word in query_lower for word in ['adjust', 'set', 'change']):
-            parsed['action'] = 'adjust'
-        elif any(word in query_lower for word in ['schedule', 'plan']):
-            parsed['action'] = 'schedule'
-        
-        # Parse time conditions
-        time_patterns = {
-            'after 8pm': '20:00',
-            'before 6am': '06:00',
-            'weekends': 'weekend',
-            'weekdays': 'weekday',
-            'every monday': 'monday',
-            'daily': 'daily'
-        }
-        
-        for pattern, time_value in time_patterns.items():
-            if pattern in query_lower:
-                parsed['schedule'] = time_value
+        entities = extract_entities(query)
+        parsed['action'] = entities.action
+        parsed['schedule'] = entities.schedule
         
         # Parse parameters (temperature, brightness, etc.)
-        temp_match = re.search(r'(\d+)\s*degrees?', query_lower)
-        if temp_match:
-            parsed['parameters']['temperature'] = int(temp_match.group(1))
+        if entities.unit == 'celsius':
+            parsed['parameters']['temperature'] = entities.value
         
         return parsed
 
@@ -305,9 +287,8 @@ class MultiLanguageSupport:
     def detect_language(query: str) -> str:
         """Enhanced language detection with Hinglish support"""
         # Count Hindi and English characters
-        hindi_chars = len(re.findall(r'[अ-ह]', query))
-        english_chars = len(re.findall(r'[a-zA-Z]', query))
-        total_chars = len(re.sub(r'[^a-zA-Zअ-ह]', '', query))  # Only count letters
+        hindi_chars, english_chars = script_letter_counts(query)
+        total_chars = hindi_chars + english_chars  # Only count letters
         
         if total_chars == 0:
             return 'en'  # Default to English if no letters found
@@ -332,9 +313,8 @@ class MultiLanguageSupport:
     @staticmethod
     def is_hinglish(query: str) -> bool:
         """Check if query is Hinglish (mixed Hindi-English)"""
-        hindi_chars = len(re.findall(r'[अ-ह]', query))
-        english_chars = len(re.findall(r'[a-zA-Z]', query))
-        total_chars = len(re.sub(r'[^a-zA-Zअ-ह]', '', query))
+        hindi_chars, english_chars = script_letter_counts(query)
+        total_chars = hindi_chars + english_chars
         
         if total_chars == 0:
             return False
@@ -346,18 +326,8 @@ class MultiLanguageSupport:
     @staticmethod
     def extract_hinglish_components(query: str) -> Dict[str, Union[list, bool]]:
         """Extract Hindi and English components from Hinglish query"""
-        # Split by spaces and categorize words
-        words = query.split()
-        hindi_words = []
-        english_words = []
-        
-        for word in words:
-            # Clean word (remove punctuation)
-            clean_word = re.sub(r'[^\wअ-ह]', '', word)
-            if re.search(r'[अ-ह]', clean_word):
-                hindi_words.append(clean_word)
-            elif re.search(r'[a-zA-Z]', clean_word):
-                english_words.append(clean_word)
+        # Split by spaces and categorize words (punctuation removed)
+        hindi_words, english_words = split_hinglish_words(query)
         
         return {
             'hindi_words': hindi_words,
@@ -366,21 +336,21 @@ class MultiLanguageSupport:
         }
     
     @staticmethod
-    def translate_response(response: str, target_language: str, llm_client) -> str:
+    def translate_response(response: str, target_language: str, llm_client=None) -> str:
         """Translate response to target language"""
         if target_language == 'en':
             return response
         
         try:
-            # Use LLM for translation
+            # Use LLM for translation; the same response is often translated again within minutes
+            llm_client = llm_client or get_llm_gateway()
             prompt = f"Translate this response to {target_language}. Keep the emojis and formatting:\n\n{response}"
-            translated = llm_client.chat.completions.create(
-                model="gpt-4o",
-                messages=[{"role": "user", "content": prompt}],
+            return llm_client.complete(
+                [{"role": "user", "content": prompt}],
                 temperature=0.3,
-                max_tokens=1000
+                max_tokens=1000,
+                cache_ttl=LLM_CACHE_TTL
             )
-            return translated.choices[0].message.content
         except:
             return response  # Fallback to original if translation fails
 
@@ -0,0 +1,32 @@
+"""
+Server-Sent Events for streamed chat answers.
+
+Both apps (the deployed repo-root main.py and backend/main.py) serve
+/chat/enhanced/stream from the agent's process_query_stream. The event format
+lives here so the two endpoints cannot drift apart: `delta` carries text as it
+is produced, `done` the complete response in the /chat/enhanced shape, and
+`error` replaces `done` on failure.
+"""
+
+import json
+from typing import AsyncIterator, Callable, Tuple
+
+NO_ANSWER = "No data found or unable to answer your query."
+
+
+def sse_event(event: str, payload: dict) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+async def chat_events(stream: AsyncIterator[Tuple[str, str]], done_body: Callable[[str], dict]) -> AsyncIterator[str]:
+    """SSE text for a process_query_stream; done_body(response) builds the `done` payload"""
+    try:
+        async for kind, text in stream:
+            if kind == "delta":
+                yield sse_event("delta", {"text": text})
+            else:
+                yield sse_event("done", done_body(text or NO_ANSWER))
+    except Exception as e:
+        print(f"Enhanced chat stream error: {e}")
+        yield sse_event("error", {"error": str(e), "code": "ENHANCED_CHAT_ERROR"})
@@ -0,0 +1,177 @@
+"""
+Per-token device directory cache.
+
+Device lookups (name -> id, id -> name, location scans) used to hit
+`user/devices` several times per query. The directory keeps one device list
+per Inferrix token in memory with a TTL; once an entry is stale it is still
+served while a background refresh runs (stale-while-revalidate), and callers
+can drop entries explicitly with invalidate(). A fetch that was already running
+when its token was invalidated does not store its (possibly stale) result.
+
+Entries are keyed on a hash of the whole token, never on its (unverified) JWT
+claims: a cache hit skips Inferrix and with it the signature check, so only
+the exact token that loaded a list may read it back. Customer users of one
+tenant see different device lists upstream and get separate entries too.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+# Fresh for DEVICE_DIRECTORY_TTL seconds, then served stale (and refreshed in
+# the background) until DEVICE_DIRECTORY_MAX_STALE seconds after the fetch
+DEVICE_DIRECTORY_TTL = float(os.getenv("DEVICE_DIRECTORY_TTL", "300"))
+DEVICE_DIRECTORY_MAX_STALE = float(os.getenv("DEVICE_DIRECTORY_MAX_STALE", "1800"))
+# Tokens are refreshed often; keep at most this many lists (oldest fetch evicted first)
+DEVICE_DIRECTORY_MAX_ENTRIES = int(os.getenv("DEVICE_DIRECTORY_MAX_ENTRIES", "500"))
+
+
+def cache_key_for_token(token: Optional[str]) -> str:
+    """Cache key for data read with an Inferrix token: a hash of the token itself.
+
+    Claims inside the JWT are not verified here, so they must not decide who may
+    read cached data; a refreshed token starts with a cold entry.
+    """
+    if not token:
+        return "anonymous"
+    return "token:" + hashlib.sha256(token.encode()).hexdigest()
+
+
+def _device_id(device: Dict) -> str:
+    device_id = device.get('id', '')
+    if isinstance(device_id, dict):
+        device_id = device_id.get('id', '')
+    return device_id or ''
+
+
+class _DirectoryEntry:
+    def __init__(self, devices: List[Dict], index=None):
+        self.devices = devices
+        self.by_id = {_device_id(d): d for d in devices if _device_id(d)}
+        self.index = index
+        self.fetched_at = time.time()
+        self.refreshing = False
+
+
+class DeviceDirectory:
+    """In-memory device list per token with TTL and background refresh"""
+
+    def __init__(self, fetch_devices: Callable[[str], List[Dict]], ttl: float = DEVICE_DIRECTORY_TTL,
+                 max_stale: float = DEVICE_DIRECTORY_MAX_STALE, build_index: Optional[Callable[[List[Dict]], Any]] = None,
+                 max_entries: int = DEVICE_DIRECTORY_MAX_ENTRIES):
+        # fetch_devices(token) must return the full device list or raise on failure;
+        # build_index(devices), if given, runs once per refresh and is served by get_index()
+        self._fetch_devices = fetch_devices
+        self._build_index = build_index
+        self.ttl = ttl
+        self.max_stale = max(max_stale, ttl)
+        self.max_entries = max(1, max_entries)
+        self._entries: Dict[str, _DirectoryEntry] = {}
+        self._lock = threading.Lock()
+        self._fetch_locks: Dict[str, threading.Lock] = {}
+        # Bumped by every invalidate(); a load stores its result only if its token was
+        # not invalidated after the load began
+        self._generation = 0
+        self._invalidated: Dict[str, int] = {}
+        self._invalidated_all = 0
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="device-directory")
+
+    def _fetch_lock(self, owner: str) -> threading.Lock:
+        with self._lock:
+            return self._fetch_locks.setdefault(owner, threading.Lock())
+
+    def _load(self, owner: str, token: str) -> _DirectoryEntry:
+        with self._lock:
+            generation = self._generation
+        devices = self._fetch_devices(token)
+        index = self._build_index(devices) if self._build_index else None
+        entry = _DirectoryEntry(devices, index)
+        with self._lock:
+            if max(self._invalidated_all, self._invalidated.get(owner, 0)) > generation:
+                print(f"[DEBUG] Device directory - Discarded a load for {owner[:16]} invalidated while it ran")
+                return entry
+            self._entries[owner] = entry
+            while len(self._entries) > self.max_entries:
+                oldest = min(self._entries, key=lambda k: self._entries[k].fetched_at)
+                del self._entries[oldest]
+                self._fetch_locks.pop(oldest, None)
+        print(f"[DEBUG] Device directory - Loaded {len(entry.devices)} devices for {owner[:16]}")
+        return entry
+
+    def _background_refresh(self, owner: str, token: str, entry: _DirectoryEntry):
+        try:
+            with self._fetch_lock(owner):
+                self._load(owner, token)
+        except Exception as e:
+            print(f"[DEBUG] Device directory - Background refresh failed for {owner[:16]}: {e}")
+        finally:
+            with self._lock:
+                entry.refreshing = False
+
+    def _entry(self, token: str) -> Optional[_DirectoryEntry]:
+        owner = cache_key_for_token(token)
+        refresh = False
+        with self._lock:
+            entry = self._entries.get(owner)
+            if entry is not None:
+                age = time.time() - entry.fetched_at
+                if age < self.ttl:
+                    return entry
+                if age < self.max_stale:
+                    # Serve stale data and revalidate in the background (one refresh at a time)
+                    refresh = not entry.refreshing
+                    entry.refreshing = True
+        if refresh:
+            self._refresher.submit(self._background_refresh, owner, token, entry)
+        if entry is not None and time.time() - entry.fetched_at < self.max_stale:
+            return entry
+        # Missing or too old: fetch synchronously, one caller per token
+        with self._fetch_lock(owner):
+            with self._lock:
+                entry = self._entries.get(owner)
+            if entry is not None and time.time() - entry.fetched_at < self.ttl:
+                return entry
+            try:
+                return self._load(owner, token)
+            except Exception:
+                # Do not keep a lock around for a token that never loaded (e.g. an expired one)
+                with self._lock:
+                    if owner not in self._entries:
+                        self._fetch_locks.pop(owner, None)
+                raise
+
+    def get_devices(self, token: str) -> List[Dict]:
+        """Return the device list visible to the token"""
+        return self._entry(token).devices
+
+    def peek_devices(self, token: str) -> Optional[List[Dict]]:
+        """Return the cached device list if one is servable, without a blocking fetch"""
+        with self._lock:
+            entry = self._entries.get(cache_key_for_token(token))
+        if entry is None or time.time() - entry.fetched_at >= self.max_stale:
+            return None
+        return self._entry(token).devices
+
+    def get_device(self, token: str, device_id: str) -> Optional[Dict]:
+        """Look up one device by id without touching the network when cached"""
+        return self._entry(token).by_id.get(device_id)
+
+    def get_index(self, token: str):
+        """Return the index built for the token's device list at its last refresh"""
+        return self._entry(token).index
+
+    def invalidate(self, token: Optional[str] = None):
+        """Drop the cached directory for one token, or for everyone (including loads still running)"""
+        with self._lock:
+            self._generation += 1
+            if token is None:
+                self._entries.clear()
+                self._invalidated.clear()
+                self._invalidated_all = self._generation
+            else:
+                owner = cache_key_for_token(token)
+                self._entries.pop(owner, None)
+                self._invalidated[owner] = self._generation
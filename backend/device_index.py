@@ -0,0 +1,151 @@
+"""
+Inverted indexes over the device directory.
+
+Built once per directory refresh so that _map_device_name_to_id resolves
+names with dictionary lookups instead of normalizing and scanning every
+device on every call:
+  - canonical location (normalize_location_name of the device name) -> devices
+  - floor -> devices, with each device's room number
+  - exact lowercase name and id -> device
+  - character trigrams -> keys, for substring and fuzzy name matching
+  - a SymSpell index over the words of device names, for typo correction
+"""
+
+import re
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from spelling_index import SymSpellIndex, correct_alpha_runs
+
+_ROOM_RE = re.compile(r'room(\d+)')
+_FLOOR_ROOM_RE = re.compile(r'(?<!\d)(\d+)froom(\d+)')
+_NAME_WORD_RE = re.compile(r'[a-z]+')
+
+
+def _device_id(device: Dict) -> str:
+    device_id = device.get('id', '')
+    if isinstance(device_id, dict):
+        device_id = device_id.get('id', '')
+    return device_id or ''
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SubstringIndex:
+    """Ordered keys with a trigram index for 'query in key' / 'key in query' lookups"""
+
+    def __init__(self, keys: List[str]):
+        self.keys = keys
+        self.position = {key: pos for pos, key in enumerate(keys)}
+        self.grams: Dict[str, Set[int]] = {}
+        for pos, key in enumerate(keys):
+            for gram in _trigrams(key):
+                self.grams.setdefault(gram, set()).add(pos)
+
+    def _positions_containing(self, query: str) -> List[int]:
+        """Positions of keys that contain query, in key order"""
+        if len(query) < 3:
+            return [pos for pos, key in enumerate(self.keys) if query in key]
+        candidates = None
+        for gram in _trigrams(query):
+            postings = self.grams.get(gram)
+            if not postings:
+                return []
+            candidates = set(postings) if candidates is None else candidates & postings
+            if not candidates:
+                return []
+        return sorted(pos for pos in candidates if query in self.keys[pos])
+
+    def containing(self, query: str) -> List[str]:
+        """All keys that contain query, in key order"""
+        return [self.keys[pos] for pos in self._positions_containing(query)]
+
+    def first_overlap(self, query: str) -> Optional[str]:
+        """First key (in key order) where query is in key or key is in query"""
+        best = None
+        containing = self._positions_containing(query)
+        if containing:
+            best = containing[0]
+        # Keys contained in the query must be one of its substrings
+        length = len(query)
+        for start in range(length + 1):
+            for end in range(start, length + 1):
+                pos = self.position.get(query[start:end])
+                if pos is not None and (best is None or pos < best):
+                    best = pos
+        return self.keys[best] if best is not None else None
+
+    def ranked_by_overlap(self, query: str, limit: int) -> List[str]:
+        """Keys sharing the most trigrams with query (shortlist for fuzzy matching)"""
+        counts: Dict[int, int] = {}
+        for gram in _trigrams(query):
+            for pos in self.grams.get(gram, ()):
+                counts[pos] = counts.get(pos, 0) + 1
+        ranked = sorted(counts, key=lambda pos: (-counts[pos], pos))[:limit]
+        return [self.keys[pos] for pos in ranked]
+
+
+class DeviceIndex:
+    """Lookup structures for one tenant's device list"""
+
+    def __init__(self, devices: List[Dict], normalize: Callable[[str], str]):
+        self.devices = devices
+        self.names = [d.get('name', '') for d in devices]
+
+        # canonical location -> [(device_id, name)] in device order
+        self.by_location: Dict[str, List[Tuple[str, str]]] = {}
+        self.by_floor: Dict[str, List[int]] = {}
+        self.room_of: Dict[int, Optional[str]] = {}
+        self.by_name: Dict[str, str] = {}
+        self.by_id: Dict[str, str] = {}
+        name_keys: List[str] = []
+
+        for pos, device in enumerate(devices):
+            device_id = _device_id(device)
+            name = device.get('name', '')
+            norm_name = normalize(name)
+            self.by_location.setdefault(norm_name, []).append((device_id, name))
+
+            room_match = _ROOM_RE.search(norm_name)
+            self.room_of[pos] = room_match.group(1) if room_match else None
+            floor_room = _FLOOR_ROOM_RE.search(norm_name)
+            if floor_room:
+                self.by_floor.setdefault(floor_room.group(1), []).append(pos)
+
+            lower_name = name.lower()
+            if lower_name not in self.by_name:
+                self.by_name[lower_name] = device_id
+                name_keys.append(lower_name)
+            if device_id:
+                self.by_id.setdefault(device_id.lower(), device_id)
+
+        # Best device per location: first by name, as the old sorted(...)[0] did. Room lookups
+        # take the first location (in key order) containing the room and use this too
+        self.best_for_location = {
+            norm: min(devs, key=lambda x: x[1])[0] for norm, devs in self.by_location.items()
+        }
+        self.locations = SubstringIndex(list(self.by_location.keys()))
+        self.lower_names = SubstringIndex(name_keys)
+        self.name_words = SymSpellIndex(word for key in name_keys for word in _NAME_WORD_RE.findall(key))
+
+    def correct_spelling(self, text: str) -> str:
+        """Lowercase text with misspelled name words corrected ('thermostta' -> 'thermostat')"""
+        return correct_alpha_runs(text.lower(), self.name_words)
+
+    def floor_devices(self, floor: str) -> List[Dict]:
+        """Devices on a floor ('2' -> 2F-Room..), in device order"""
+        return [self.devices[pos] for pos in self.by_floor.get(floor, [])]
+
+    def closest_room_on_floor(self, floor: str, room: str) -> Optional[Dict]:
+        """Device on the floor whose room number is nearest to room"""
+        closest = None
+        min_diff = 1000
+        for pos in self.by_floor.get(floor, []):
+            device_room = self.room_of.get(pos)
+            if device_room:
+                diff = abs(int(device_room) - int(room))
+                if diff < min_diff:
+                    min_diff = diff
+                    closest = self.devices[pos]
+        return closest
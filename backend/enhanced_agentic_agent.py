@@ -6,23 +6,42 @@ Integrates conversational memory, multi-device operations, proactive insights, a
 
 import os
 import json
+import asyncio
+import contextvars
 import datetime
-import requests
+import inferrix_client
+from device_directory import DeviceDirectory
+from device_index import DeviceIndex
+from telemetry_catalog import TelemetryKeyCatalog
+from response_cache import ResponseCache
+from request_context import RequestContext, bind_context, current_context
+from prefetch import Prefetcher, join_prefetch
+from llm_cache import LLM_CACHE_TTL
+from llm_gateway import LLMUnavailable, get_llm_gateway
+from prompt_compaction import fit_to_budget, to_prompt_json
+from query_router import QueryRouter, QueryRule, RoutedQuery
+from hindi_normalizer import map_hindi_to_english, normalize_hindi_location
+from entity_extractor import extract_entities
+from spelling_index import SymSpellIndex, typo_budget
 import time
 import re
 import difflib
+import functools
 import logging
-from concurrent.futures import ThreadPoolExecutor
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from typing import Dict, List, Any, Optional, Tuple
-from openai import OpenAI
-from langchain_openai import ChatOpenAI
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import HumanMessage, AIMessage, FunctionMessage, SystemMessage
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Offline-trained intent classifier (needs numpy); routing works without it
+try:
+    from intent_classifier import GENERAL_INTENT, INTENT_CLASSIFIER_THRESHOLD, load_intent_classifier
+except ImportError:
+    load_intent_classifier = None
+
 # Import AI Magic Core
 try:
     from ai_magic_core import (
@@ -42,98 +61,111 @@ except ImportError:
 
 INFERRIX_BASE_URL = "https://cloud.inferrix.com/api"
 
-# AI Provider Configuration
-AI_PROVIDER = os.getenv("AI_PROVIDER", "openai").lower()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-
-# Initialize AI clients
-client = None
-llm = None
-
-if AI_PROVIDER == "gemini" and GEMINI_API_KEY and GEMINI_API_KEY != "test-key-for-testing":
-    client = None
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-1.5-pro",
-        temperature=0,
-        convert_system_message_to_human=True
-    )
-    os.environ["GOOGLE_API_KEY"] = GEMINI_API_KEY
-    print("🤖 Using Google Gemini Pro as AI provider")
-elif OPENAI_API_KEY and OPENAI_API_KEY != "test-key-for-testing":
-    client = OpenAI(api_key=OPENAI_API_KEY)
-    llm = ChatOpenAI(model="gpt-4o", temperature=0)
-    print("🤖 Using OpenAI GPT-4o as AI provider")
-else:
-    print("⚠️ No valid AI provider configured - LLM features will be limited")
-    client = None
-    llm = None
+# Fleet scan fan-out limits (see EnhancedAgenticInferrixAgent._fan_out)
+FANOUT_MAX_CONCURRENCY = int(os.getenv("FANOUT_MAX_CONCURRENCY", "8"))
+FANOUT_CALL_DEADLINE = float(os.getenv("FANOUT_CALL_DEADLINE", "15"))
+# How long a call may wait for a free worker of the shared executor before it is cancelled
+FANOUT_QUEUE_TIMEOUT = float(os.getenv("FANOUT_QUEUE_TIMEOUT", "30"))
+
+# Shared worker pools; chats are isolated by RequestContext so these can be raised.
+# The intent cascade is synchronous: each running chat holds one chat worker thread
+# for its whole duration, so AGENT_MAX_CONCURRENT_CHATS is the number of chats one
+# process answers at once (further chats queue). Raise it, or run more workers,
+# for more concurrent chats.
+AGENT_EXECUTOR_WORKERS = int(os.getenv("AGENT_EXECUTOR_WORKERS", "32"))
+AGENT_MAX_CONCURRENT_CHATS = int(os.getenv("AGENT_MAX_CONCURRENT_CHATS", "32"))
+
+# Token budget for the recent-conversation block of general-query prompts
+PROMPT_CONTEXT_TOKENS = int(os.getenv("PROMPT_CONTEXT_TOKENS", "300"))
+
+# All LLM calls go through one gateway (provider selection, concurrency cap, deadlines, 429 retries)
+LLM_GATEWAY = get_llm_gateway()
 
 # Initialize the enhanced agentic agent
 enhanced_agentic_agent = None
+_agent_lock = threading.Lock()
 
 def get_enhanced_agentic_agent():
     global enhanced_agentic_agent
     if enhanced_agentic_agent is None:
-        enhanced_agentic_agent = EnhancedAgenticInferrixAgent()
+        with _agent_lock:
+            if enhanced_agentic_agent is None:
+                enhanced_agentic_agent = EnhancedAgenticInferrixAgent()
     return enhanced_agentic_agent
 
 
+# Precompiled tables for normalize_location_name (hot path of device resolution)
+FLOOR_NAME_MAP = {
+    'ground floor': '0f', 'gf': '0f', 'basement': 'b', 'b': 'b',
+    'first floor': '1f', '1st floor': '1f', '1f': '1f',
+    'second floor': '2f', '2nd floor': '2f', '2f': '2f',
+    'third floor': '3f', '3rd floor': '3f', '3f': '3f',
+    'fourth floor': '4f', '4th floor': '4f', '4f': '4f',
+    'fifth floor': '5f', '5th floor': '5f', '5f': '5f',
+    'sixth floor': '6f', '6th floor': '6f', '6f': '6f',
+    'seventh floor': '7f', '7th floor': '7f', '7f': '7f',
+    'eighth floor': '8f', '8th floor': '8f', '8f': '8f',
+    'ninth floor': '9f', '9th floor': '9f', '9f': '9f',
+    'tenth floor': '10f', '10th floor': '10f', '10f': '10f',
+}
+# One alternation pass, longest phrases first so 'second floor' wins over shorter keys
+_FLOOR_NAME_RE = re.compile(r'\b(?:' + '|'.join(re.escape(k) for k in sorted(FLOOR_NAME_MAP, key=len, reverse=True)) + r')\b')
+_ROOM_NUMBER_WORD_RE = re.compile(r'room\s*(?:no\.?|number)')
+_LETTER_DIGIT_RE = re.compile(r'([a-z])([0-9])')
+_DIGIT_LETTER_RE = re.compile(r'([0-9])([a-z])')
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9 ]')
+_SPACES_RE = re.compile(r'\s+')
+_FLOOR_RE = re.compile(r'(\d+)f')
+_ROOM_RE = re.compile(r'room\s*(\d+)')
+_ROOM_ON_FLOOR_RE = re.compile(r'room\s*(\d+)\s*(?:on|at|in)?\s*(\d+)f')
+_SPACED_FLOOR_RE = re.compile(r'(\d+)\s*f')
+_LOT_RE = re.compile(r'lot\s*(\d+)')
+_PLANT_RE = re.compile(r'plant\s*(\d+)')
+NORMALIZE_CACHE_SIZE = int(os.getenv("NORMALIZE_CACHE_SIZE", "8192"))
+
+
 def normalize_location_name(text):
     """Unify normalization: all floor/room/ordinal/number variations to canonical form (e.g., '2froom50').
     Handles natural language variants like 'Second Floor Room 50', 'Room 50 on Second Floor', 'room 50 second floor', etc."""
-    import re
     if not text:
         return ''
-    text = text.lower().strip()
-    devanagari_numerals = {'०': '0', '१': '1', '२': '2', '३': '3', '४': '4', '५': '5', '६': '6', '७': '7', '८': '8', '९': '9'}
-    for dev, arab in devanagari_numerals.items():
-        text = text.replace(dev, arab)
+    return _normalize_location_cached(text)
+
+
+@functools.lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _normalize_location_cached(text):
+    # Devanagari digits and Hindi floor/room words ('दूसरी मंजिल कमरा ५०') map to English first
+    text = normalize_hindi_location(text.lower().strip())
     # Normalize floor
-    floor_map = {
-        'ground floor': '0f', 'gf': '0f', 'basement': 'b', 'b': 'b',
-        'first floor': '1f', '1st floor': '1f', '1f': '1f',
-        'second floor': '2f', '2nd floor': '2f', '2f': '2f',
-        'third floor': '3f', '3rd floor': '3f', '3f': '3f',
-        'fourth floor': '4f', '4th floor': '4f', '4f': '4f',
-        'fifth floor': '5f', '5th floor': '5f', '5f': '5f',
-        'sixth floor': '6f', '6th floor': '6f', '6f': '6f',
-        'seventh floor': '7f', '7th floor': '7f', '7f': '7f',
-        'eighth floor': '8f', '8th floor': '8f', '8f': '8f',
-        'ninth floor': '9f', '9th floor': '9f', '9f': '9f',
-        'tenth floor': '10f', '10th floor': '10f', '10f': '10f',
-    }
-    for k, v in floor_map.items():
-        text = re.sub(r'\b' + re.escape(k) + r'\b', v, text)
+    text = _FLOOR_NAME_RE.sub(lambda m: FLOOR_NAME_MAP[m.group(0)], text)
     # Normalize 'room no.' and 'room number' to 'room'
-    text = re.sub(r'room\s*no\.?', 'room', text)
-    text = re.sub(r'room\s*number', 'room', text)
+    text = _ROOM_NUMBER_WORD_RE.sub('room', text)
     # Insert spaces between letters and numbers
-    text = re.sub(r'([a-z])([0-9])', r'\1 \2', text)
-    text = re.sub(r'([0-9])([a-z])', r'\1 \2', text)
+    text = _LETTER_DIGIT_RE.sub(r'\1 \2', text)
+    text = _DIGIT_LETTER_RE.sub(r'\1 \2', text)
     # Remove all non-alphanumeric (except spaces)
-    text = re.sub(r'[^a-z0-9 ]', '', text)
+    text = _NON_ALNUM_RE.sub('', text)
     # Collapse multiple spaces
-    text = re.sub(r'\s+', ' ', text)
+    text = _SPACES_RE.sub(' ', text)
     # --- NEW: Extract both floor and room in any order ---
     # Find floor (e.g., 2f) and room (e.g., room 50) anywhere in the string
-    floor = re.search(r'(\d+)f', text)
-    room = re.search(r'room\s*(\d+)', text)
+    floor = _FLOOR_RE.search(text)
+    room = _ROOM_RE.search(text)
     if floor and room:
         canonical = f"{floor.group(1)}froom{room.group(1)}"
         return canonical
     # Enhanced: handle 'room 50 on 2f', 'room 50 at 2f', etc.
-    match = re.search(r'room\s*(\d+)\s*(?:on|at|in)?\s*(\d+)f', text)
+    match = _ROOM_ON_FLOOR_RE.search(text)
     if match:
         floor = match.group(2)
         room = match.group(1)
         canonical = f"{floor}froom{room}"
         return canonical
     # Reorder to canonical: floor, room, lot, plant, etc.
-    floor = re.search(r'(\d+)\s*f', text)
-    room = re.search(r'room\s*(\d+)', text)
-    lot = re.search(r'lot\s*(\d+)', text)
-    plant = re.search(r'plant\s*(\d+)', text)
+    floor = _SPACED_FLOOR_RE.search(text)
+    room = _ROOM_RE.search(text)
+    lot = _LOT_RE.search(text)
+    plant = _PLANT_RE.search(text)
     canonical = ''
     if floor:
         canonical += f"{floor.group(1)}f"
@@ -337,108 +369,164 @@ ENHANCED_COMMON_WORDS = {
         'चालू', 'बंद', 'ऊपर', 'नीचे', 'उच्च', 'कम', 'मध्यम'
     ]
 }
+# Spelling indexes over ENHANCED_COMMON_WORDS, built once at import
+COMMON_WORD_SPELLING = {language: SymSpellIndex(words) for language, words in ENHANCED_COMMON_WORDS.items()}
 
 class EnhancedIntelligentContextExtractor:
-    """Enhanced context extraction with AI magic features"""
+    """Enhanced context extraction with AI magic features (views over extract_entities)"""
     
     @staticmethod
     def extract_device_info(query: str) -> Optional[str]:
         """Extract device information from query"""
-        query_lower = query.lower()
-        
-        # Look for device ID patterns (UUID format or numeric)
-        import re
-        device_patterns = [
-            r'device\s+([a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12})',  # UUID format
-            r'device\s+(\d+)',
-            r'device\s+id\s+(\d+)',
-            r'(\d{6,})',  # 6+ digit numbers
-        ]
-        
-        for pattern in device_patterns:
-            match = re.search(pattern, query, re.IGNORECASE)
-            if match:
-                return match.group(1)
-        
-        return None
-        
-        # Look for device ID patterns (UUID format)
-        device_patterns = [
-            r'device\s+([a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12})',
-            r'device\s+(\d+)',
-            r'device\s+id\s+(\d+)',
-            r'(\d{6,})',
-        ]
-        
-        for pattern in device_patterns:
-            match = re.search(pattern, query, re.IGNORECASE)
-            if match:
-                return match.group(1)
-        
-        return None
+        return extract_entities(query).device
     
     @staticmethod
     def extract_location_info(query: str) -> Optional[str]:
         """Extract location information from query"""
-        locations = [
-            'east wing', 'west wing', 'north wing', 'south wing',
-            'main lobby', 'conference room b', 'main hall',
-            '3rd floor', 'tower a', 'office', 'restrooms',
-            '2nd floor', '1st floor', 'basement'
-        ]
-        query_lower = query.lower()
-        for location in locations:
-            if location in query_lower:
-                return location
-        # --- Legacy/demo code below (commented out, not used in production) ---
-        # for location in ENHANCED_LOCATION_MAPPING.keys():
-        #     if location in query_lower:
-        #         return location
-        # for location in ENHANCED_LOCATION_MAPPING.keys():
-        #     if any(word in query_lower for word in location.split()):
-        #         return location
-        # for location in ENHANCED_LOCATION_MAPPING.keys():
-        #     if english_location in location:
-        #         return location
-        return None
+        return extract_entities(query).location_phrase
     
     @staticmethod
     def extract_timeframe_info(query: str) -> Optional[str]:
         """Extract timeframe information from query"""
-        timeframes = {
-            'today': 'today',
-            'last 24 hours': 'last_24h',
-            'this week': 'this_week',
-            'this month': 'this_month',
-            'this quarter': 'this_quarter',
-            'weekend': 'weekend',
-            'next 3 hours': 'next_3h',
-            'next 7 days': 'next_7d',
-            'yesterday': 'yesterday',
-            'last week': 'last_week'
-        }
-        
-        query_lower = query.lower()
-        for key, value in timeframes.items():
-            if key in query_lower:
-                return value
-        return None
+        return extract_entities(query).timeframe
     
     @staticmethod
     def extract_severity_info(query: str) -> Optional[str]:
         """Extract alarm severity from query"""
-        severities = {
-            'critical': 'CRITICAL',
-            'major': 'MAJOR', 
-            'minor': 'MINOR',
-            'warning': 'WARNING'
-        }
-        
-        query_lower = query.lower()
-        for key, value in severities.items():
-            if key in query_lower:
-                return value
-        return None
+        return extract_entities(query).severity
+
+# --- process_query routing table (compiled once at import, evaluated in order) ---
+BATTERY_DIRECT_KEYWORDS = ('low battery', 'devices with low battery', 'show low battery', 'battery status', 'battery level', 'normal battery', 'devices with normal battery', 'show normal battery', 'proper battery', 'correct battery', 'optimum battery', 'optimal battery', 'good battery', 'healthy battery')
+ADJUST_TEMPERATURE_PATTERNS = (
+    r"(reduce|decrease|lower|increase|raise) (?:the )?(?:temperature|temp|room temperature) (?:of|in|at|for)? ?([\w\- ]+)? by (\d{1,2}(?:\.\d+)?) ?(?:degrees|degree|c|celsius)?",
+)
+# Temperature setpoint patterns (English and Hinglish), matched after Hindi word mapping
+TEMP_SETPOINT_PATTERNS = (
+    # English patterns
+    r"set (?:the )?(?:temperature|temp|room temperature) (?:in|at|for)? ?([\w\- ]+)? to (\d{1,2}(?:\.\d+)?) ?(?:degrees|degree|c|celsius)?",
+    r"(?:temperature|temp|room temperature) (?:in|at|for)? ?([\w\- ]+)? (?:to|set to) (\d{1,2}(?:\.\d+)?) ?(?:degrees|degree|c|celsius)?",
+    # Hinglish patterns
+    r"([\w\- ]+)? (?:ka|ki|ke) (?:temperature|temp) (\d{1,2}(?:\.\d+)?) ?(?:degree|degrees) (?:par|me) (?:set|kar|karo|kare)",
+    r"(?:temperature|temp) (\d{1,2}(?:\.\d+)?) ?(?:degree|degrees) (?:par|me) (?:set|kar|karo|kare) (?:[\w\- ]+)?",
+    r"([\w\- ]+)? (?:me|par) (?:temperature|temp) (\d{1,2}(?:\.\d+)?) ?(?:degree|degrees) (?:set|kar|karo|kare)",
+)
+HINDI_FAN_SPEED_PATTERNS = (
+    # Original patterns
+    r"(?:fan speed|speed|फैन स्पीड|स्पीड) (?:को|में|की)? ?([\w\- ]+)? (?:को|में|की)? (low|medium|high|lowest|minimum|highest|maximum|0|1|2|कम|मध्यम|तेज़|ज़्यादा|अधिकतम|न्यूनतम)",
+    r"(?:set|सेट|करो|करें) (?:fan speed|speed|फैन स्पीड|स्पीड) (?:को|में|की)? ?([\w\- ]+)? (?:को|में|की)? (low|medium|high|lowest|minimum|highest|maximum|0|1|2|कम|मध्यम|तेज़|ज़्यादा|अधिकतम|न्यूनतम)",
+    r"(?:fan speed|speed|फैन स्पीड|स्पीड) (low|medium|high|lowest|minimum|highest|maximum|0|1|2|कम|मध्यम|तेज़|ज़्यादा|अधिकतम|न्यूनतम) (?:करो|करें|सेट|set) ?([\w\- ]+)?",
+    # New patterns for user's query format
+    r"([\w\- ]+)? (?:mein|में|मे) (?:fan speed|speed|फैन स्पीड|स्पीड) (low|medium|high|lowest|minimum|highest|maximum|0|1|2|कम|मध्यम|तेज़|ज़्यादा|अधिकतम|न्यूनतम) (?:करो|करें|सेट|set)",
+    r"([\w\- ]+)? (?:mein|में|मे) (?:fan speed|speed|फैन स्पीड|स्पीड) (?:ko|को) (low|medium|high|lowest|minimum|highest|maximum|0|1|2|कम|मध्यम|तेज़|ज़्यादा|अधिकतम|न्यूनतम) (?:करो|करें|सेट|set)",
+    r"(?:fan speed|speed|फैन स्पीड|स्पीड) (low|medium|high|lowest|minimum|highest|maximum|0|1|2|कम|मध्यम|तेज़|ज़्यादा|अधिकतम|न्यूनतम) (?:करो|करें|सेट|set) (?:[\w\- ]+)?",
+    # Additional patterns for exact user format
+    r"([\w\- ]+)? (?:mein|में|मे) (?:fan speed|speed|फैन स्पीड|स्पीड) (low|medium|high|lowest|minimum|highest|maximum|0|1|2|कम|मध्यम|तेज़|ज़्यादा|अधिकतम|न्यूनतम) (?:karo|kare|kar do|kar de)",
+    r"([\w\- ]+)? (?:mein|में|मे) (?:fan speed|speed|फैन स्पीड|स्पीड) (?:ko|को) (low|medium|high|lowest|minimum|highest|maximum|0|1|2|कम|मध्यम|तेज़|ज़्यादा|अधिकतम|न्यूनतम) (?:karo|kare|kar do|kar de)",
+)
+# Enhanced fan speed patterns including "increase" commands
+FAN_SPEED_PATTERNS = (
+    r"set (?:the )?(?:fan speed|speed) (?:in|at|for)? ?([\w\- ]+)? to (low|medium|high|lowest|minimum|highest|maximum|\d{1,2}(?:\.\d+)?)",
+    r"set (?:the )?(?:fan speed|speed) to (low|medium|high|lowest|minimum|highest|maximum|\d{1,2}(?:\.\d+)?) in ([\w\- ]+)",
+    r"set (?:the )?fan to (low|medium|high|lowest|minimum|highest|maximum|\d{1,2}(?:\.\d+)?) speed (?:for|in|at) ([\w\- ]+)",
+    r"set (?:the )?fan to (low|medium|high|lowest|minimum|highest|maximum|\d{1,2}(?:\.\d+)?) speed",
+    r"increase (?:the )?(?:fan speed|speed) (?:in|at|for)? ?([\w\- ]+)? to (low|medium|high|lowest|minimum|highest|maximum|\d{1,2}(?:\.\d+)?)",
+    r"change (?:the )?(?:fan speed|speed) (?:in|at|for)? ?([\w\- ]+)? to (low|medium|high|lowest|minimum|highest|maximum|\d{1,2}(?:\.\d+)?)",
+    r"adjust (?:the )?(?:fan speed|speed) (?:in|at|for)? ?([\w\- ]+)? to (low|medium|high|lowest|minimum|highest|maximum|\d{1,2}(?:\.\d+)?)",
+    r"(?:fan speed|speed) (?:in|at|for)? ?([\w\- ]+)? (?:to|set to|increase to) (low|medium|high|lowest|minimum|highest|maximum|\d{1,2}(?:\.\d+)?)",
+    r"fan (?:speed|) (?:to|set to) (low|medium|high|lowest|minimum|highest|maximum|\d{1,2}(?:\.\d+)?) (?:for|in|at) ([\w\- ]+)",
+    r"fan (?:speed|) (?:to|set to) (low|medium|high|lowest|minimum|highest|maximum|\d{1,2}(?:\.\d+)?)",
+)
+# Only tried when the query contains Hindi/Hinglish keywords
+HINGLISH_QUERY_KEYWORDS = ('tapmaan', 'taapman', 'tapman', 'तापमान', 'ka', 'ki', 'ke', 'kya', 'hai', 'ha')
+HINGLISH_TEMP_PATTERNS = (
+    # Original patterns
+    r"(?:तापमान|temperature) (?:क्या है|कैसा है|दिखाओ|show|check) ?([\w\- ]+)?",
+    r"([\w\- ]+)? में (?:तापमान|temperature) (?:क्या है|कैसा है|दिखाओ|show|check)",
+    # Pattern for "Room 50 2nd floor ka tapmaan kya ha" type queries
+    r"(.*?(?:room|floor|f)\s*\d+.*?) (?:ka|ki|ke) (?:tapmaan|taapman|tapman|temperature)",
+    r"(.*?(?:floor|f)\s*\d+.*?) (?:ka|ki|ke) (?:tapmaan|taapman|tapman|temperature)",
+    r"(.*?room\s*\d+.*?) (?:ka|ki|ke) (?:tapmaan|taapman|tapman|temperature)",
+    # Pattern for "room number 50 2nd floor ka tapman kya hai" type queries
+    r"(.*?(?:room\s*number|room|floor|f)\s*\d+.*?) (?:ka|ki|ke) (?:tapmaan|taapman|tapman|temperature)",
+    # Pattern for "tapmaan 2nd floor room 50" type queries
+    r"(?:tapmaan|taapman|tapman|तापमान|temperature) ([\w\- ]+ (?:floor|f) [\w\- ]+)",
+    r"(?:tapmaan|taapman|tapman|तापमान|temperature) ([\w\- ]+ (?:room|kamra) [\w\- ]+)",
+    # More specific patterns to avoid capturing question words
+    r"([\w\- ]+(?:room|floor|f)\s*\d+[\w\- ]*) (?:ka|ki|ke) (?:tapmaan|taapman|tapman|temperature)",
+    r"([\w\- ]+\d+[\w\- ]*(?:room|floor|f)[\w\- ]*) (?:ka|ki|ke) (?:tapmaan|taapman|tapman|temperature)",
+    # Fallback patterns for broken/partial Hinglish (but exclude question words)
+    r"(?:tapmaan|taapman|tapman|तापमान|temperature) (?!kya|kaisa|kaise|क्या|कैसा|कैसे)([\w\- ]+)?",
+    r"([\w\- ]+)? (?:tapmaan|taapman|tapman|तापमान|temperature)",
+)
+# Prioritize telemetry fetch for telemetry keywords, but not for fan speed control commands
+TELEMETRY_KEYWORDS = ('humidity', 'temperature', 'battery', 'pressure', 'setpoint', 'speed')
+HINGLISH_TEMP_KEYWORDS = ('tapmaan', 'taapman', 'tapman', 'तापमान')
+HINGLISH_QUESTION_WORDS = ('kya', 'kaisa', 'kaise', 'क्या', 'कैसा', 'कैसे')
+HINGLISH_AUXILIARY_WORDS = ('ha', 'hai', 'h', 'है', 'हैं')
+HEALTH_KEYWORDS = (
+    'system health', 'system status', 'all systems fine', 'all systems ok', 'is everything working', 'is health of all systems fine', 'are all systems ok', 'system communication status', 'overall health', 'building health', 'is health of all systems good', 'is health of all systems ok', 'is health of all systems', 'is system healthy', 'is everything ok', 'is everything fine', 'is everything normal', 'is system ok', 'is system fine', 'is system normal'
+)
+# Predictive maintenance patterns; the days value is always the last group
+PREDICTIVE_PATTERNS = (
+    r'predict(?: (.+?))?(?: (?:issues|failures|problems|risks))?(?: for)?(?: next)? (\d{1,2}|tomorrow|today) ?days?',  # (system_type, days)
+    r'(?:are|is|will) (?:any|all|the) (?:devices|equipment|systems) (?:likely to|going to|about to) (?:fail|break|stop|malfunction) (?:in|within|over) (?:the )?(?:next )?(\d{1,2}|tomorrow|today) ?days?',  # (days)
+    r'(?:what|which) (?:devices|equipment|systems) (?:are|will) (?:likely to|going to|about to) (?:fail|break|stop|malfunction) (?:in|within|over) (?:the )?(?:next )?(\d{1,2}|tomorrow|today) ?days?',  # (days)
+    r'(?:failure|maintenance) (?:prediction|forecast|analysis) (?:for|in|within|over) (?:the )?(?:next )?(\d{1,2}|tomorrow|today) ?days?',  # (days)
+)
+PREDICTIVE_KEYWORDS = (
+    'predict', 'prediction', 'forecast', 'failure', 'failures', 'likely to fail',
+    'going to fail', 'about to fail', 'next 7 days', 'next 30 days', 'next few days',
+    'analytics', 'maintenance', 'risk', 'proactive', 'preventive', 'equipment failure',
+    'device failure', 'system failure', 'breakdown', 'malfunction'
+)
+# Troubleshooting (how to fix/diagnose alarms) must be routed before general alarm detection
+TROUBLESHOOTING_KEYWORDS = ('how to fix', 'how to diagnose', 'fix', 'diagnose', 'troubleshoot', 'troubleshooting')
+TROUBLESHOOTING_ALARM_KEYWORDS = ('alarm', 'alarms', 'co2', 'filter', 'choke', 'pressure', 'temperature', 'humidity', 'battery', 'communication', 'sensor')
+ALARM_KEYWORDS = (
+    'alarm', 'alarms', 'system issue', 'system issues', 'co2', 'highest severity', 'highest priority', 'highest risk', 'critical', 'major', 'minor', 'warning', 'indeterminate', 'fault', 'error', 'issue', 'sensor', 'show me any system issues', 'show me the critical alarms', 'show me alarms with high co2 levels', "what's the highest severity alarm right now?", 'show me minor alarms', 'show all alarms', 'show me system issues',
+    # battery keywords
+    'battery', 'battery status', 'battery level', 'battery condition', 'battery health'
+)
+FAN_SPEED_TELEMETRY_KEYWORDS = ('fan speed', 'speed of', 'current speed', 'what is the speed')
+# Energy consumption must be routed before the device list handler
+ENERGY_KEYWORDS = ('energy consumption', 'power consumption', 'electricity usage', 'energy usage',
+                   'power usage', 'energy data', 'power data', 'kwh', 'voltage', 'current',
+                   'energy efficiency')
+DEVICE_LIST_KEYWORDS = ('all devices', 'list devices', 'show devices', 'active devices', 'device inventory', 'available devices', 'device list')
+COMMUNICATION_KEYWORDS = ('communication', 'system communication', 'connection', 'connectivity')
+AIR_QUALITY_KEYWORDS = ('co2', 'air quality', 'pm2.5', 'pm10', 'aqi')
+HINDI_TEMP_KEYWORDS = ('taapman', 'tapmaan', 'taapmaan', 'tapman', 'तापमान')
+
+# Response cache TTLs (seconds) for read-only intents; control rules have none and are never cached
+LIVE_READING_TTL = float(os.getenv("RESPONSE_TTL_LIVE_READING", "15"))
+ALARM_RESPONSE_TTL = float(os.getenv("RESPONSE_TTL_ALARMS", "30"))
+FLEET_SCAN_TTL = float(os.getenv("RESPONSE_TTL_FLEET_SCAN", "60"))
+INVENTORY_TTL = float(os.getenv("RESPONSE_TTL_INVENTORY", "120"))
+ANALYTICS_TTL = float(os.getenv("RESPONSE_TTL_ANALYTICS", "300"))
+STATIC_GUIDANCE_TTL = float(os.getenv("RESPONSE_TTL_GUIDANCE", "3600"))
+
+PROCESS_QUERY_ROUTER = QueryRouter([
+    QueryRule('battery_status', '_route_battery_status', keywords=[BATTERY_DIRECT_KEYWORDS], cache_ttl=FLEET_SCAN_TTL),
+    QueryRule('adjust_temperature', '_route_adjust_temperature', patterns=ADJUST_TEMPERATURE_PATTERNS),
+    QueryRule('set_temperature', '_route_set_temperature', patterns=TEMP_SETPOINT_PATTERNS, on='mapped'),
+    QueryRule('hindi_fan_speed', '_route_hindi_fan_speed', patterns=HINDI_FAN_SPEED_PATTERNS),
+    QueryRule('set_fan_speed', '_route_set_fan_speed', patterns=FAN_SPEED_PATTERNS),
+    QueryRule('hinglish_temperature', '_route_hinglish_temperature', keywords=[HINGLISH_QUERY_KEYWORDS], patterns=HINGLISH_TEMP_PATTERNS, cache_ttl=LIVE_READING_TTL),
+    QueryRule('telemetry', '_route_telemetry', keywords=[TELEMETRY_KEYWORDS + HINGLISH_TEMP_KEYWORDS],
+              when=lambda q: not q.is_fan_speed_control, cache_ttl=LIVE_READING_TTL),
+    QueryRule('system_health', '_route_system_communication', keywords=[HEALTH_KEYWORDS], cache_ttl=FLEET_SCAN_TTL),
+    QueryRule('predictive_pattern', '_route_predictive_pattern', patterns=PREDICTIVE_PATTERNS, cache_ttl=ANALYTICS_TTL),
+    QueryRule('predictive_keyword', '_route_predictive_keyword', keywords=[PREDICTIVE_KEYWORDS], cache_ttl=ANALYTICS_TTL),
+    QueryRule('troubleshooting', '_route_troubleshooting', keywords=[TROUBLESHOOTING_KEYWORDS, TROUBLESHOOTING_ALARM_KEYWORDS], cache_ttl=STATIC_GUIDANCE_TTL),
+    QueryRule('alarms', '_route_alarms', keywords=[ALARM_KEYWORDS], cache_ttl=ALARM_RESPONSE_TTL),
+    QueryRule('fan_speed_telemetry', '_route_fan_speed_telemetry', keywords=[FAN_SPEED_TELEMETRY_KEYWORDS],
+              when=lambda q: not q.is_fan_speed_control, cache_ttl=LIVE_READING_TTL),
+    QueryRule('energy_consumption', '_route_energy_consumption', keywords=[ENERGY_KEYWORDS], cache_ttl=FLEET_SCAN_TTL),
+    QueryRule('device_list', '_route_device_list', keywords=[DEVICE_LIST_KEYWORDS], cache_ttl=INVENTORY_TTL),
+    QueryRule('communication_status', '_route_system_communication', keywords=[COMMUNICATION_KEYWORDS], cache_ttl=FLEET_SCAN_TTL),
+    QueryRule('air_quality', '_route_air_quality', keywords=[AIR_QUALITY_KEYWORDS], cache_ttl=ALARM_RESPONSE_TTL),
+    QueryRule('hindi_temperature', '_route_hindi_temperature', keywords=[HINDI_TEMP_KEYWORDS], cache_ttl=LIVE_READING_TTL),
+], keyword_groups=[HINGLISH_TEMP_KEYWORDS])
 
 class EnhancedAgenticInferrixAgent:
     # PATCH: Room alias mapping
@@ -447,17 +535,10 @@ class EnhancedAgenticInferrixAgent:
         # Add more aliases as needed
     }
     def __init__(self):
-        # Initialize API token
-        self._api_token = None
+        # Token used outside a request (scripts/tests); chats carry theirs in RequestContext
+        self._default_api_token = None
         
-        # Initialize LLM only if API key is available
-        try:
-            if OPENAI_API_KEY and OPENAI_API_KEY != "test-key-for-testing":
-                self.llm = ChatOpenAI(model="gpt-4o", temperature=0)
-            else:
-                self.llm = None
-        except Exception:
-            self.llm = None
+        self.llm = LLM_GATEWAY
             
         self.conversation_history = []
         self.context_extractor = EnhancedIntelligentContextExtractor()
@@ -466,12 +547,52 @@ class EnhancedAgenticInferrixAgent:
         self.predictive_engine = self._init_predictive_engine()
         self.alarm_manager = self._init_alarm_manager()
         self.performance_cache = self._init_performance_cache()
-        self.executor = ThreadPoolExecutor(max_workers=10)
+        self.executor = ThreadPoolExecutor(max_workers=AGENT_EXECUTOR_WORKERS)
+        self._chat_executor = ThreadPoolExecutor(max_workers=AGENT_MAX_CONCURRENT_CHATS, thread_name_prefix="agent-chat")
+        self._fanout_local = threading.local()
+        self.device_directory = DeviceDirectory(
+            self._fetch_device_directory,
+            build_index=lambda devices: DeviceIndex(devices, normalize_location_name)
+        )
+        self.telemetry_key_catalog = TelemetryKeyCatalog()
+        self.response_cache = ResponseCache()
+        self.prefetcher = Prefetcher()
+        self.intent_classifier = load_intent_classifier() if load_intent_classifier else None
         
         # Configure logging
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
     
+    @property
+    def _api_token(self) -> Optional[str]:
+        """Inferrix token of the query being processed (falls back to set_api_token)"""
+        context = current_context()
+        if context is not None and context.token:
+            return context.token
+        return self._default_api_token
+
+    @property
+    def last_available_locations(self) -> List[str]:
+        context = current_context()
+        return context.last_available_locations if context is not None else []
+
+    @last_available_locations.setter
+    def last_available_locations(self, value: List[str]):
+        context = current_context()
+        if context is not None:
+            context.last_available_locations = value
+
+    @property
+    def last_available_devices(self) -> List[str]:
+        context = current_context()
+        return context.last_available_devices if context is not None else []
+
+    @last_available_devices.setter
+    def last_available_devices(self, value: List[str]):
+        context = current_context()
+        if context is not None:
+            context.last_available_devices = value
+
     def _init_predictive_engine(self):
         """Initialize predictive maintenance engine"""
         try:
@@ -520,6 +641,72 @@ class EnhancedAgenticInferrixAgent:
             'cache_timestamps': {}
         }
     
+    def _fan_out(self, func, items, max_concurrency: int = None, deadline: float = None, default=None) -> list:
+        """Run func(item) for every item on the shared executor and return results in input order.
+
+        At most max_concurrency calls are in flight at once; a call that raises or does not
+        finish within `deadline` seconds of starting yields `default` instead of failing the scan.
+        Time spent queued behind other chats' work on the shared executor does not count against
+        the deadline; a call still queued after FANOUT_QUEUE_TIMEOUT is cancelled and never runs.
+        Items may be any iterable (including a lazy generator); they are submitted as they are read.
+        """
+        max_concurrency = max(1, min(max_concurrency or FANOUT_MAX_CONCURRENCY, self.executor._max_workers))
+        deadline = deadline or FANOUT_CALL_DEADLINE
+        
+        # Nested fan-out from inside a worker would starve the pool - run serially instead
+        if getattr(self._fanout_local, 'in_worker', False):
+            results = []
+            for item in items:
+                try:
+                    results.append(func(item))
+                except Exception as e:
+                    print(f"[DEBUG] _fan_out - call failed: {e}")
+                    results.append(default)
+            return results
+        
+        gate = threading.BoundedSemaphore(max_concurrency)
+        local = self._fanout_local
+        
+        def run(slot, item):
+            slot['started_at'] = time.monotonic()
+            slot['started'].set()
+            local.in_worker = True
+            try:
+                return func(item)
+            finally:
+                local.in_worker = False
+                gate.release()
+        
+        submitted = []
+        try:
+            for item in items:
+                gate.acquire()
+                slot = {'started': threading.Event(), 'started_at': None}
+                # Each worker runs in a copy of the caller's context so it sees the same RequestContext
+                submitted.append((slot, time.monotonic(), self.executor.submit(contextvars.copy_context().run, run, slot, item)))
+        except BaseException:
+            # The item source failed (e.g. a device page): the scan is abandoned, so drop queued calls
+            for _, _, future in submitted:
+                future.cancel()
+            raise
+        
+        results = []
+        for slot, queued_at, future in submitted:
+            try:
+                if not slot['started'].wait(max(0.0, queued_at + FANOUT_QUEUE_TIMEOUT - time.monotonic())) and future.cancel():
+                    print(f"[DEBUG] _fan_out - call still queued after {FANOUT_QUEUE_TIMEOUT}s, cancelled")
+                    results.append(default)
+                    continue
+                slot['started'].wait()
+                results.append(future.result(timeout=max(0.0, slot['started_at'] + deadline - time.monotonic())))
+            except FutureTimeoutError:
+                print(f"[DEBUG] _fan_out - call exceeded {deadline}s deadline")
+                results.append(default)
+            except Exception as e:
+                print(f"[DEBUG] _fan_out - call failed: {e}")
+                results.append(default)
+        return results
+    
     def get_available_functions(self) -> List[Dict]:
         """Define all available API functions with enhanced capabilities"""
         return [
@@ -986,808 +1173,610 @@ class EnhancedAgenticInferrixAgent:
         ]
     
     def set_api_token(self, token: str):
-        """Set the API token for this agent instance"""
-        self._api_token = token
+        """Set the token for the current query, or the default token outside a query"""
+        context = current_context()
+        if context is not None:
+            context.token = token
+        else:
+            self._default_api_token = token
     
-    def process_query(self, user_query: str, user: str = "User", device: str = "", token: str = None) -> str:
-        # Set the token if provided
+    async def process_query_async(self, user_query: str, user: str = "User", device: str = "", token: str = None) -> str:
+        """Async entry point for the chat endpoints.
+
+        The intent cascade and its Inferrix/LLM calls are synchronous and run on a
+        chat worker thread, so the event loop keeps serving other requests. This is
+        thread-bound, not async I/O: at most AGENT_MAX_CONCURRENT_CHATS chats run at
+        once and the rest wait for a free worker.
+        """
+        loop = asyncio.get_running_loop()
+        run = functools.partial(contextvars.copy_context().run, self.process_query, user_query, user, device, token)
+        return await loop.run_in_executor(self._chat_executor, run)
+
+    async def process_query_stream(self, user_query: str, user: str = "User", device: str = "", token: str = None):
+        """Async generator for streaming chat: ('delta', text) while the answer is produced, then ('done', response).
+
+        The query runs on a chat worker like process_query_async; text the handlers stream
+        (LLM tokens) is handed to the event loop as it arrives.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        def emit(text: str):
+            if text:
+                loop.call_soon_threadsafe(queue.put_nowait, text)
+
+        run = functools.partial(contextvars.copy_context().run, self.process_query, user_query, user, device, token, emit)
+        result = loop.run_in_executor(self._chat_executor, run)
+        result.add_done_callback(lambda _: queue.put_nowait(None))
+        while True:
+            text = await queue.get()
+            if text is None:
+                break
+            yield 'delta', text
+        yield 'done', await result
+
+    def process_query(self, user_query: str, user: str = "User", device: str = "", token: str = None,
+                      stream=None) -> str:
+        """Process one chat query in its own RequestContext (stream, if given, receives text as it is produced)"""
         if token:
-            print(f"[DEBUG] Enhanced agent - Setting API token: {token[:20]}...")
-            self.set_api_token(token)
-            print(f"[DEBUG] Enhanced agent - Token set successfully: {hasattr(self, '_api_token') and self._api_token is not None}")
-            print(f"[DEBUG] Enhanced agent - Token value: {self._api_token[:20] if self._api_token else 'None'}...")
+            print(f"[DEBUG] Enhanced agent - Using request token: {token[:20]}...")
         else:
             print("[DEBUG] Enhanced agent - No token provided to process_query")
-            print(f"[DEBUG] Enhanced agent - Current agent token: {hasattr(self, '_api_token') and self._api_token is not None}")
-            if hasattr(self, '_api_token') and self._api_token:
-                print(f"[DEBUG] Enhanced agent - Current token value: {self._api_token[:20]}...")
-        # PATCH: Battery status direct handling (handle 'low battery' and similar queries FIRST)
-        battery_keywords_direct = ['low battery', 'devices with low battery', 'show low battery', 'battery status', 'battery level', 'normal battery', 'devices with normal battery', 'show normal battery', 'proper battery', 'correct battery', 'optimum battery', 'optimal battery', 'good battery', 'healthy battery']
-        if any(word in user_query.lower() for word in battery_keywords_direct):
-            return self._get_battery_status_all_devices({'query': user_query}, token=token)
+            if self._default_api_token:
+                print(f"[DEBUG] Enhanced agent - Falling back to default token: {self._default_api_token[:20]}...")
+        context = RequestContext(token=token or self._default_api_token, user=user, device=device, stream=stream)
+        with bind_context(context):
+            return self._process_query(user_query, user, device, token)
 
-        # PATCH: Set temperature command handling
-        import re
-        # Handle temperature setpoint patterns (English and Hinglish)
-        temp_setpoint_patterns = [
-            # English patterns
-            r"set (?:the )?(?:temperature|temp|room temperature) (?:in|at|for)? ?([\w\- ]+)? to (\d{1,2}(?:\.\d+)?) ?(?:degrees|degree|c|celsius)?",
-            r"(?:temperature|temp|room temperature) (?:in|at|for)? ?([\w\- ]+)? (?:to|set to) (\d{1,2}(?:\.\d+)?) ?(?:degrees|degree|c|celsius)?",
-            # Hinglish patterns
-            r"([\w\- ]+)? (?:ka|ki|ke) (?:temperature|temp) (\d{1,2}(?:\.\d+)?) ?(?:degree|degrees) (?:par|me) (?:set|kar|karo|kare)",
-            r"(?:temperature|temp) (\d{1,2}(?:\.\d+)?) ?(?:degree|degrees) (?:par|me) (?:set|kar|karo|kare) (?:[\w\- ]+)?",
-            r"([\w\- ]+)? (?:me|par) (?:temperature|temp) (\d{1,2}(?:\.\d+)?) ?(?:degree|degrees) (?:set|kar|karo|kare)"
-                ]
+    def _process_query(self, user_query: str, user: str = "User", device: str = "", token: str = None) -> str:
+        """Route the query through PROCESS_QUERY_ROUTER (first rule with a response wins)"""
+        query = RoutedQuery(user_query, device=device, token=token or self._api_token)
+        self._start_prefetch(query)
+        context = current_context()
+        # Read-only rules are served from the response cache unless this query wrote something
+        should_store = lambda: not (context is not None and context.side_effects)
+        rule_name, response = PROCESS_QUERY_ROUTER.route(self, query, cache=self.response_cache, should_store=should_store)
+        if response is None:
+            rule_name, response = self._route_by_classifier(query, should_store)
+        if context is not None:
+            context.route = rule_name
+            if context.side_effects:
+                # Device state changed - cached readings of everyone in this tenant are stale
+                self.response_cache.invalidate(query.token)
+        if response is not None:
+            return response
+        
+        # PATCH: Fallback
+        return "❌ Unable to process your query. Please try rephrasing or contact support if the issue persists."
+    
+    def _start_prefetch(self, query: RoutedQuery):
+        """Start the upstream reads this query will most likely need while it is being routed"""
+        if not query.token:
+            return
+        query.scan(PROCESS_QUERY_ROUTER.automaton)
+        entities = query.entities
+        device_refs = [ref for ref in (query.device, entities.device, entities.device_name) if ref]
+        self.prefetcher.start('device_directory', self._prefetch_directory, query.token, device_refs)
+        # Skip the alarm page when the alarm response is about to be served from cache
+        if query.has_any(ALARM_KEYWORDS) and self.response_cache.get(query.token, ('alarms',) + query.cache_entities) is None:
+            self.prefetcher.start('active_alarms', self._fetch_active_alarm_page)
+
+    def _prefetch_directory(self, token: str, device_refs: List[str]):
+        """Load the device directory, then the key catalogs of devices the query names"""
+        index = self.device_directory.get_index(token)
+        for ref in device_refs:
+            ref = str(ref).strip().lower()
+            device_id = index.by_id.get(ref) or index.by_name.get(ref) if index else None
+            if device_id:
+                self.prefetcher.start(('telemetry_keys', device_id), self._load_telemetry_keys, device_id)
+        return index
+
+    def _route_by_classifier(self, query: RoutedQuery, should_store) -> Tuple[Optional[str], Optional[str]]:
+        """Send a query the keyword rules missed to the rule the intent classifier is confident about"""
+        if self.intent_classifier is None:
+            return None, None
+        intent, confidence = self.intent_classifier.predict(query.text)
+        print(f"[DEBUG] Intent classifier - {intent} ({confidence:.2f})")
+        if intent == GENERAL_INTENT or confidence < INTENT_CLASSIFIER_THRESHOLD:
+            return None, None
+        return PROCESS_QUERY_ROUTER.dispatch(self, query, intent, cache=self.response_cache, should_store=should_store)
+    
+    # --- process_query route handlers: (query, match) -> response, or None to fall through ---
+    
+    def _route_battery_status(self, q: RoutedQuery, match) -> Optional[str]:
+        # PATCH: Battery status direct handling (handle 'low battery' and similar queries FIRST)
+        return self._get_battery_status_all_devices({'query': q.text}, token=q.token)
+    
+    def _route_adjust_temperature(self, q: RoutedQuery, adjust_temp_match) -> Optional[str]:
         # Handle 'reduce/increase temperature ... by ...' pattern
-        adjust_temp_match = re.search(r"(reduce|decrease|lower|increase|raise) (?:the )?(?:temperature|temp|room temperature) (?:of|in|at|for)? ?([\w\- ]+)? by (\d{1,2}(?:\.\d+)?) ?(?:degrees|degree|c|celsius)?", user_query, re.IGNORECASE)
-        if adjust_temp_match:
-            action = adjust_temp_match.group(1).lower()
-            location_phrase = adjust_temp_match.group(2) or device or ''
-            location_phrase = location_phrase.strip()
-            delta = float(adjust_temp_match.group(3))
-            device_id = self._map_device_name_to_id(location_phrase)
-            if not device_id:
-                return f"❌ Unable to find a device for '{location_phrase or user_query}'. Please check the room/device name."
-            # Fetch current setpoint
-            current_setpoint = self._get_device_telemetry_data(device_id, 'room temperature setpoint')
+        user_query, device, token = q.text, q.device, q.token
+        action = adjust_temp_match.group(1).lower()
+        location_phrase = adjust_temp_match.group(2) or device or ''
+        location_phrase = location_phrase.strip()
+        delta = float(adjust_temp_match.group(3))
+        device_id = self._map_device_name_to_id(location_phrase)
+        if not device_id:
+            return f"❌ Unable to find a device for '{location_phrase or user_query}'. Please check the room/device name."
+        # Fetch current setpoint
+        current_setpoint = self._get_device_telemetry_data(device_id, 'room temperature setpoint')
+        try:
+            current_setpoint = float(current_setpoint)
+        except Exception:
+            return f"❌ Unable to fetch current setpoint for device {device_id}."
+        if action in ['reduce', 'decrease', 'lower']:
+            new_setpoint = current_setpoint - delta
+        else:
+            new_setpoint = current_setpoint + delta
+
+        # Validate the new setpoint before sending command
+        is_valid, validation_message = self._validate_temperature_range(new_setpoint)
+        if not is_valid:
+            return validation_message
+
+        result = self._send_control_command('DEVICE', device_id, 'room temperature setpoint', new_setpoint, location_phrase, token)
+        return result
+    
+    def _route_set_temperature(self, q: RoutedQuery, set_temp_match) -> Optional[str]:
+        # PATCH: Set temperature command handling (patterns run on the Hindi-mapped query)
+        user_query, device, token = q.text, q.device, q.token
+        location_phrase = set_temp_match.group(1) or device or ''
+        location_phrase = location_phrase.strip()
+        value = float(set_temp_match.group(2))
+        device_id = self._map_device_name_to_id(location_phrase)
+        if not device_id:
+            return f"❌ Unable to find a device for '{location_phrase or user_query}'. Please check the room/device name."
+
+        # Validate the temperature value before sending command
+        is_valid, validation_message = self._validate_temperature_range(value)
+        if not is_valid:
+            return validation_message
+
+        # Try to set the temperature setpoint
+        result = self._send_control_command('DEVICE', device_id, 'room temperature setpoint', value, location_phrase, token)
+        return result
+    
+    def _route_hindi_fan_speed(self, q: RoutedQuery, match) -> Optional[str]:
+        # Enhanced Hindi/Hinglish fan speed commands
+        user_query, device, token = q.text, q.device, q.token
+        if len(match.groups()) == 2:
+            location_phrase = match.group(1) or device or ''
+            value_raw = match.group(2).strip().lower()
+        elif len(match.groups()) == 3:
+            value_raw = match.group(1).strip().lower()
+            location_phrase = match.group(3) or device or ''
+        else:
+            return None
+        location_phrase = location_phrase.strip()
+        value_raw = map_hindi_to_english(value_raw)
+        # Map natural language to numeric values
+        if value_raw == 'low':
+            value = 0
+        elif value_raw == 'medium':
+            value = 1
+        elif value_raw == 'high':
+            value = 2
+        else:
             try:
-                current_setpoint = float(current_setpoint)
+                # For fan speed, use integer values
+                value = int(float(value_raw))
             except Exception:
-                return f"❌ Unable to fetch current setpoint for device {device_id}."
-            if action in ['reduce', 'decrease', 'lower']:
-                new_setpoint = current_setpoint - delta
+                return f"❌ Invalid fan speed value: {value_raw}. Use 0 (low), 1 (medium), or 2 (high)."
+        device_id = self._map_device_name_to_id(location_phrase)
+        if not device_id:
+            return f"❌ Unable to find a device for '{location_phrase or user_query}'. Please check the room/device name."
+        # Set the fan speed
+        result = self._send_control_command('DEVICE', device_id, 'set fan speed', value, location_phrase, token)
+        return result
+    
+    def _route_set_fan_speed(self, q: RoutedQuery, set_fan_speed_match) -> Optional[str]:
+        user_query, device, token = q.text, q.device, q.token
+        groups = set_fan_speed_match.groups()
+
+        if len(groups) == 2:
+            group1 = groups[0]
+            group2 = groups[1]
+
+            # Check if group1 is a value and group2 is location
+            if (group1 and group1.strip().lower() in ['low', 'medium', 'high', 'lowest', 'minimum', 'highest', 'maximum', '0', '1', '2'] or 
+                group1 and group1.strip().isdigit()) and group2 and not group2.strip().lower() in ['low', 'medium', 'high', 'lowest', 'minimum', 'highest', 'maximum', '0', '1', '2']:
+                # Pattern: "set fan speed to [value] in [location]" or "fan to [value] speed for [location]"
+                value_raw = group1.strip().lower()
+                location_phrase = group2.strip() or device or ''
             else:
-                new_setpoint = current_setpoint + delta
-            
-            # Validate the new setpoint before sending command
-            is_valid, validation_message = self._validate_temperature_range(new_setpoint)
-            if not is_valid:
-                return validation_message
-            
-            result = self._send_control_command('DEVICE', device_id, 'room temperature setpoint', new_setpoint, location_phrase, token)
-            return result
+                # Pattern: "set fan speed in [location] to [value]"
+                location_phrase = group1 or device or ''
+                value_raw = group2.strip().lower()
+        elif len(groups) == 1:
+            # Pattern: "set fan to [value] speed" (no location specified)
+            value_raw = groups[0].strip().lower()
+            location_phrase = device or ''
+        else:
+            # Fallback to original logic
+            location_phrase = set_fan_speed_match.group(1) or device or ''
+            value_raw = set_fan_speed_match.group(2).strip().lower()
 
-        # Initialize temperature setpoint match variable
-        set_temp_match = None
-        
-        # --- Hindi/Hinglish keyword mapping ---
-        HINDI_WORD_MAPPINGS = {
-            'कम': 'low',
-            'मध्यम': 'medium',
-            'तेज़': 'high',
-            'ज़्यादा': 'high',
-            'अधिकतम': 'maximum',
-            'न्यूनतम': 'minimum',
-            'तापमान': 'temperature',
-            'taapman': 'temperature',
-            'tapmaan': 'temperature',
-            'taapmaan': 'temperature',
-            'tapman': 'temperature',
-            'नमी': 'humidity',
-            'बैटरी': 'battery',
-            'कमरा': 'room',
-            'मंजिल': 'floor',
-            'सेट': 'set',
-            'करो': 'set',
-            'करें': 'set',
-            'दिखाओ': 'show',
-            'क्या है': 'what is',
-            'कैसा है': 'how is',
-            'स्पीड': 'speed',
-            'फैन': 'fan',
-            # Temperature control mappings
-            'डिग्री': 'degree',
-            'डिग्रीज': 'degrees',
-            'पर': 'to',
-            'में': 'in',
-            'के': 'of',
-            'का': 'of',
-            'की': 'of',
-            # Fan speed control mappings
-            'तेज़': 'high',
-            'ज़्यादा': 'high',
-            'अधिकतम': 'maximum',
-            'न्यूनतम': 'minimum',
-            'कम': 'low',
-            'मध्यम': 'medium',
-        }
-        
-        def map_hindi_to_english(text):
-            for hindi, eng in HINDI_WORD_MAPPINGS.items():
-                text = text.replace(hindi, eng)
-            return text
-        
-        # Apply Hindi word mapping to user query for temperature setpoint detection
-        mapped_query = map_hindi_to_english(user_query)
-        
-        # Check temperature setpoint patterns with Hindi mapping applied
-        set_temp_match = None
-        for pattern in temp_setpoint_patterns:
-            set_temp_match = re.search(pattern, mapped_query, re.IGNORECASE)
-            if set_temp_match:
-                break
-        
-        # Process temperature setpoint if matched
-        if set_temp_match:
-            location_phrase = set_temp_match.group(1) or device or ''
-            location_phrase = location_phrase.strip()
-            value = float(set_temp_match.group(2))
+        location_phrase = location_phrase.strip()
+        value_raw = map_hindi_to_english(value_raw)
+        # Enhanced speed mapping with more variations
+        if value_raw in ['low', 'lowest', 'minimum']:
+            value = 0
+        elif value_raw in ['medium', 'med']:
+            value = 1
+        elif value_raw in ['high', 'highest', 'maximum']:
+            value = 2
+        else:
+            try:
+                # For fan speed, use integer values
+                value = int(float(value_raw))
+            except Exception:
+                return f"❌ Invalid fan speed value: {value_raw}. Use 0 (low/lowest/minimum), 1 (medium), or 2 (high/highest/maximum)."
+
+        # If location_phrase is empty or just a floor, try to find a device on that floor
+        if not location_phrase or location_phrase.strip() in ['second floor', '2nd floor', '2 floor', 'floor 2']:
+            # Try to find a device on the second floor
+            devices = self._get_devices_list() or []
+            second_floor_devices = []
+            for d in devices:
+                location = d.get('location', '').lower()
+                if 'second' in location or '2nd' in location or '2' in location:
+                    second_floor_devices.append(d)
+
+            if second_floor_devices:
+                # Use the first device found on second floor
+                device_id = second_floor_devices[0].get('id', {})
+                if isinstance(device_id, dict):
+                    device_id = device_id.get('id', '')
+                location_phrase = f"second floor ({second_floor_devices[0].get('name', 'device')})"
+            else:
+                return f"❌ No devices found on second floor. Please specify a specific room or device."
+        else:
             device_id = self._map_device_name_to_id(location_phrase)
             if not device_id:
-                return f"❌ Unable to find a device for '{location_phrase or user_query}'. Please check the room/device name."
-            
-            # Validate the temperature value before sending command
-            is_valid, validation_message = self._validate_temperature_range(value)
-            if not is_valid:
-                return validation_message
-            
-            # Try to set the temperature setpoint
-            result = self._send_control_command('DEVICE', device_id, 'room temperature setpoint', value, location_phrase, token)
-            return result
+                return f"❌ Unable to find a device for '{location_phrase}'. Please check the room/device name."
 
-        # --- Enhanced Hindi/Hinglish regex patterns for fan speed ---
-        hindi_fan_speed_patterns = [
-            # Original patterns
-            r"(?:fan speed|speed|फैन स्पीड|स्पीड) (?:को|में|की)? ?([\w\- ]+)? (?:को|में|की)? (low|medium|high|lowest|minimum|highest|maximum|0|1|2|कम|मध्यम|तेज़|ज़्यादा|अधिकतम|न्यूनतम)",
-            r"(?:set|सेट|करो|करें) (?:fan speed|speed|फैन स्पीड|स्पीड) (?:को|में|की)? ?([\w\- ]+)? (?:को|में|की)? (low|medium|high|lowest|minimum|highest|maximum|0|1|2|कम|मध्यम|तेज़|ज़्यादा|अधिकतम|न्यूनतम)",
-            r"(?:fan speed|speed|फैन स्पीड|स्पीड) (low|medium|high|lowest|minimum|highest|maximum|0|1|2|कम|मध्यम|तेज़|ज़्यादा|अधिकतम|न्यूनतम) (?:करो|करें|सेट|set) ?([\w\- ]+)?",
-            # New patterns for user's query format
-            r"([\w\- ]+)? (?:mein|में|मे) (?:fan speed|speed|फैन स्पीड|स्पीड) (low|medium|high|lowest|minimum|highest|maximum|0|1|2|कम|मध्यम|तेज़|ज़्यादा|अधिकतम|न्यूनतम) (?:करो|करें|सेट|set)",
-            r"([\w\- ]+)? (?:mein|में|मे) (?:fan speed|speed|फैन स्पीड|स्पीड) (?:ko|को) (low|medium|high|lowest|minimum|highest|maximum|0|1|2|कम|मध्यम|तेज़|ज़्यादा|अधिकतम|न्यूनतम) (?:करो|करें|सेट|set)",
-            r"(?:fan speed|speed|फैन स्पीड|स्पीड) (low|medium|high|lowest|minimum|highest|maximum|0|1|2|कम|मध्यम|तेज़|ज़्यादा|अधिकतम|न्यूनतम) (?:करो|करें|सेट|set) (?:[\w\- ]+)?",
-            # Additional patterns for exact user format
-            r"([\w\- ]+)? (?:mein|में|मे) (?:fan speed|speed|फैन स्पीड|स्पीड) (low|medium|high|lowest|minimum|highest|maximum|0|1|2|कम|मध्यम|तेज़|ज़्यादा|अधिकतम|न्यूनतम) (?:karo|kare|kar do|kar de)",
-            r"([\w\- ]+)? (?:mein|में|मे) (?:fan speed|speed|फैन स्पीड|स्पीड) (?:ko|को) (low|medium|high|lowest|minimum|highest|maximum|0|1|2|कम|मध्यम|तेज़|ज़्यादा|अधिकतम|न्यूनतम) (?:karo|kare|kar do|kar de)"
-        ]
-        # Try Hindi/Hinglish fan speed patterns
-        for pattern in hindi_fan_speed_patterns:
-            match = re.search(pattern, user_query, re.IGNORECASE)
-            if match:
-                # Try to extract location and value
-                if len(match.groups()) == 2:
-                    location_phrase = match.group(1) or device or ''
-                    value_raw = match.group(2).strip().lower()
-                elif len(match.groups()) == 3:
-                    value_raw = match.group(1).strip().lower()
-                    location_phrase = match.group(3) or device or ''
-                else:
-                    continue
-                location_phrase = location_phrase.strip()
-                value_raw = map_hindi_to_english(value_raw)
-                # Map natural language to numeric values
-                if value_raw == 'low':
-                    value = 0
-                elif value_raw == 'medium':
-                    value = 1
-                elif value_raw == 'high':
-                    value = 2
-                else:
-                    try:
-                        # For fan speed, use integer values
-                        value = int(float(value_raw))
-                    except Exception:
-                        return f"❌ Invalid fan speed value: {value_raw}. Use 0 (low), 1 (medium), or 2 (high)."
-                device_id = self._map_device_name_to_id(location_phrase)
-                if not device_id:
-                    return f"❌ Unable to find a device for '{location_phrase or user_query}'. Please check the room/device name."
-                # Set the fan speed
-                result = self._send_control_command('DEVICE', device_id, 'set fan speed', value, location_phrase, token)
-                return result
-        # Enhanced fan speed patterns including "increase" commands
-        fan_speed_patterns = [
-            r"set (?:the )?(?:fan speed|speed) (?:in|at|for)? ?([\w\- ]+)? to (low|medium|high|lowest|minimum|highest|maximum|\d{1,2}(?:\.\d+)?)",
-            r"set (?:the )?(?:fan speed|speed) to (low|medium|high|lowest|minimum|highest|maximum|\d{1,2}(?:\.\d+)?) in ([\w\- ]+)",
-            r"set (?:the )?fan to (low|medium|high|lowest|minimum|highest|maximum|\d{1,2}(?:\.\d+)?) speed (?:for|in|at) ([\w\- ]+)",
-            r"set (?:the )?fan to (low|medium|high|lowest|minimum|highest|maximum|\d{1,2}(?:\.\d+)?) speed",
-            r"increase (?:the )?(?:fan speed|speed) (?:in|at|for)? ?([\w\- ]+)? to (low|medium|high|lowest|minimum|highest|maximum|\d{1,2}(?:\.\d+)?)",
-            r"change (?:the )?(?:fan speed|speed) (?:in|at|for)? ?([\w\- ]+)? to (low|medium|high|lowest|minimum|highest|maximum|\d{1,2}(?:\.\d+)?)",
-            r"adjust (?:the )?(?:fan speed|speed) (?:in|at|for)? ?([\w\- ]+)? to (low|medium|high|lowest|minimum|highest|maximum|\d{1,2}(?:\.\d+)?)",
-            r"(?:fan speed|speed) (?:in|at|for)? ?([\w\- ]+)? (?:to|set to|increase to) (low|medium|high|lowest|minimum|highest|maximum|\d{1,2}(?:\.\d+)?)",
-            r"fan (?:speed|) (?:to|set to) (low|medium|high|lowest|minimum|highest|maximum|\d{1,2}(?:\.\d+)?) (?:for|in|at) ([\w\- ]+)",
-            r"fan (?:speed|) (?:to|set to) (low|medium|high|lowest|minimum|highest|maximum|\d{1,2}(?:\.\d+)?)"
-        ]
-        
-        set_fan_speed_match = None
-        for pattern in fan_speed_patterns:
-            set_fan_speed_match = re.search(pattern, user_query, re.IGNORECASE)
-            if set_fan_speed_match:
-                break
-        if set_fan_speed_match:
-            # Handle different pattern formats
-            groups = set_fan_speed_match.groups()
-            
-            if len(groups) == 2:
-                group1 = groups[0]
-                group2 = groups[1]
-                
-                # Check if group1 is a value and group2 is location
-                if (group1 and group1.strip().lower() in ['low', 'medium', 'high', 'lowest', 'minimum', 'highest', 'maximum', '0', '1', '2'] or 
-                    group1 and group1.strip().isdigit()) and group2 and not group2.strip().lower() in ['low', 'medium', 'high', 'lowest', 'minimum', 'highest', 'maximum', '0', '1', '2']:
-                    # Pattern: "set fan speed to [value] in [location]" or "fan to [value] speed for [location]"
-                    value_raw = group1.strip().lower()
-                    location_phrase = group2.strip() or device or ''
-                else:
-                    # Pattern: "set fan speed in [location] to [value]"
-                    location_phrase = group1 or device or ''
-                    value_raw = group2.strip().lower()
-            elif len(groups) == 1:
-                # Pattern: "set fan to [value] speed" (no location specified)
-                value_raw = groups[0].strip().lower()
-                location_phrase = device or ''
-            else:
-                # Fallback to original logic
-                location_phrase = set_fan_speed_match.group(1) or device or ''
-                value_raw = set_fan_speed_match.group(2).strip().lower()
-            
-            location_phrase = location_phrase.strip()
-            value_raw = map_hindi_to_english(value_raw)
-            # Enhanced speed mapping with more variations
-            if value_raw in ['low', 'lowest', 'minimum']:
-                value = 0
-            elif value_raw in ['medium', 'med']:
-                value = 1
-            elif value_raw in ['high', 'highest', 'maximum']:
-                value = 2
-            else:
-                try:
-                    # For fan speed, use integer values
-                    value = int(float(value_raw))
-                except Exception:
-                    return f"❌ Invalid fan speed value: {value_raw}. Use 0 (low/lowest/minimum), 1 (medium), or 2 (high/highest/maximum)."
-            
-            # If location_phrase is empty or just a floor, try to find a device on that floor
-            if not location_phrase or location_phrase.strip() in ['second floor', '2nd floor', '2 floor', 'floor 2']:
-                # Try to find a device on the second floor
-                devices = self._get_devices_list() or []
-                second_floor_devices = []
-                for d in devices:
-                    location = d.get('location', '').lower()
-                    if 'second' in location or '2nd' in location or '2' in location:
-                        second_floor_devices.append(d)
-                
-                if second_floor_devices:
-                    # Use the first device found on second floor
-                    device_id = second_floor_devices[0].get('id', {})
-                    if isinstance(device_id, dict):
-                        device_id = device_id.get('id', '')
-                    location_phrase = f"second floor ({second_floor_devices[0].get('name', 'device')})"
-                else:
-                    return f"❌ No devices found on second floor. Please specify a specific room or device."
-            else:
-                device_id = self._map_device_name_to_id(location_phrase)
-                if not device_id:
-                    return f"❌ Unable to find a device for '{location_phrase}'. Please check the room/device name."
-            
-            result = self._send_control_command('DEVICE', device_id, 'set fan speed', value, location_phrase, token)
-            return result
-        # --- Enhanced Hindi/Hinglish regex patterns for temperature queries ---
-        hindi_temp_patterns = [
-            # Original patterns
-            r"(?:तापमान|temperature) (?:क्या है|कैसा है|दिखाओ|show|check) ?([\w\- ]+)?",
-            r"([\w\- ]+)? में (?:तापमान|temperature) (?:क्या है|कैसा है|दिखाओ|show|check)",
-            # Pattern for "Room 50 2nd floor ka tapmaan kya ha" type queries
-            r"(.*?(?:room|floor|f)\s*\d+.*?) (?:ka|ki|ke) (?:tapmaan|taapman|tapman|temperature)",
-            r"(.*?(?:floor|f)\s*\d+.*?) (?:ka|ki|ke) (?:tapmaan|taapman|tapman|temperature)",
-            r"(.*?room\s*\d+.*?) (?:ka|ki|ke) (?:tapmaan|taapman|tapman|temperature)",
-            # Pattern for "room number 50 2nd floor ka tapman kya hai" type queries
-            r"(.*?(?:room\s*number|room|floor|f)\s*\d+.*?) (?:ka|ki|ke) (?:tapmaan|taapman|tapman|temperature)",
-            # Pattern for "tapmaan 2nd floor room 50" type queries
-            r"(?:tapmaan|taapman|tapman|तापमान|temperature) ([\w\- ]+ (?:floor|f) [\w\- ]+)",
-            r"(?:tapmaan|taapman|tapman|तापमान|temperature) ([\w\- ]+ (?:room|kamra) [\w\- ]+)",
-            # More specific patterns to avoid capturing question words
-            r"([\w\- ]+(?:room|floor|f)\s*\d+[\w\- ]*) (?:ka|ki|ke) (?:tapmaan|taapman|tapman|temperature)",
-            r"([\w\- ]+\d+[\w\- ]*(?:room|floor|f)[\w\- ]*) (?:ka|ki|ke) (?:tapmaan|taapman|tapman|temperature)",
-            # Fallback patterns for broken/partial Hinglish (but exclude question words)
-            r"(?:tapmaan|taapman|tapman|तापमान|temperature) (?!kya|kaisa|kaise|क्या|कैसा|कैसे)([\w\- ]+)?",
-            r"([\w\- ]+)? (?:tapmaan|taapman|tapman|तापमान|temperature)",
-        ]
-        # Only process Hinglish patterns if the query contains Hindi/Hinglish keywords
-        has_hindi_keywords = any(keyword in user_query.lower() for keyword in ['tapmaan', 'taapman', 'tapman', 'तापमान', 'ka', 'ki', 'ke', 'kya', 'hai', 'ha'])
-        
-        if has_hindi_keywords:
-            for i, pattern in enumerate(hindi_temp_patterns):
-                match = re.search(pattern, user_query, re.IGNORECASE)
+        result = self._send_control_command('DEVICE', device_id, 'set fan speed', value, location_phrase, token)
+        return result
+    
+    def _route_hinglish_temperature(self, q: RoutedQuery, match) -> Optional[str]:
+        # Enhanced Hindi/Hinglish temperature queries
+        user_query, device = q.text, q.device
+        print(f"[DEBUG] Hinglish pattern matched: '{match.re.pattern}' -> groups: {match.groups()}")
+        location_phrase = match.group(1) or device or ''
+        location_phrase = location_phrase.strip()
+
+        # If location_phrase is empty or contains question words, try to extract from the full query
+        if not location_phrase or any(qw in location_phrase.lower() for qw in ['kya', 'kaisa', 'kaise', 'क्या', 'कैसा', 'कैसे', 'hai', 'ha', 'है']):
+            # Try to extract location from the full query before the Hindi words
+            query_lower = user_query.lower()
+
+            # Look for patterns like "Room 50 2nd floor ka tapmaan kya hai"
+            # Extract everything before "ka tapmaan" or similar
+            temp_patterns = [
+                r'(.+?)\s+(?:ka|ki|ke)\s+(?:tapmaan|taapman|tapman|तापमान|temperature)',
+                r'(.+?)\s+(?:tapmaan|taapman|tapman|तापमान|temperature)',
+            ]
+
+            for pattern in temp_patterns:
+                match = re.search(pattern, query_lower)
                 if match:
-                    print(f"[DEBUG] Hinglish pattern {i} matched: '{pattern}' -> groups: {match.groups()}")
-                    location_phrase = match.group(1) or device or ''
-                    location_phrase = location_phrase.strip()
-                    
-                    # If location_phrase is empty or contains question words, try to extract from the full query
-                    if not location_phrase or any(qw in location_phrase.lower() for qw in ['kya', 'kaisa', 'kaise', 'क्या', 'कैसा', 'कैसे', 'hai', 'ha', 'है']):
-                        # Try to extract location from the full query before the Hindi words
-                        query_lower = user_query.lower()
-                        
-                        # Look for patterns like "Room 50 2nd floor ka tapmaan kya hai"
-                        # Extract everything before "ka tapmaan" or similar
-                        temp_patterns = [
-                            r'(.+?)\s+(?:ka|ki|ke)\s+(?:tapmaan|taapman|tapman|तापमान|temperature)',
-                            r'(.+?)\s+(?:tapmaan|taapman|tapman|तापमान|temperature)',
-                        ]
-                        
-                        for pattern in temp_patterns:
-                            match = re.search(pattern, query_lower)
-                            if match:
-                                location_phrase = match.group(1).strip()
-                                break
-                        
-                        # If no pattern match, fall back to removing keywords
-                        if not location_phrase or any(qw in location_phrase.lower() for qw in ['kya', 'kaisa', 'kaise', 'क्या', 'कैसा', 'कैसे', 'hai', 'ha', 'है']):
-                            temp_keywords = ['tapmaan', 'taapman', 'tapman', 'तापमान', 'temperature']
-                            question_words = ['kya', 'kaisa', 'kaise', 'क्या', 'कैसा', 'कैसे', 'hai', 'ha', 'है']
-                            hindi_connectors = ['ka', 'ki', 'ke', 'का', 'की', 'के']
-                            
-                            query_clean = user_query.lower()
-                            for keyword in temp_keywords + question_words + hindi_connectors:
-                                query_clean = query_clean.replace(keyword, '').strip()
-                            location_phrase = query_clean
-                    
-                    location_phrase = map_hindi_to_english(location_phrase)
-                    print(f"[DEBUG] Hinglish temp query - Extracted location: '{location_phrase}'")
-                    
-                    device_id = self._map_device_name_to_id(location_phrase)
-                    if not device_id:
-                        return f"❌ Unable to find a device for '{location_phrase or user_query}'. Please check the room/device name."
-                    value = self._get_device_telemetry_data(device_id, 'temperature')
-                    value_str = str(value)
-                    if not value_str.strip().endswith('°C'):
-                        value_str = f"{value_str}°C"
-                    
-                    # Get device name for better response
-                    device_name = self._get_device_name_by_id(device_id)
-                    if device_name:
-                        return f"🌡️ Temperature for {device_name} ({device_id}): {value_str}"
-                    else:
-                        return f"🌡️ Temperature for {location_phrase or device_id}: {value_str}"
-
-        # PATCH: Prioritize telemetry fetch for telemetry keywords (move to very top)
-        # BUT exclude fan speed control commands
-        telemetry_keywords = ['humidity', 'temperature', 'battery', 'pressure', 'setpoint', 'speed']
-        
-        # Enhanced Hinglish temperature keyword detection
-        hinglish_temp_keywords = ['tapmaan', 'taapman', 'tapman', 'तापमान']
-        hinglish_question_words = ['kya', 'kaisa', 'kaise', 'क्या', 'कैसा', 'कैसे']
-        hinglish_auxiliary_words = ['ha', 'hai', 'h', 'है', 'हैं']
-        has_hinglish_temp = any(keyword in user_query.lower() for keyword in hinglish_temp_keywords)
-        
-        # Check if this is a fan speed control command first (more specific)
-        control_action_keywords = ['increase', 'set', 'change', 'adjust', 'turn', 'switch']
-        is_fan_speed_control = any(kw in user_query.lower() for kw in control_action_keywords) and 'speed' in user_query.lower()
-        
-        if not is_fan_speed_control and (any(kw in user_query.lower() for kw in telemetry_keywords) or has_hinglish_temp):
-            # For Hinglish temperature queries, try to extract location from the full query
-            if has_hinglish_temp:
-                # Try to extract location before the Hindi words
-                query_lower = user_query.lower()
-                
-                # Look for patterns like "Room 50 2nd floor ka tapmaan kya hai"
-                # Extract everything before "ka tapmaan" or similar
-                temp_patterns = [
-                    r'(.+?)\s+(?:ka|ki|ke)\s+(?:tapmaan|taapman|tapman|तापमान|temperature)',
-                    r'(.+?)\s+(?:tapmaan|taapman|tapman|तापमान|temperature)',
-                ]
-                
-                device_phrase = None
-                for pattern in temp_patterns:
-                    match = re.search(pattern, query_lower)
-                    if match:
-                        device_phrase = match.group(1).strip()
-                        break
-                
-                # If no pattern match, fall back to removing keywords
-                if not device_phrase:
-                    query_clean = query_lower
-                    for keyword in hinglish_temp_keywords + hinglish_question_words + hinglish_auxiliary_words:
-                        query_clean = query_clean.replace(keyword, '').strip()
-                    # Also remove common Hindi connectors
-                    query_clean = query_clean.replace('ka', '').replace('ki', '').replace('ke', '').replace('का', '').replace('की', '').replace('के', '').strip()
-                    device_phrase = query_clean
-                
-                device_phrase = device_phrase or device or user_query
-                print(f"[DEBUG] Hinglish temp fallback - Using location: '{device_phrase}'")
-            else:
-                device_phrase = device or user_query
-            device_id = self._map_device_name_to_id(device_phrase)
-            if device_id:
-                for metric in telemetry_keywords:
-                    if metric in user_query.lower():
-                        value = self._get_device_telemetry_data(device_id, metric)
-                        if value and not (isinstance(value, str) and value.startswith('❌')):
-                            if metric == 'humidity':
-                                value_str = str(value)
-                                if not value_str.strip().endswith('%'):
-                                    value_str = f"{value_str}%"
-                                # Get device name for better readability
-                                device_name = self._get_device_name_by_id(device_id)
-                                if device_name:
-                                    return f"{metric.title()} for {device_name} ({device_id}): {value_str}"
-                                else:
-                                    return f"{metric.title()} for {device or device_id}: {value_str}"
-                            if metric == 'battery':
-                                value_str = str(value)
-                                if not (value_str.strip().endswith('V') or value_str.strip().lower().endswith('volt')):
-                                    value_str = f"{value_str}V"
-                                # Get device name for better readability
-                                device_name = self._get_device_name_by_id(device_id)
-                                if device_name:
-                                    return f"{metric.title()} for {device_name} ({device_id}): {value_str}"
-                                else:
-                                    return f"{metric.title()} for {device or device_id}: {value_str}"
-                            if metric == 'temperature':
-                                value_str = str(value)
-                                if not value_str.strip().endswith('°C'):
-                                    value_str = f"{value_str}°C"
-                                # Get device name for better readability
-                                device_name = self._get_device_name_by_id(device_id)
-                                if device_name:
-                                    return f"🌡️ Temperature for {device_name} ({device_id}): {value_str}"
-                                else:
-                                    return f"🌡️ Temperature for {device or device_id}: {value_str}"
-                            if metric == 'speed':
-                                value_str = str(value)
-                                # Map speed values to human-readable format
-                                if value_str == '0':
-                                    speed_desc = 'Low'
-                                elif value_str == '1':
-                                    speed_desc = 'Medium'
-                                elif value_str == '2':
-                                    speed_desc = 'High'
-                                else:
-                                    speed_desc = value_str
-                                
-                                # Get device name for better readability
-                                device_name = self._get_device_name_by_id(device_id)
-                                if device_name:
-                                    return f"Fan Speed for {device_name} ({device_id}): {speed_desc} ({value_str})"
-                                else:
-                                    return f"Fan Speed for {device or device_id}: {speed_desc} ({value_str})"
+                    location_phrase = match.group(1).strip()
+                    break
+
+            # If no pattern match, fall back to removing keywords
+            if not location_phrase or any(qw in location_phrase.lower() for qw in ['kya', 'kaisa', 'kaise', 'क्या', 'कैसा', 'कैसे', 'hai', 'ha', 'है']):
+                temp_keywords = ['tapmaan', 'taapman', 'tapman', 'तापमान', 'temperature']
+                question_words = ['kya', 'kaisa', 'kaise', 'क्या', 'कैसा', 'कैसे', 'hai', 'ha', 'है']
+                hindi_connectors = ['ka', 'ki', 'ke', 'का', 'की', 'के']
+
+                query_clean = user_query.lower()
+                for keyword in temp_keywords + question_words + hindi_connectors:
+                    query_clean = query_clean.replace(keyword, '').strip()
+                location_phrase = query_clean
+
+        location_phrase = map_hindi_to_english(location_phrase)
+        print(f"[DEBUG] Hinglish temp query - Extracted location: '{location_phrase}'")
+
+        device_id = self._map_device_name_to_id(location_phrase)
+        if not device_id:
+            return f"❌ Unable to find a device for '{location_phrase or user_query}'. Please check the room/device name."
+        value = self._get_device_telemetry_data(device_id, 'temperature')
+        value_str = str(value)
+        if not value_str.strip().endswith('°C'):
+            value_str = f"{value_str}°C"
+
+        # Get device name for better response
+        device_name = self._get_device_name_by_id(device_id)
+        if device_name:
+            return f"🌡️ Temperature for {device_name} ({device_id}): {value_str}"
+        else:
+            return f"🌡️ Temperature for {location_phrase or device_id}: {value_str}"
+    
+    def _route_telemetry(self, q: RoutedQuery, match) -> Optional[str]:
+        # PATCH: Prioritize telemetry fetch for telemetry keywords (fan speed control is excluded by the rule)
+        user_query, device = q.text, q.device
+        telemetry_keywords = TELEMETRY_KEYWORDS
+        hinglish_temp_keywords = HINGLISH_TEMP_KEYWORDS
+        hinglish_question_words = HINGLISH_QUESTION_WORDS
+        hinglish_auxiliary_words = HINGLISH_AUXILIARY_WORDS
+        has_hinglish_temp = q.has_any(HINGLISH_TEMP_KEYWORDS)
+        
+        if has_hinglish_temp:
+            # Try to extract location before the Hindi words
+            query_lower = user_query.lower()
+
+            # Look for patterns like "Room 50 2nd floor ka tapmaan kya hai"
+            # Extract everything before "ka tapmaan" or similar
+            temp_patterns = [
+                r'(.+?)\s+(?:ka|ki|ke)\s+(?:tapmaan|taapman|tapman|तापमान|temperature)',
+                r'(.+?)\s+(?:tapmaan|taapman|tapman|तापमान|temperature)',
+            ]
+
+            device_phrase = None
+            for pattern in temp_patterns:
+                match = re.search(pattern, query_lower)
+                if match:
+                    device_phrase = match.group(1).strip()
+                    break
+
+            # If no pattern match, fall back to removing keywords
+            if not device_phrase:
+                query_clean = query_lower
+                for keyword in hinglish_temp_keywords + hinglish_question_words + hinglish_auxiliary_words:
+                    query_clean = query_clean.replace(keyword, '').strip()
+                # Also remove common Hindi connectors
+                query_clean = query_clean.replace('ka', '').replace('ki', '').replace('ke', '').replace('का', '').replace('की', '').replace('के', '').strip()
+                device_phrase = query_clean
+
+            device_phrase = device_phrase or device or user_query
+            print(f"[DEBUG] Hinglish temp fallback - Using location: '{device_phrase}'")
+        else:
+            device_phrase = device or user_query
+        device_id = self._map_device_name_to_id(device_phrase)
+        if device_id:
+            for metric in telemetry_keywords:
+                if metric in user_query.lower():
+                    value = self._get_device_telemetry_data(device_id, metric)
+                    if value and not (isinstance(value, str) and value.startswith('❌')):
+                        if metric == 'humidity':
+                            value_str = str(value)
+                            if not value_str.strip().endswith('%'):
+                                value_str = f"{value_str}%"
                             # Get device name for better readability
                             device_name = self._get_device_name_by_id(device_id)
                             if device_name:
-                                return f"{metric.title()} for {device_name} ({device_id}): {value}"
+                                return f"{metric.title()} for {device_name} ({device_id}): {value_str}"
                             else:
-                                return f"{metric.title()} for {device or device_id}: {value}"
-                        else:
-                            return value
+                                return f"{metric.title()} for {device or device_id}: {value_str}"
+                        if metric == 'battery':
+                            value_str = str(value)
+                            if not (value_str.strip().endswith('V') or value_str.strip().lower().endswith('volt')):
+                                value_str = f"{value_str}V"
+                            # Get device name for better readability
+                            device_name = self._get_device_name_by_id(device_id)
+                            if device_name:
+                                return f"{metric.title()} for {device_name} ({device_id}): {value_str}"
+                            else:
+                                return f"{metric.title()} for {device or device_id}: {value_str}"
+                        if metric == 'temperature':
+                            value_str = str(value)
+                            if not value_str.strip().endswith('°C'):
+                                value_str = f"{value_str}°C"
+                            # Get device name for better readability
+                            device_name = self._get_device_name_by_id(device_id)
+                            if device_name:
+                                return f"🌡️ Temperature for {device_name} ({device_id}): {value_str}"
+                            else:
+                                return f"🌡️ Temperature for {device or device_id}: {value_str}"
+                        if metric == 'speed':
+                            value_str = str(value)
+                            # Map speed values to human-readable format
+                            if value_str == '0':
+                                speed_desc = 'Low'
+                            elif value_str == '1':
+                                speed_desc = 'Medium'
+                            elif value_str == '2':
+                                speed_desc = 'High'
+                            else:
+                                speed_desc = value_str
 
-        # PATCH: General health/system status queries
-        health_keywords = [
-            'system health', 'system status', 'all systems fine', 'all systems ok', 'is everything working', 'is health of all systems fine', 'are all systems ok', 'system communication status', 'overall health', 'building health', 'is health of all systems good', 'is health of all systems ok', 'is health of all systems', 'is system healthy', 'is everything ok', 'is everything fine', 'is everything normal', 'is system ok', 'is system fine', 'is system normal'
-        ]
-        if any(kw in user_query.lower() for kw in health_keywords):
-            return self._get_system_communication_status({'query': user_query})
-        
-        # --- Predictive maintenance/analytics direct handling (enhanced) ---
-        # Enhanced pattern matching for various predictive maintenance queries
-        predictive_patterns = [
-            (r'predict(?: (.+?))?(?: (?:issues|failures|problems|risks))?(?: for)?(?: next)? (\d{1,2}|tomorrow|today) ?days?', 2),  # (system_type, days)
-            (r'(?:are|is|will) (?:any|all|the) (?:devices|equipment|systems) (?:likely to|going to|about to) (?:fail|break|stop|malfunction) (?:in|within|over) (?:the )?(?:next )?(\d{1,2}|tomorrow|today) ?days?', 1),  # (days)
-            (r'(?:what|which) (?:devices|equipment|systems) (?:are|will) (?:likely to|going to|about to) (?:fail|break|stop|malfunction) (?:in|within|over) (?:the )?(?:next )?(\d{1,2}|tomorrow|today) ?days?', 1),  # (days)
-            (r'(?:failure|maintenance) (?:prediction|forecast|analysis) (?:for|in|within|over) (?:the )?(?:next )?(\d{1,2}|tomorrow|today) ?days?', 1)  # (days)
-        ]
-        
-        for pattern, num_groups in predictive_patterns:
-            predictive_match = re.search(pattern, user_query, re.IGNORECASE)
-            if predictive_match:
-                # Extract system type if available (only for first pattern)
-                system_type = 'all'
-                if num_groups > 1 and predictive_match.group(1):
-                    raw_system_type = predictive_match.group(1).strip().lower()
-                    
-                    # Handle compound system types like "hvac or thermostat"
-                    if ' or ' in raw_system_type:
-                        # Extract the first system type (usually the primary one)
-                        system_type = raw_system_type.split(' or ')[0].strip()
+                            # Get device name for better readability
+                            device_name = self._get_device_name_by_id(device_id)
+                            if device_name:
+                                return f"Fan Speed for {device_name} ({device_id}): {speed_desc} ({value_str})"
+                            else:
+                                return f"Fan Speed for {device or device_id}: {speed_desc} ({value_str})"
+                        # Get device name for better readability
+                        device_name = self._get_device_name_by_id(device_id)
+                        if device_name:
+                            return f"{metric.title()} for {device_name} ({device_id}): {value}"
+                        else:
+                            return f"{metric.title()} for {device or device_id}: {value}"
                     else:
-                        system_type = raw_system_type
-                
-                # Extract days (last group)
-                days_raw = predictive_match.group(num_groups).strip().lower()
-                if days_raw == 'tomorrow':
-                    days = 1
-                elif days_raw == 'today':
-                    days = 0
-                else:
-                    days = int(days_raw)
-                
-                return self._get_predictive_maintenance_summary(system_type=system_type, days=days)
-        
+                        return value
+        return None
+    
+    def _route_system_communication(self, q: RoutedQuery, match) -> Optional[str]:
+        # PATCH: General health/system status and communication queries
+        return self._get_system_communication_status({'query': q.text})
+    
+    def _route_predictive_pattern(self, q: RoutedQuery, predictive_match) -> Optional[str]:
+        # --- Predictive maintenance/analytics direct handling (enhanced) ---
+        num_groups = predictive_match.re.groups
+        # Extract system type if available (only for first pattern)
+        system_type = 'all'
+        if num_groups > 1 and predictive_match.group(1):
+            raw_system_type = predictive_match.group(1).strip().lower()
+
+            # Handle compound system types like "hvac or thermostat"
+            if ' or ' in raw_system_type:
+                # Extract the first system type (usually the primary one)
+                system_type = raw_system_type.split(' or ')[0].strip()
+            else:
+                system_type = raw_system_type
+
+        # Extract days (last group)
+        days_raw = predictive_match.group(num_groups).strip().lower()
+        if days_raw == 'tomorrow':
+            days = 1
+        elif days_raw == 'today':
+            days = 0
+        else:
+            days = int(days_raw)
+
+        return self._get_predictive_maintenance_summary(system_type=system_type, days=days)
+    
+    def _route_predictive_keyword(self, q: RoutedQuery, match) -> Optional[str]:
         # Enhanced fallback: broader keyword detection
-        predictive_keywords = [
-            'predict', 'prediction', 'forecast', 'failure', 'failures', 'likely to fail', 
-            'going to fail', 'about to fail', 'next 7 days', 'next 30 days', 'next few days',
-            'analytics', 'maintenance', 'risk', 'proactive', 'preventive', 'equipment failure',
-            'device failure', 'system failure', 'breakdown', 'malfunction'
-        ]
-        
-        if any(word in user_query.lower() for word in predictive_keywords):
-            # Extract days from common patterns
+        days = q.entities.days
+        if days is None:
             days = 7  # default
-            days_match = re.search(r'(\d{1,2}) ?days?', user_query.lower())
-            if days_match:
-                days = int(days_match.group(1))
-            elif 'tomorrow' in user_query.lower():
-                days = 1
-            elif 'today' in user_query.lower():
-                days = 0
-            
-            return self._get_predictive_maintenance_summary(system_type='all', days=days)
-        
-        # PATCH: Alarm-related queries
-        alarm_keywords = [
-            'alarm', 'alarms', 'system issue', 'system issues', 'co2', 'highest severity', 'highest priority', 'highest risk', 'critical', 'major', 'minor', 'warning', 'indeterminate', 'fault', 'error', 'issue', 'sensor', 'show me any system issues', 'show me the critical alarms', 'show me alarms with high co2 levels', "what's the highest severity alarm right now?", 'show me minor alarms', 'show all alarms', 'show me system issues'
-        ]
-        battery_keywords = ['battery', 'battery status', 'battery level', 'battery condition', 'battery health']
-        # PATCH: Troubleshooting queries (how to fix/diagnose alarms) - MUST BE BEFORE GENERAL ALARM DETECTION
-        troubleshooting_keywords = ['how to fix', 'how to diagnose', 'fix', 'diagnose', 'troubleshoot', 'troubleshooting']
-        alarm_keywords_for_troubleshooting = ['alarm', 'alarms', 'co2', 'filter', 'choke', 'pressure', 'temperature', 'humidity', 'battery', 'communication', 'sensor']
-        
-        if any(word in user_query.lower() for word in troubleshooting_keywords) and any(word in user_query.lower() for word in alarm_keywords_for_troubleshooting):
-            # Extract alarm type from query
-            alarm_type = ""
-            for word in user_query.lower().split():
-                if word in alarm_keywords_for_troubleshooting and word not in ['alarm', 'alarms']:
-                    alarm_type = word
-                    break
-            
-            if not alarm_type:
-                # Try to extract from common patterns
-                if 'co2' in user_query.lower():
-                    alarm_type = 'co2'
-                elif 'filter' in user_query.lower():
-                    alarm_type = 'filter'
-                elif 'choke' in user_query.lower():
-                    alarm_type = 'choke'
-                elif 'pressure' in user_query.lower():
-                    alarm_type = 'pressure'
-                elif 'temperature' in user_query.lower():
-                    alarm_type = 'temperature'
-                elif 'humidity' in user_query.lower():
-                    alarm_type = 'humidity'
-                elif 'battery' in user_query.lower():
-                    alarm_type = 'battery'
-                elif 'communication' in user_query.lower():
-                    alarm_type = 'communication'
-                elif 'sensor' in user_query.lower():
-                    alarm_type = 'sensor'
-                else:
-                    alarm_type = 'general'
-            
-            return self._get_troubleshooting_steps(alarm_type)
-        
+
+        return self._get_predictive_maintenance_summary(system_type='all', days=days)
+    
+    def _route_troubleshooting(self, q: RoutedQuery, match) -> Optional[str]:
+        # PATCH: Troubleshooting queries (how to fix/diagnose alarms)
+        user_query = q.text
+        alarm_keywords_for_troubleshooting = TROUBLESHOOTING_ALARM_KEYWORDS
+        # Extract alarm type from query
+        alarm_type = ""
+        for word in user_query.lower().split():
+            if word in alarm_keywords_for_troubleshooting and word not in ['alarm', 'alarms']:
+                alarm_type = word
+                break
+
+        if not alarm_type:
+            # Try to extract from common patterns
+            if 'co2' in user_query.lower():
+                alarm_type = 'co2'
+            elif 'filter' in user_query.lower():
+                alarm_type = 'filter'
+            elif 'choke' in user_query.lower():
+                alarm_type = 'choke'
+            elif 'pressure' in user_query.lower():
+                alarm_type = 'pressure'
+            elif 'temperature' in user_query.lower():
+                alarm_type = 'temperature'
+            elif 'humidity' in user_query.lower():
+                alarm_type = 'humidity'
+            elif 'battery' in user_query.lower():
+                alarm_type = 'battery'
+            elif 'communication' in user_query.lower():
+                alarm_type = 'communication'
+            elif 'sensor' in user_query.lower():
+                alarm_type = 'sensor'
+            else:
+                alarm_type = 'general'
+
+        return self._get_troubleshooting_steps(alarm_type)
+    
+    def _route_alarms(self, q: RoutedQuery, match) -> Optional[str]:
         # PATCH: General alarm detection (AFTER troubleshooting detection)
-        alarm_keywords.extend(battery_keywords)
-        if any(kw in user_query.lower() for kw in alarm_keywords):
-            try:
-                args = {'user_query': user_query}
-                ql = user_query.lower()
-                if 'minor' in ql:
-                    args['severity'] = 'MINOR'
-                elif 'major' in ql:
-                    args['severity'] = 'MAJOR'
-                elif 'critical' in ql:
-                    args['severity'] = 'CRITICAL'
-                result = self._get_enhanced_alarms(args)
-                return result
-            except Exception as e:
-                return f"❌ Error processing alarm query: {str(e)}"
+        user_query = q.text
+        try:
+            args = {'user_query': user_query}
+            # This route has always preferred minor, then major, then critical when several are named
+            severity = next((sev for sev in ('MINOR', 'MAJOR', 'CRITICAL') if sev in q.entities.severities), None)
+            if severity:
+                args['severity'] = severity
+            result = self._get_enhanced_alarms(args)
+            return result
+        except Exception as e:
+            return f"❌ Error processing alarm query: {str(e)}"
+    
+    def _route_fan_speed_telemetry(self, q: RoutedQuery, match) -> Optional[str]:
         # PATCH: Fan speed telemetry queries
-        fan_speed_telemetry_keywords = ['fan speed', 'speed of', 'current speed', 'what is the speed']
-        if any(word in user_query.lower() for word in fan_speed_telemetry_keywords) and not is_fan_speed_control:
-            device_phrase = device or user_query
-            device_id = self._map_device_name_to_id(device_phrase)
-            if device_id:
-                value = self._get_device_telemetry_data(device_id, 'speed')
-                if value and not (isinstance(value, str) and value.startswith('❌')):
-                    value_str = str(value)
-                    # Map speed values to human-readable format
-                    if value_str == '0':
-                        speed_desc = 'Low'
-                    elif value_str == '1':
-                        speed_desc = 'Medium'
-                    elif value_str == '2':
-                        speed_desc = 'High'
-                    else:
-                        speed_desc = value_str
-                    
-                    # Get device name for better readability
-                    device_name = self._get_device_name_by_id(device_id)
-                    if device_name:
-                        return f"Fan Speed for {device_name} ({device_id}): {speed_desc} ({value_str})"
-                    else:
-                        return f"Fan Speed for {device_phrase or device_id}: {speed_desc} ({value_str})"
+        user_query, device = q.text, q.device
+        device_phrase = device or user_query
+        device_id = self._map_device_name_to_id(device_phrase)
+        if device_id:
+            value = self._get_device_telemetry_data(device_id, 'speed')
+            if value and not (isinstance(value, str) and value.startswith('❌')):
+                value_str = str(value)
+                # Map speed values to human-readable format
+                if value_str == '0':
+                    speed_desc = 'Low'
+                elif value_str == '1':
+                    speed_desc = 'Medium'
+                elif value_str == '2':
+                    speed_desc = 'High'
                 else:
-                    return f"❌ Unable to get fan speed for {device_phrase or device_id}. Please check if the device supports speed control."
-            else:
-                return f"❌ Unable to find device for '{device_phrase}'. Please check the room/device name."
+                    speed_desc = value_str
 
-        # PATCH: Energy consumption queries (MUST BE BEFORE device list handler)
-        energy_keywords = ['energy consumption', 'power consumption', 'electricity usage', 'energy usage', 
-                          'power usage', 'energy data', 'power data', 'kwh', 'voltage', 'current', 
-                          'energy efficiency', 'energy consumption', 'power consumption']
-        if any(word in user_query.lower() for word in energy_keywords):
-            
-            # Extract device or location from query
-            device_id = None
-            location = None
-            
-            # Check for device ID in query
-            import re
-            device_match = re.search(r'device\s+([a-f0-9\-]+)', user_query, re.IGNORECASE)
-            if device_match:
-                device_id = device_match.group(1)
-            
-            # Check for location in query - Enhanced extraction
-            location_keywords = ['room', 'floor', 'location', 'area', 'wing', 'building']
-            location = None
-            
-            # First, try to extract specific patterns from the original query
-            # Pattern for "Show me electricity usage for all devices in 2nd floor"
-            # Look for "in 2nd floor" or similar patterns
-            in_pattern = re.search(r'in\s+(\d+(?:st|nd|rd|th)?\s*floor|room\s*\d+|building\s*\w+|area\s*\w+|wing\s*\w+)', user_query.lower())
-            if in_pattern:
-                location = in_pattern.group(1).strip()
+                # Get device name for better readability
+                device_name = self._get_device_name_by_id(device_id)
+                if device_name:
+                    return f"Fan Speed for {device_name} ({device_id}): {speed_desc} ({value_str})"
+                else:
+                    return f"Fan Speed for {device_phrase or device_id}: {speed_desc} ({value_str})"
             else:
-                # Try to find any location pattern in the query
-                location_pattern = re.search(r'(\d+(?:st|nd|rd|th)?\s*floor|room\s*\d+|building\s*\w+|area\s*\w+|wing\s*\w+)', user_query.lower())
-                if location_pattern:
-                    location = location_pattern.group(1).strip()
-            
-            # Clean up location if it contains extra words
-            if location:
-                # Remove common extra words that might be captured
-                extra_words = ['all', 'devices', 'in', 'for', 'the', 'show', 'me', 'get', 'what', 'is', 'usage', 'electricity']
-                location_words = location.split()
-                cleaned_words = [word for word in location_words if word.lower() not in extra_words]
-                location = ' '.join(cleaned_words).strip()
-                
-                # Additional cleanup for specific patterns
-                if location and 'all devices in' in location.lower():
-                    # Extract just the location part after "all devices in"
-                    match = re.search(r'all devices in\s+(.+)', location.lower())
-                    if match:
-                        location = match.group(1).strip()
-            
-            # If no specific pattern found, try general patterns
-            if not location:
-                for keyword in location_keywords:
-                    if keyword in user_query.lower():
-                        # Pattern 1: "for [location]" - more specific
-                        pattern1 = re.search(rf'for\s+([^,\s]+(?:\s+[^,\s]+)*?)(?:\s+in\s+|\s+for\s+|\s*$)', user_query.lower())
-                        if pattern1:
-                            location = pattern1.group(1).strip()
-                            break
-                        
-                        # Pattern 2: "in [location]" - more specific
-                        pattern2 = re.search(rf'in\s+([^,\s]+(?:\s+[^,\s]+)*?)(?:\s+in\s+|\s+for\s+|\s*$)', user_query.lower())
-                        if pattern2:
-                            location = pattern2.group(1).strip()
-                            break
-                        
-                        # Pattern 3: "[location] [keyword]" (e.g., "Room 50")
-                        pattern3 = re.search(rf'([^,\s]+(?:\s+[^,\s]+)*?)\s+{keyword}', user_query.lower())
-                        if pattern3:
-                            location = pattern3.group(1).strip()
-                            break
-                        
-                        # Pattern 4: "[keyword] [location]" (e.g., "room 50")
-                        pattern4 = re.search(rf'{keyword}\s+([^,\s]+(?:\s+[^,\s]+)*?)(?:\s+in\s+|\s+for\s+|\s*$)', user_query.lower())
-                        if pattern4:
-                            location = pattern4.group(1).strip()
-                            break
-            
-            # If no specific location found, try to extract any location-like terms
-            if not location:
-                # Look for common location patterns
-                location_patterns = [
-                    r'(\d+(?:st|nd|rd|th)\s+floor)',
-                    r'(room\s+\d+)',
-                    r'(building\s+\w+)',
-                    r'(area\s+\w+)',
-                    r'(wing\s+\w+)'
-                ]
-                
-                for pattern in location_patterns:
-                    match = re.search(pattern, user_query.lower())
-                    if match:
-                        location = match.group(1).strip()
-                        break
-            
-            # Clean up location if it contains extra words
-            if location:
-                # Remove common extra words that might be captured
-                extra_words = ['all', 'devices', 'in', 'for', 'the', 'show', 'me', 'get', 'what', 'is', 'usage', 'electricity']
-                location_words = location.split()
-                cleaned_words = [word for word in location_words if word.lower() not in extra_words]
-                location = ' '.join(cleaned_words).strip()
-                
-                # Additional cleanup for specific patterns
-                if location and 'all devices in' in location.lower():
-                    # Extract just the location part after "all devices in"
-                    match = re.search(r'all devices in\s+(.+)', location.lower())
-                    if match:
-                        location = match.group(1).strip()
-                
-                # Additional cleanup for "for all devices in" pattern
-                if location and 'for all devices in' in location.lower():
-                    # Extract just the location part after "for all devices in"
-                    match = re.search(r'for all devices in\s+(.+)', location.lower())
-                    if match:
-                        location = match.group(1).strip()
-                
-                # Additional cleanup for "usage for all devices in" pattern
-                if location and 'usage for all devices in' in location.lower():
-                    # Extract just the location part after "usage for all devices in"
-                    match = re.search(r'usage for all devices in\s+(.+)', location.lower())
-                    if match:
-                        location = match.group(1).strip()
-            
-            # Debug logging
-            print(f"[DEBUG] Energy consumption query - device_id: {device_id}, location: {location}")
-            
-            return self._get_energy_consumption_data({
-                'device_id': device_id,
-                'location': location,
-                'timeframe': 'current'
-            })
-        
+                return f"❌ Unable to get fan speed for {device_phrase or device_id}. Please check if the device supports speed control."
+        else:
+            return f"❌ Unable to find device for '{device_phrase}'. Please check the room/device name."
+    
+    def _route_energy_consumption(self, q: RoutedQuery, match) -> Optional[str]:
+        # PATCH: Energy consumption queries (MUST BE BEFORE device list handler)
+        entities = q.entities
+        device_id = entities.device
+        location = entities.location_phrase
+
+        # Debug logging
+        print(f"[DEBUG] Energy consumption query - device_id: {device_id}, location: {location}")
+
+        return self._get_energy_consumption_data({
+            'device_id': device_id,
+            'location': location,
+            'timeframe': 'current'
+        })
+    
+    def _route_device_list(self, q: RoutedQuery, match) -> Optional[str]:
         # PATCH: Device inventory/listing queries
-        device_list_keywords = ['all devices', 'list devices', 'show devices', 'active devices', 'device inventory', 'available devices', 'device list']
-        if any(word in user_query.lower() for word in device_list_keywords):
-            devices = self._get_devices_list()
-            return self._format_full_device_summary(devices)
-        # PATCH: System communication status direct handling
-        communication_keywords = ['communication', 'system communication', 'connection', 'connectivity']
-        if any(word in user_query.lower() for word in communication_keywords):
-            return self._get_system_communication_status({'query': user_query})
-        
+        devices = self._get_devices_list()
+        return self._format_full_device_summary(devices)
+    
+    def _route_air_quality(self, q: RoutedQuery, match) -> Optional[str]:
         # PATCH: Air Quality/CO2/PM direct handling
-        air_quality_keywords = ['co2', 'air quality', 'pm2.5', 'pm10', 'aqi']
-        if any(word in user_query.lower() for word in air_quality_keywords):
-            return self._get_enhanced_alarms({'type': 'air_quality', 'query': user_query})
-        
+        return self._get_enhanced_alarms({'type': 'air_quality', 'query': q.text})
+    
+    def _route_hindi_temperature(self, q: RoutedQuery, match) -> Optional[str]:
         # PATCH: Hindi/Hinglish temperature queries
-        hindi_temp_keywords = ['taapman', 'tapmaan', 'taapmaan', 'tapman', 'तापमान']
-        if any(word in user_query.lower() for word in hindi_temp_keywords):
-            # Apply Hindi word mapping to get English equivalent
-            mapped_query = map_hindi_to_english(user_query)
-            # Extract location from the query
-            location_phrase = device or ''
-            # Try to extract location from the query if not provided
-            if not location_phrase:
-                # Look for common location patterns in Hindi/Hinglish
-                location_patterns = [
-                    r'([\w\- ]+)? (?:ka|ki|ke) (?:taapman|tapmaan|taapmaan|tapman|तापमान)',
-                    r'(?:taapman|tapmaan|taapmaan|tapman|तापमान) (?:[\w\- ]+)? (?:ka|ki|ke)',
-                    r'([\w\- ]+)? (?:mein|में|मे) (?:taapman|tapmaan|taapmaan|tapman|तापमान)',
-                    r'(?:taapman|tapmaan|taapmaan|tapman|तापमान) (?:[\w\- ]+)? (?:mein|में|मे)'
-                ]
-                for pattern in location_patterns:
-                    match = re.search(pattern, user_query, re.IGNORECASE)
-                    if match and match.group(1):
-                        location_phrase = match.group(1).strip()
-                        break
-            
-            # Map the location phrase to English
-            location_phrase = map_hindi_to_english(location_phrase)
-            device_id = self._map_device_name_to_id(location_phrase)
-            if device_id:
-                value = self._get_device_telemetry_data(device_id, 'temperature')
-                if value and not (isinstance(value, str) and value.startswith('❌')):
-                    value_str = str(value)
-                    if not value_str.strip().endswith('°C'):
-                        value_str = f"{value_str}°C"
-                    device_name = self._get_device_name_by_id(device_id)
-                    if device_name:
-                        return f"🌡️ Temperature for {device_name} ({device_id}): {value_str}"
-                    else:
-                        return f"🌡️ Temperature for {location_phrase or device_id}: {value_str}"
+        user_query, device = q.text, q.device
+        # Apply Hindi word mapping to get English equivalent
+        mapped_query = map_hindi_to_english(user_query)
+        # Extract location from the query
+        location_phrase = device or ''
+        # Try to extract location from the query if not provided
+        if not location_phrase:
+            # Look for common location patterns in Hindi/Hinglish
+            location_patterns = [
+                r'([\w\- ]+)? (?:ka|ki|ke) (?:taapman|tapmaan|taapmaan|tapman|तापमान)',
+                r'(?:taapman|tapmaan|taapmaan|tapman|तापमान) (?:[\w\- ]+)? (?:ka|ki|ke)',
+                r'([\w\- ]+)? (?:mein|में|मे) (?:taapman|tapmaan|taapmaan|tapman|तापमान)',
+                r'(?:taapman|tapmaan|taapmaan|tapman|तापमान) (?:[\w\- ]+)? (?:mein|में|मे)'
+            ]
+            for pattern in location_patterns:
+                match = re.search(pattern, user_query, re.IGNORECASE)
+                if match and match.group(1):
+                    location_phrase = match.group(1).strip()
+                    break
+
+        # Map the location phrase to English
+        location_phrase = map_hindi_to_english(location_phrase)
+        device_id = self._map_device_name_to_id(location_phrase)
+        if device_id:
+            value = self._get_device_telemetry_data(device_id, 'temperature')
+            if value and not (isinstance(value, str) and value.startswith('❌')):
+                value_str = str(value)
+                if not value_str.strip().endswith('°C'):
+                    value_str = f"{value_str}°C"
+                device_name = self._get_device_name_by_id(device_id)
+                if device_name:
+                    return f"🌡️ Temperature for {device_name} ({device_id}): {value_str}"
                 else:
-                    return f"❌ Unable to get temperature for {location_phrase or device_id}. Please check if the device supports temperature monitoring."
+                    return f"🌡️ Temperature for {location_phrase or device_id}: {value_str}"
             else:
-                return f"❌ Unable to find device for '{location_phrase}'. Please check the room/device name."
-        
-        # PATCH: Fallback
-        return "❌ Unable to process your query. Please try rephrasing or contact support if the issue persists."
+                return f"❌ Unable to get temperature for {location_phrase or device_id}. Please check if the device supports temperature monitoring."
+        else:
+            return f"❌ Unable to find device for '{location_phrase}'. Please check the room/device name."
     
     def _get_device_telemetry_data(self, device_id: str, key: str) -> str:
         """Get telemetry data for a device with enhanced debugging and fallback keys."""
@@ -1820,11 +1809,7 @@ class EnhancedAgenticInferrixAgent:
                 'pressure': ['pressure', 'air pressure', 'static pressure', 'differential pressure', 'Pressure']
             }
             
-            # First, get all available keys for this device
-            all_keys_endpoint = f"plugins/telemetry/DEVICE/{device_id}/keys/timeseries"
-            all_keys = self._make_api_request(all_keys_endpoint)
-            
-            if isinstance(all_keys, list) and all_keys:
+            def find_candidate_keys(all_keys):
                 # Try to find the exact key or similar keys
                 matching_keys = []
                 for available_key in all_keys:
@@ -1833,51 +1818,29 @@ class EnhancedAgenticInferrixAgent:
                     elif key.lower() in available_key.lower():
                         matching_keys.append(available_key)
                 
-                # Try matching keys first
-                for matching_key in matching_keys:
-                    try:
-                        endpoint = f"plugins/telemetry/DEVICE/{device_id}/values/timeseries?keys={matching_key}"
-                        telemetry_data = self._make_api_request(endpoint)
-                        
-                        if isinstance(telemetry_data, dict) and matching_key in telemetry_data and telemetry_data[matching_key]:
-                            value = telemetry_data[matching_key]
-                            if isinstance(value, list) and len(value) > 0:
-                                result = value[0].get('value', None)
-                                if result is not None and result != 'None':
-                                    return str(result)
-                            elif isinstance(value, dict):
-                                result = value.get('value', None)
-                                if result is not None and result != 'None':
-                                    return str(result)
-                            else:
-                                if value is not None and value != 'None':
-                                    return str(value)
-                    except Exception as e:
-                        continue
-                
-                # Try fallback keys if no matching keys found
-                if key in fallback_keys:
-                    for fallback_key in fallback_keys[key]:
-                        if fallback_key in all_keys:  # Only try keys that actually exist
-                            try:
-                                fallback_endpoint = f"plugins/telemetry/DEVICE/{device_id}/values/timeseries?keys={fallback_key}"
-                                fallback_data = self._make_api_request(fallback_endpoint)
-                                
-                                if isinstance(fallback_data, dict) and fallback_key in fallback_data and fallback_data[fallback_key]:
-                                    value = fallback_data[fallback_key]
-                                    if isinstance(value, list) and len(value) > 0:
-                                        result = value[0].get('value', None)
-                                        if result is not None and result != 'None':
-                                            return str(result)
-                                    elif isinstance(value, dict):
-                                        result = value.get('value', None)
-                                        if result is not None and result != 'None':
-                                            return str(result)
-                                    else:
-                                        if value is not None and value != 'None':
-                                            return str(value)
-                            except Exception as e:
-                                continue
+                # Fallback keys are only tried if they actually exist on the device
+                candidate_keys = list(matching_keys)
+                for fallback_key in fallback_keys.get(key, []):
+                    if fallback_key in all_keys and fallback_key not in candidate_keys:
+                        candidate_keys.append(fallback_key)
+                return candidate_keys
+            
+            # First, get all available keys for this device (key catalog)
+            all_keys = self._get_available_telemetry_keys(device_id)
+            candidate_keys = find_candidate_keys(all_keys) if all_keys else []
+            if not candidate_keys:
+                # Catalog miss: the key may have been added since we cached the list
+                all_keys = self._get_available_telemetry_keys(device_id, refresh=True)
+                candidate_keys = find_candidate_keys(all_keys) if all_keys else []
+            
+            # Resolve the requested key and all its fallbacks in one round-trip,
+            # then pick the first candidate (in priority order) that has data
+            if candidate_keys:
+                latest_values = self._get_latest_telemetry_values(device_id, candidate_keys)
+                for candidate_key in candidate_keys:
+                    result = self._extract_latest_value(latest_values.get(candidate_key))
+                    if result is not None:
+                        return result
             
             # If still no data found, provide detailed diagnostic information
             
@@ -1915,6 +1878,35 @@ class EnhancedAgenticInferrixAgent:
         except Exception as e:
             return f"❌ Error fetching telemetry data: {str(e)}. Please check your connection to Inferrix API or contact support."
     
+    def _get_latest_telemetry_values(self, device_id: str, keys: List[str]) -> Dict:
+        """Fetch the latest values for several telemetry keys of one device in a single request"""
+        if not keys:
+            return {}
+        endpoint = f"plugins/telemetry/DEVICE/{device_id}/values/timeseries"
+        telemetry_data = self._make_api_request(endpoint, data={"keys": ",".join(keys)})
+        if not isinstance(telemetry_data, dict) or self._is_api_error(telemetry_data):
+            return {}
+        return telemetry_data
+
+    @staticmethod
+    def _is_api_error(result: Dict) -> bool:
+        """True for _make_api_request's error dicts; a device may report a telemetry key named 'error'"""
+        return isinstance(result.get('error'), str) and 'message' in result
+    
+    def _extract_latest_value(self, value) -> Optional[str]:
+        """Return the latest reading from a timeseries value (list, dict or scalar) as a string"""
+        if value is None or value == [] or value == {}:
+            return None
+        if isinstance(value, list):
+            result = value[0].get('value', None) if isinstance(value[0], dict) else value[0]
+        elif isinstance(value, dict):
+            result = value.get('value', None)
+        else:
+            result = value
+        if result is None or result == 'None':
+            return None
+        return str(result)
+    
     def _check_device_status(self, args: Dict) -> str:
         """Check device status, connectivity, and available telemetry data for diagnostics."""
         entity_id = args.get('entityId', '')
@@ -1997,10 +1989,21 @@ class EnhancedAgenticInferrixAgent:
         except Exception as e:
             return f"❌ Error checking device status: {str(e)}"
 
-    def _get_available_telemetry_keys(self, device_id: str) -> list:
-        """Fetch all available telemetry keys for a device."""
+    def _get_available_telemetry_keys(self, device_id: str, entity_type: str = "DEVICE", refresh: bool = False) -> list:
+        """Fetch all available telemetry keys for a device (served from the key catalog when cached)."""
+        if not refresh and entity_type == "DEVICE":
+            # Wait for a prefetch of these keys if one is in flight; it fills the catalog
+            join_prefetch(('telemetry_keys', device_id))
+        return self._load_telemetry_keys(device_id, entity_type, refresh)
+
+    def _load_telemetry_keys(self, device_id: str, entity_type: str = "DEVICE", refresh: bool = False) -> list:
         try:
-            endpoint = f"plugins/telemetry/DEVICE/{device_id}/keys/timeseries"
+            if not refresh:
+                cached_keys = self.telemetry_key_catalog.get(self._api_token, entity_type, device_id)
+                if cached_keys is not None:
+                    return cached_keys
+            
+            endpoint = f"plugins/telemetry/{entity_type}/{device_id}/keys/timeseries"
             keys_data = self._make_api_request(endpoint)
             
             # Handle API errors
@@ -2010,10 +2013,15 @@ class EnhancedAgenticInferrixAgent:
                 return []
                 
             if isinstance(keys_data, dict):
-                return list(keys_data.keys()) if keys_data else []
+                keys = list(keys_data.keys()) if keys_data else []
             elif isinstance(keys_data, list):
-                return keys_data
-            return []
+                keys = keys_data
+            else:
+                keys = []
+            # Empty lists are not cached: the device may simply not have reported yet
+            if keys:
+                self.telemetry_key_catalog.put(self._api_token, entity_type, device_id, keys)
+            return keys
         except Exception as e:
             print(f"❌ Exception fetching telemetry keys for device {device_id}: {str(e)}")
             return []
@@ -2376,9 +2384,11 @@ class EnhancedAgenticInferrixAgent:
             available_keys = self._get_available_telemetry_keys(device_id)
             telemetry_data = {}
             if include_telemetry and available_keys:
+                # Latest values for every key in one request
+                latest_values = self._get_latest_telemetry_values(device_id, available_keys)
                 for key in available_keys:
-                    value = self._get_device_telemetry_data(device_id, key)
-                    telemetry_data[key] = value
+                    value = self._extract_latest_value(latest_values.get(key))
+                    telemetry_data[key] = value if value is not None else 'No data'
             # Device status
             status = device_data.get('status', 'Unknown')
             last_seen = device_data.get('lastActive', None)
@@ -2425,35 +2435,51 @@ class EnhancedAgenticInferrixAgent:
     def _get_device_name_by_id(self, device_id: str) -> Optional[str]:
         """Get device name by device ID."""
         try:
-            # Get all devices and find the one with matching ID
-            devices = self._get_devices_list()
-            for device in devices:
-                if device.get('id', {}).get('id') == device_id:
-                    return device.get('name', '')
-            return None
+            device = self.device_directory.get_device(self._api_token, device_id)
+            return device.get('name', '') if device else None
         except Exception as e:
             return None
 
+    def _fetch_device_directory(self, token: str) -> List[Dict]:
+        """Fetch the device list from Inferrix for the device directory (raises on API errors)"""
+        # Walk every page so tenants with more than one page of devices are complete
+        return list(inferrix_client.iter_devices(token))
+
     def _get_devices_list(self, token: str = None) -> List[Dict]:
-        """Get list of devices for multi-device processing"""
+        """Get list of devices for multi-device processing (served from the device directory)"""
         try:
             # Use provided token or fall back to stored API token
             api_token = token or self._api_token
-            devices_data = self._make_api_request("user/devices?page=0&pageSize=100", token=api_token)
-            
-            # Handle API errors with proper error messages
-            if isinstance(devices_data, dict) and 'error' in devices_data:
-                error_msg = devices_data.get('error', 'Unknown error')
-                print(f"❌ Error fetching devices: {error_msg}")
+            if not api_token:
+                print("❌ Error fetching devices: No token provided")
                 return []
-                
-            if isinstance(devices_data, dict) and 'data' in devices_data:
-                return devices_data['data']
-            return []
+            return self.device_directory.get_devices(api_token)
         except Exception as e:
-            print(f"❌ Exception fetching devices: {str(e)}")
+            print(f"❌ Error fetching devices: {str(e)}")
             return []
     
+    def _iter_devices(self, token: str = None):
+        """Yield every device: from the directory when cached, otherwise page by page.
+
+        A page that fails mid-walk raises instead of ending the walk, so fleet-wide answers
+        never present a partial fleet as the whole one.
+        """
+        api_token = token or self._api_token
+        if not api_token:
+            return
+        try:
+            devices = self.device_directory.peek_devices(api_token)
+        except Exception:
+            devices = None
+        if devices is not None:
+            yield from devices
+            return
+        yield from inferrix_client.iter_devices(api_token)
+
+    def invalidate_device_directory(self, token: str = None):
+        """Drop cached devices so the next lookup refetches (e.g. after devices are added)"""
+        self.device_directory.invalidate(token)
+    
     def _get_available_device_ids(self) -> List[str]:
         """Get list of available device IDs"""
         try:
@@ -2480,12 +2506,8 @@ class EnhancedAgenticInferrixAgent:
         matched_devices = []
         location_candidates = []
         device_location_map = {}
-        for device in devices:
-            device_id = device.get('id')
-            if isinstance(device_id, dict):
-                device_id = device_id.get('id', '')
-            if not device_id:
-                continue
+        
+        def fetch_location_attribute(device_id):
             location_value = ''
             attr_endpoint = f"plugins/telemetry/DEVICE/{device_id}/values/attributes?keys=location"
             attr_data = self._make_api_request(attr_endpoint)
@@ -2496,6 +2518,19 @@ class EnhancedAgenticInferrixAgent:
                         break
             elif isinstance(attr_data, dict) and 'location' in attr_data:
                 location_value = attr_data['location']
+            return location_value
+        
+        with_ids = []
+        for device in devices:
+            device_id = device.get('id')
+            if isinstance(device_id, dict):
+                device_id = device_id.get('id', '')
+            if device_id:
+                with_ids.append((device, device_id))
+        # Fetch location attributes concurrently, then match in device order
+        location_values = self._fan_out(fetch_location_attribute, [device_id for _, device_id in with_ids], default='')
+        
+        for (device, device_id), location_value in zip(with_ids, location_values):
             if not location_value:
                 location_value = device.get('name', '')
             location_candidates.append(location_value)
@@ -2548,12 +2583,34 @@ class EnhancedAgenticInferrixAgent:
             self.last_available_locations = room_names[:20]
         return matched_devices
 
+    def _get_device_index(self, token: str = None) -> Optional[DeviceIndex]:
+        """Get the device index built at the last directory refresh"""
+        try:
+            api_token = token or self._api_token
+            if not api_token:
+                return None
+            return self.device_directory.get_index(api_token)
+        except Exception as e:
+            print(f"❌ Error loading device index: {str(e)}")
+            return None
+    
     def _map_device_name_to_id(self, device_name: str) -> Optional[str]:
+        """Resolve a device/location phrase to a device id (memoized per request)"""
+        context = current_context()
+        if context is None or not device_name:
+            return self._resolve_device_name_to_id(device_name)
+        cache_key = ('device_name_to_id', device_name)
+        if cache_key not in context.cache:
+            context.cache[cache_key] = self._resolve_device_name_to_id(device_name)
+        return context.cache[cache_key]
+
+    def _resolve_device_name_to_id(self, device_name: str) -> Optional[str]:
         if not device_name:
             return None
         
-        # Get all devices
-        devices = self._get_devices_list() or []
+        # All lookups below use the index built once per directory refresh
+        index = self._get_device_index() or DeviceIndex([], normalize_location_name)
+        devices = index.devices
         
         # Debug logging for device matching
         print(f"[DEBUG] Device matching - Input: '{device_name}'")
@@ -2568,95 +2625,59 @@ class EnhancedAgenticInferrixAgent:
         # Users typically ask: "temperature in room 201", "thermostat at 3rd floor", etc.
         normalized_input = normalize_location_name(device_name)
         
-        # Create location mapping
-        norm_map = {}
-        for device in devices:
-            name = device.get('name', '')
-            device_id = device.get('id')
-            if isinstance(device_id, dict):
-                device_id = device_id.get('id', '')
-            norm_name = normalize_location_name(name)
-            norm_map.setdefault(norm_name, []).append((device_id, name))
-        
         # 1a. Exact location match
-        if normalized_input in norm_map:
-            best = sorted(norm_map[normalized_input], key=lambda x: x[1])[0][0]
-            return best
+        if normalized_input in index.best_for_location:
+            return index.best_for_location[normalized_input]
         
         # 1b. Substring location match
-        for norm_name, devs in norm_map.items():
-            if normalized_input in norm_name or norm_name in normalized_input:
-                best = sorted(devs, key=lambda x: x[1])[0][0]
-                return best
+        overlap = index.locations.first_overlap(normalized_input)
+        if overlap is not None:
+            return index.best_for_location[overlap]
         
-        # 1c. Enhanced substring matching for room numbers
+        # 1c. Enhanced matching for room numbers
         # Handle cases where user says "room 50" but device is "2froom50"
         if 'room' in normalized_input:
             room_match = re.search(r'room(\d+)', normalized_input)
             if room_match:
                 room_number = room_match.group(1)
                 print(f"[DEBUG] Device matching - Found room number: {room_number}")
-                # First try exact room number match
-                for norm_name, devs in norm_map.items():
-                    if f'room{room_number}' in norm_name:
-                        best = sorted(devs, key=lambda x: x[1])[0][0]
-                        print(f"[DEBUG] Device matching - Exact room match found: {norm_name} -> {best}")
-                        return best
+                # First try exact room number match: first location naming the room,
+                # then the alphabetically first device there (best_for_location)
+                room_keys = index.locations.containing(f'room{room_number}')
+                if room_keys:
+                    best = index.best_for_location[room_keys[0]]
+                    print(f"[DEBUG] Device matching - Exact room match found: {room_keys[0]} -> {best}")
+                    return best
                 
                 # If no exact match, try floor + room combination
                 floor_match = re.search(r'(\d+)(?:st|nd|rd|th)?\s*(?:floor|f)', normalized_input, re.IGNORECASE)
                 if floor_match:
-                    floor = floor_match.group(1)
-                    floor_pattern = f"{floor}froom{room_number}"
-                    for norm_name, devs in norm_map.items():
-                        if floor_pattern in norm_name:
-                            best = sorted(devs, key=lambda x: x[1])[0][0]
-                            return best
-        
-        # 1d. Floor-based fuzzy matching (e.g., "3rd floor room 50") - ONLY if no specific room number found
+                    floor_room_keys = index.locations.containing(f"{floor_match.group(1)}froom{room_number}")
+                    if floor_room_keys:
+                        return index.best_for_location[floor_room_keys[0]]
+        
+        # 1d. Floor-based matching (e.g., "3rd floor") - ONLY if no specific room number found
         floor_match = re.match(r'(\d+)f', normalized_input)
         if floor_match and 'room' not in normalized_input:  # Only use fuzzy matching if no specific room mentioned
-            floor = floor_match.group(1)
-            floor_pattern = f"{floor}froom"
-            floor_devices = [d for d in devices if floor_pattern in normalize_location_name(d.get('name',''))]
+            floor_devices = index.floor_devices(floor_match.group(1))
             if floor_devices:
-                input_room = re.findall(r'room(\d+)', normalized_input)
-                if input_room:
-                    input_room = input_room[0]
-                    room_numbers = [(d, re.findall(r'room(\d+)', normalize_location_name(d.get('name','')))) for d in floor_devices]
-                    closest = None
-                    min_diff = 1000
-                    for d, nums in room_numbers:
-                        if nums:
-                            diff = abs(int(nums[0]) - int(input_room))
-                            if diff < min_diff:
-                                min_diff = diff
-                                closest = d
-                    if closest:
-                        return closest.get('id')
-                # If no room number, just return first device on floor
-                return floor_devices[0].get('id')
+                # No room number given, so return the first device on the floor
+                device_id = floor_devices[0].get('id')
+                if isinstance(device_id, dict):
+                    device_id = device_id.get('id', '')
+                return device_id
         
         # PRIORITY 2: DEVICE NAME MATCHING (When user specifies device type)
         # Users might ask: "IAQ Sensor V2", "thermostat", "HVAC unit", etc.
         
         # 2a. Exact device name match
-        for device in devices:
-            name = device.get('name', '').lower()
-            if name == device_name.lower():
-                device_id = device.get('id')
-                if isinstance(device_id, dict):
-                    device_id = device_id.get('id', '')
-                return device_id
+        if device_name.lower() in index.by_name:
+            return index.by_name[device_name.lower()]
         
         # 2b. Partial device name match
-        for device in devices:
-            name = device.get('name', '').lower()
-            if device_name.lower() in name or name in device_name.lower():
-                device_id = device.get('id')
-                if isinstance(device_id, dict):
-                    device_id = device_id.get('id', '')
-                return device_id
+        partial_name = index.lower_names.first_overlap(device_name.lower())
+        if partial_name is not None:
+            return index.by_name[partial_name]
         
         # PRIORITY 3: DEVICE ID MATCHING (Rare - when user specifies exact ID)
         # Check if the device_name contains a device ID pattern (e.g., "IAQ Sensor V2 - 300186")
@@ -2664,54 +2685,45 @@ class EnhancedAgenticInferrixAgent:
         if device_id_match:
             potential_device_id = device_id_match.group(1)
             
-            # Verify this device ID exists in our device list
-            for device in devices:
-                device_id = device.get('id')
-                if isinstance(device_id, dict):
-                    device_id = device_id.get('id', '')
-                if device_id and str(device_id) == potential_device_id:
-                    return potential_device_id
-                # Also check if the device name contains this ID
-                name = device.get('name', '')
-                if potential_device_id in name:
-                    return potential_device_id
+            # Verify this device ID exists, or a device name contains it
+            if potential_device_id.lower() in index.by_id or index.lower_names.containing(potential_device_id):
+                return potential_device_id
         
         # 3b. Exact device ID match
-        for device in devices:
-            device_id = device.get('id')
-            if isinstance(device_id, dict):
-                device_id = device_id.get('id', '')
-            if device_id and device_id.lower() == device_name.lower():
-                return device_id
+        if device_name.lower() in index.by_id:
+            return index.by_id[device_name.lower()]
         
         # PRIORITY 4: FUZZY MATCHING (Last resort)
-        device_names = [d.get('name', '') for d in devices]
-        matches = difflib.get_close_matches(device_name, device_names, n=1, cutoff=0.6)
+        # 4a. Correct misspelled words against the device-name vocabulary, then retry by name
+        corrected_name = index.correct_spelling(device_name)
+        if corrected_name != device_name.lower():
+            if corrected_name in index.by_name:
+                return index.by_name[corrected_name]
+            partial_name = index.lower_names.first_overlap(corrected_name)
+            if partial_name is not None:
+                return index.by_name[partial_name]
+        
+        # 4b. Shortlist names sharing the most trigrams before running difflib
+        shortlist = index.lower_names.ranked_by_overlap(device_name.lower(), 50) if len(devices) > 200 else list(index.by_name)
+        matches = difflib.get_close_matches(device_name.lower(), shortlist, n=1, cutoff=0.6)
         
         if matches:
-            for device in devices:
-                if device.get('name', '') == matches[0]:
-                    device_id = device.get('id')
-                    if isinstance(device_id, dict):
-                        device_id = device_id.get('id', '')
-                    return device_id
+            return index.by_name[matches[0]]
         
         # ERROR: No match found - provide helpful suggestions
-        self.last_available_devices = [d.get('name', '') for d in devices]
+        self.last_available_devices = list(index.names)
         
         # Suggest floor-specific rooms if floor was mentioned
         if floor_match and devices:
             floor = floor_match.group(1)
-            floor_pattern = f"{floor}froom"
-            floor_devices = [d for d in devices if floor_pattern in normalize_location_name(d.get('name',''))]
+            floor_devices = index.floor_devices(floor)
             if floor_devices:
                 room_names = [d.get('name','') for d in floor_devices]
                 raise Exception(f"❌ No device found for '{device_name}' on {floor}F. Available rooms on {floor}F: {', '.join(room_names)}")
         
         # Suggest all available devices
         if devices:
-            device_names = [d.get('name', '') for d in devices]
-            raise Exception(f"❌ No device found for '{device_name}'. Available devices: {', '.join(device_names[:20])}")
+            raise Exception(f"❌ No device found for '{device_name}'. Available devices: {', '.join(index.names[:20])}")
         
         raise Exception(f"❌ No device found for '{device_name}'. No devices available in the system.")
     
@@ -2729,9 +2741,10 @@ class EnhancedAgenticInferrixAgent:
         headers = {"X-Authorization": f"Bearer {api_token}"}
         try:
             if method == "GET":
-                response = requests.get(url, headers=headers, params=data, timeout=10)
+                response = inferrix_client.get(url, headers=headers, params=data, timeout=10)
             else:
-                response = requests.post(url, headers=headers, json=data, timeout=10)
+                self._mark_side_effect()
+                response = inferrix_client.post(url, headers=headers, json=data, timeout=10)
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -2744,12 +2757,12 @@ class EnhancedAgenticInferrixAgent:
         """Handle general queries with LLM"""
         try:
             # Check if LLM is available
-            if not client and not llm:
+            if not LLM_GATEWAY.available:
                 return ("❌ LLM service is not configured. Please set a valid OPENAI_API_KEY or GEMINI_API_KEY environment variable.\n\n"
                        "For your demo, please ensure you have a valid API key configured.")
 
             # Get recent context
-            recent_context = conversation_memory.get_recent_context(user, 3)
+            recent_context = conversation_memory.get_recent_context(user, 3) if conversation_memory else []
 
             # Enhanced system prompt for engineer-friendly, context-aware, robust NLU
             system_prompt = (
@@ -2790,28 +2803,42 @@ class EnhancedAgenticInferrixAgent:
             if recent_context:
                 context_prompt = "\n\nRecent conversation context:\n"
                 for ctx in recent_context:
-                    context_prompt += f"User: {ctx['query']}\nAssistant: {ctx['response'][:100]}...\n"
+                    context_prompt += f"User: {ctx['query'][:200]}\nAssistant: {ctx['response'][:100]}...\n"
+                context_prompt = fit_to_budget(context_prompt, PROMPT_CONTEXT_TOKENS)
             if device_id:
                 context_prompt += f"\nCurrent device context: {device_id}"
 
             full_prompt = f"{context_prompt}\n\nUser query: {query}\n\nProvide a helpful, informative response based on the context and query."
 
-            if client:
-                response = client.chat.completions.create(
-                    model="gpt-4o",
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": full_prompt}
-                    ],
-                    temperature=0.7,
-                    max_tokens=500
-                )
-                return response.choices[0].message.content or ""
-            else:
-                return "❌ LLM service is not available. Please check your API configuration."
+            return self._chat_completion(
+                [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": full_prompt}
+                ],
+                temperature=0.7,
+                max_tokens=500
+            )
         except Exception as e:
             return f"❌ Error processing general query: {str(e)}. Please check your LLM API configuration."
     
+    def _chat_completion(self, messages: List[Dict], temperature: float, max_tokens: int, heading: str = "",
+                         cache_ttl: Optional[float] = None) -> str:
+        """heading + the model's reply; both are streamed to the caller as produced when the query is streaming"""
+        context = current_context()
+        sink = context.stream if context is not None else None
+        if sink is not None:
+            sink(heading)
+        try:
+            return heading + LLM_GATEWAY.complete(messages, temperature=temperature, max_tokens=max_tokens, on_token=sink,
+                                                  cache_ttl=cache_ttl)
+        except LLMUnavailable as e:
+            # Busy or rate-limited provider: answer now instead of holding the chat worker
+            print(f"[DEBUG] LLM unavailable: {e}")
+            fallback = self._handle_error_gracefully(e, messages[-1]["content"])
+            if sink is not None:
+                sink(fallback)
+            return heading + fallback
+
     def _handle_error_gracefully(self, error: Exception, user_query: str) -> str:
         """Handle errors gracefully with helpful messages"""
         error_msg = str(error)
@@ -2980,20 +3007,22 @@ class EnhancedAgenticInferrixAgent:
         device_id = args.get('device_id', '')
         system_type = args.get('type', '')
         # Extract timeframe/location from query
-        timeframe = self.context_extractor.extract_timeframe_info(query) or 'last_24h'
-        location = self.context_extractor.extract_location_info(query)
-        
-        # Helper to call LLM for explanation
-        def llm_explanation(prompt):
-            if client:
-                response = client.chat.completions.create(
-                    model="gpt-4o",
-                    messages=[{"role": "user", "content": prompt}],
+        entities = extract_entities(query)
+        timeframe = entities.timeframe or 'last_24h'
+        location = entities.location_phrase
+        
+        # Helper to call LLM for explanation (the heading is streamed before the first token).
+        # Prompts are built from compacted data, so repeats within LLM_CACHE_TTL are served from the cache
+        def llm_explanation(heading, prompt):
+            if LLM_GATEWAY.available:
+                return self._chat_completion(
+                    [{"role": "user", "content": prompt}],
                     temperature=0.7,
-                    max_tokens=400
+                    max_tokens=400,
+                    heading=heading,
+                    cache_ttl=LLM_CACHE_TTL
                 )
-                return response.choices[0].message.content or ""
-            return "(LLM unavailable for explanation)"
+            return heading + "(LLM unavailable for explanation)"
 
         # 1. Trend Analysis & Forecasting
         if any(word in query for word in ['trend', 'forecast', 'predict future', 'usage pattern', 'occupancy trend', 'alarm trend']):
@@ -3004,9 +3033,9 @@ class EnhancedAgenticInferrixAgent:
             analytics = self._make_api_request(endpoint)
             if analytics and not analytics.get('error'):
                 # Summarize analytics data for LLM
-                summary = f"Analytics data for {metric} ({timeframe}):\n" + json.dumps(analytics, indent=2)
+                summary = f"Analytics data for {metric} ({timeframe}):\n" + to_prompt_json(analytics)
                 prompt = f"You are an analytics expert for building management. Given the following analytics data, provide a concise trend analysis and actionable forecast for the user.\n\n{summary}"
-                return "📈 **Trend Analysis & Forecasting**\n" + llm_explanation(prompt)
+                return llm_explanation("📈 **Trend Analysis & Forecasting**\n", prompt)
             # Fallback: Try timeseries for device
             if device_id:
                 endpoint = f"plugins/telemetry/DEVICE/{device_id}/values/timeseries?keys={metric}"
@@ -3019,8 +3048,8 @@ class EnhancedAgenticInferrixAgent:
                             first = float(values[0]['value'])
                             last = float(values[-1]['value'])
                             trend = 'increasing' if last > first else 'decreasing' if last < first else 'stable'
-                            prompt = f"Device {device_id} {metric} timeseries: {values[:5]}... Trend: {trend}. Give a user-friendly summary and forecast."
-                            return "📈 **Trend Analysis & Forecasting**\n" + llm_explanation(prompt)
+                            prompt = f"Device {device_id} {metric} timeseries summary: {to_prompt_json(values)}. Trend: {trend}. Give a user-friendly summary and forecast."
+                            return llm_explanation("📈 **Trend Analysis & Forecasting**\n", prompt)
                         except Exception:
                             pass
             return "❌ No analytics or telemetry data available for trend analysis."
@@ -3036,9 +3065,9 @@ class EnhancedAgenticInferrixAgent:
                     alarms = alarms_data['data']
                 telemetry = self._make_api_request(f"plugins/telemetry/DEVICE/{device_id}/values/timeseries?keys=temperature,humidity,energy")
             # Summarize for LLM
-            summary = f"Recent alarms: {json.dumps(alarms[:3], indent=2)}\nTelemetry: {json.dumps(telemetry, indent=2)}"
+            summary = f"Recent alarms: {to_prompt_json(alarms)}\nTelemetry: {to_prompt_json(telemetry)}"
             prompt = f"You are a root cause analysis expert. Given the following alarms and telemetry, identify likely root causes and suggest actions.\n\n{summary}"
-            return "🔍 **Root Cause Analysis**\n" + llm_explanation(prompt)
+            return llm_explanation("🔍 **Root Cause Analysis**\n", prompt)
 
         # 3. Automated Recommendations / Optimization
         if 'recommend' in query or 'optimization' in query or 'suggest' in query:
@@ -3047,9 +3076,9 @@ class EnhancedAgenticInferrixAgent:
             telemetry = {}
             if device_id:
                 telemetry = self._make_api_request(f"plugins/telemetry/DEVICE/{device_id}/values/timeseries?keys=temperature,humidity,energy")
-            summary = f"Analytics: {json.dumps(analytics, indent=2)}\nTelemetry: {json.dumps(telemetry, indent=2)}"
+            summary = f"Analytics: {to_prompt_json(analytics)}\nTelemetry: {to_prompt_json(telemetry)}"
             prompt = f"You are an AI assistant for building optimization. Given the following analytics and telemetry, provide 2-3 actionable recommendations for the user.\n\n{summary}"
-            return "🤖 **Automated Recommendations**\n" + llm_explanation(prompt)
+            return llm_explanation("🤖 **Automated Recommendations**\n", prompt)
 
         return "No advanced analytics available for this query."
 
@@ -3060,8 +3089,10 @@ class EnhancedAgenticInferrixAgent:
         query_lower = query.lower()
         words = query_lower.split()
         
-        # Get common words for the language
-        common_words = ENHANCED_COMMON_WORDS.get(language, [])
+        # Get the spelling index for the language
+        spelling = COMMON_WORD_SPELLING.get(language)
+        if spelling is None:
+            return query
         
         # Check each word for spelling
         corrected_words = []
@@ -3071,12 +3102,8 @@ class EnhancedAgenticInferrixAgent:
                 corrected_words.append(word)
                 continue
                 
-            # Find close matches
-            matches = difflib.get_close_matches(word, common_words, n=1, cutoff=0.8)
-            if matches and matches[0] != word:
-                corrected_words.append(matches[0])
-            else:
-                corrected_words.append(word)
+            # Find the closest vocabulary word within the typo budget
+            corrected_words.append(spelling.lookup(word, typo_budget(word)) or word)
         
         corrected_query = ' '.join(corrected_words)
         return corrected_query if corrected_query != query_lower else query
@@ -3085,35 +3112,7 @@ class EnhancedAgenticInferrixAgent:
         """Extract location information from query with improved floor+room handling."""
         if not query:
             return None
-        query_lower = query.lower()
-        import re
-        # Find floor (e.g., 'second floor', '2nd floor', '2f')
-        floor = None
-        floor_match = re.search(r'(\d+)(?:st|nd|rd|th)?\s*f(?:loor)?', query_lower)
-        if floor_match:
-            floor = f"{floor_match.group(1)}f"
-        else:
-            # Also match 'first floor', 'second floor', etc.
-            floor_words = {'first': '1f', 'second': '2f', 'third': '3f', 'fourth': '4f', 'fifth': '5f', 'sixth': '6f', 'seventh': '7f', 'eighth': '8f', 'ninth': '9f', 'tenth': '10f'}
-            for word, val in floor_words.items():
-                if word + ' floor' in query_lower:
-                    floor = val
-                    break
-        # Find room (e.g., 'room 50')
-        room = None
-        room_match = re.search(r'room\s*(\d+)', query_lower)
-        if room_match:
-            room = f"room{room_match.group(1)}"
-        # Combine floor and room if both found
-        if floor and room:
-            return f"{floor}{room}"
-        elif room:
-            return room
-        elif floor:
-            return floor
-        return None
-    
-
+        return extract_entities(query).location_key
     
     def _get_sub_location_guidance(self, location: str, language: str = 'en') -> str:
         """Get sub-location guidance for ambiguous locations"""
@@ -3167,20 +3166,22 @@ class EnhancedAgenticInferrixAgent:
         response += "💡 **Tip:** Try asking about a specific location for detailed information."
         return response
 
+    def _fetch_active_alarm_page(self):
+        """First page of active alarms, newest first (also prefetched on query arrival)"""
+        # Use robust v2/alarms endpoint and safe params
+        params: dict = {
+            'pageSize': 100,
+            'page': 0,
+            'sortProperty': 'createdTime',
+            'sortOrder': 'DESC',
+            'statusList': 'ACTIVE'
+        }
+        return self._make_api_request("v2/alarms", method="GET", data=params, token=self._api_token)
+
     def _get_enhanced_alarms(self, args: Dict) -> str:
         """Get enhanced alarms with better filtering and formatting."""
         try:
-            # Use robust v2/alarms endpoint and safe params
-            params: dict = {
-                'pageSize': 100,
-                'page': 0,
-                'sortProperty': 'createdTime',
-                'sortOrder': 'DESC',
-                'statusList': 'ACTIVE'
-            }
-            endpoint = "v2/alarms"
-            import urllib.parse
-            alarms_data = self._make_api_request(endpoint, method="GET", data=params, token=self._api_token)
+            alarms_data = join_prefetch('active_alarms') or self._fetch_active_alarm_page()
             if isinstance(alarms_data, dict) and 'error' in alarms_data:
                 error_msg = alarms_data.get('error', 'Unknown error')
                 # PATCH: Special handling for 401 token expired
@@ -3943,10 +3944,10 @@ class EnhancedAgenticInferrixAgent:
         response += "🌡️ **Environmental Metrics:**\n"
         try:
             # Get real temperature and humidity data from available devices
-            devices = self._make_api_request("devices?pageSize=10&page=0", token=self._api_token)
-            if isinstance(devices, dict) and 'data' in devices and devices['data']:
+            # Only the first device is needed, so stop after the first page
+            first_device = next(self._iter_devices(), None)
+            if first_device:
                 # Use the first available device for environmental data
-                first_device = devices['data'][0]
                 device_id = first_device.get('id', {}).get('id') if isinstance(first_device.get('id'), dict) else first_device.get('id')
                 if device_id:
                     temp_data = self._get_device_telemetry_data(device_id, "temperature")
@@ -4017,10 +4018,10 @@ class EnhancedAgenticInferrixAgent:
         response += "**Step 1: Energy Analysis**\n"
         try:
             # Get real energy consumption data from available devices
-            devices = self._make_api_request("devices?pageSize=10&page=0", token=self._api_token)
-            if isinstance(devices, dict) and 'data' in devices and devices['data']:
+            # Only the first device is needed, so stop after the first page
+            first_device = next(self._iter_devices(), None)
+            if first_device:
                 # Use the first available device for energy data
-                first_device = devices['data'][0]
                 device_id = first_device.get('id', {}).get('id') if isinstance(first_device.get('id'), dict) else first_device.get('id')
                 if device_id:
                     energy_data = self._get_device_telemetry_data(device_id, "energy")
@@ -4360,10 +4361,16 @@ class EnhancedAgenticInferrixAgent:
         except (ValueError, TypeError):
             return False, f"❌ Invalid temperature value: {temperature_value}. Please provide a valid number."
 
+    def _mark_side_effect(self):
+        """Record that the current query wrote to Inferrix (disables response caching for it)"""
+        context = current_context()
+        if context is not None:
+            context.side_effects = True
+
     def _send_control_command(self, entity_type, entity_id, desired_key, value, location=None, token=None):
-        # Always fetch available telemetry keys before sending control command
-        keys_endpoint = f"plugins/telemetry/{entity_type}/{entity_id}/keys/timeseries"
-        keys = self._make_api_request(keys_endpoint)
+        self._mark_side_effect()
+        # Available telemetry keys come from the key catalog shared with reads
+        keys = self._get_available_telemetry_keys(entity_id, entity_type)
         # Map user-friendly keys to actual telemetry keys
         key_map = {
             'temperature': ['temperature', 'room temperature setpoint', 'room temperature'],
@@ -4371,19 +4378,24 @@ class EnhancedAgenticInferrixAgent:
             'fan': ['set fan speed', 'fan speed', 'fan_speed', 'setFanSpeed'],
             'room temperature setpoint': ['room temperature setpoint', 'temperature setpoint'],
         }
-        # Try to match the desired_key to available keys
-        matched_key = None
-        for k, variants in key_map.items():
-            if desired_key.lower() == k or desired_key.lower() in variants:
-                for variant in variants:
-                    if isinstance(keys, list) and variant in keys:
-                        matched_key = variant
-                        break
-            if matched_key:
-                break
-        # Fallback: try direct match
-        if not matched_key and isinstance(keys, list) and desired_key in keys:
-            matched_key = desired_key
+        
+        def match_key(keys):
+            # Try to match the desired_key to available keys
+            for k, variants in key_map.items():
+                if desired_key.lower() == k or desired_key.lower() in variants:
+                    for variant in variants:
+                        if isinstance(keys, list) and variant in keys:
+                            return variant
+            # Fallback: try direct match
+            if isinstance(keys, list) and desired_key in keys:
+                return desired_key
+            return None
+        
+        matched_key = match_key(keys)
+        if not matched_key:
+            # Catalog miss: refetch once in case the key was added since it was cached
+            keys = self._get_available_telemetry_keys(entity_id, entity_type, refresh=True)
+            matched_key = match_key(keys)
         if not matched_key:
             return f"❌ The key '{desired_key}' is not available for this {entity_type}. Available keys: {', '.join(keys) if isinstance(keys, list) else 'unknown'}"
         
@@ -4591,11 +4603,7 @@ class EnhancedAgenticInferrixAgent:
 
     def _extract_device_phrase(self, user_query: str) -> str:
         """Extract the device/location phrase from the user query, ignoring trailing values like 'to 24', 'at', etc."""
-        # Remove trailing 'to <number>' or 'to <value>'
-        phrase = re.split(r'\bto\b|\bat\b|\bin\b|\bfor\b|\bon\b', user_query, maxsplit=1)[0]
-        # Remove common command words
-        phrase = re.sub(r'^(set|adjust|change|modify|show|diagnose|check|what is|what\'s|display|fetch|read|write|update) ', '', phrase, flags=re.IGNORECASE)
-        return phrase.strip()
+        return extract_entities(user_query).device_phrase
 
     def _get_alarm_reasoning(self, alarm_type: str, device_name: str = "") -> str:
         """Get detailed reasoning for alarm types based on comprehensive fault knowledge"""
@@ -5103,34 +5111,28 @@ class EnhancedAgenticInferrixAgent:
             normal_battery_devices = []
             no_battery_data = []
             
-            for device in devices:
+            def read_battery(device):
                 device_id = device.get('id')
                 if isinstance(device_id, dict):
                     device_id = device_id.get('id', '')
-                device_name = device.get('name', 'Unknown')
-
                 # Check if device has battery telemetry key before making the call
                 if not device_id:
-                    no_battery_data.append(device_name)
-                    continue
+                    return None
                 available_keys = self._get_available_telemetry_keys(device_id)
                 if not available_keys or 'battery' not in [k.lower() for k in available_keys]:
-                    no_battery_data.append(device_name)
-                    continue
-
-                # Try to get battery telemetry
-                battery = None
-                try:
-                    if device_id:  # Only proceed if device_id is not None
-                        battery_val = self._get_device_telemetry_data(device_id, 'battery')
-                    if battery_val is not None and battery_val != 'None' and not battery_val.startswith('❌'):
-                        try:
-                            battery = float(battery_val)
-                        except Exception:
-                            pass
-                except Exception:
-                    pass
-                
+                    return None
+                battery_val = self._get_device_telemetry_data(device_id, 'battery')
+                if battery_val is not None and battery_val != 'None' and not battery_val.startswith('❌'):
+                    try:
+                        return float(battery_val)
+                    except Exception:
+                        pass
+                return None
+            
+            # Probe devices concurrently; results come back in device order
+            readings = self._fan_out(read_battery, devices)
+            for device, battery in zip(devices, readings):
+                device_name = device.get('name', 'Unknown')
                 if battery is not None:
                     if battery < 3.0:  # Low battery threshold
                         low_battery_devices.append((device_name, battery))
@@ -5238,30 +5240,25 @@ class EnhancedAgenticInferrixAgent:
             
             # Get device connectivity status
             devices = self._get_devices_list() or []
-            online_devices = 0
-            offline_devices = 0
             
-            for device in devices:
+            def is_online(device):
                 device_id = device.get('id')
                 if isinstance(device_id, dict):
                     device_id = device_id.get('id', '')
-                
+                if not device_id:
+                    return False
                 # Check if device has recent telemetry data
-                try:
-                    if device_id:  # Only proceed if device_id is not None
-                        keys = self._get_available_telemetry_keys(device_id)
-                    if keys:
-                        # Try to get recent data for any key
-                        test_key = keys[0]
-                        test_data = self._make_api_request(f"plugins/telemetry/DEVICE/{device_id}/values/timeseries?keys={test_key}")
-                        if isinstance(test_data, dict) and test_key in test_data and test_data[test_key]:
-                            online_devices += 1
-                        else:
-                            offline_devices += 1
-                    else:
-                        offline_devices += 1
-                except Exception:
-                    offline_devices += 1
+                keys = self._get_available_telemetry_keys(device_id)
+                if not keys:
+                    return False
+                # Try to get recent data for any key
+                test_key = keys[0]
+                test_data = self._make_api_request(f"plugins/telemetry/DEVICE/{device_id}/values/timeseries?keys={test_key}")
+                return isinstance(test_data, dict) and test_key in test_data and bool(test_data[test_key])
+            
+            statuses = self._fan_out(is_online, devices, default=False)
+            online_devices = sum(1 for online in statuses if online)
+            offline_devices = len(statuses) - online_devices
             
             response = "📡 **System Communication Status:**\n\n"
             
@@ -5331,13 +5328,13 @@ class EnhancedAgenticInferrixAgent:
             
             response = f"⚙️ **Pump Status Report ({len(pump_devices)} pumps):**\n\n"
             
-            for pump in pump_devices:
+            def pump_report(pump):
                 device_id = pump.get('id')
                 if isinstance(device_id, dict):
                     device_id = device_id.get('id', '')
                 
                 pump_name = pump.get('name', 'Unknown Pump')
-                response += f"🔧 **{pump_name}:**\n"
+                section = f"🔧 **{pump_name}:**\n"
                 
                 # Check pump status
                 try:
@@ -5356,13 +5353,13 @@ class EnhancedAgenticInferrixAgent:
                     
                     if pump_status:
                         if 'on' in str(pump_status).lower() or 'running' in str(pump_status).lower():
-                            response += f"   ✅ **Status:** Running\n"
+                            section += f"   ✅ **Status:** Running\n"
                         elif 'off' in str(pump_status).lower() or 'stopped' in str(pump_status).lower():
-                            response += f"   ❌ **Status:** Stopped\n"
+                            section += f"   ❌ **Status:** Stopped\n"
                         else:
-                            response += f"   ⚠️ **Status:** {pump_status}\n"
+                            section += f"   ⚠️ **Status:** {pump_status}\n"
                     else:
-                        response += f"   ❓ **Status:** Unknown (no data)\n"
+                        section += f"   ❓ **Status:** Unknown (no data)\n"
                     
                     # Check for pump alarms
                     try:
@@ -5372,20 +5369,25 @@ class EnhancedAgenticInferrixAgent:
                         if isinstance(alarms_data, dict) and 'data' in alarms_data:
                             pump_alarms = alarms_data['data']
                             if pump_alarms:
-                                response += f"   🚨 **Active Alarms:** {len(pump_alarms)}\n"
+                                section += f"   🚨 **Active Alarms:** {len(pump_alarms)}\n"
                                 for alarm in pump_alarms[:3]:  # Show first 3 alarms
                                     alarm_type = alarm.get('type', 'Unknown')
                                     severity = alarm.get('severity', 'Unknown')
-                                    response += f"     • {alarm_type} ({severity})\n"
+                                    section += f"     • {alarm_type} ({severity})\n"
                             else:
-                                response += f"   ✅ **Alarms:** None active\n"
+                                section += f"   ✅ **Alarms:** None active\n"
                     except Exception:
-                        response += f"   ❓ **Alarms:** Unable to check\n"
+                        section += f"   ❓ **Alarms:** Unable to check\n"
                     
                 except Exception as e:
-                    response += f"   ❌ **Error:** Unable to get pump data - {str(e)}\n"
+                    section += f"   ❌ **Error:** Unable to get pump data - {str(e)}\n"
                 
-                response += "\n"
+                section += "\n"
+                return section
+            
+            # Query pumps concurrently; sections are assembled in pump order
+            for section in self._fan_out(pump_report, pump_devices, default=""):
+                response += section
             
             # Add pump-specific recommendations
             response += "💡 **Pump Maintenance Recommendations:**\n"
@@ -5449,8 +5451,7 @@ class EnhancedAgenticInferrixAgent:
         """Get energy consumption for a specific device"""
         try:
             # Get available telemetry keys for the device
-            keys_endpoint = f"plugins/telemetry/DEVICE/{device_id}/keys/timeseries"
-            available_keys = self._make_api_request(keys_endpoint)
+            available_keys = self._get_available_telemetry_keys(device_id)
             
             if not available_keys:
                 return f"❌ No telemetry data available for device {device_id}"
@@ -5504,14 +5505,8 @@ class EnhancedAgenticInferrixAgent:
     def _get_location_energy_consumption(self, location: str, energy_keys: list) -> str:
         """Get energy consumption for all devices in a location"""
         try:
-            # Get all devices
-            devices_response = self._make_api_request("user/devices?pageSize=1000&page=0", token=self._api_token)
-            
-            if not devices_response:
-                return f"❌ No devices found for location {location}"
-            
-            # Extract devices from response (API returns data in 'data' field)
-            devices = devices_response.get('data', []) if isinstance(devices_response, dict) else devices_response
+            # Get all devices (every page, not just the first 1000)
+            devices = list(self._iter_devices())
             
             if not devices:
                 return f"❌ No devices found for location {location}"
@@ -5578,8 +5573,7 @@ class EnhancedAgenticInferrixAgent:
                 if device_id:
                     # Get available keys for this device
                     try:
-                        keys_endpoint = f"plugins/telemetry/DEVICE/{device_id}/keys/timeseries"
-                        available_keys = self._make_api_request(keys_endpoint)
+                        available_keys = self._get_available_telemetry_keys(device_id)
                         
                         if available_keys:
                             # Find energy-related keys
@@ -5640,23 +5634,14 @@ class EnhancedAgenticInferrixAgent:
         try:
             print(f"[DEBUG] Getting energy consumption for all devices with keys: {energy_keys}")
             
-            # Get all devices
-            devices_response = self._make_api_request("user/devices?pageSize=1000&page=0", token=self._api_token)
-            
-            if not devices_response:
-                print("[DEBUG] No devices response received")
-                return "❌ No devices found"
-            
-            # Extract devices from response (API returns data in 'data' field)
-            devices = devices_response.get('data', []) if isinstance(devices_response, dict) else devices_response
-            
-            if not devices:
-                return "❌ No devices found"
+            # Stream devices page by page; probing starts while later pages load
+            devices = self._iter_devices()
             
             headers = ["Device Name", "Location", "Energy Metric", "Value", "Unit", "Timestamp"]
             rows = []
             
-            for device in devices[:50]:  # Increased limit to check more devices
+            def collect_device_rows(device):
+                device_rows = []
                 device_id = device.get('id', {}).get('id') if isinstance(device.get('id'), dict) else device.get('id')
                 device_name = device.get('name', 'Unknown')
                 
@@ -5744,8 +5729,7 @@ class EnhancedAgenticInferrixAgent:
                 if device_id:
                     try:
                         # Get available keys for this device
-                        keys_endpoint = f"plugins/telemetry/DEVICE/{device_id}/keys/timeseries"
-                        available_keys = self._make_api_request(keys_endpoint)
+                        available_keys = self._get_available_telemetry_keys(device_id)
                         
                         if available_keys:
                             # Find energy-related keys
@@ -5777,7 +5761,7 @@ class EnhancedAgenticInferrixAgent:
                                                 else:
                                                     dt = "Unknown"
                                                 
-                                                rows.append([device_name, device_location, key, value, unit, dt])
+                                                device_rows.append([device_name, device_location, key, value, unit, dt])
                                     elif isinstance(energy_data, list):
                                         for reading in energy_data:
                                             key = reading.get('key', '')
@@ -5790,9 +5774,19 @@ class EnhancedAgenticInferrixAgent:
                                             else:
                                                 dt = "Unknown"
                                             
-                                            rows.append([device_name, device_location, key, value, unit, dt])
+                                            device_rows.append([device_name, device_location, key, value, unit, dt])
                     except Exception:
-                        continue
+                        pass
+                return device_rows
+            
+            # Probe devices concurrently; rows keep the device order
+            device_count = 0
+            for device_rows in self._fan_out(collect_device_rows, devices, default=[]):
+                device_count += 1
+                rows.extend(device_rows)
+            
+            if not device_count:
+                return "❌ No devices found"
             
             if not rows:
                 return "❌ No energy consumption data available for any devices"
@@ -0,0 +1,221 @@
+"""
+Single-pass entity extraction for chat queries.
+
+Device, location, timeframe, severity and parameter extraction used to be
+spread over a dozen helpers (EnhancedIntelligentContextExtractor,
+_extract_location_from_query, _extract_device_phrase, the energy handler's
+location patterns, NaturalLanguageProcessor.parse_complex_command), and each
+one re-scanned the query with its own regex list. Every token kind is now one
+named group of a single alternation regex. The Hindi-mapped, lowercased query
+is tokenized in one finditer pass, and the tokens fill a QueryEntities record
+that handlers read from. Records are memoized because routing and handlers ask
+about the same query several times.
+"""
+
+import functools
+import os
+import re
+from typing import List, Optional, Tuple
+
+from hindi_normalizer import map_hindi_to_english, normalize_hindi_location
+
+ENTITY_CACHE_SIZE = int(os.getenv("ENTITY_CACHE_SIZE", "4096"))
+
+FLOOR_WORDS = {
+    'ground': '0', 'first': '1', 'second': '2', 'third': '3', 'fourth': '4', 'fifth': '5',
+    'sixth': '6', 'seventh': '7', 'eighth': '8', 'ninth': '9', 'tenth': '10',
+}
+NAMED_LOCATIONS = (
+    'conference room b', 'main lobby', 'main hall', 'tower a', 'office', 'restrooms', 'basement',
+)
+TIMEFRAMES = {
+    'today': 'today',
+    'last 24 hours': 'last_24h',
+    'this week': 'this_week',
+    'this month': 'this_month',
+    'this quarter': 'this_quarter',
+    'weekend': 'weekend',
+    'yesterday': 'yesterday',
+    'last week': 'last_week',
+    'tomorrow': 'tomorrow',
+    # 'next N days/hours' -> 'next_Nd' / 'next_Nh' is matched separately
+}
+# Phrase -> severity, in priority order when a query names several
+SEVERITIES = {'critical': 'CRITICAL', 'major': 'MAJOR', 'minor': 'MINOR', 'warning': 'WARNING'}
+# Phrase -> action, in priority order when a query contains several
+ACTIONS = (
+    ('turn off', 'turn_off'), ('shut down', 'turn_off'), ('disable', 'turn_off'),
+    ('turn on', 'turn_on'), ('enable', 'turn_on'), ('activate', 'turn_on'),
+    ('adjust', 'adjust'), ('set', 'adjust'), ('change', 'adjust'),
+    ('schedule', 'schedule'), ('plan', 'schedule'),
+)
+SCHEDULES = {'weekends': 'weekend', 'weekdays': 'weekday', 'every monday': 'monday', 'daily': 'daily'}
+UNITS = {
+    '°c': 'celsius', '° c': 'celsius', 'c': 'celsius', 'degree': 'celsius', 'degrees': 'celsius', 'celsius': 'celsius',
+    '°f': 'fahrenheit', 'fahrenheit': 'fahrenheit', '%': 'percent', 'percent': 'percent',
+    'kwh': 'kwh', 'kw': 'kw', 'ppm': 'ppm',
+    'day': 'days', 'days': 'days', 'hour': 'hours', 'hours': 'hours', 'hr': 'hours', 'hrs': 'hours',
+    'minute': 'minutes', 'minutes': 'minutes', 'min': 'minutes', 'mins': 'minutes',
+}
+COMMAND_WORDS = ('set', 'adjust', 'change', 'modify', 'show', 'diagnose', 'check', "what's", 'what is',
+                 'display', 'fetch', 'read', 'write', 'update')
+
+
+def _words(words) -> str:
+    return '|'.join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+
+# Alternatives are tried left to right at each position, so specific tokens come before generic ones
+_TOKEN_RE = re.compile(
+    r'(?P<uuid>\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b)'
+    r'|\bdevice\s+(?:id\s+)?(?P<device_num>\d+)\b'
+    r'|(?P<device_name>\b(?P<name_floor>\d+)f-[a-z]*?(?P<name_room>\d*)(?:-[a-z0-9]+)+)'
+    r'|(?P<room>\broom\s*(?:no\.?\s*|number\s*)?(?P<room_num>\d+))'
+    r'|(?P<floor>\b(?:(?P<floor_num>\d+)(?:st|nd|rd|th)?\s*f(?:loor)?|(?P<floor_word>' + _words(FLOOR_WORDS) + r')\s+floor|floor\s+(?P<floor_after>\d+))\b)'
+    r'|(?P<wing>\b(?:east|west|north|south)\s+wing\b)'
+    r'|(?P<place>\b(?:' + _words(NAMED_LOCATIONS) + r'|(?:building|area|wing)\s+\w+)\b)'
+    r'|(?P<timeframe>\b(?:' + _words(TIMEFRAMES) + r'|next\s+(?P<next_n>\d+)\s+(?P<next_unit>days?|hours?))\b)'
+    r'|(?P<schedule>\b(?:(?P<clock_rel>after|before)\s+(?P<clock_h>\d{1,2})\s*(?P<clock_ampm>am|pm)|' + _words(SCHEDULES) + r')\b)'
+    r'|(?P<severity>\b(?:' + _words(SEVERITIES) + r'))'
+    r'|(?P<action>\b(?:' + _words(a for a, _ in ACTIONS) + r')\b)'
+    r'|(?P<value>-?\b\d+(?:\.\d+)?)\s*(?P<unit>°\s*[cf]\b|(?:' + _words(u for u in UNITS if not u.startswith('°')) + r'|%)(?![a-z]))?'
+    r'|\b(?P<prep>to|at|in|for|on)\b'
+)
+_COMMAND_PREFIX_RE = re.compile(r'^(?:' + _words(COMMAND_WORDS) + r') ', re.IGNORECASE)
+_ACTION_PRIORITY = {phrase: (rank, action) for rank, (phrase, action) in enumerate(ACTIONS)}
+
+
+class QueryEntities:
+    """Typed entities of one query; None for anything the query does not mention"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.device: Optional[str] = None          # explicit device id (UUID or number)
+        self.device_name: Optional[str] = None     # device name as typed, e.g. 2f-room50-thermostat
+        self.room: Optional[str] = None            # room number, e.g. '50'
+        self.floor: Optional[str] = None           # floor number, e.g. '2'
+        self.wing: Optional[str] = None            # e.g. 'east wing'
+        self.place: Optional[str] = None           # named area, e.g. 'main lobby', 'building b'
+        self.location_phrase: Optional[str] = None  # first location as written, preferring one after 'in'
+        self.timeframe: Optional[str] = None       # e.g. 'last_24h', 'this_week'
+        self.days: Optional[int] = None            # horizon in days ('next 7 days', 'tomorrow')
+        self.severity: Optional[str] = None        # CRITICAL / MAJOR / MINOR / WARNING, highest named
+        self.severities: List[str] = []            # every severity named, in query order
+        self.value: Optional[float] = None         # first numeric parameter, e.g. 24 in 'set to 24 degrees'
+        self.unit: Optional[str] = None            # canonical unit of value
+        self.action: Optional[str] = None          # turn_off / turn_on / adjust / schedule
+        self.schedule: Optional[str] = None        # e.g. '20:00', 'weekend', 'daily'
+        self.device_phrase: str = ''               # leading phrase before to/at/in/for/on, command verb removed
+
+    @property
+    def location_key(self) -> Optional[str]:
+        """Canonical floor/room key in normalize_location_name form: '2froom50', 'room50' or '2f'"""
+        floor = f"{self.floor}f" if self.floor is not None else ''
+        room = f"room{self.room}" if self.room is not None else ''
+        return (floor + room) or None
+
+    def __repr__(self):
+        fields = {k: v for k, v in vars(self).items() if v not in (None, '', []) and k != 'text'}
+        return f"QueryEntities({fields})"
+
+
+def _number(text: str) -> float:
+    value = float(text)
+    return int(value) if value.is_integer() else value
+
+
+def _tokenize(text: str) -> QueryEntities:
+    entities = QueryEntities(text)
+    lowered = map_hindi_to_english(normalize_hindi_location(text)).lower()
+    locations: List[Tuple[bool, str]] = []  # (follows 'in', phrase)
+    first_prep = None
+    previous_prep = None
+    best_action = None
+    bare_value = None
+    long_number = None
+
+    for token in _TOKEN_RE.finditer(lowered):
+        after_in = previous_prep == 'in'
+        previous_prep = None
+        if token.group('uuid') or token.group('device_num'):
+            entities.device = entities.device or token.group('uuid') or token.group('device_num')
+        elif token.group('device_name'):
+            entities.device_name = entities.device_name or token.group('device_name')
+            entities.floor = entities.floor or token.group('name_floor')
+            entities.room = entities.room or (token.group('name_room') or None)
+        elif token.group('room'):
+            entities.room = entities.room or token.group('room_num')
+            locations.append((after_in, token.group('room')))
+        elif token.group('floor'):
+            floor = token.group('floor_num') or token.group('floor_after') or FLOOR_WORDS.get(token.group('floor_word'))
+            entities.floor = entities.floor or floor
+            locations.append((after_in, token.group('floor')))
+        elif token.group('wing'):
+            entities.wing = entities.wing or token.group('wing')
+            locations.append((after_in, token.group('wing')))
+        elif token.group('place'):
+            entities.place = entities.place or token.group('place')
+            locations.append((after_in, token.group('place')))
+        elif token.group('timeframe'):
+            if token.group('next_n'):
+                n = int(token.group('next_n'))
+                unit = token.group('next_unit')
+                entities.timeframe = entities.timeframe or f"next_{n}{unit[0]}"
+                if unit.startswith('day') and entities.days is None:
+                    entities.days = n
+            else:
+                phrase = ' '.join(token.group('timeframe').split())
+                entities.timeframe = entities.timeframe or TIMEFRAMES[phrase]
+                if entities.days is None and phrase in ('today', 'tomorrow'):
+                    entities.days = 0 if phrase == 'today' else 1
+        elif token.group('schedule'):
+            if token.group('clock_h'):
+                hour = int(token.group('clock_h')) % 12 + (12 if token.group('clock_ampm') == 'pm' else 0)
+                entities.schedule = f"{hour:02d}:00"
+            else:
+                entities.schedule = SCHEDULES[' '.join(token.group('schedule').split())]
+                if entities.schedule == 'weekend':
+                    entities.timeframe = entities.timeframe or 'weekend'
+        elif token.group('severity'):
+            entities.severities.append(SEVERITIES[token.group('severity')])
+        elif token.group('action'):
+            ranked = _ACTION_PRIORITY[' '.join(token.group('action').split())]
+            best_action = min(best_action, ranked) if best_action else ranked
+        elif token.group('value') is not None:
+            raw, unit = token.group('value'), token.group('unit')
+            if not unit and len(raw) >= 6 and raw.isdigit():
+                # Bare 6+ digit numbers are device serials (e.g. 'IAQ Sensor V2 - 300186')
+                long_number = long_number or raw
+                continue
+            value = _number(raw)
+            if unit:
+                unit = UNITS.get(unit.replace(' ', ''), UNITS.get(unit))
+                if unit == 'days' and entities.days is None:
+                    entities.days = int(value)
+                if entities.unit is None:
+                    entities.value, entities.unit = value, unit
+            elif bare_value is None:
+                bare_value = value
+        elif token.group('prep'):
+            previous_prep = token.group('prep')
+            if first_prep is None:
+                first_prep = token.start()
+
+    entities.device = entities.device or long_number
+    entities.severity = next((sev for sev in SEVERITIES.values() if sev in entities.severities), None)
+    if entities.value is None:
+        entities.value = bare_value
+    if best_action:
+        entities.action = best_action[1]
+    if locations:
+        entities.location_phrase = next((phrase for after_in, phrase in locations if after_in), locations[0][1])
+    # The device phrase comes from the original text so names keep their casing
+    head = text if first_prep is None or lowered != text.lower() else text[:first_prep]
+    entities.device_phrase = _COMMAND_PREFIX_RE.sub('', head.strip(), count=1).strip()
+    return entities
+
+
+@functools.lru_cache(maxsize=ENTITY_CACHE_SIZE)
+def extract_entities(text: str) -> QueryEntities:
+    """Tokenize text once and return its entity record (shared; treat as read-only)"""
+    return _tokenize(text or '')
@@ -2,12 +2,12 @@ from typing import TypedDict, Optional
 #from langchain_core.messages import HumanMessage
 #from langchain_core.runnables import RunnableLambda
 #from langchain_core.runnables.graph import END, StateGraph
-from langchain_core.messages import HumanMessage
 from langgraph.graph import END, StateGraph
 from langchain_core.runnables import RunnableLambda
 from langchain_core.runnables import RunnableBranch
 
 from tools import (
+    ask_llm,
     fetch_active_alarms,
     acknowledge_alarm,
     fetch_temperature,
@@ -32,129 +32,63 @@ from tools import (
 )
 
 import os
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_openai import ChatOpenAI
+import logging
+import threading
+import time
 
-# LLM config
-use_gemini = "GOOGLE_API_KEY" in os.environ and os.environ["GOOGLE_API_KEY"]
-llm = (
-    ChatGoogleGenerativeAI(model="gemini-pro", temperature=0)
-    if use_gemini else
-    ChatOpenAI(model="gpt-4o", temperature=0)
-)
+logger = logging.getLogger(__name__)
 
 # Define graph state schema
 class AgentState(TypedDict, total=False):
     input: str
     user: str
+    token: str  # Inferrix token of the caller; tools read through the shared data layer with it
+    device: str
     result: str
     tool: str
     last_alarm_query: dict  # For context memory
-
-# For dynamic state updates, we'll use regular dict operations
-
-# Tool functions
-# Add print statements and ensure only 'result' is returned
-
-def alarms_node(state):
-    print('ALARMS NODE called with:', state)
-    out = fetch_active_alarms(state)
-    print('ALARMS NODE returned:', out)
-    return {**state, 'result': out, 'tool': 'alarms'}
-
-def acknowledge_node(state):
-    print('ACKNOWLEDGE NODE called with:', state)
-    out = acknowledge_alarm(state)
-    print('ACKNOWLEDGE NODE returned:', out)
-    return {**state, 'result': out, 'tool': 'acknowledge'}
-
-def temperature_node(state):
-    print('TEMPERATURE NODE called with:', state)
-    out = fetch_temperature(state)
-    print('TEMPERATURE NODE returned:', out)
-    return {**state, 'result': out, 'tool': 'temperature'}
-
-def health_node(state):
-    print('HEALTH NODE called with:', state)
-    out = check_health(state)
-    print('HEALTH NODE returned:', out)
-    return {**state, 'result': out, 'tool': 'health'}
-
-def predict_node(state):
-    print('PREDICT NODE called with:', state)
-    out = predict_overheat_risk(state)
-    print('PREDICT NODE returned:', out)
-    return {**state, 'result': out, 'tool': 'predict'}
-
-def alarms_by_device_node(state):
-    print('ALARMS_BY_DEVICE NODE called with:', state)
-    out = fetch_alarms_for_device_today(state)
-    print('ALARMS_BY_DEVICE NODE returned:', out)
-    return {**state, 'result': out, 'tool': 'alarms_by_device'}
-
-def severity_node(state):
-    print('SEVERITY NODE called with:', state)
-    out = get_highest_severity(state)
-    print('SEVERITY NODE returned:', out)
-    return {**state, 'result': out, 'tool': 'severity'}
-
-def devices_node(state):
-    print('DEVICES NODE called with:', state)
-    out = fetch_all_devices(state)
-    print('DEVICES NODE returned:', out)
-    return {**state, 'result': out, 'tool': 'devices'}
-
-def telemetry_node(state):
-    print('TELEMETRY NODE called with:', state)
-    out = fetch_device_telemetry(state)
-    print('TELEMETRY NODE returned:', out)
-    return {**state, 'result': out, 'tool': 'telemetry'}
-
-def online_node(state):
-    print('ONLINE NODE called with:', state)
-    out = check_device_online(state)
-    print('ONLINE NODE returned:', out)
-    return {**state, 'result': out, 'tool': 'online'}
-
-def telemetry_health_node(state):
-    print('TELEMETRY_HEALTH NODE called with:', state)
-    out = check_device_telemetry_health(state)
-    print('TELEMETRY_HEALTH NODE returned:', out)
-    return {**state, 'result': out, 'tool': 'telemetry_health'}
-
-def alarm_types_node(state):
-    print('ALARM_TYPES NODE called with:', state)
-    out = get_top_alarm_types(state)
-    print('ALARM_TYPES NODE returned:', out)
-    return {**state, 'result': out, 'tool': 'alarm_types'}
-
-def summarize_alarms_node(state):
-    print('SUMMARIZE_ALARMS NODE called with:', state)
-    out = summarize_alarms_last_24h(state)
-    print('SUMMARIZE_ALARMS NODE returned:', out)
-    return {**state, 'result': out, 'tool': 'summarize_alarms'}
-
-def low_battery_node(state):
-    print('LOW_BATTERY NODE called with:', state)
-    out = list_low_battery_devices(state)
-    print('LOW_BATTERY NODE returned:', out)
-    return {**state, 'result': out, 'tool': 'low_battery'}
-
-def is_online_node(state):
-    print('IS_ONLINE NODE called with:', state)
-    out = is_device_online(state)
-    print('IS_ONLINE NODE returned:', out)
-    return {**state, 'result': out, 'tool': 'is_online'}
-
-def llm_node(state):
-    print('LLM NODE called with:', state)
-    response = llm.invoke([HumanMessage(content=state.get("input", ""))]).content
-    return {**state, "result": response, "tool": "llm"}
-
-def fallback_node(state):
+    timings: dict  # node name -> elapsed ms for this invocation
+
+# Per-node latency totals since startup: name -> [calls, total ms, max ms]
+_node_timings = {}
+_node_timings_lock = threading.Lock()
+
+def node_timing_stats():
+    """Calls, average and max latency (ms) of every graph node since startup"""
+    with _node_timings_lock:
+        return {
+            name: {"calls": calls, "avg_ms": round(total / calls, 1), "max_ms": round(worst, 1)}
+            for name, (calls, total, worst) in _node_timings.items()
+        }
+
+def _record_timing(tool_name, elapsed_ms):
+    with _node_timings_lock:
+        entry = _node_timings.setdefault(tool_name, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += elapsed_ms
+        entry[2] = max(entry[2], elapsed_ms)
+
+def _tool_node(tool_name, func):
+    """Graph node running one tool: stores its output as 'result' and times the call"""
+    def node(state):
+        started = time.perf_counter()
+        try:
+            out = func(state)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            _record_timing(tool_name, elapsed_ms)
+            logger.info("graph node %s took %.1f ms", tool_name, elapsed_ms)
+        timings = {**(state.get("timings") or {}), tool_name: round(elapsed_ms, 1)}
+        return {**state, "result": out, "tool": tool_name, "timings": timings}
+    node.__name__ = f"{tool_name}_node"
+    return RunnableLambda(node)
+
+def llm_answer(state):
+    return ask_llm(state.get("input", ""))
+
+def fallback_answer(state):
     """Graceful fallback when no tool matches"""
-    print('FALLBACK NODE called with:', state)
-    fallback_message = (
+    return (
         "❌ I couldn't understand your request.\n\n"
         "**What you can do:**\n"
         "- Please rephrase your question with more details or specific terms.\n"
@@ -166,71 +100,37 @@ def fallback_node(state):
         "  • 'List devices with low battery'\n"
         "\nIf you continue to have trouble, please contact your system administrator or Inferrix support."
     )
-    return {**state, "result": fallback_message, "tool": "fallback"}
-
-def energy_opt_node(state):
-    print('ENERGY_OPTIMIZATION NODE called with:', state)
-    out = energy_optimization_node(state)
-    print('ENERGY_OPTIMIZATION NODE returned:', out)
-    return {**state, 'result': out, 'tool': 'energy_optimization'}
-
-def comfort_adj_node(state):
-    print('COMFORT_ADJUSTMENT NODE called with:', state)
-    out = comfort_adjustment_node(state)
-    print('COMFORT_ADJUSTMENT NODE returned:', out)
-    return {**state, 'result': out, 'tool': 'comfort_adjustment'}
 
-def predictive_maint_node(state):
-    print('PREDICTIVE_MAINTENANCE NODE called with:', state)
-    out = predictive_maintenance_node(state)
-    print('PREDICTIVE_MAINTENANCE NODE returned:', out)
-    return {**state, 'result': out, 'tool': 'predictive_maintenance'}
-
-def esg_report_node(state):
-    print('ESG_REPORTING NODE called with:', state)
-    out = esg_reporting_node(state)
-    print('ESG_REPORTING NODE returned:', out)
-    return {**state, 'result': out, 'tool': 'esg_reporting'}
-
-def cleaning_opt_node(state):
-    print('CLEANING_OPTIMIZATION NODE called with:', state)
-    out = cleaning_optimization_node(state)
-    print('CLEANING_OPTIMIZATION NODE returned:', out)
-    return {**state, 'result': out, 'tool': 'cleaning_optimization'}
-
-def root_cause_node(state):
-    print('ROOT_CAUSE_IDENTIFICATION NODE called with:', state)
-    out = root_cause_identification_node(state)
-    print('ROOT_CAUSE_IDENTIFICATION NODE returned:', out)
-    return {**state, 'result': out, 'tool': 'root_cause_identification'}
+llm_node = _tool_node("llm", llm_answer)
 
 tools = {
-    "alarms": RunnableLambda(alarms_node),
-    "acknowledge": RunnableLambda(acknowledge_node),
-    "temperature": RunnableLambda(temperature_node),
-    "health": RunnableLambda(health_node),
-    "predict": RunnableLambda(predict_node),
-    "alarms_by_device": RunnableLambda(alarms_by_device_node),
-    "severity": RunnableLambda(severity_node),
-    "devices": RunnableLambda(devices_node),
-    "telemetry": RunnableLambda(telemetry_node),
-    "online": RunnableLambda(online_node),
-    "telemetry_health": RunnableLambda(telemetry_health_node),
-    "alarm_types": RunnableLambda(alarm_types_node),
-    "summarize_alarms": RunnableLambda(summarize_alarms_node),
-    "low_battery": RunnableLambda(low_battery_node),
-    "is_online": RunnableLambda(is_online_node),
-    "fallback": RunnableLambda(fallback_node),
-    "energy_optimization": RunnableLambda(energy_opt_node),
-    "comfort_adjustment": RunnableLambda(comfort_adj_node),
-    "predictive_maintenance": RunnableLambda(predictive_maint_node),
-    "esg_reporting": RunnableLambda(esg_report_node),
-    "cleaning_optimization": RunnableLambda(cleaning_opt_node),
-    "root_cause_identification": RunnableLambda(root_cause_node),
+    name: _tool_node(name, func) for name, func in {
+        "alarms": fetch_active_alarms,
+        "acknowledge": acknowledge_alarm,
+        "temperature": fetch_temperature,
+        "health": check_health,
+        "predict": predict_overheat_risk,
+        "alarms_by_device": fetch_alarms_for_device_today,
+        "severity": get_highest_severity,
+        "devices": fetch_all_devices,
+        "telemetry": fetch_device_telemetry,
+        "online": check_device_online,
+        "telemetry_health": check_device_telemetry_health,
+        "alarm_types": get_top_alarm_types,
+        "summarize_alarms": summarize_alarms_last_24h,
+        "low_battery": list_low_battery_devices,
+        "is_online": is_device_online,
+        "fallback": fallback_answer,
+        "energy_optimization": energy_optimization_node,
+        "comfort_adjustment": comfort_adjustment_node,
+        "predictive_maintenance": predictive_maintenance_node,
+        "esg_reporting": esg_reporting_node,
+        "cleaning_optimization": cleaning_optimization_node,
+        "root_cause_identification": root_cause_identification_node,
+    }.items()
 }
 
 # Tool router
-# Add print to router
 
 def extract_severity(query: str) -> Optional[str]:
     """Extract severity level from query"""
@@ -249,7 +149,7 @@ def extract_severity(query: str) -> Optional[str]:
 
 def select_tool(state: AgentState):
     """Improved router with context and better alarm/telemetry distinction"""
-    print('ROUTER called with:', state)
+    logger.debug("graph router input: %s", state.get("input"))
     query = (state.get("input") or "").lower()
     severity = extract_severity(query)
 
@@ -333,29 +233,43 @@ def select_tool(state: AgentState):
     # Fallback
     return "fallback"
 
-# Build the graph
-workflow = StateGraph(AgentState)
+def build_agent_graph():
+    """Wire the router and tool nodes into a compiled graph"""
+    workflow = StateGraph(AgentState)
 
-# Add router node first
-workflow.add_node("router", RunnableLambda(lambda state: state))
+    # Add router node first
+    workflow.add_node("router", RunnableLambda(lambda state: state))
 
-# Add all nodes
-for tool_name, tool_func in tools.items():
-    workflow.add_node(tool_name, tool_func)
+    # Add all nodes
+    for tool_name, tool_func in tools.items():
+        workflow.add_node(tool_name, tool_func)
 
-# Add router
-workflow.add_conditional_edges(
-    "router",
-    select_tool,
-    {tool_name: tool_name for tool_name in tools.keys()}
-)
+    # Add router
+    workflow.add_conditional_edges(
+        "router",
+        select_tool,
+        {tool_name: tool_name for tool_name in tools.keys()}
+    )
+
+    # Set entry point
+    workflow.set_entry_point("router")
+
+    # Set exit point - all tools terminate the graph
+    for tool_name in tools.keys():
+        workflow.add_edge(tool_name, END)
 
-# Set entry point
-workflow.set_entry_point("router")
+    return workflow.compile()
 
-# Set exit point - all tools terminate the graph
-for tool_name in tools.keys():
-    workflow.add_edge(tool_name, END)
+# Compiled once at import; every request reuses it
+agent_graph = build_agent_graph()
 
-# Compile the graph
-agent_graph = workflow.compile()
+def run_agent_graph(query, token, user=None, device=None, last_alarm_query=None):
+    """Answer one query through the compiled graph; returns the final state"""
+    state = {"input": query, "token": token, "timings": {}}
+    if user:
+        state["user"] = user
+    if device:
+        state["device"] = device
+    if last_alarm_query:
+        state["last_alarm_query"] = last_alarm_query
+    return agent_graph.invoke(state)
@@ -0,0 +1,133 @@
+"""
+Shared data layer for the LangGraph tool nodes.
+
+The graph's tools each downloaded the full device list on every call, just to
+find one device, and read latest telemetry without any caching, so a scan such
+as "list low battery devices" cost one request per device every time. All
+nodes now share one GraphDataLayer. Its DeviceDirectory (with a DeviceIndex)
+serves the device list per token, the TelemetryKeyCatalog serves key lists,
+and latest values are kept for a short TTL. Every cache is keyed on a hash of
+the caller's token, so one user's data never reaches another user. Fleet scans fan out over a bounded
+pool.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from device_directory import DeviceDirectory
+from device_index import DeviceIndex, _device_id
+from response_cache import ResponseCache
+from telemetry_catalog import TelemetryKeyCatalog
+
+GRAPH_TELEMETRY_TTL = float(os.getenv("GRAPH_TELEMETRY_TTL", "30"))
+GRAPH_FANOUT_MAX_CONCURRENCY = int(os.getenv("GRAPH_FANOUT_MAX_CONCURRENCY", "8"))
+GRAPH_FANOUT_DEADLINE = float(os.getenv("GRAPH_FANOUT_DEADLINE", "15"))
+
+# Cached marker for "device reported no value for this key"
+_NO_VALUE = object()
+
+
+class GraphDataLayer:
+    """Device directory, key catalog and latest-value cache shared by every graph node"""
+
+    def __init__(self, fetch_devices: Callable[[str], List[Dict]],
+                 fetch_latest: Callable[[str, List[str], str], Dict],
+                 fetch_keys: Callable[[str, str], List[str]],
+                 normalize: Callable[[str], str],
+                 telemetry_ttl: float = GRAPH_TELEMETRY_TTL,
+                 max_concurrency: int = GRAPH_FANOUT_MAX_CONCURRENCY):
+        # fetch_latest(device_id, keys, token) returns Inferrix timeseries JSON ({key: [{ts, value}]});
+        # fetch_keys(device_id, token) returns the device's timeseries key list
+        self.directory = DeviceDirectory(fetch_devices, build_index=lambda devices: DeviceIndex(devices, normalize))
+        self.key_catalog = TelemetryKeyCatalog()
+        self.latest_values = ResponseCache(enabled=True)
+        self.telemetry_ttl = telemetry_ttl
+        self._fetch_latest = fetch_latest
+        self._fetch_keys = fetch_keys
+        self._normalize = normalize
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="graph-data")
+
+    @staticmethod
+    def device_id(device: Dict) -> str:
+        """Plain id string of a device record"""
+        return _device_id(device)
+
+    def devices(self, token: str) -> List[Dict]:
+        """Device list visible to the token"""
+        return self.directory.get_devices(token)
+
+    def find_device(self, token: str, query: str) -> Optional[Dict]:
+        """Device by id, then exact name, then first device whose normalized name contains the query"""
+        query = str(query or '').strip()
+        if not query:
+            return None
+        device = self.directory.get_device(token, query)
+        if device is not None:
+            return device
+        index = self.directory.get_index(token)
+        device_id = index.by_name.get(query.lower())
+        if device_id is None:
+            norm_query = self._normalize(query)
+            matches = index.locations.containing(norm_query) if norm_query else []
+            if matches:
+                device_id = index.by_location[matches[0]][0][0]
+        return self.directory.get_device(token, device_id) if device_id else None
+
+    def telemetry_keys(self, token: str, device_id: str) -> List[str]:
+        """Timeseries keys of a device, from the catalog when known"""
+        keys = self.key_catalog.get(token, 'DEVICE', device_id)
+        if keys is None:
+            keys = list(self._fetch_keys(device_id, token) or [])
+            self.key_catalog.put(token, 'DEVICE', device_id, keys)
+        return keys
+
+    def latest(self, token: str, device_id: str, keys: Iterable[str]) -> Dict[str, Any]:
+        """Latest value per key; only keys without a fresh cached value are fetched, in one request"""
+        values: Dict[str, Any] = {}
+        missing = []
+        for key in keys:
+            cached = self.latest_values.get(token, (device_id, key))
+            if cached is None:
+                missing.append(key)
+            elif cached is not _NO_VALUE:
+                values[key] = cached
+        if missing:
+            data = self._fetch_latest(device_id, missing, token) or {}
+            for key in missing:
+                points = data.get(key) or []
+                value = points[0].get('value') if points else None
+                self.latest_values.put(token, (device_id, key), _NO_VALUE if value is None else value, self.telemetry_ttl)
+                if value is not None:
+                    values[key] = value
+        return values
+
+    def latest_for_devices(self, token: str, devices: List[Dict], key: str,
+                           deadline: float = GRAPH_FANOUT_DEADLINE) -> List[Tuple[Dict, Any]]:
+        """(device, value) for every device reporting key, read with bounded concurrency.
+
+        Devices that fail or miss the shared deadline are logged and skipped.
+        """
+        futures = [(device, self._executor.submit(self.latest, token, _device_id(device), [key]))
+                   for device in devices]
+        expires_at = time.time() + deadline
+        results = []
+        for device, future in futures:
+            try:
+                values = future.result(timeout=max(0.0, expires_at - time.time()))
+            except FutureTimeoutError:
+                future.cancel()
+                print(f"[DEBUG] Graph data - {key} read timed out for {device.get('name')}")
+                continue
+            except Exception as e:
+                print(f"[DEBUG] Graph data - {key} read failed for {device.get('name')}: {e}")
+                continue
+            if key in values:
+                results.append((device, values[key]))
+        return results
+
+    def invalidate(self, token: Optional[str] = None):
+        """Forget cached devices and values for one token, or for everyone"""
+        self.directory.invalidate(token)
+        self.latest_values.invalidate(token)
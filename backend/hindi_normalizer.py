@@ -0,0 +1,156 @@
+"""
+Hindi/Hinglish normalization shared by intent routing, location matching and
+language detection.
+
+Word mappings are compiled into one longest-match trie regex, so a query is
+rewritten in a single pass instead of one str.replace per dictionary entry,
+and Devanagari numerals are folded to ASCII digits in the same pass. Pure
+ASCII text skips the Devanagari words entirely, and results are memoized
+because the same query is normalized several times while it is routed.
+"""
+
+import functools
+import os
+import re
+from typing import Dict, List, Tuple
+
+DEVANAGARI_DIGITS = str.maketrans('०१२३४५६७८९', '0123456789')
+HINDI_NORMALIZER_CACHE_SIZE = int(os.getenv("HINDI_NORMALIZER_CACHE_SIZE", "4096"))
+
+# Hindi/Hinglish words -> English equivalents used by process_query routing
+HINDI_WORD_MAPPINGS = {
+    'कम': 'low',
+    'मध्यम': 'medium',
+    'तेज़': 'high',
+    'ज़्यादा': 'high',
+    'अधिकतम': 'maximum',
+    'न्यूनतम': 'minimum',
+    'तापमान': 'temperature',
+    'taapman': 'temperature',
+    'tapmaan': 'temperature',
+    'taapmaan': 'temperature',
+    'tapman': 'temperature',
+    'नमी': 'humidity',
+    'बैटरी': 'battery',
+    'कमरा': 'room',
+    'मंजिल': 'floor',
+    'सेट': 'set',
+    'करो': 'set',
+    'करें': 'set',
+    'दिखाओ': 'show',
+    'क्या है': 'what is',
+    'कैसा है': 'how is',
+    'स्पीड': 'speed',
+    'फैन': 'fan',
+    # Temperature control mappings
+    'डिग्री': 'degree',
+    'डिग्रीज': 'degrees',
+    'पर': 'to',
+    'में': 'in',
+    'के': 'of',
+    'का': 'of',
+    'की': 'of',
+}
+
+# Location words only, for normalize_location_name ('दूसरी मंजिल कमरा 50' -> 'second floor room 50')
+HINDI_LOCATION_WORDS = {
+    'कमरा': 'room',
+    'कमरे': 'room',
+    'रूम': 'room',
+    'मंजिल': 'floor',
+    'मंज़िल': 'floor',
+    'फ्लोर': 'floor',
+    'ग्राउंड': 'ground',
+    'पहली': 'first',
+    'दूसरी': 'second',
+    'तीसरी': 'third',
+    'चौथी': 'fourth',
+    'पांचवी': 'fifth',
+    'पाँचवीं': 'fifth',
+}
+
+_HINDI_LETTER_RE = re.compile(r'[अ-ह]')
+_ENGLISH_LETTER_RE = re.compile(r'[a-zA-Z]')
+_WORD_PUNCTUATION_RE = re.compile(r'[^\wअ-ह]')
+
+
+def _trie_regex(trie: Dict) -> str:
+    # Optional groups are greedy, so the longest word wins at every position
+    terminal = '' in trie
+    branches = [re.escape(char) + _trie_regex(child) for char, child in sorted(trie.items()) if char]
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 and len(branches[0]) == 1 else '(?:' + '|'.join(branches) + ')'
+    return body + '?' if terminal else body
+
+
+def _alternation(words) -> re.Pattern:
+    """Compile words into one trie-shaped regex (shared prefixes are tested once)"""
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    return re.compile(_trie_regex(trie))
+
+
+class HindiNormalizer:
+    """Single-pass word replacement with Devanagari digit folding"""
+
+    def __init__(self, mappings: Dict[str, str], cache_size: int = HINDI_NORMALIZER_CACHE_SIZE):
+        self.mappings = dict(mappings)
+        ascii_words = [w for w in self.mappings if w.isascii()]
+        self._ascii_pattern = _alternation(ascii_words) if ascii_words else None
+        # Devanagari digits are folded by the same regex pass as the words
+        self._replacements = dict(self.mappings)
+        for digit in '०१२३४५६७८९':
+            self._replacements[digit] = digit.translate(DEVANAGARI_DIGITS)
+        self._pattern = _alternation(self._replacements)
+        self.normalize = functools.lru_cache(maxsize=cache_size)(self._normalize)
+
+    def _replace(self, match) -> str:
+        return self._replacements[match.group(0)]
+
+    def _normalize(self, text: str) -> str:
+        """Map every known word to English in one pass and fold Devanagari digits"""
+        if not text:
+            return text
+        if text.isascii():
+            return self._ascii_pattern.sub(self._replace, text) if self._ascii_pattern else text
+        return self._pattern.sub(self._replace, text)
+
+
+HINDI_NORMALIZER = HindiNormalizer(HINDI_WORD_MAPPINGS)
+LOCATION_NORMALIZER = HindiNormalizer(HINDI_LOCATION_WORDS)
+
+
+def map_hindi_to_english(text: str) -> str:
+    """Replace Hindi/Hinglish words with their English equivalents"""
+    return HINDI_NORMALIZER.normalize(text)
+
+
+def normalize_hindi_location(text: str) -> str:
+    """Fold Devanagari digits and translate Hindi floor/room words"""
+    return LOCATION_NORMALIZER.normalize(text)
+
+
+def script_letter_counts(text: str) -> Tuple[int, int]:
+    """Count (Devanagari, Latin) letters in text"""
+    if text.isascii():
+        return 0, len(_ENGLISH_LETTER_RE.findall(text))
+    return len(_HINDI_LETTER_RE.findall(text)), len(_ENGLISH_LETTER_RE.findall(text))
+
+
+def split_hinglish_words(text: str) -> Tuple[List[str], List[str]]:
+    """Split text into (Hindi words, English words), punctuation removed"""
+    hindi_words = []
+    english_words = []
+    ascii_text = text.isascii()
+    for word in text.split():
+        clean_word = _WORD_PUNCTUATION_RE.sub('', word)
+        if not ascii_text and _HINDI_LETTER_RE.search(clean_word):
+            hindi_words.append(clean_word)
+        elif _ENGLISH_LETTER_RE.search(clean_word):
+            english_words.append(clean_word)
+    return hindi_words, english_words
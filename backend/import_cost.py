@@ -0,0 +1,172 @@
+"""
+Per-module import cost, measured while the server starts.
+
+Cold starts on Railway/Render spent seconds importing provider SDKs,
+LangChain and the agent before /health could answer, and nothing showed
+which imports were responsible. install() puts a finder at the front of
+sys.meta_path. The finder times each module's execution, both on its own
+(self) and including the modules it imports (cumulative). main.py installs it
+first thing and prints report() once the app is up. The same numbers are
+served from /health/startup.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+IMPORT_COST_REPORT = os.getenv("IMPORT_COST_REPORT", "true").lower() != "false"
+IMPORT_COST_TOP = int(os.getenv("IMPORT_COST_TOP", "15"))
+
+
+class _TimedLoader:
+    """Wraps a module's loader to time its execution, then hands the module back its real loader"""
+
+    def __init__(self, loader, tracker: "ImportCostTracker"):
+        self._loader = loader
+        self._tracker = tracker
+
+    def create_module(self, spec):
+        create = getattr(self._loader, "create_module", None)
+        if create is None:
+            return None
+        # Extension modules do their work here rather than in exec_module; the time is
+        # held back and recorded together with exec_module as one measurement
+        with self._tracker.timing(spec.name, final=False):
+            return create(spec)
+
+    def exec_module(self, module):
+        module.__loader__ = self._loader
+        if getattr(module, "__spec__", None) is not None:
+            module.__spec__.loader = self._loader
+        with self._tracker.timing(module.__name__):
+            self._loader.exec_module(module)
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class _Timing:
+    def __init__(self, tracker: "ImportCostTracker", name: str, final: bool = True):
+        self.tracker = tracker
+        self.name = name
+        self.final = final
+
+    def __enter__(self):
+        self.tracker._stack().append([self.name, time.perf_counter(), 0.0])
+
+    def __exit__(self, *exc):
+        stack = self.tracker._stack()
+        name, started, children = stack.pop()
+        elapsed = time.perf_counter() - started
+        if stack:
+            stack[-1][2] += elapsed
+        pending = self.tracker._pending()
+        self_time, cumulative = pending.pop(name, (0.0, 0.0))
+        self_time += elapsed - children
+        cumulative += elapsed
+        if self.final:
+            self.tracker._record(name, self_time, cumulative, top_level=not stack)
+        else:
+            pending[name] = (self_time, cumulative)
+        return False
+
+
+class ImportCostTracker:
+    """Meta-path finder recording self and cumulative import time per module"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._self_time = defaultdict(float)
+        self._cumulative = defaultdict(float)
+        self._total = 0.0
+
+    def find_spec(self, fullname, path=None, target=None):
+        if getattr(self._local, "finding", False):
+            return None
+        self._local.finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                        spec.loader = _TimedLoader(spec.loader, self)
+                    return spec
+            return None
+        finally:
+            self._local.finding = False
+
+    def timing(self, name: str, final: bool = True) -> _Timing:
+        return _Timing(self, name, final)
+
+    def _pending(self) -> Dict:
+        pending = getattr(self._local, "pending", None)
+        if pending is None:
+            pending = self._local.pending = {}
+        return pending
+
+    def _stack(self) -> List:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, name: str, self_time: float, cumulative: float, top_level: bool):
+        with self._lock:
+            self._self_time[name] += self_time
+            self._cumulative[name] += cumulative
+            if top_level:
+                self._total += cumulative
+
+    def report(self, top: int = IMPORT_COST_TOP) -> Dict:
+        """Total import time, the slowest modules and the cost per top-level package (ms)"""
+        with self._lock:
+            self_time = dict(self._self_time)
+            cumulative = dict(self._cumulative)
+            total = self._total
+        by_package = defaultdict(float)
+        for name, seconds in self_time.items():
+            by_package[name.partition(".")[0]] += seconds
+        slowest = sorted(self_time, key=self_time.get, reverse=True)[:top]
+        return {
+            "total_ms": round(total * 1000, 1),
+            "modules_imported": len(self_time),
+            "slowest_modules": [
+                {"module": name, "self_ms": round(self_time[name] * 1000, 1),
+                 "cumulative_ms": round(cumulative[name] * 1000, 1)}
+                for name in slowest
+            ],
+            "by_package": {
+                package: round(seconds * 1000, 1)
+                for package, seconds in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]
+            },
+        }
+
+
+_tracker = None
+
+
+def install() -> ImportCostTracker:
+    """Start timing imports (idempotent); only modules imported afterwards are measured"""
+    global _tracker
+    if _tracker is None:
+        _tracker = ImportCostTracker()
+        if IMPORT_COST_REPORT:
+            sys.meta_path.insert(0, _tracker)
+    return _tracker
+
+
+def report(top: int = IMPORT_COST_TOP) -> Dict:
+    return install().report(top)
+
+
+def print_report(top: int = IMPORT_COST_TOP):
+    summary = report(top)
+    print(f"⏱️ Import cost: {summary['total_ms']:.0f} ms across {summary['modules_imported']} modules")
+    for package, ms in list(summary["by_package"].items())[:top]:
+        print(f"   {package:<32} {ms:>9.1f} ms")
@@ -0,0 +1,356 @@
+"""
+Shared HTTP client for all Inferrix API calls.
+
+Every call path (agent, tools, MCP helpers and the FastAPI handlers) goes
+through one pooled keep-alive requests.Session instead of opening a fresh
+TCP/TLS connection per request with the bare requests.get/post helpers.
+
+Identical GETs (same token, URL, params and headers) that are in flight at
+the same time are coalesced: the first caller sends the request and the
+others wait for and share its response (or its exception). When several
+operators open the UI at once, the burst costs one upstream call per
+distinct read.
+"""
+
+import asyncio
+import functools
+import hashlib
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Optional: native asyncio HTTP client. Falls back to running the pooled
+# requests session in a thread when httpx is not installed.
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    httpx = None
+    HTTPX_AVAILABLE = False
+
+INFERRIX_BASE_URL = "https://cloud.inferrix.com/api"
+
+# Pool sizing: number of distinct hosts kept and connections kept per host
+POOL_CONNECTIONS = int(os.getenv("INFERRIX_POOL_CONNECTIONS", "4"))
+POOL_MAXSIZE = int(os.getenv("INFERRIX_POOL_MAXSIZE", "20"))
+# When True, callers wait for a free connection instead of opening extra
+# unpooled ones, which caps concurrent connections per host at POOL_MAXSIZE
+POOL_BLOCK = os.getenv("INFERRIX_POOL_BLOCK", "true").lower() == "true"
+
+DEFAULT_TIMEOUT = float(os.getenv("INFERRIX_HTTP_TIMEOUT", "10"))
+DEFAULT_PAGE_SIZE = int(os.getenv("INFERRIX_PAGE_SIZE", "100"))
+SINGLE_FLIGHT_ENABLED = os.getenv("INFERRIX_SINGLE_FLIGHT", "true").lower() != "false"
+
+_session = None
+_session_lock = threading.Lock()
+# httpx.AsyncClient connections belong to the event loop that opened them, so each loop gets its own client
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _build_session() -> requests.Session:
+    """Create a keep-alive session with a sized connection pool"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        pool_block=POOL_BLOCK,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "Accept": "application/json",
+        "Connection": "keep-alive",
+    })
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled session, creating it on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def auth_headers(token, json_body=False):
+    """Build the X-Authorization headers Inferrix expects"""
+    headers = {"X-Authorization": f"Bearer {token}"}
+    if json_body:
+        headers["Content-Type"] = "application/json"
+    return headers
+
+
+def build_url(endpoint):
+    """Resolve an endpoint relative to INFERRIX_BASE_URL (absolute URLs pass through)"""
+    if endpoint.startswith("http://") or endpoint.startswith("https://"):
+        return endpoint
+    return f"{INFERRIX_BASE_URL}/{endpoint.lstrip('/')}"
+
+
+# === Single-flight ===
+
+class _InFlight:
+    """One upstream GET that concurrent identical callers wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+_async_inflight = {}
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _flight_key(method, url, kwargs):
+    """Key identifying an idempotent read, or None if the call must not be shared"""
+    if not SINGLE_FLIGHT_ENABLED or method.upper() != "GET":
+        return None
+    if any(kwargs.get(name) is not None for name in ("data", "json", "files", "auth", "cookies")) or kwargs.get("stream"):
+        return None
+    headers = dict(kwargs.get("headers") or {})
+    # Only callers presenting the very same credentials may share a response (the key holds a hash, not the token)
+    for name in ("X-Authorization", "Authorization"):
+        if name in headers:
+            headers[name] = hashlib.sha256(str(headers[name]).encode()).hexdigest()
+    return (build_url(url), _freeze(kwargs.get("params")), _freeze(headers))
+
+
+def request(method, url, **kwargs):
+    """Send a request through the shared pool with a default timeout (identical concurrent GETs share one call)"""
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    key = _flight_key(method, url, kwargs)
+    if key is None:
+        return get_session().request(method, build_url(url), **kwargs)
+    with _inflight_lock:
+        flight = _inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _inflight[key] = _InFlight()
+    if not leader:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.response
+    try:
+        flight.response = get_session().request(method, build_url(url), **kwargs)
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        flight.done.set()
+    return flight.response
+
+
+def get(url, **kwargs):
+    """GET through the shared pool"""
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    """POST through the shared pool"""
+    return request("POST", url, **kwargs)
+
+
+# === Pagination ===
+
+_prefetch_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="inferrix-prefetch")
+
+
+def _get_page(endpoint, token, params, page, page_size):
+    page_params = dict(params or {})
+    page_params.update({"page": page, "pageSize": page_size})
+    response = get(endpoint, headers=auth_headers(token), params=page_params)
+    response.raise_for_status()
+    body = response.json()
+    if isinstance(body, list):
+        return body, False
+    return body.get("data", []) or [], bool(body.get("hasNext"))
+
+
+def iter_pages(endpoint, token, params=None, page_size=DEFAULT_PAGE_SIZE, max_pages=None):
+    """Lazily yield every item of a paginated Inferrix listing.
+
+    Walks `hasNext` page by page; while the caller consumes page N, page N+1 is
+    already being fetched in the background. Stops fetching as soon as the
+    caller stops iterating. HTTP errors are raised to the caller.
+    """
+    page = 0
+    pending = _prefetch_executor.submit(_get_page, endpoint, token, params, page, page_size)
+    while pending is not None:
+        items, has_next = pending.result()
+        page += 1
+        more = has_next and items and (max_pages is None or page < max_pages)
+        pending = _prefetch_executor.submit(_get_page, endpoint, token, params, page, page_size) if more else None
+        try:
+            for item in items:
+                yield item
+        except GeneratorExit:
+            if pending is not None:
+                pending.cancel()
+            raise
+
+
+def iter_devices(token, page_size=DEFAULT_PAGE_SIZE, **params):
+    """Lazily yield every device visible to the token's user"""
+    return iter_pages("user/devices", token, params=params, page_size=page_size)
+
+
+def close():
+    """Close pooled connections (used on shutdown)"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+# === Async data layer ===
+# Serves the FastAPI list endpoints. The agent's intent handlers stay synchronous and use the
+# pooled session from chat worker threads (see EnhancedAgenticInferrixAgent.process_query_async).
+
+class AsyncResponse:
+    """Minimal response wrapper so async callers see the same surface for both backends"""
+
+    def __init__(self, status_code, content, text, json_loader, raise_fn):
+        self.status_code = status_code
+        self.content = content
+        self.text = text
+        self._json_loader = json_loader
+        self._raise_fn = raise_fn
+
+    def json(self):
+        return self._json_loader()
+
+    def raise_for_status(self):
+        self._raise_fn()
+
+
+def _get_async_client():
+    """Return the running loop's httpx.AsyncClient with limits mirroring the sync pool"""
+    loop = asyncio.get_running_loop()
+    with _session_lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            client = _async_clients[loop] = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=POOL_MAXSIZE * POOL_CONNECTIONS,
+                    max_keepalive_connections=POOL_MAXSIZE,
+                ),
+                headers={"Accept": "application/json"},
+                timeout=DEFAULT_TIMEOUT,
+            )
+    return client
+
+
+async def arequest(method, url, **kwargs):
+    """Async request through the shared client without blocking the event loop.
+
+    Identical concurrent GETs await one shared task; a caller that is cancelled
+    does not cancel the request for the others.
+    """
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    key = _flight_key(method, url, kwargs)
+    if key is None:
+        return await _arequest(method, url, **kwargs)
+    loop = asyncio.get_running_loop()
+    task = _async_inflight.get(key)
+    if task is None or task.get_loop() is not loop:
+        task = loop.create_task(_arequest(method, url, **kwargs))
+        _async_inflight[key] = task
+
+        def _forget(done_task, key=key):
+            if _async_inflight.get(key) is done_task:
+                del _async_inflight[key]
+            if not done_task.cancelled():
+                done_task.exception()  # mark retrieved even if every waiter was cancelled
+
+        task.add_done_callback(_forget)
+    return await asyncio.shield(task)
+
+
+async def _arequest(method, url, **kwargs):
+    if HTTPX_AVAILABLE:
+        response = await _get_async_client().request(method, build_url(url), **kwargs)
+
+        def _raise():
+            try:
+                response.raise_for_status()
+            except httpx.HTTPStatusError as e:
+                # Keep the requests exception type (and e.response.status_code) so existing except clauses still work
+                raise requests.HTTPError(str(e), response=wrapped) from e
+
+        wrapped = AsyncResponse(response.status_code, response.content, response.text, response.json, _raise)
+        return wrapped
+
+    loop = asyncio.get_running_loop()
+    response = await loop.run_in_executor(None, functools.partial(request, method, url, **kwargs))
+    return AsyncResponse(response.status_code, response.content, response.text, response.json, response.raise_for_status)
+
+
+async def aget(url, **kwargs):
+    """Async GET through the shared client"""
+    return await arequest("GET", url, **kwargs)
+
+
+async def apost(url, **kwargs):
+    """Async POST through the shared client"""
+    return await arequest("POST", url, **kwargs)
+
+
+async def aclose():
+    """Close the running loop's async client (used on shutdown)"""
+    with _session_lock:
+        client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def aiter_pages(endpoint, token, params=None, page_size=DEFAULT_PAGE_SIZE, max_pages=None):
+    """Async counterpart of iter_pages with the same next-page prefetch"""
+
+    async def fetch(page):
+        page_params = dict(params or {})
+        page_params.update({"page": page, "pageSize": page_size})
+        response = await aget(endpoint, headers=auth_headers(token), params=page_params)
+        response.raise_for_status()
+        body = response.json()
+        if isinstance(body, list):
+            return body, False
+        return body.get("data", []) or [], bool(body.get("hasNext"))
+
+    page = 0
+    pending = asyncio.ensure_future(fetch(page))
+    try:
+        while pending is not None:
+            items, has_next = await pending
+            page += 1
+            more = has_next and items and (max_pages is None or page < max_pages)
+            pending = asyncio.ensure_future(fetch(page)) if more else None
+            for item in items:
+                yield item
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+
+
+async def alist_pages(endpoint, token, params=None, page_size=DEFAULT_PAGE_SIZE):
+    """Collect every item of a paginated listing"""
+    return [item async for item in aiter_pages(endpoint, token, params=params, page_size=page_size)]
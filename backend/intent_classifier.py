@@ -1,3 +1,279 @@
+"""
+Offline-trained intent classifier for queries the routing table misses.
+
+PROCESS_QUERY_ROUTER only fires when a query contains one of its exact
+keywords, so typos and paraphrases ("show alrams", "which sensors are
+running out of batery") used to go unanswered. This classifier
+hashes character n-grams (plus whole words) into a fixed-size vector and
+scores it with a softmax linear model in NumPy. Its labels are the router's
+own rule names plus GENERAL_INTENT. A confident prediction is dispatched
+straight to that rule's handler.
+
+The model is trained offline from the prompt corpora in the repo. Each prompt
+is labelled by the rule the router picks for it, and seeded typo variants
+keep that label, so the model learns what the keyword rules miss. Prompts the
+router does not handle are labelled GENERAL_INTENT. INTENT_SEED_PROMPTS adds
+hand-labelled paraphrases that no corpus prompt covers. Retrain and commit
+intent_model.npz after changing the routing table:
+
+    python intent_classifier.py
+"""
+
+import ast
+import os
+import random
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from hindi_normalizer import map_hindi_to_english
+
+GENERAL_INTENT = 'general'
+INTENT_MODEL_PATH = os.getenv("INTENT_MODEL_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_model.npz"))
+INTENT_CLASSIFIER_ENABLED = os.getenv("INTENT_CLASSIFIER_ENABLED", "true").lower() != "false"
+INTENT_CLASSIFIER_THRESHOLD = float(os.getenv("INTENT_CLASSIFIER_THRESHOLD", "0.8"))
+INTENT_HASH_DIM = 4096
+INTENT_NGRAM_RANGE = (2, 4)
+
+_DIGITS_RE = re.compile(r'\d+')
+_NON_WORD_RE = re.compile(r'[^\w\s]')
+
+
+def _feature_text(text: str) -> str:
+    """Lowercase, Hindi-mapped text with numbers folded so 'room 201' and 'room 50' look alike"""
+    text = _DIGITS_RE.sub('0', map_hindi_to_english(text).lower())
+    return ' '.join(_NON_WORD_RE.sub(' ', text).split())
+
+
+def _hash(token: str, dim: int) -> int:
+    # crc32 rather than hash(): Python string hashing is randomized per process
+    return zlib.crc32(token.encode('utf-8')) % dim
+
+
+def featurize(text: str, dim: int = INTENT_HASH_DIM, ngram_range: Tuple[int, int] = INTENT_NGRAM_RANGE) -> np.ndarray:
+    """L2-normalized hashed counts of character n-grams and words"""
+    normalized = _feature_text(text)
+    padded = f' {normalized} '
+    low, high = ngram_range
+    indexes = [_hash(padded[i:i + n], dim) for n in range(low, high + 1) for i in range(len(padded) - n + 1)]
+    indexes.extend(_hash('w:' + word, dim) for word in normalized.split())
+    vector = np.zeros(dim, dtype=np.float32)
+    if indexes:
+        np.add.at(vector, indexes, 1.0)
+        vector /= np.linalg.norm(vector)
+    return vector
+
+
+class IntentClassifier:
+    """Softmax linear model over hashed n-gram features"""
+
+    def __init__(self, labels: Sequence[str], weights: np.ndarray, bias: np.ndarray,
+                 dim: int = INTENT_HASH_DIM, ngram_range: Tuple[int, int] = INTENT_NGRAM_RANGE):
+        self.labels = list(labels)
+        self.weights = weights  # dim x labels
+        self.bias = bias
+        self.dim = dim
+        self.ngram_range = tuple(ngram_range)
+
+    def probabilities(self, text: str) -> Dict[str, float]:
+        scores = featurize(text, self.dim, self.ngram_range) @ self.weights + self.bias
+        scores = np.exp(scores - scores.max())
+        scores /= scores.sum()
+        return dict(zip(self.labels, scores.tolist()))
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """Return (label, confidence) for one query"""
+        probabilities = self.probabilities(text)
+        label = max(probabilities, key=probabilities.get)
+        return label, probabilities[label]
+
+    @classmethod
+    def train(cls, texts: Sequence[str], labels: Sequence[str], dim: int = INTENT_HASH_DIM,
+              ngram_range: Tuple[int, int] = INTENT_NGRAM_RANGE, epochs: int = 300,
+              learning_rate: float = 30.0, l2: float = 1e-4) -> 'IntentClassifier':
+        """Fit by full-batch gradient descent on class-balanced cross-entropy"""
+        classes = sorted(set(labels))
+        class_index = {label: i for i, label in enumerate(classes)}
+        features = np.stack([featurize(text, dim, ngram_range) for text in texts])
+        targets = np.zeros((len(texts), len(classes)), dtype=np.float32)
+        targets[np.arange(len(texts)), [class_index[label] for label in labels]] = 1.0
+        # Balance classes so GENERAL_INTENT does not drown out the small intents
+        sample_weights = (len(texts) / (len(classes) * targets.sum(axis=0)))[targets.argmax(axis=1)]
+        sample_weights = (sample_weights / sample_weights.sum()).astype(np.float32)[:, None]
+
+        weights = np.zeros((dim, len(classes)), dtype=np.float32)
+        bias = np.zeros(len(classes), dtype=np.float32)
+        for _ in range(epochs):
+            scores = features @ weights + bias
+            scores -= scores.max(axis=1, keepdims=True)
+            probabilities = np.exp(scores)
+            probabilities /= probabilities.sum(axis=1, keepdims=True)
+            gradient = (probabilities - targets) * sample_weights
+            weights -= learning_rate * (features.T @ gradient + l2 * weights)
+            bias -= learning_rate * gradient.sum(axis=0)
+        return cls(classes, weights, bias, dim, ngram_range)
+
+    def save(self, path: str = INTENT_MODEL_PATH):
+        np.savez_compressed(path, labels=np.array(self.labels), weights=self.weights.astype(np.float32),
+                            bias=self.bias.astype(np.float32), dim=self.dim, ngram_range=np.array(self.ngram_range))
+
+    @classmethod
+    def load(cls, path: str = INTENT_MODEL_PATH) -> 'IntentClassifier':
+        with np.load(path, allow_pickle=False) as model:
+            return cls([str(label) for label in model['labels']], model['weights'], model['bias'],
+                       int(model['dim']), tuple(int(n) for n in model['ngram_range']))
+
+
+def load_intent_classifier(path: str = INTENT_MODEL_PATH) -> Optional[IntentClassifier]:
+    """Load the persisted model at startup; None if disabled or not trained yet"""
+    if not INTENT_CLASSIFIER_ENABLED:
+        return None
+    if not os.path.exists(path):
+        print(f"⚠️ Intent model not found at {path} - run intent_classifier.py to train it")
+        return None
+    try:
+        return IntentClassifier.load(path)
+    except Exception as e:
+        print(f"⚠️ Could not load intent model {path}: {e}")
+        return None
+
+
+# --- Offline training --------------------------------------------------------
+
+_BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+_REPO_DIR = os.path.dirname(_BACKEND_DIR)
+TRAINING_CORPORA = (
+    os.path.join(_REPO_DIR, 'demo_prompts.txt'),
+    os.path.join(_BACKEND_DIR, 'TOP_20_PRACTICAL_PROMPTS.py'),
+    os.path.join(_BACKEND_DIR, 'top_30_critical_prompts.py'),
+    os.path.join(_BACKEND_DIR, 'comprehensive_bms_test_suite.py'),
+)
+# Paraphrases the keyword rules and the corpora miss, by rule name
+INTENT_SEED_PROMPTS = {
+    'battery_status': (
+        "which sensors are running out of battery", "which devices are running out of battery",
+        "devices running low on battery", "sensors that need new batteries", "which batteries need replacing",
+        "battery charge of sensors", "show battery levels", "battery percentage of all devices",
+        "which devices have a dying battery", "any sensors with a weak battery",
+    ),
+    'alarms': (
+        "show alarms", "show all alarms", "list alarms", "any alarms", "active alarms", "show active alarms",
+        "what alarms are active", "show me the alerts", "any alerts right now", "list active alerts",
+        "are there any alerts",
+    ),
+}
+_NUMBERED_PROMPT_RE = re.compile(r'^\s*\d+\.\s+(.+?)\s*$')
+_QUOTED_PROMPT_RE = re.compile(r'^\s*["“]([^"“”]+)["”]?\s*$')
+_PLAIN_PROMPT_RE = re.compile(r'^(?:show|give|what|set|turn|list|check|how|temperature)\b', re.IGNORECASE)
+
+
+def _prompts_from_text(source: str) -> List[str]:
+    """Numbered and quoted prompt lines, plus bare command lines, of a notes file"""
+    prompts = []
+    for line in source.splitlines():
+        found = _NUMBERED_PROMPT_RE.match(line) or _QUOTED_PROMPT_RE.match(line)
+        if found:
+            prompts.append(found.group(1).strip('"“” '))
+        elif _PLAIN_PROMPT_RE.match(line) and len(line) < 120 and not line.strip().endswith(':'):
+            prompts.append(line.strip().strip('"“” '))
+    return prompts
+
+
+def _prompts_from_python(source: str) -> List[str]:
+    """Values of 'prompt' dict keys, strings in *prompts lists and test_scenario queries"""
+    prompts = []
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Dict):
+            for key, value in zip(node.keys, node.values):
+                if isinstance(key, ast.Constant) and key.value == 'prompt' and isinstance(value, ast.Constant):
+                    prompts.append(value.value)
+        elif isinstance(node, ast.Assign) and isinstance(node.value, ast.List):
+            if any(isinstance(target, ast.Name) and 'prompts' in target.id for target in node.targets):
+                prompts.extend(item.value for item in node.value.elts
+                               if isinstance(item, ast.Constant) and isinstance(item.value, str))
+        elif isinstance(node, ast.Call) and getattr(node.func, 'attr', None) == 'test_scenario':
+            if len(node.args) >= 3 and isinstance(node.args[2], ast.Constant):
+                prompts.append(node.args[2].value)
+    return prompts
+
+
+def load_training_prompts(paths: Iterable[str] = TRAINING_CORPORA) -> List[str]:
+    """De-duplicated prompts from the corpora, in file order"""
+    prompts = []
+    for path in paths:
+        with open(path, encoding='utf-8', errors='ignore') as f:
+            source = f.read()
+        prompts.extend(_prompts_from_python(source) if path.endswith('.py') else _prompts_from_text(source))
+    seen = set()
+    unique = []
+    for prompt in prompts:
+        key = ' '.join(prompt.lower().split())
+        if isinstance(prompt, str) and len(key.split()) >= 2 and len(key) <= 200 and key not in seen:
+            seen.add(key)
+            unique.append(prompt.strip())
+    return unique
+
+
+def label_prompt(router, prompt: str) -> str:
+    """Name of the first rule whose keywords/patterns match, else GENERAL_INTENT"""
+    from query_router import RoutedQuery
+
+    query = RoutedQuery(prompt)
+    query.scan(router.automaton)
+    for rule in router.rules:
+        if rule.match(query) is not None:
+            return rule.name
+    return GENERAL_INTENT
+
+
+def typo_variants(text: str, count: int, rng: random.Random) -> List[str]:
+    """Copies of text with one or two character edits (drop, swap, double) inside words"""
+    variants = []
+    for _ in range(count):
+        chars = list(text)
+        for _ in range(rng.randint(1, 2)):
+            positions = [i for i in range(1, len(chars) - 1) if chars[i].isalpha() and chars[i - 1].isalpha()]
+            if not positions:
+                break
+            i = rng.choice(positions)
+            edit = rng.randrange(3)
+            if edit == 0:
+                del chars[i]
+            elif edit == 1:
+                chars[i - 1], chars[i] = chars[i], chars[i - 1]
+            else:
+                chars.insert(i, chars[i])
+        variants.append(''.join(chars))
+    return variants
+
+
+def build_training_set(router, prompts: Sequence[str], variants_per_prompt: int = 8, seed: int = 7,
+                       labelled: Optional[Dict[str, Sequence[str]]] = None) -> Tuple[List[str], List[str]]:
+    """Router-labelled prompts plus hand-labelled ones, each with typo variants"""
+    rng = random.Random(seed)
+    examples = [(prompt, label_prompt(router, prompt)) for prompt in prompts]
+    examples += [(prompt, label) for label, seeds in (labelled or {}).items() for prompt in seeds]
+    texts, labels = [], []
+    for prompt, label in examples:
+        for text in [prompt] + typo_variants(prompt, variants_per_prompt, rng):
+            texts.append(text)
+            labels.append(label)
+    return texts, labels
+
+
+def train_intent_model(router, paths: Iterable[str] = TRAINING_CORPORA, path: str = INTENT_MODEL_PATH) -> IntentClassifier:
+    prompts = load_training_prompts(paths)
+    texts, labels = build_training_set(router, prompts, labelled=INTENT_SEED_PROMPTS)
+    classifier = IntentClassifier.train(texts, labels)
+    classifier.save(path)
+    correct = sum(classifier.predict(text)[0] == label for text, label in zip(texts, labels))
+    print(f"✅ Trained intent model on {len(prompts)} prompts ({len(texts)} with typo variants), "
+          f"{len(classifier.labels)} intents, training accuracy {correct / len(texts):.1%} -> {path}")
+    return classifier
+
+
 def classify_intent(prompt: str) -> str:
     prompt = prompt.lower()
 
@@ -18,4 +294,10 @@ def classify_intent(prompt: str) -> str:
     elif "who am i" in prompt or "identity" in prompt:
         return "whoami"
     else:
-        return "get_devices"
\ No newline at end of file
+        return "get_devices"
+
+
+if __name__ == "__main__":
+    from enhanced_agentic_agent import PROCESS_QUERY_ROUTER
+
+    train_intent_model(PROCESS_QUERY_ROUTER)
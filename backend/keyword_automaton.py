@@ -0,0 +1,78 @@
+"""
+Multi-keyword matcher (Aho-Corasick) for intent detection.
+
+Keyword lists are registered under a category once at startup; scan() walks
+the lowercased query a single time and returns every category with at least
+one keyword occurring in it - the same answer as
+`any(kw in text for kw in keywords)` per category, without rescanning the
+query for each list.
+"""
+
+from collections import deque
+from typing import Dict, Hashable, Iterable, List, Set
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton mapping keywords to the categories they belong to"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Set[Hashable]] = [set()]
+        self.categories: Set[Hashable] = set()
+        self._empty_keyword_categories: Set[Hashable] = set()
+        self._built = False
+
+    def add(self, category: Hashable, keywords: Iterable[str]):
+        """Register keywords under category (call build() afterwards)"""
+        self.categories.add(category)
+        for keyword in keywords:
+            if not keyword:
+                # '' is a substring of every text
+                self._empty_keyword_categories.add(category)
+                continue
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(set())
+                    self._goto[state][char] = next_state
+                state = next_state
+            self._out[state].add(category)
+        self._built = False
+
+    def build(self) -> 'KeywordAutomaton':
+        """Compute failure links breadth-first"""
+        queue = deque()
+        for state in self._goto[0].values():
+            self._fail[state] = 0
+            queue.append(state)
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._out[next_state] |= self._out[self._fail[next_state]]
+        self._built = True
+        return self
+
+    def scan(self, text: str) -> Set[Hashable]:
+        """Return the categories with a keyword occurring in text"""
+        if not self._built:
+            self.build()
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set(self._empty_keyword_categories)
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found |= out[state]
+        return found
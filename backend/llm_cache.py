@@ -0,0 +1,111 @@
+"""
+Content-addressed cache of LLM results.
+
+Root-cause, trend and recommendation explanations and response translations
+often get byte-identical prompts within minutes, for example the same
+compacted alarm set asked about from two dashboards. Each one used to cost a
+full provider round-trip. LLMResultCache stores the reply under a SHA-256 of
+the model, the rendered messages (prompt template plus compacted inputs) and
+the sampling parameters. Entries are evicted by LRU and TTL. When
+LLM_CACHE_PATH is set, entries are also written to a SQLite file so they
+survive restarts and are shared by workers on the same host. Callers opt in
+per call through LLMGateway.complete(cache_ttl=...).
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() != "false"
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "600"))
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH")  # e.g. llm_cache.db; unset keeps the cache in memory only
+
+
+def content_key(*parts: Any) -> str:
+    """Stable SHA-256 of JSON-serializable parts"""
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResultCache:
+    """LRU of content key -> reply with per-entry TTL, optionally backed by SQLite"""
+
+    def __init__(self, max_entries: int = LLM_CACHE_MAX_ENTRIES, path: Optional[str] = LLM_CACHE_PATH,
+                 enabled: bool = LLM_CACHE_ENABLED):
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if enabled and path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS llm_results (key TEXT PRIMARY KEY, reply TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+                self._db.execute("DELETE FROM llm_results WHERE expires_at <= ?", (time.time(),))
+            except sqlite3.Error as e:
+                print(f"⚠️ LLM cache: SQLite backing at {path} unavailable ({e}), using memory only")
+                self._db = None
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a fresh cached reply, or None"""
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                reply, expires_at = entry
+                if now < expires_at:
+                    self._entries.move_to_end(key)
+                    return reply
+                del self._entries[key]
+            if self._db is None:
+                return None
+            try:
+                row = self._db.execute(
+                    "SELECT reply, expires_at FROM llm_results WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+            except sqlite3.Error as e:
+                print(f"[DEBUG] LLM cache read failed: {e}")
+                return None
+            if row is None:
+                return None
+            self._remember(key, row[0], row[1])
+            return row[0]
+
+    def put(self, key: str, reply: str, ttl: float = LLM_CACHE_TTL):
+        """Remember a reply for ttl seconds"""
+        if not self.enabled or not ttl:
+            return
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._remember(key, reply, expires_at)
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_results (key, reply, expires_at) VALUES (?, ?, ?)", (key, reply, expires_at)
+                )
+            except sqlite3.Error as e:
+                print(f"[DEBUG] LLM cache write failed: {e}")
+
+    def _remember(self, key: str, reply: str, expires_at: float):
+        self._entries[key] = (reply, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_results")
@@ -0,0 +1,315 @@
+"""
+Central gateway for every LLM call.
+
+LLM clients used to be created in several places: module-level OpenAI and
+LangChain objects in the agent, another ChatOpenAI per agent, and more in
+graph.py and tools.py. None of those calls had a timeout, a retry budget or a
+concurrency cap, so a slow provider held every chat worker thread. LLMGateway
+picks the provider from AI_PROVIDER and bounds in-flight calls with a
+semaphore. Each call gets a deadline that covers the wait for a slot, every
+attempt and the backoff between attempts, and 429 responses are retried with
+jittered exponential backoff inside that deadline. The gateway also counts
+calls, tokens and latency. When a call cannot finish in time, LLMUnavailable
+is raised, and callers answer with a short message instead of blocking.
+Prompts larger than LLM_MAX_PROMPT_TOKENS are cut before they are sent.
+Callers that pass cache_ttl get repeated identical prompts answered from
+LLMResultCache without a provider round-trip.
+"""
+
+import os
+import random
+import threading
+import time
+import types
+from typing import Callable, Dict, List, Optional
+
+from llm_cache import LLMResultCache, content_key
+from prompt_compaction import estimate_tokens, fit_messages
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_CALL_DEADLINE = float(os.getenv("LLM_CALL_DEADLINE", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_MAX_PROMPT_TOKENS = int(os.getenv("LLM_MAX_PROMPT_TOKENS", "3000"))
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-pro")
+
+_PLACEHOLDER_KEYS = ("", "test-key-for-testing")
+
+
+class LLMUnavailable(Exception):
+    """The LLM could not answer within the call's deadline (busy, rate limited, timed out or unconfigured)"""
+
+
+def _is_rate_limit(error: Exception) -> bool:
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    text = str(error).lower()
+    return status == 429 or "429" in text or "rate limit" in text or "rate_limit" in text or "resource exhausted" in text
+
+
+def _close_quietly(stream):
+    try:
+        stream.close()
+    except Exception:
+        pass
+
+
+def _within_deadline(stream, expires_at: float):
+    """Chunks of a streamed reply, abandoned with LLMUnavailable once the call's deadline passes.
+
+    The SDK timeout only bounds each read, so a provider trickling tokens could keep
+    a stream open indefinitely. Chunks are checked against the deadline, and a
+    closable HTTP stream is also closed at the deadline so a read blocked in
+    between is cut off too.
+    """
+    watchdog = None
+    if hasattr(stream, "close") and not isinstance(stream, types.GeneratorType):
+        watchdog = threading.Timer(max(0.0, expires_at - time.monotonic()), _close_quietly, args=(stream,))
+        watchdog.daemon = True
+        watchdog.start()
+    try:
+        for chunk in stream:
+            if time.monotonic() >= expires_at:
+                raise LLMUnavailable("LLM call timeout: streamed reply passed the deadline")
+            yield chunk
+    finally:
+        if watchdog is not None:
+            watchdog.cancel()
+        if hasattr(stream, "close"):
+            _close_quietly(stream)
+
+
+def _usage_tokens(usage) -> (int, int):
+    """(prompt, completion) token counts from an OpenAI usage object or LangChain usage_metadata"""
+    if not usage:
+        return 0, 0
+    if isinstance(usage, dict):
+        return usage.get("input_tokens", 0) or 0, usage.get("output_tokens", 0) or 0
+    return getattr(usage, "prompt_tokens", 0) or 0, getattr(usage, "completion_tokens", 0) or 0
+
+
+class LLMGateway:
+    """Provider selection, concurrency cap, deadlines, 429 retries and counters for chat completions"""
+
+    def __init__(self, provider: Optional[str] = None, openai_client=None, chat_model=None,
+                 max_concurrency: int = LLM_MAX_CONCURRENCY, deadline: float = LLM_CALL_DEADLINE,
+                 max_retries: int = LLM_MAX_RETRIES, retry_base_delay: float = LLM_RETRY_BASE_DELAY,
+                 max_prompt_tokens: int = LLM_MAX_PROMPT_TOKENS, cache: Optional[LLMResultCache] = None):
+        # openai_client / chat_model may be injected; otherwise they are created on first use
+        self.provider = provider if provider is not None else self._configured_provider()
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.max_prompt_tokens = max_prompt_tokens
+        self.cache = cache if cache is not None else LLMResultCache()
+        self._openai_client = openai_client
+        self._chat_model = chat_model
+        self._client_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrency))
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "calls": 0, "succeeded": 0, "failed": 0, "rejected": 0, "deadline_exceeded": 0,
+            "rate_limited": 0, "retries": 0, "in_flight": 0, "prompts_trimmed": 0,
+            "cache_hits": 0, "cache_misses": 0,
+            "prompt_tokens": 0, "completion_tokens": 0, "latency_ms_total": 0.0, "latency_ms_max": 0.0,
+        }
+
+    @staticmethod
+    def _configured_provider() -> Optional[str]:
+        ai_provider = os.getenv("AI_PROVIDER", "openai").lower()
+        gemini_key = os.getenv("GEMINI_API_KEY") or ""
+        openai_key = os.getenv("OPENAI_API_KEY") or ""
+        if ai_provider == "gemini" and gemini_key not in _PLACEHOLDER_KEYS:
+            print("🤖 Using Google Gemini Pro as AI provider")
+            return "gemini"
+        if openai_key not in _PLACEHOLDER_KEYS:
+            print("🤖 Using OpenAI GPT-4o as AI provider")
+            return "openai"
+        print("⚠️ No valid AI provider configured - LLM features will be limited")
+        return None
+
+    @property
+    def available(self) -> bool:
+        return self.provider is not None
+
+    @property
+    def model(self) -> Optional[str]:
+        return {"openai": OPENAI_MODEL, "gemini": GEMINI_MODEL}.get(self.provider)
+
+    def _openai(self):
+        if self._openai_client is None:
+            with self._client_lock:
+                if self._openai_client is None:
+                    from openai import OpenAI
+                    # Retries are ours (429 only, within the deadline)
+                    self._openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+        return self._openai_client
+
+    def _gemini(self):
+        if self._chat_model is None:
+            with self._client_lock:
+                if self._chat_model is None:
+                    from langchain_google_genai import ChatGoogleGenerativeAI
+                    os.environ.setdefault("GOOGLE_API_KEY", os.getenv("GEMINI_API_KEY") or "")
+                    self._chat_model = ChatGoogleGenerativeAI(
+                        model=GEMINI_MODEL, temperature=0, convert_system_message_to_human=True, max_retries=0
+                    )
+        return self._chat_model
+
+    def complete(self, messages: List[Dict[str, str]], temperature: float = 0.0, max_tokens: Optional[int] = None,
+                 deadline: Optional[float] = None, on_token: Optional[Callable[[str], None]] = None,
+                 cache_ttl: Optional[float] = None) -> str:
+        """Reply text for OpenAI-style messages; on_token, if given, receives the reply as it streams.
+
+        With cache_ttl, the reply is stored for that many seconds under a hash of the
+        model, messages and sampling parameters, and identical calls reuse it.
+
+        Raises LLMUnavailable when no provider is configured, no slot frees up, or the
+        deadline passes (including while retrying 429s). Other provider errors propagate.
+        """
+        if not self.available:
+            raise LLMUnavailable("LLM service is not configured")
+        if sum(estimate_tokens(m.get("content") or "") for m in messages) > self.max_prompt_tokens:
+            messages = fit_messages(messages, self.max_prompt_tokens)
+            self._count("prompts_trimmed")
+        cache_key = None
+        if cache_ttl and self.cache.enabled:
+            cache_key = content_key(self.model, messages, temperature, max_tokens)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self._count("cache_hits")
+                if on_token is not None:
+                    on_token(cached)
+                return cached
+            self._count("cache_misses")
+        deadline = deadline or self.deadline
+        started = time.monotonic()
+        expires_at = started + deadline
+        self._count("calls")
+        if not self._slots.acquire(timeout=deadline):
+            self._count("rejected")
+            raise LLMUnavailable(f"LLM busy: timeout waiting for a free slot after {deadline:.0f}s")
+        self._count("in_flight")
+        try:
+            attempt = 0
+            while True:
+                remaining = expires_at - time.monotonic()
+                if remaining <= 0:
+                    self._count("deadline_exceeded")
+                    raise LLMUnavailable(f"LLM call timeout after {deadline:.0f}s")
+                streamed = []
+                sink = None
+                if on_token is not None:
+                    def sink(text, streamed=streamed):
+                        streamed.append(text)
+                        on_token(text)
+                try:
+                    text, usage = self._call(messages, temperature, max_tokens, remaining, sink)
+                except LLMUnavailable:
+                    self._count("deadline_exceeded")
+                    raise
+                except Exception as e:
+                    if time.monotonic() >= expires_at and not _is_rate_limit(e):
+                        self._count("deadline_exceeded")
+                        raise LLMUnavailable(f"LLM call timeout after {deadline:.0f}s: {e}") from e
+                    if not _is_rate_limit(e):
+                        self._count("failed")
+                        raise
+                    self._count("rate_limited")
+                    # A partly streamed reply cannot be retried without duplicating text
+                    if streamed or attempt >= self.max_retries:
+                        self._count("failed")
+                        raise LLMUnavailable(f"LLM rate_limit: {e}") from e
+                    delay = random.uniform(0, self.retry_base_delay * (2 ** attempt))
+                    if time.monotonic() + delay >= expires_at:
+                        self._count("deadline_exceeded")
+                        raise LLMUnavailable(f"LLM rate_limit: retry would pass the {deadline:.0f}s deadline") from e
+                    attempt += 1
+                    self._count("retries")
+                    time.sleep(delay)
+                    continue
+                prompt_tokens, completion_tokens = usage
+                self._record_success((time.monotonic() - started) * 1000, prompt_tokens, completion_tokens)
+                if cache_key is not None and text:
+                    self.cache.put(cache_key, text, cache_ttl)
+                return text
+        finally:
+            self._count("in_flight", -1)
+            self._slots.release()
+
+    def _call(self, messages, temperature, max_tokens, timeout, sink):
+        """One provider request; returns (text, (prompt tokens, completion tokens))
+
+        Streaming requests raise LLMUnavailable when the reply runs past timeout seconds.
+        """
+        expires_at = time.monotonic() + timeout
+        if self.provider == "openai":
+            kwargs = {"model": OPENAI_MODEL, "messages": messages, "temperature": temperature, "timeout": timeout}
+            if max_tokens:
+                kwargs["max_tokens"] = max_tokens
+            completions = self._openai().chat.completions
+            if sink is None:
+                response = completions.create(**kwargs)
+                return response.choices[0].message.content or "", _usage_tokens(getattr(response, "usage", None))
+            parts = []
+            usage = None
+            stream = completions.create(stream=True, stream_options={"include_usage": True}, **kwargs)
+            for chunk in _within_deadline(stream, expires_at):
+                usage = getattr(chunk, "usage", None) or usage
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    sink(delta)
+            return "".join(parts), _usage_tokens(usage)
+
+        from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+        roles = {"system": SystemMessage, "assistant": AIMessage}
+        lc_messages = [roles.get(m["role"], HumanMessage)(content=m["content"]) for m in messages]
+        model = self._gemini().bind(temperature=temperature, max_output_tokens=max_tokens, timeout=timeout)
+        if sink is None:
+            response = model.invoke(lc_messages)
+            return response.content or "", _usage_tokens(getattr(response, "usage_metadata", None))
+        parts = []
+        usage = None
+        for chunk in _within_deadline(model.stream(lc_messages), expires_at):
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            if chunk.content:
+                parts.append(chunk.content)
+                sink(chunk.content)
+        return "".join(parts), _usage_tokens(usage)
+
+    def _count(self, name: str, amount: int = 1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def _record_success(self, latency_ms: float, prompt_tokens: int, completion_tokens: int):
+        with self._stats_lock:
+            self._stats["succeeded"] += 1
+            self._stats["prompt_tokens"] += prompt_tokens
+            self._stats["completion_tokens"] += completion_tokens
+            self._stats["latency_ms_total"] += latency_ms
+            self._stats["latency_ms_max"] = max(self._stats["latency_ms_max"], latency_ms)
+
+    def stats(self) -> Dict:
+        """Counters since startup plus average latency of successful calls"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["provider"] = self.provider
+        stats["latency_ms_avg"] = round(stats["latency_ms_total"] / stats["succeeded"], 1) if stats["succeeded"] else 0.0
+        stats["latency_ms_total"] = round(stats["latency_ms_total"], 1)
+        stats["latency_ms_max"] = round(stats["latency_ms_max"], 1)
+        return stats
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Process-wide gateway, created on first use"""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = LLMGateway()
+    return _gateway
@@ -1,6 +1,13 @@
-﻿import dotenv
-import requests
+﻿# Time every import from here on; the report is printed once the app has started
+import import_cost
+import_cost.install()
+
+import asyncio
+import dotenv
+import inferrix_client
+import json
 import os
+import threading
 import time
 from collections import defaultdict
 from typing import Optional
@@ -8,16 +15,42 @@ dotenv.load_dotenv()
 
 from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.responses import JSONResponse, HTMLResponse, StreamingResponse
 from pydantic import BaseModel
-from enhanced_agentic_agent import get_enhanced_agentic_agent
 from auth_db import get_current_user
+from chat_stream import chat_events
+from llm_gateway import get_llm_gateway
 
 # Import database cleanup for one-time execution
 from database_cleanup import cleanup_database
 
 app = FastAPI(title="Inferrix AI Agent API", version="1.0.0")
 
+# The agent module pulls in the ML/LLM stack; import it in the background so /health answers at once.
+# Handlers fetch the agent with asyncio.to_thread so a first (or still warming) import never blocks the loop.
+AGENT_WARMUP = os.getenv("AGENT_WARMUP", "true").lower() != "false"
+
+def get_enhanced_agentic_agent():
+    """The shared chat agent; its module is imported on first use (or by the startup warm-up)"""
+    from enhanced_agentic_agent import get_enhanced_agentic_agent as get_agent
+    return get_agent()
+
+def _warm_up_agent():
+    started = time.perf_counter()
+    try:
+        get_enhanced_agentic_agent()
+        print(f"🔥 Agent warmed up in {time.perf_counter() - started:.1f}s")
+    except Exception as e:
+        print(f"⚠️ Agent warm-up failed, it will be built on the first chat: {e}")
+    import_cost.print_report()
+
+@app.on_event("startup")
+def start_agent_warm_up():
+    if AGENT_WARMUP:
+        threading.Thread(target=_warm_up_agent, name="agent-warmup", daemon=True).start()
+    else:
+        import_cost.print_report()
+
 # Rate limiting
 request_counts = defaultdict(list)
 RATE_LIMIT_WINDOW = 60  # 1 minute
@@ -133,7 +166,7 @@ def login(user: User):
         while retry_count < max_retries:
             try:
                 print(f"[DEBUG] Attempt {retry_count + 1} of {max_retries} for Inferrix API call")
-                inferrix_response = requests.post(
+                inferrix_response = inferrix_client.post(
                     "https://cloud.inferrix.com/api/auth/login",
                     json=inferrix_login_data,
                     headers=headers,
@@ -176,7 +209,7 @@ def login(user: User):
         return {"access_token": token, "token_type": "bearer"}
 
 @app.post("/chat")
-def chat(prompt: Prompt, request: Request, current_user=Depends(get_current_user)):
+async def chat(prompt: Prompt, request: Request, current_user=Depends(get_current_user)):
     """Process chat query through AI agent using agentic approach"""
     try:
         if not prompt.query.strip():
@@ -197,11 +230,11 @@ def chat(prompt: Prompt, request: Request, current_user=Depends(get_current_user
             # If device is selected, modify the query to include device context
             device_context = f" (Device ID: {prompt.device})"
             enhanced_query = prompt.query + device_context
-            agent = get_enhanced_agentic_agent()
-            response = agent.process_query(enhanced_query, prompt.user, prompt.device, inferrix_token)
+            agent = await asyncio.to_thread(get_enhanced_agentic_agent)
+            response = await agent.process_query_async(enhanced_query, prompt.user, prompt.device, inferrix_token)
         else:
-            agent = get_enhanced_agentic_agent()
-            response = agent.process_query(prompt.query, prompt.user, "", inferrix_token)
+            agent = await asyncio.to_thread(get_enhanced_agentic_agent)
+            response = await agent.process_query_async(prompt.query, prompt.user, "", inferrix_token)
         
         # Always return a string
         if not response:
@@ -221,8 +254,35 @@ def chat(prompt: Prompt, request: Request, current_user=Depends(get_current_user
 
 # Removed complex refresh token endpoint - using simple token approach
 
+ENHANCED_CHAT_FEATURES = [
+    "conversational_memory",
+    "multi_device_operations", 
+    "proactive_insights",
+    "natural_language_control",
+    "rich_responses",
+    "personalization",
+    "self_healing",
+    "smart_notifications",
+    "multi_language_support"
+]
+
+def get_chat_inferrix_token(request: Request) -> Optional[str]:
+    """Inferrix token from X-Inferrix-Token, falling back to the Authorization bearer"""
+    inferrix_token = request.headers.get("X-Inferrix-Token")
+    if inferrix_token:
+        print(f"[DEBUG] Enhanced chat - Token found: {inferrix_token[:20]}...")
+        return inferrix_token
+    print("[DEBUG] Enhanced chat - No X-Inferrix-Token header found")
+    # Try to get from Authorization header as fallback
+    auth_header = request.headers.get("Authorization")
+    if auth_header and auth_header.startswith("Bearer "):
+        inferrix_token = auth_header[7:]  # Remove "Bearer " prefix
+        print(f"[DEBUG] Enhanced chat - Token from Authorization header: {inferrix_token[:20]}...")
+        return inferrix_token
+    return None
+
 @app.post("/chat/enhanced")
-def enhanced_chat(prompt: Prompt, request: Request, current_user=Depends(get_current_user)):
+async def enhanced_chat(prompt: Prompt, request: Request, current_user=Depends(get_current_user)):
     """Process chat query through enhanced AI agent with AI magic features"""
     try:
         if not prompt.query.strip():
@@ -234,27 +294,16 @@ def enhanced_chat(prompt: Prompt, request: Request, current_user=Depends(get_cur
         print(f"[DEBUG] Enhanced chat - DEPLOYMENT MARKER: Debugging changes deployed")
         
         # Get the Inferrix token from the request headers
-        inferrix_token = None
-        auth_header = request.headers.get("X-Inferrix-Token")
-        if auth_header:
-            inferrix_token = auth_header
-            print(f"[DEBUG] Enhanced chat - Token found: {inferrix_token[:20]}...")
-        else:
-            print("[DEBUG] Enhanced chat - No X-Inferrix-Token header found")
-            # Try to get from Authorization header as fallback
-            auth_header = request.headers.get("Authorization")
-            if auth_header and auth_header.startswith("Bearer "):
-                inferrix_token = auth_header[7:]  # Remove "Bearer " prefix
-                print(f"[DEBUG] Enhanced chat - Token from Authorization header: {inferrix_token[:20]}...")
+        inferrix_token = get_chat_inferrix_token(request)
         
         # Use the enhanced agentic agent with AI magic features
-        agent = get_enhanced_agentic_agent()
+        agent = await asyncio.to_thread(get_enhanced_agentic_agent)
         
         # Debug: Check if agent has token before calling process_query
         print(f"[DEBUG] Enhanced chat - Agent has token: {hasattr(agent, '_api_token') and agent._api_token is not None}")
         
         # Pass the token to process_query - it will set the API token internally
-        response = agent.process_query(prompt.query, prompt.user, prompt.device or "", inferrix_token)
+        response = await agent.process_query_async(prompt.query, prompt.user, prompt.device or "", inferrix_token)
         
         print(f"[DEBUG] Enhanced chat - Final response: {response[:100]}...")
         
@@ -266,17 +315,7 @@ def enhanced_chat(prompt: Prompt, request: Request, current_user=Depends(get_cur
             "response": response, 
             "tool": "enhanced_agentic_agent",  # Indicate this is using the enhanced agentic approach
             "timestamp": time.time(),
-            "features": [
-                "conversational_memory",
-                "multi_device_operations", 
-                "proactive_insights",
-                "natural_language_control",
-                "rich_responses",
-                "personalization",
-                "self_healing",
-                "smart_notifications",
-                "multi_language_support"
-            ]
+            "features": ENHANCED_CHAT_FEATURES
         }
     except Exception as e:
         print(f"Enhanced chat error: {e}")
@@ -285,8 +324,31 @@ def enhanced_chat(prompt: Prompt, request: Request, current_user=Depends(get_cur
             status_code=500
         )
 
+@app.post("/chat/enhanced/stream")
+async def enhanced_chat_stream(prompt: Prompt, request: Request, current_user=Depends(get_current_user)):
+    """Stream a chat answer as Server-Sent Events (see chat_stream).
+
+    Answers that do not come from the LLM arrive in one `done` event.
+    """
+    if not prompt.query.strip():
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+    inferrix_token = get_chat_inferrix_token(request)
+    agent = await asyncio.to_thread(get_enhanced_agentic_agent)
+
+    def done_body(response):
+        return {
+            "response": response,
+            "tool": "enhanced_agentic_agent",
+            "timestamp": time.time(),
+            "features": ENHANCED_CHAT_FEATURES
+        }
+
+    events = chat_events(agent.process_query_stream(prompt.query, prompt.user, prompt.device or "", inferrix_token), done_body)
+    return StreamingResponse(events, media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.get("/inferrix/alarms")
-def get_alarms(request: Request, current_user=Depends(get_current_user)):
+async def get_alarms(request: Request, current_user=Depends(get_current_user)):
     """Get alarms from Inferrix API"""
     try:
         # Get the Inferrix token from the request headers
@@ -295,7 +357,7 @@ def get_alarms(request: Request, current_user=Depends(get_current_user)):
             raise HTTPException(status_code=401, detail="Inferrix API token required. Please log in again.")
         
         headers = {"X-Authorization": f"Bearer {inferrix_token}"}
-        response = requests.get(
+        response = await inferrix_client.aget(
             "https://cloud.inferrix.com/api/v2/alarms",
             headers=headers,
             params={"pageSize": 100, "page": 0, "sortProperty": "createdTime", "sortOrder": "DESC", "statusList": "ACTIVE"}
@@ -307,7 +369,7 @@ def get_alarms(request: Request, current_user=Depends(get_current_user)):
         raise HTTPException(status_code=500, detail=f"Inferrix API call failed: {str(e)}")
 
 @app.get("/inferrix/devices")
-def get_devices(request: Request, current_user=Depends(get_current_user)):
+async def get_devices(request: Request, current_user=Depends(get_current_user)):
     """Get devices from Inferrix API"""
     try:
         # Get the Inferrix token from the request headers
@@ -315,15 +377,9 @@ def get_devices(request: Request, current_user=Depends(get_current_user)):
         if not inferrix_token:
             raise HTTPException(status_code=401, detail="Inferrix API token required. Please log in again.")
         
-        headers = {"X-Authorization": f"Bearer {inferrix_token}"}
-        response = requests.get(
-            "https://cloud.inferrix.com/api/user/devices",
-            headers=headers,
-            params={"page": 0, "pageSize": 100}
-        )
-        response.raise_for_status()
-        
-        return {"devices": response.json().get("data", [])}
+        # Walk every page (next page is prefetched) so large fleets are complete
+        devices = await inferrix_client.alist_pages("user/devices", inferrix_token)
+        return {"devices": devices}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Inferrix API call failed: {str(e)}")
 
@@ -376,9 +432,15 @@ def health():
         "version": "1.0.0",
         "database_available": True,
         "ai_magic_available": True,
+        "llm": get_llm_gateway().stats(),
         "note": "Use /inferrix/devices or /inferrix/alarms with authentication for API testing"
     }
 
+@app.get("/health/startup")
+def health_startup():
+    """Import cost per module since the process started"""
+    return import_cost.report()
+
 @app.get("/api/info")
 def api_info():
     """Dynamic API information endpoint"""
@@ -416,7 +478,7 @@ def debug_devices(current_user=Depends(get_current_user)):
             raise HTTPException(status_code=500, detail="Inferrix API token not configured")
         
         headers = {"X-Authorization": f"Bearer {jwt_token}"}
-        response = requests.get(
+        response = inferrix_client.get(
             "https://cloud.inferrix.com/api/user/devices",
             headers=headers,
             params={"page": 0, "pageSize": 50}
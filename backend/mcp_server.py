@@ -1,6 +1,7 @@
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 import requests
+import inferrix_client
 import os
 import time
 from dotenv import load_dotenv
@@ -57,7 +58,7 @@ def get_alarms(request: Request):
         if any(word in q for word in ['history', 'past', 'last', 'week', 'month', 'day', 'old']):
             include_cleared = True
             params["statusList"] = "CLEARED,ACTIVE"
-        response = requests.get(url, headers=headers, params=params)
+        response = inferrix_client.get(url, headers=headers, params=params)
         response.raise_for_status()
         alarms_data = response.json()
         if not include_cleared and isinstance(alarms_data, dict) and 'data' in alarms_data:
@@ -75,19 +76,15 @@ def get_devices(request: Request):
         # For health checks, return a simple response without authentication
         return {"status": "MCP Server is running", "note": "Authentication required for full API access"}
     
-    url = "https://cloud.inferrix.com/api/user/devices"
     params = {
-        "pageSize": 100,
-        "page": 0,
         "sortProperty": "createdTime",
         "sortOrder": "DESC",
         "includeCustomers": "true"
     }
-    headers = {"X-Authorization": f"Bearer {inferrix_token}", "Content-Type": "application/json"}
     try:
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        return response.json()
+        # Walk every page instead of truncating at the first 100 devices
+        devices = list(inferrix_client.iter_pages("user/devices", inferrix_token, params=params))
+        return {"data": devices, "totalPages": 1, "totalElements": len(devices), "hasNext": False}
     except requests.RequestException as e:
         print("❌ Error calling Inferrix API (devices):", e)
         raise HTTPException(status_code=500, detail="Inferrix API call failed (devices)")
@@ -0,0 +1,64 @@
+"""
+Speculative prefetch of upstream data on query arrival.
+
+Almost every chat query ends up reading the tenant's device directory, alarm
+queries read the active alarm page, and queries that name a device read its
+telemetry keys. Those reads used to start only after routing had picked a
+handler, one after another. process_query now starts them on a small pool as
+soon as the query arrives, so they overlap with routing and the intent
+classifier. Prefetches are named futures on the request context. A handler
+joins the one it needs and fetches by itself when nothing was prefetched, the
+prefetch failed, or it did not finish in time. A prefetch still queued behind
+other chats' prefetches is cancelled at join time instead of waited for, and a
+running one is only waited for briefly (PREFETCH_JOIN_TIMEOUT).
+"""
+
+import contextvars
+import os
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Hashable, Optional
+
+from request_context import current_context
+
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() != "false"
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "4"))
+PREFETCH_JOIN_TIMEOUT = float(os.getenv("PREFETCH_JOIN_TIMEOUT", "2"))
+
+
+class Prefetcher:
+    """Starts named background fetches for the query bound to the current RequestContext"""
+
+    def __init__(self, max_workers: int = PREFETCH_WORKERS, enabled: bool = PREFETCH_ENABLED):
+        self.enabled = enabled
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="prefetch")
+
+    def start(self, name: Hashable, func: Callable[..., Any], *args) -> Optional[Future]:
+        """Run func(*args) in the background under the query's context; one future per name"""
+        context = current_context()
+        if not self.enabled or context is None:
+            return None
+        future = context.prefetches.get(name)
+        if future is None:
+            # The copied context carries the RequestContext, so the token and per-query state follow
+            future = self._executor.submit(contextvars.copy_context().run, func, *args)
+            context.prefetches[name] = future
+        return future
+
+
+def join_prefetch(name: Hashable, timeout: float = PREFETCH_JOIN_TIMEOUT) -> Any:
+    """Result of the named prefetch for the current query; None if none was started or it failed"""
+    context = current_context()
+    future = context.prefetches.get(name) if context is not None else None
+    if future is None:
+        return None
+    if future.cancel():
+        # Never started (the pool is busy with other chats): fetching directly is faster than queueing
+        print(f"[DEBUG] Prefetch - {name} still queued, fetching directly")
+        return None
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        print(f"[DEBUG] Prefetch - {name} not ready after {timeout}s, fetching directly")
+    except Exception as e:
+        print(f"[DEBUG] Prefetch - {name} failed: {e}")
+    return None
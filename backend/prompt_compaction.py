@@ -0,0 +1,174 @@
+"""
+Compaction of telemetry and alarm payloads before they go into LLM prompts.
+
+The analytics handlers used to paste whole API payloads into prompts:
+json.dumps(..., indent=2) of analytics responses, raw alarm objects and full
+timeseries dicts. Prompt size, and with it LLM latency and cost, grew with
+the history length and the alarm count while adding nothing the model needs.
+compact_payload turns every timeseries into summary statistics (count, min,
+max, mean, p95, slope, last value) and every alarm list into deduplicated
+type/severity/device tallies. to_prompt_json renders the result as compact
+JSON within a token budget. The LLM gateway also caps the total prompt size
+of each call with fit_messages.
+"""
+
+import json
+import math
+import os
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+PROMPT_PAYLOAD_TOKENS = int(os.getenv("PROMPT_PAYLOAD_TOKENS", "800"))
+PROMPT_ALARM_GROUPS = int(os.getenv("PROMPT_ALARM_GROUPS", "10"))
+PROMPT_LIST_ITEMS = int(os.getenv("PROMPT_LIST_ITEMS", "5"))
+PROMPT_STRING_CHARS = int(os.getenv("PROMPT_STRING_CHARS", "300"))
+
+# Rough size of a token for English/JSON text; good enough for budgeting
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = " …[truncated]"
+
+_SEVERITY_RANK = {"CRITICAL": 0, "MAJOR": 1, "MINOR": 2, "WARNING": 3, "INDETERMINATE": 4}
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def fit_to_budget(text: str, max_tokens: int) -> str:
+    """text cut to about max_tokens, marked as truncated when cut"""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[:max(0, max_chars - len(TRUNCATION_MARKER))] + TRUNCATION_MARKER
+
+
+def _number(value) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def _is_series(items: List) -> bool:
+    """A timeseries: [{'ts': ..., 'value': ...}, ...] or a plain list of numbers"""
+    if all(isinstance(p, dict) and "value" in p for p in items):
+        return True
+    return all(_number(p) is not None for p in items)
+
+
+def _is_alarm_list(items: List) -> bool:
+    return all(isinstance(a, dict) and "severity" in a and "type" in a for a in items)
+
+
+def summarize_series(points: List) -> Dict[str, Any]:
+    """count, min, max, mean, p95, slope and last value of a timeseries
+
+    The slope is per hour when points carry 'ts' (epoch ms), otherwise per sample.
+    Points are taken oldest first whatever order the API returned them in.
+    """
+    timed = all(isinstance(p, dict) and _number(p.get("ts")) is not None for p in points)
+    if timed:
+        points = sorted(points, key=lambda p: float(p["ts"]))
+    raw = [p.get("value") if isinstance(p, dict) else p for p in points]
+    samples = [(i, _number(v)) for i, v in enumerate(raw) if _number(v) is not None]
+    summary = {"count": len(raw)}
+    if not samples:
+        # Non-numeric series (states, strings): the latest value is what matters
+        if raw:
+            summary["last"] = raw[-1]
+        return summary
+
+    values = sorted(v for _, v in samples)
+    summary.update({
+        "min": round(values[0], 3),
+        "max": round(values[-1], 3),
+        "mean": round(sum(values) / len(values), 3),
+        "p95": round(values[min(len(values) - 1, math.ceil(0.95 * len(values)) - 1)], 3),
+        "last": round(samples[-1][1], 3),
+    })
+    if len(samples) > 1:
+        if timed:
+            xs = [float(points[i]["ts"]) / 3_600_000 for i, _ in samples]
+            unit = "slope_per_hour"
+        else:
+            xs = [float(i) for i, _ in samples]
+            unit = "slope_per_sample"
+        ys = [v for _, v in samples]
+        mean_x = sum(xs) / len(xs)
+        mean_y = sum(ys) / len(ys)
+        spread = sum((x - mean_x) ** 2 for x in xs)
+        if spread:
+            summary[unit] = round(sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / spread, 4)
+    return summary
+
+
+def summarize_alarms(alarms: List[Dict], max_groups: int = PROMPT_ALARM_GROUPS) -> Dict[str, Any]:
+    """Alarm tallies by severity plus deduplicated (type, severity, device) groups, most severe first"""
+    groups = {}
+    for alarm in alarms:
+        device = alarm.get("originatorName") or (alarm.get("originator") or {}).get("id") or "unknown"
+        key = (alarm.get("type") or "unknown", str(alarm.get("severity") or "unknown").upper(), device)
+        group = groups.setdefault(key, {"type": key[0], "severity": key[1], "device": device, "count": 0,
+                                        "active": 0, "last_seen": 0})
+        group["count"] += 1
+        if "ACTIVE" in str(alarm.get("status", "")).upper():
+            group["active"] += 1
+        group["last_seen"] = max(group["last_seen"], _number(alarm.get("createdTime")) or 0)
+    ordered = sorted(groups.values(), key=lambda g: (_SEVERITY_RANK.get(g["severity"], 9), -g["count"]))
+    for group in ordered:
+        group["last_seen"] = int(group["last_seen"]) or None
+    return {
+        "total": len(alarms),
+        "by_severity": dict(Counter(str(a.get("severity") or "unknown").upper() for a in alarms)),
+        "by_type": dict(Counter(a.get("type") or "unknown" for a in alarms).most_common(max_groups)),
+        "groups": ordered[:max_groups],
+        "more_groups": max(0, len(ordered) - max_groups),
+    }
+
+
+def compact_payload(payload: Any) -> Any:
+    """payload with timeseries and alarm lists summarized, long lists and strings cut"""
+    if isinstance(payload, dict):
+        return {key: compact_payload(value) for key, value in payload.items()}
+    if isinstance(payload, list):
+        if not payload:
+            return payload
+        if _is_alarm_list(payload):
+            return summarize_alarms(payload)
+        if _is_series(payload):
+            return summarize_series(payload)
+        items = [compact_payload(item) for item in payload[:PROMPT_LIST_ITEMS]]
+        if len(payload) > PROMPT_LIST_ITEMS:
+            items.append(f"… {len(payload) - PROMPT_LIST_ITEMS} more")
+        return items
+    if isinstance(payload, str) and len(payload) > PROMPT_STRING_CHARS:
+        return payload[:PROMPT_STRING_CHARS] + TRUNCATION_MARKER
+    return payload
+
+
+def to_prompt_json(payload: Any, max_tokens: int = PROMPT_PAYLOAD_TOKENS) -> str:
+    """Compacted payload as compact JSON, cut to max_tokens"""
+    text = json.dumps(compact_payload(payload), separators=(",", ":"), default=str, ensure_ascii=False)
+    return fit_to_budget(text, max_tokens)
+
+
+def fit_messages(messages: List[Dict[str, str]], max_tokens: int) -> List[Dict[str, str]]:
+    """messages whose total size fits max_tokens, cutting the longest non-system contents first"""
+    sizes = [estimate_tokens(m.get("content") or "") for m in messages]
+    excess = sum(sizes) - max_tokens
+    if excess <= 0:
+        return messages
+    fitted = [dict(m) for m in messages]
+    # The system prompt carries the instructions; data-bearing user turns give way first
+    order = sorted((i for i, m in enumerate(messages) if m.get("role") != "system"), key=lambda i: -sizes[i])
+    order += [i for i, m in enumerate(messages) if m.get("role") == "system"]
+    for i in order:
+        if excess <= 0:
+            break
+        keep = max(0, sizes[i] - excess)
+        fitted[i]["content"] = fit_to_budget(fitted[i]["content"] or "", keep)
+        excess -= sizes[i] - estimate_tokens(fitted[i]["content"])
+    return fitted
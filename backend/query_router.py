@@ -0,0 +1,182 @@
+"""
+Declarative intent routing for EnhancedAgenticInferrixAgent.process_query.
+
+process_query used to be one long cascade that rebuilt its regex lists and
+lowercased the query dozens of times per call. Routing is now a table of
+ordered QueryRule entries compiled once at import: each rule names the keyword
+groups it needs, optional compiled patterns (first match wins) and the agent
+method that handles it. QueryRouter.route() evaluates the rules in order and
+reports which one fired; a handler may return None to let later rules try.
+Every keyword group in the table is compiled into one KeywordAutomaton, so a
+query is scanned once and rules test group membership instead of substrings.
+Read-only rules carry a cache_ttl; route() serves and stores their responses
+through an optional ResponseCache. dispatch() runs a read-only rule chosen by
+the intent classifier when the keyword rules all missed.
+"""
+
+import re
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+from entity_extractor import QueryEntities, extract_entities
+from hindi_normalizer import HINDI_WORD_MAPPINGS, map_hindi_to_english
+from keyword_automaton import KeywordAutomaton
+
+FAN_SPEED_CONTROL_ACTIONS = ('increase', 'set', 'change', 'adjust', 'turn', 'switch')
+
+
+class RoutedQuery:
+    """A query plus the derived forms rules match against (computed once)"""
+
+    def __init__(self, text: str, device: str = "", token: Optional[str] = None):
+        self.text = text
+        self.lower = text.lower()
+        self.device = device
+        self.token = token
+        self._mapped = None
+        self._hits = {}
+        self._automaton = None
+        self._matched_groups = None
+        self._cache_entities = None
+
+    def scan(self, automaton: KeywordAutomaton):
+        """Find every registered keyword group present in the query in one pass"""
+        self._automaton = automaton
+        self._matched_groups = automaton.scan(self.lower)
+
+    @property
+    def mapped(self) -> str:
+        """Query with Hindi words mapped to English"""
+        if self._mapped is None:
+            self._mapped = map_hindi_to_english(self.text)
+        return self._mapped
+
+    def has_any(self, keywords: Sequence[str]) -> bool:
+        """True if any keyword is a substring of the lowercased query"""
+        if self._matched_groups is not None and isinstance(keywords, tuple) and keywords in self._automaton.categories:
+            return keywords in self._matched_groups
+        # Group not in the automaton: scan for it directly (memoized per group)
+        key = id(keywords)
+        hit = self._hits.get(key)
+        if hit is None:
+            hit = self._hits[key] = any(kw in self.lower for kw in keywords)
+        return hit
+
+    @property
+    def entities(self) -> QueryEntities:
+        """Device, location, timeframe, severity and value mentioned in the query"""
+        return extract_entities(self.text)
+
+    @property
+    def cache_entities(self) -> Tuple[str, str]:
+        """What a cached response depends on besides tenant and rule: normalized text and device"""
+        if self._cache_entities is None:
+            self._cache_entities = (' '.join(self.mapped.lower().split()), (self.device or '').strip().lower())
+        return self._cache_entities
+
+    @property
+    def is_fan_speed_control(self) -> bool:
+        """Control verb plus 'speed' - a fan speed command, not a telemetry read"""
+        return self.has_any(FAN_SPEED_CONTROL_ACTIONS) and 'speed' in self.lower
+
+
+class QueryRule:
+    """One routing rule: all keyword groups must hit, then `when`, then the first matching pattern"""
+
+    def __init__(self, name: str, handler: str, keywords: Iterable[Sequence[str]] = (),
+                 patterns: Iterable[str] = (), flags: int = re.IGNORECASE, on: str = 'text',
+                 when: Optional[Callable[[RoutedQuery], bool]] = None, cache_ttl: Optional[float] = None):
+        self.name = name
+        self.handler = handler
+        self.keywords = tuple(tuple(group) for group in keywords)
+        self.patterns = tuple(re.compile(p, flags) for p in patterns)
+        self.on = on  # which RoutedQuery field the patterns search: text, lower or mapped
+        self.when = when
+        self.cache_ttl = cache_ttl  # seconds; None for control intents, which are never cached
+
+    @property
+    def dispatchable(self) -> bool:
+        """Read-only keyword rule whose handler can run without a regex match"""
+        return not self.patterns and bool(self.cache_ttl)
+
+    def match(self, query: RoutedQuery):
+        """Return the regex match (or True for keyword-only rules) if the rule applies"""
+        for group in self.keywords:
+            if not query.has_any(group):
+                return None
+        if self.when is not None and not self.when(query):
+            return None
+        if not self.patterns:
+            return True
+        target = getattr(query, self.on)
+        for pattern in self.patterns:
+            found = pattern.search(target)
+            if found:
+                return found
+        return None
+
+
+class QueryRouter:
+    """Ordered rule table evaluated once per query"""
+
+    def __init__(self, rules: List[QueryRule], keyword_groups: Iterable[Sequence[str]] = ()):
+        self.rules = list(rules)
+        names = [rule.name for rule in self.rules]
+        if len(names) != len(set(names)):
+            raise ValueError("Duplicate routing rule names")
+        self._by_name = {rule.name: rule for rule in self.rules}
+        # One automaton over every rule's keyword groups plus any extra groups handlers test
+        self.automaton = KeywordAutomaton()
+        for group in [FAN_SPEED_CONTROL_ACTIONS, *keyword_groups]:
+            self.automaton.add(tuple(group), group)
+        for rule in self.rules:
+            for group in rule.keywords:
+                self.automaton.add(group, group)
+        self.automaton.build()
+
+    def route(self, agent, query: RoutedQuery, cache=None,
+              should_store: Optional[Callable[[], bool]] = None) -> Tuple[Optional[str], Optional[str]]:
+        """Run the first rule whose handler produces a response; returns (rule name, response).
+
+        With a cache, rules that have a cache_ttl are answered from it when possible and
+        successful responses are stored unless should_store() says the query had side effects.
+        """
+        if query._automaton is not self.automaton:
+            query.scan(self.automaton)
+        for rule in self.rules:
+            found = rule.match(query)
+            if found is None:
+                continue
+            response = self._run(agent, rule, query, found, cache, should_store)
+            if response is not None:
+                return rule.name, response
+        return None, None
+
+    def dispatch(self, agent, query: RoutedQuery, rule_name: str, cache=None,
+                 should_store: Optional[Callable[[], bool]] = None) -> Tuple[Optional[str], Optional[str]]:
+        """Run a rule picked by the intent classifier even though its keywords did not match.
+
+        Only read-only keyword rules qualify: pattern rules need their regex match, and
+        control intents must never fire on a guess. The rule's `when` guard still applies.
+        """
+        rule = self._by_name.get(rule_name)
+        if rule is None or not rule.dispatchable:
+            return None, None
+        if rule.when is not None and not rule.when(query):
+            return None, None
+        response = self._run(agent, rule, query, True, cache, should_store)
+        return (rule.name, response) if response is not None else (None, None)
+
+    def _run(self, agent, rule: QueryRule, query: RoutedQuery, found, cache, should_store) -> Optional[str]:
+        cacheable = cache is not None and rule.cache_ttl
+        if cacheable:
+            cached = cache.get(query.token, (rule.name,) + query.cache_entities)
+            if cached is not None:
+                print(f"[DEBUG] Query router - rule '{rule.name}' answered from cache")
+                return cached
+        response = getattr(agent, rule.handler)(query, found)
+        if response is not None:
+            print(f"[DEBUG] Query router - rule '{rule.name}' fired")
+            if (cacheable and isinstance(response, str) and not response.startswith('❌')
+                    and (should_store is None or should_store())):
+                cache.put(query.token, (rule.name,) + query.cache_entities, response, rule.cache_ttl)
+        return response
@@ -0,0 +1,55 @@
+"""
+Request-scoped state for the shared agent.
+
+The enhanced agent is a process-wide singleton, so anything that belongs to a
+single chat (the caller's Inferrix token, user, selected device, lists shown
+to the user, lookups memoized for this query) must not live on the agent
+instance. A RequestContext is bound with a ContextVar for the duration of a
+query; asyncio.to_thread and the agent's fan-out copy the binding into their
+worker threads, so concurrent chats never see each other's state.
+"""
+
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+
+class RequestContext:
+    """State for one in-flight query"""
+
+    def __init__(self, token: Optional[str] = None, user: str = "User", device: str = "",
+                 stream: Optional[Callable[[str], None]] = None):
+        self.token = token
+        self.user = user
+        self.device = device
+        # Receives response text as it is produced when the caller asked for a stream
+        self.stream = stream
+        # Lists offered to the user in this query ("did you mean ...")
+        self.last_available_locations: List[str] = []
+        self.last_available_devices: List[str] = []
+        # Per-request memo for lookups that cannot change mid-query
+        self.cache: Dict[Any, Any] = {}
+        # Name of the routing rule that answered the query
+        self.route: Optional[str] = None
+        # Set when the query wrote to Inferrix (control commands); such responses are not cached
+        self.side_effects = False
+        # Futures of fetches started speculatively on arrival, by name (see prefetch.py)
+        self.prefetches: Dict[Any, Any] = {}
+
+
+_current_context: contextvars.ContextVar = contextvars.ContextVar("agent_request_context", default=None)
+
+
+def current_context() -> Optional[RequestContext]:
+    """Return the context bound to the running query, if any"""
+    return _current_context.get()
+
+
+@contextmanager
+def bind_context(context: RequestContext):
+    """Bind context for the duration of a with-block"""
+    reset_token = _current_context.set(context)
+    try:
+        yield context
+    finally:
+        _current_context.reset(reset_token)
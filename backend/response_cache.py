@@ -0,0 +1,85 @@
+"""
+Short-TTL cache of chat responses for read-only intents.
+
+Dashboards and operators ask the same questions ("show low battery devices",
+"show critical alarms") over and over, and each one used to rerun a fleet
+scan. The query router stores the response of a read-only rule under
+(token, rule name, normalized query, device) for that rule's TTL. Answers are
+keyed on a hash of the caller's own token: customer users of one tenant see
+different devices, and a token's claims are not verified on a cache hit.
+Control intents have no TTL and are never stored, a query that issued a write
+is not stored either, and a successful control command drops the entries of
+every user in the tenant it changed.
+"""
+
+import base64
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+from device_directory import cache_key_for_token
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() != "false"
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2000"))
+
+
+def _claimed_tenant(token: Optional[str]) -> Optional[str]:
+    """tenantId claimed by a JWT, unverified: only ever used to drop entries, never to serve them"""
+    try:
+        payload_part = token.split('.')[1]
+        payload_part += '=' * (-len(payload_part) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload_part.encode()).decode()).get('tenantId')
+    except Exception:
+        return None
+
+
+class ResponseCache:
+    """LRU of (token, key) -> response, each entry with its own TTL"""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, enabled: bool = RESPONSE_CACHE_ENABLED):
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: Optional[str], key: Hashable) -> Optional[str]:
+        """Return a fresh cached response, or None"""
+        if not self.enabled:
+            return None
+        cache_key = (cache_key_for_token(token), key)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                return None
+            response, expires_at, _ = entry
+            if time.time() >= expires_at:
+                del self._entries[cache_key]
+                return None
+            self._entries.move_to_end(cache_key)
+            return response
+
+    def put(self, token: Optional[str], key: Hashable, response: str, ttl: float):
+        """Remember a response for ttl seconds"""
+        if not self.enabled or not ttl:
+            return
+        cache_key = (cache_key_for_token(token), key)
+        with self._lock:
+            self._entries[cache_key] = (response, time.time() + ttl, _claimed_tenant(token))
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token: Optional[str] = None):
+        """Drop the responses of the token and of every user in its tenant, or everything"""
+        with self._lock:
+            if token is None:
+                self._entries.clear()
+                return
+            owner = cache_key_for_token(token)
+            tenant = _claimed_tenant(token)
+            stale = [k for k, entry in self._entries.items() if k[0] == owner or (tenant and entry[2] == tenant)]
+            for cache_key in stale:
+                del self._entries[cache_key]
@@ -0,0 +1,115 @@
+"""
+SymSpell-style spelling correction.
+
+difflib.get_close_matches compares a word against every vocabulary entry, so
+typo correction got slower as the vocabulary grew. SymSpellIndex precomputes
+the deletion neighbourhood of every word: each string reachable by deleting up
+to max_distance characters from the word's prefix maps back to the word. A
+lookup generates the deletions of the input and intersects them with that
+table, then checks the few candidates with a bounded edit distance. Cost
+depends on the word length, not on the vocabulary size.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Set
+
+_ALPHA_RUN_RE = re.compile(r'[a-z]+')
+
+
+def _deletes(word: str, max_distance: int) -> Set[str]:
+    """word plus every string made by deleting up to max_distance characters"""
+    results = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier if len(w) > 1 for i in range(len(w))}
+        results |= frontier
+    return results
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance (adjacent swaps count once); limit + 1 if above limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous2 is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1] if previous[-1] <= limit else limit + 1
+
+
+class SymSpellIndex:
+    """Deletion-neighbourhood index over a vocabulary; more frequent words win ties"""
+
+    def __init__(self, words: Iterable[str] = (), max_distance: int = 2, prefix_length: int = 7):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.counts: Dict[str, int] = {}
+        self.deletes: Dict[str, List[str]] = {}
+        for word in words:
+            self.add(word)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.counts
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def add(self, word: str):
+        if not word:
+            return
+        if word in self.counts:
+            self.counts[word] += 1
+            return
+        self.counts[word] = 1
+        for variant in _deletes(word[:self.prefix_length], self.max_distance):
+            self.deletes.setdefault(variant, []).append(word)
+
+    def lookup(self, word: str, max_distance: Optional[int] = None) -> Optional[str]:
+        """Closest vocabulary word within max_distance edits, or None"""
+        if word in self.counts:
+            return word
+        limit = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        best = None
+        best_key = None
+        seen = set()
+        for variant in _deletes(word[:self.prefix_length], limit):
+            for candidate in self.deletes.get(variant, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                distance = edit_distance(word, candidate, limit)
+                if distance > limit:
+                    continue
+                key = (distance, -self.counts[candidate], candidate)
+                if best_key is None or key < best_key:
+                    best, best_key = candidate, key
+        return best
+
+
+def typo_budget(word: str) -> int:
+    """Edits allowed for a word: one for short words, two from six letters up"""
+    return 1 if len(word) <= 5 else 2
+
+
+def correct_alpha_runs(text: str, index: SymSpellIndex, min_length: int = 3) -> str:
+    """Correct each run of letters in lowercase text; digits and separators are kept as typed.
+
+    Numbers are never corrected, so 'room51' cannot turn into an existing 'room50'.
+    """
+    def replace(match):
+        run = match.group(0)
+        if len(run) < min_length:
+            return run
+        return index.lookup(run, typo_budget(run)) or run
+    return _ALPHA_RUN_RE.sub(replace, text)
@@ -0,0 +1,64 @@
+"""
+Per-device telemetry key catalog.
+
+The timeseries keys a device reports almost never change, yet reads and
+control writes used to call `keys/timeseries` before every operation. The
+catalog remembers each device's key list per token with a long TTL; callers
+invalidate an entry when a key they expect is missing so that newly added
+keys are picked up on the next fetch.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+from device_directory import cache_key_for_token
+
+TELEMETRY_KEY_CATALOG_TTL = float(os.getenv("TELEMETRY_KEY_CATALOG_TTL", "21600"))  # 6 hours
+TELEMETRY_KEY_CATALOG_MAX_ENTRIES = int(os.getenv("TELEMETRY_KEY_CATALOG_MAX_ENTRIES", "20000"))
+
+
+class TelemetryKeyCatalog:
+    """LRU + TTL cache of timeseries key lists keyed by (token, entity type, entity id)"""
+
+    def __init__(self, ttl: float = TELEMETRY_KEY_CATALOG_TTL, max_entries: int = TELEMETRY_KEY_CATALOG_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, token, entity_type, entity_id):
+        return (cache_key_for_token(token), (entity_type or 'DEVICE').upper(), entity_id)
+
+    def get(self, token: str, entity_type: str, entity_id: str) -> Optional[List[str]]:
+        """Return cached keys, or None if missing/expired"""
+        cache_key = self._key(token, entity_type, entity_id)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                return None
+            keys, stored_at = entry
+            if time.time() - stored_at >= self.ttl:
+                del self._entries[cache_key]
+                return None
+            self._entries.move_to_end(cache_key)
+            return list(keys)
+
+    def put(self, token: str, entity_type: str, entity_id: str, keys: List[str]):
+        """Remember a successfully fetched key list"""
+        cache_key = self._key(token, entity_type, entity_id)
+        with self._lock:
+            self._entries[cache_key] = (list(keys), time.time())
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token: Optional[str] = None, entity_type: str = 'DEVICE', entity_id: Optional[str] = None):
+        """Drop one device's keys, or everything when no device is given"""
+        with self._lock:
+            if entity_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(self._key(token, entity_type, entity_id), None)
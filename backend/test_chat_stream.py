@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test script for streaming chat answers token by token
+"""
+
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import enhanced_agentic_agent
+from chat_stream import NO_ANSWER, chat_events
+from enhanced_agentic_agent import EnhancedAgenticInferrixAgent
+from llm_gateway import LLMGateway
+from request_context import RequestContext, bind_context
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = []
+
+    def create(self, stream=False, **kwargs):
+        self.calls.append(stream)
+        if not stream:
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="Energy use is stable."))])
+        words = ["Energy ", "use ", "is ", "stable."]
+        return iter([SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=w))]) for w in words]
+                    + [SimpleNamespace(choices=[])])
+
+def test_stream_forwards_tokens():
+    print("=== Testing streamed chat answers ===")
+    completions = FakeCompletions()
+    original_gateway = enhanced_agentic_agent.LLM_GATEWAY
+    enhanced_agentic_agent.LLM_GATEWAY = LLMGateway(
+        provider="openai", openai_client=SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+
+    agent = SimpleNamespace(_chat_executor=ThreadPoolExecutor(max_workers=1))
+
+    def process_query(user_query, user="User", device="", token=None, stream=None):
+        with bind_context(RequestContext(token=token, stream=stream)):
+            return EnhancedAgenticInferrixAgent._chat_completion(
+                agent, [{"role": "user", "content": user_query}], 0.7, 400, heading="📈 **Trend**\n")
+    agent.process_query = process_query
+
+    async def collect():
+        return [event async for event in EnhancedAgenticInferrixAgent.process_query_stream(agent, "energy trend", token="tok")]
+
+    try:
+        events = asyncio.run(collect())
+        # Without a stream the same helper returns the whole answer at once
+        assert process_query("energy trend") == "📈 **Trend**\nEnergy use is stable."
+    finally:
+        enhanced_agentic_agent.LLM_GATEWAY = original_gateway
+    assert events == [('delta', "📈 **Trend**\n"), ('delta', "Energy "), ('delta', "use "), ('delta', "is "),
+                      ('delta', "stable."), ('done', "📈 **Trend**\nEnergy use is stable.")]
+    assert completions.calls == [True, False]
+    print("✅ Streamed chat answers work")
+
+def test_chat_events_format():
+    print("=== Testing chat SSE events ===")
+    async def answer():
+        yield ('delta', "Energy ")
+        yield ('done', "")
+
+    async def failing():
+        yield ('delta', "Energy ")
+        raise RuntimeError("upstream down")
+
+    async def collect(stream):
+        return [event async for event in chat_events(stream, lambda response: {"response": response})]
+
+    events = asyncio.run(collect(answer()))
+    assert events == ['event: delta\ndata: {"text": "Energy "}\n\n',
+                      f'event: done\ndata: {json.dumps({"response": NO_ANSWER})}\n\n']
+    # A failure mid-stream ends with an error event instead of done
+    events = asyncio.run(collect(failing()))
+    assert events[-1] == 'event: error\ndata: {"error": "upstream down", "code": "ENHANCED_CHAT_ERROR"}\n\n'
+    print("✅ Chat SSE events work")
+
+if __name__ == "__main__":
+    test_stream_forwards_tokens()
+    test_chat_events_format()
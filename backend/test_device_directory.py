@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test script for the per-token device directory cache
+"""
+
+import base64
+import json
+import threading
+import time
+
+from device_directory import DeviceDirectory, cache_key_for_token
+
+def make_token(payload):
+    body = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+    return f"header.{body}.signature"
+
+def test_directory_cache():
+    print("=== Testing device directory cache ===")
+    fetches = []
+
+    def fetch_devices(token):
+        fetches.append(token)
+        time.sleep(0.02)
+        return [{'id': {'id': 'dev-1'}, 'name': '2F-Room33-Thermostat'}, {'id': 'dev-2', 'name': 'Pump 1'}]
+
+    directory = DeviceDirectory(fetch_devices, ttl=0.2, max_stale=5)
+    token_a = make_token({'tenantId': 'tenant-1', 'customerId': 'customer-1'})
+    token_b = make_token({'tenantId': 'tenant-1', 'customerId': 'customer-2'})
+    forged = token_a.replace('.signature', '.forged')
+
+    # Only the exact token shares an entry: unverified claims never select cached data
+    assert cache_key_for_token(token_a) == cache_key_for_token(token_a)
+    assert len({cache_key_for_token(t) for t in (token_a, token_b, forged)}) == 3
+    directory.get_devices(token_a)
+    directory.get_devices(token_a)
+    print(f"Fetches after two lookups with the same token: {len(fetches)}")
+    assert len(fetches) == 1
+    directory.get_devices(token_b)
+    directory.get_devices(forged)
+    assert fetches == [token_a, token_b, forged]
+    fetches.clear()
+    directory.get_devices(token_a)
+
+    assert directory.get_device(token_a, 'dev-1')['name'] == '2F-Room33-Thermostat'
+    assert directory.get_device(token_a, 'missing') is None
+
+    # Stale entries are served immediately and refreshed once in the background, however many readers race
+    time.sleep(0.25)
+    readers = [threading.Thread(target=directory.get_devices, args=(token_a,)) for _ in range(8)]
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join()
+    time.sleep(0.1)
+    print(f"Fetches after stale reads: {len(fetches)}")
+    assert len(fetches) == 1
+
+    directory.invalidate(token_a)
+    directory.get_devices(token_a)
+    assert len(fetches) == 2
+    print("✅ Device directory cache works")
+
+def test_invalidate_beats_inflight_refresh():
+    print("=== Testing invalidation during a refresh ===")
+    release = threading.Event()
+    versions = iter(['old', 'stale'])
+
+    def fetch_devices(token):
+        if token == 'expired':
+            raise RuntimeError("401 Unauthorized")
+        version = next(versions, 'fresh')
+        if version == 'stale':
+            release.wait(5)
+        return [{'id': 'dev-1', 'name': version}]
+
+    directory = DeviceDirectory(fetch_devices, ttl=0.05, max_stale=5)
+    assert directory.get_device('token', 'dev-1')['name'] == 'old'
+    time.sleep(0.1)
+    # Served stale while a background refresh starts; invalidate before it returns
+    assert directory.get_device('token', 'dev-1')['name'] == 'old'
+    directory.invalidate('token')
+    release.set()
+    time.sleep(0.1)
+    assert directory.peek_devices('token') is None, "an invalidated refresh must not be stored"
+    assert directory.get_device('token', 'dev-1')['name'] == 'fresh'
+
+    # A failed load leaves no per-token lock behind
+    try:
+        directory.get_devices('expired')
+        assert False, "the fetch error should propagate"
+    except RuntimeError:
+        pass
+    assert cache_key_for_token('expired') not in directory._fetch_locks
+    print("✅ Invalidation during a refresh works")
+
+if __name__ == "__main__":
+    test_directory_cache()
+    test_invalidate_beats_inflight_refresh()
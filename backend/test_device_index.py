@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test script for the inverted device index used by _map_device_name_to_id
+"""
+
+import time
+
+from enhanced_agentic_agent import EnhancedAgenticInferrixAgent, normalize_location_name
+from device_index import DeviceIndex
+
+FLOORS = 120  # 12,000 thermostats: the fleet size the index is built for
+
+def build_fleet():
+    devices = []
+    for floor in range(1, FLOORS + 1):
+        for room in range(1, 101):
+            devices.append({'id': {'id': f'dev-{floor}-{room}'}, 'name': f'{floor}F-Room{room}-Thermostat'})
+    devices.append({'id': {'id': 'iaq-1'}, 'name': 'IAQ Sensor V2 - 300186'})
+    return devices
+
+def test_index_lookups():
+    print("=== Testing device index lookups ===")
+    start = time.time()
+    index = DeviceIndex(build_fleet(), normalize_location_name)
+    build_seconds = time.time() - start
+    print(f"Built index for {len(index.devices)} devices in {build_seconds:.2f}s")
+    assert len(index.devices) > 10000
+    assert build_seconds < 10, "index build must stay well under a directory refresh interval"
+
+    norm = normalize_location_name("Second Floor Room No. 50")
+    print(f"'{norm}' -> {index.best_for_location.get(norm)}")
+    assert index.best_for_location.get(norm) == 'dev-2-50'
+
+    assert index.locations.containing('room50')[0] == '1froom50'
+    assert len(index.floor_devices('2')) == 100
+    assert index.closest_room_on_floor('3', '57')['name'] == '3F-Room57-Thermostat'
+    assert index.lower_names.first_overlap('iaq sensor v2') == 'iaq sensor v2 - 300186'
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        index.locations.first_overlap('112froom77')
+    per_lookup_ms = (time.perf_counter() - start)
+    print(f"Substring lookup: {per_lookup_ms:.3f}ms per call")
+    assert per_lookup_ms < 5, "substring lookups must not scan the fleet"
+
+    agent = EnhancedAgenticInferrixAgent()
+    agent._get_device_index = lambda: index
+    start = time.perf_counter()
+    for floor in range(1, 101):
+        assert agent._resolve_device_name_to_id(f"{floor}F-Room{floor}-Thermostat") == f'dev-{floor}-{floor}'
+    per_resolve_ms = (time.perf_counter() - start) * 10
+    print(f"Name resolution: {per_resolve_ms:.2f}ms per call")
+    assert per_resolve_ms < 50
+    print("✅ Device index lookups work")
+
+def test_room_match_prefers_first_name():
+    print("=== Testing room match tie-break ===")
+    # Two devices in the same room, listed out of name order
+    index = DeviceIndex([
+        {'id': {'id': 'thermostat-50'}, 'name': '3F-Room50-Thermostat'},
+        {'id': {'id': 'sensor-50'}, 'name': '3F-Room50-Sensor'},
+    ], normalize_location_name)
+    agent = EnhancedAgenticInferrixAgent()
+    agent._get_device_index = lambda: index
+    # No location contains '2froom50', so the room number decides; the name sorted first wins
+    assert agent._resolve_device_name_to_id("2nd floor room 50") == 'sensor-50'
+    print("✅ Room match keeps the alphabetical tie-break")
+
+if __name__ == "__main__":
+    test_index_lookups()
+    test_room_match_prefers_first_name()
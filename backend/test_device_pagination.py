@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test script for the lazy paginated device iterator
+"""
+
+import requests
+
+import inferrix_client
+from enhanced_agentic_agent import EnhancedAgenticInferrixAgent
+from request_context import RequestContext, bind_context
+
+class FakePage:
+    def __init__(self, body, status_code=200):
+        self.body = body
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Server Error")
+
+    def json(self):
+        return self.body
+
+def test_iter_pages():
+    print("=== Testing paginated device iterator ===")
+    requested = []
+
+    def fake_get(endpoint, headers=None, params=None, **kwargs):
+        page = params["page"]
+        requested.append(page)
+        start = page * params["pageSize"]
+        data = [{'id': {'id': f'dev-{i}'}, 'name': f'Device {i}'} for i in range(start, min(start + params["pageSize"], 250))]
+        return FakePage({"data": data, "hasNext": start + params["pageSize"] < 250})
+
+    original_get = inferrix_client.get
+    inferrix_client.get = fake_get
+    try:
+        devices = list(inferrix_client.iter_devices("token", page_size=100))
+        print(f"Fetched {len(devices)} devices over pages {sorted(requested)}")
+        assert len(devices) == 250
+        assert devices[-1]['name'] == 'Device 249'
+        assert sorted(requested) == [0, 1, 2]
+
+        # Stopping early does not walk the whole fleet
+        requested.clear()
+        first = next(inferrix_client.iter_devices("token", page_size=100))
+        assert first['name'] == 'Device 0'
+        assert max(requested) <= 1
+    finally:
+        inferrix_client.get = original_get
+    print("✅ Paginated device iterator works")
+
+def test_failed_page_is_not_a_partial_fleet():
+    print("\n=== Testing a page failing mid-walk ===")
+
+    def fake_get(endpoint, headers=None, params=None, **kwargs):
+        if params["page"] == 1:
+            return FakePage({}, status_code=502)
+        return FakePage({"data": [{'id': {'id': f'dev-{i}'}, 'name': f'2F-Room{i}-Thermostat'} for i in range(100)],
+                         "hasNext": True})
+
+    agent = EnhancedAgenticInferrixAgent()
+    agent._get_available_telemetry_keys = lambda device_id, *args, **kwargs: ['energy']
+    agent._make_api_request = lambda endpoint, **kwargs: {'energy': [{'ts': 0, 'value': '1'}]}
+    original_get = inferrix_client.get
+    inferrix_client.get = fake_get
+    try:
+        with bind_context(RequestContext(token="token-page-failure")):
+            fleet = agent._get_all_devices_energy_consumption(['energy'])
+            location = agent._get_location_energy_consumption('Room5', ['energy'])
+    finally:
+        inferrix_client.get = original_get
+    print(f"Fleet answer: {fleet[:80]}")
+    # The first page's rows must not be shown as the whole fleet
+    assert fleet.startswith("❌") and "502" in fleet
+    assert location.startswith("❌") and "502" in location
+    print("✅ A failed page fails the fleet answer instead of truncating it")
+
+if __name__ == "__main__":
+    test_iter_pages()
+    test_failed_page_is_not_a_partial_fleet()
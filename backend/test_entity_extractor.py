@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test script for the single-pass entity extractor
+"""
+
+from entity_extractor import extract_entities
+from enhanced_agentic_agent import EnhancedAgenticInferrixAgent, EnhancedIntelligentContextExtractor
+from query_router import RoutedQuery
+
+def test_entities_from_one_scan():
+    print("=== Testing entity extractor ===")
+    e = extract_entities("Show me electricity usage for all devices in 2nd floor")
+    assert (e.floor, e.location_phrase, e.location_key) == ('2', '2nd floor', '2f')
+
+    e = extract_entities("Show temperature in Second Floor Room No. 50")
+    assert (e.floor, e.room, e.location_key) == ('2', '50', '2froom50')
+
+    e = extract_entities("Give temperature of 2F-Room50-Thermostat")
+    assert (e.device_name, e.location_key) == ('2f-room50-thermostat', '2froom50')
+
+    e = extract_entities("दूसरी मंजिल कमरा ५० का तापमान")
+    assert e.location_key == '2froom50'
+
+    e = extract_entities("Set 2F-Room34-Thermostat to 24 degrees")
+    assert (e.action, e.value, e.unit, e.device_phrase) == ('adjust', 24, 'celsius', '2F-Room34-Thermostat')
+
+    assert extract_entities("Show battery level for device 300186").device == '300186'
+    assert extract_entities("Show temperature for IAQ Sensor V2 - 300186").device == '300186'
+    assert extract_entities("device a1f77c50-4c24-11f0-816d-85352a7c91ff").device == 'a1f77c50-4c24-11f0-816d-85352a7c91ff'
+
+    e = extract_entities("Show all critical alarms in the east wing this week")
+    assert (e.severity, e.wing, e.timeframe) == ('CRITICAL', 'east wing', 'this_week')
+
+    assert extract_entities("Are any HVAC systems likely to fail in the next 7 days?").days == 7
+    assert extract_entities("Which devices will fail in 30 days").days == 30
+    assert extract_entities("predict failures tomorrow").days == 1
+
+    e = extract_entities("turn off all devices after 8pm")
+    assert (e.action, e.schedule) == ('turn_off', '20:00')
+    # Word boundaries: 'asset' is not 'set', 'co2' has no value
+    e = extract_entities("Display asset information for co2 sensors")
+    assert e.action is None and e.value is None
+    print("✅ Entity extractor works")
+
+def test_severity_precedence():
+    print("=== Testing severity precedence ===")
+    # The extractor reports the highest severity named, as extract_severity_info always did
+    e = extract_entities("Show minor and critical alarms")
+    assert (e.severity, e.severities) == ('CRITICAL', ['MINOR', 'CRITICAL'])
+    assert EnhancedIntelligentContextExtractor.extract_severity_info("any warning or major alarms?") == 'MAJOR'
+
+    # The alarm route keeps its own order: minor, then major, then critical
+    agent = EnhancedAgenticInferrixAgent()
+    requested = []
+    agent._get_enhanced_alarms = lambda args: requested.append(args.get('severity'))
+    for query in ("Show critical and minor alarms", "major or critical alarms", "critical alarms", "all alarms"):
+        agent._route_alarms(RoutedQuery(query), True)
+    assert requested == ['MINOR', 'MAJOR', 'CRITICAL', None], requested
+    print("✅ Severity precedence works")
+
+if __name__ == "__main__":
+    test_entities_from_one_scan()
+    test_severity_precedence()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test script for the bounded-concurrency fan-out used by fleet scans
+"""
+
+import threading
+import time
+
+import enhanced_agentic_agent
+from enhanced_agentic_agent import EnhancedAgenticInferrixAgent
+
+def test_ordered_results():
+    print("=== Testing ordered results with failures and deadline ===")
+    agent = EnhancedAgenticInferrixAgent()
+
+    def probe(n):
+        time.sleep(0.1)
+        if n == 3:
+            raise ValueError("probe failed")
+        if n == 5:
+            time.sleep(2)
+        return n * n
+
+    start = time.time()
+    results = agent._fan_out(probe, range(8), max_concurrency=4, deadline=0.5, default=-1)
+    elapsed = time.time() - start
+    print(f"Results: {results} ({elapsed:.2f}s)")
+    assert results == [0, 1, 4, -1, 16, -1, 36, 49], results
+    assert elapsed < 2, "fan-out should not wait past the per-call deadline"
+    print("✅ Results keep input order; failures and timeouts use the default")
+
+def test_concurrency_cap():
+    print("\n=== Testing concurrency cap ===")
+    agent = EnhancedAgenticInferrixAgent()
+    in_flight = {'now': 0, 'peak': 0}
+
+    def probe(n):
+        in_flight['now'] += 1
+        in_flight['peak'] = max(in_flight['peak'], in_flight['now'])
+        time.sleep(0.05)
+        in_flight['now'] -= 1
+        return n
+
+    agent._fan_out(probe, range(20), max_concurrency=3)
+    print(f"Peak in-flight calls: {in_flight['peak']}")
+    assert in_flight['peak'] <= 3
+    print("✅ Concurrency cap respected")
+
+def saturate(agent, seconds):
+    """Occupy every worker of the shared executor, as concurrent chats' scans would"""
+    release = threading.Event()
+    for _ in range(agent.executor._max_workers):
+        agent.executor.submit(release.wait, seconds)
+    return release
+
+def test_deadline_starts_when_call_runs():
+    print("\n=== Testing deadline on a saturated executor ===")
+    agent = EnhancedAgenticInferrixAgent()
+    saturate(agent, 0.6)
+
+    def probe(n):
+        time.sleep(0.05)
+        return n
+
+    # Queued time behind other work does not count against the per-call deadline
+    results = agent._fan_out(probe, range(6), max_concurrency=3, deadline=0.3, default=-1)
+    print(f"Results: {results}")
+    assert results == list(range(6)), results
+    print("✅ Deadline measured from when each call starts")
+
+def test_queued_calls_are_cancelled():
+    print("\n=== Testing cancellation of calls stuck in the queue ===")
+    agent = EnhancedAgenticInferrixAgent()
+    release = saturate(agent, 5)
+    called = []
+    original_timeout = enhanced_agentic_agent.FANOUT_QUEUE_TIMEOUT
+    enhanced_agentic_agent.FANOUT_QUEUE_TIMEOUT = 0.2
+    try:
+        start = time.time()
+        results = agent._fan_out(called.append, range(3), max_concurrency=3, default=-1)
+        elapsed = time.time() - start
+    finally:
+        enhanced_agentic_agent.FANOUT_QUEUE_TIMEOUT = original_timeout
+        release.set()
+    time.sleep(0.2)
+    print(f"Results: {results} ({elapsed:.2f}s), calls run later: {called}")
+    assert results == [-1, -1, -1]
+    assert elapsed < 1
+    assert called == [], "cancelled calls must not run once workers free up"
+    print("✅ Queued calls past the queue timeout are cancelled")
+
+if __name__ == "__main__":
+    test_ordered_results()
+    test_concurrency_cap()
+    test_deadline_starts_when_call_runs()
+    test_queued_calls_are_cancelled()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test script for the data layer shared by the LangGraph tool nodes
+"""
+
+from graph_data import GraphDataLayer
+
+DEVICES = [
+    {'id': {'id': 'dev-1'}, 'name': '2F-Room50-Thermostat', 'status': 'ACTIVE'},
+    {'id': {'id': 'dev-2'}, 'name': 'IAQ Sensor V2 - 300186', 'status': 'INACTIVE'},
+    {'id': {'id': 'dev-3'}, 'name': '3F-Room12-Thermostat', 'status': 'ACTIVE'},
+]
+BATTERY = {'dev-1': 15, 'dev-2': 80}
+
+def test_shared_directory_and_telemetry_cache():
+    print("=== Testing graph data layer ===")
+    calls = {'devices': 0, 'latest': [], 'keys': 0}
+
+    def fetch_devices(token):
+        calls['devices'] += 1
+        return DEVICES
+
+    def fetch_latest(device_id, keys, token):
+        calls['latest'].append((device_id, tuple(keys)))
+        if device_id == 'dev-2' and 'temperature' in keys:
+            raise RuntimeError("timeout")
+        data = {'temperature': [{'ts': 1, 'value': '23.5'}]} if device_id == 'dev-1' else {}
+        if device_id in BATTERY:
+            data['battery'] = [{'ts': 1, 'value': BATTERY[device_id]}]
+        return {k: v for k, v in data.items() if k in keys}
+
+    def fetch_keys(device_id, token):
+        calls['keys'] += 1
+        return ['temperature', 'battery']
+
+    data = GraphDataLayer(fetch_devices, fetch_latest, fetch_keys,
+                          normalize=lambda s: s.lower().replace(' ', '').replace('-', ''))
+
+    # Lookups by id, exact name and normalized substring all share one directory load
+    assert data.find_device('tok', 'dev-2')['name'] == 'IAQ Sensor V2 - 300186'
+    assert data.find_device('tok', '2f-room50-thermostat')['id']['id'] == 'dev-1'
+    assert data.find_device('tok', '3F Room12')['id']['id'] == 'dev-3'
+    assert data.find_device('tok', 'Lobby Chiller') is None
+    assert calls['devices'] == 1
+
+    # Latest values are cached per key, including "no value"
+    assert data.latest('tok', 'dev-1', ['temperature']) == {'temperature': '23.5'}
+    assert data.latest('tok', 'dev-1', ['temperature']) == {'temperature': '23.5'}
+    assert data.latest('tok', 'dev-3', ['battery']) == {}
+    assert data.latest('tok', 'dev-3', ['battery']) == {}
+    assert calls['latest'] == [('dev-1', ('temperature',)), ('dev-3', ('battery',))]
+    # Only the uncached key is requested
+    assert data.latest('tok', 'dev-1', ['temperature', 'battery']) == {'temperature': '23.5', 'battery': 15}
+    assert calls['latest'][-1] == ('dev-1', ('battery',))
+
+    # Fleet scans skip devices that fail or report nothing
+    readings = data.latest_for_devices('tok', data.devices('tok'), 'battery')
+    assert sorted((d['id']['id'], v) for d, v in readings) == [('dev-1', 15), ('dev-2', 80)]
+    assert data.latest_for_devices('tok', data.devices('tok'), 'temperature')[0][1] == '23.5'
+
+    assert data.telemetry_keys('tok', 'dev-1') == ['temperature', 'battery']
+    data.telemetry_keys('tok', 'dev-1')
+    assert calls['keys'] == 1
+    print("✅ Graph data layer works")
+
+if __name__ == "__main__":
+    test_shared_directory_and_telemetry_cache()
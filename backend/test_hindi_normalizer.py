@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared Hindi/Hinglish normalizer
+"""
+
+from hindi_normalizer import map_hindi_to_english, normalize_hindi_location, script_letter_counts, split_hinglish_words
+
+def test_single_pass_mapping():
+    print("=== Testing Hindi normalizer ===")
+    # Longest word wins: 'कमरा' is not split into 'कम' + 'रा', 'डिग्रीज' is not 'डिग्री' + 'ज'
+    assert map_hindi_to_english("कमरा 201 में तापमान") == "room 201 in temperature"
+    assert map_hindi_to_english("२४ डिग्रीज") == "24 degrees"
+    assert map_hindi_to_english("room 50 ka tapmaan kya hai") == "room 50 ka temperature kya hai"
+    assert map_hindi_to_english("set fan speed to high") == "set fan speed to high"
+
+    assert normalize_hindi_location("दूसरी मंजिल कमरा ५०") == "second floor room 50"
+
+    assert script_letter_counts("कमरा room") == (3, 4)
+    hindi_words, english_words = split_hinglish_words("कमरा 201 का temperature?")
+    assert len(hindi_words) == 2 and english_words == ['temperature']
+    print("✅ Hindi normalizer works")
+
+if __name__ == "__main__":
+    test_single_pass_mapping()
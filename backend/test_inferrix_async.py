@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Test script for the async Inferrix client
+"""
+
+import asyncio
+
+import httpx
+import requests
+
+import inferrix_client
+
+def test_async_client_per_loop_and_errors():
+    print("=== Testing async Inferrix client ===")
+
+    async def client_pair():
+        return inferrix_client._get_async_client(), inferrix_client._get_async_client()
+
+    # One client per event loop: connections are never shared across loops
+    first, again = asyncio.run(client_pair())
+    second, _ = asyncio.run(client_pair())
+    assert first is again and first is not second
+
+    async def not_found():
+        loop = asyncio.get_running_loop()
+        inferrix_client._async_clients[loop] = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(404, json={"message": "missing"})))
+        response = await inferrix_client.aget("device/unknown")
+        try:
+            response.raise_for_status()
+        except requests.HTTPError as e:
+            return e
+        finally:
+            await inferrix_client.aclose()
+
+    # HTTP errors keep the requests type and carry the response, so status checks still work
+    error = asyncio.run(not_found())
+    assert isinstance(error, requests.HTTPError)
+    assert error.response.status_code == 404
+    assert error.response.json() == {"message": "missing"}
+    print("✅ Async Inferrix client works")
+
+if __name__ == "__main__":
+    test_async_client_per_loop_and_errors()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test script for the offline-trained intent classifier
+"""
+
+import os
+import tempfile
+
+from intent_classifier import (GENERAL_INTENT, INTENT_CLASSIFIER_THRESHOLD, IntentClassifier, build_training_set,
+                               label_prompt, load_intent_classifier)
+from query_router import QueryRouter, QueryRule, RoutedQuery
+
+ROUTER = QueryRouter([
+    QueryRule('battery_status', '_route_battery', keywords=[('low battery', 'battery status')], cache_ttl=60),
+    QueryRule('set_fan_speed', '_route_set_fan', patterns=[r"set fan to (\w+)"]),
+    QueryRule('alarms', '_route_alarms', keywords=[('alarm', 'alarms')], cache_ttl=30),
+])
+PROMPTS = [
+    "Show low battery devices", "List devices with low battery", "Which sensors have low battery?",
+    "Battery status of all thermostats", "Show battery status", "set fan to high", "set fan to low",
+    "Show all active alarms", "Show critical alarms", "Any major alarms on the 2nd floor?", "List alarms for room 50",
+    "What is the weather in Mumbai tomorrow?", "Show ESG performance for the quarter", "Optimize cleaning schedules",
+    "Compare costs with industry benchmarks", "Personalize comfort for guest 12345",
+]
+
+class RecordingAgent:
+    def _route_battery(self, query, match):
+        return f"battery {match}"
+
+    def _route_alarms(self, query, match):
+        return f"alarms {match}"
+
+    def _route_set_fan(self, query, match):
+        raise AssertionError("control rules are never dispatched by the classifier")
+
+def test_classifier_routes_typos():
+    print("=== Testing intent classifier ===")
+    assert label_prompt(ROUTER, "Show critical alarms") == 'alarms'
+    assert label_prompt(ROUTER, "What is the weather in Mumbai tomorrow?") == GENERAL_INTENT
+
+    texts, labels = build_training_set(ROUTER, PROMPTS)
+    classifier = IntentClassifier.train(texts, labels, dim=1024)
+    assert classifier.predict("shwo all actve alrams")[0] == 'alarms'
+    assert classifier.predict("list devices with lwo batery")[0] == 'battery_status'
+
+    # Persisted model predicts the same as the trained one
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'intent_model.npz')
+        classifier.save(path)
+        loaded = IntentClassifier.load(path)
+    assert loaded.labels == classifier.labels
+    assert loaded.predict("any critcal alarms?") == classifier.predict("any critcal alarms?")
+
+    # Only read-only keyword rules can be dispatched on a prediction
+    agent = RecordingAgent()
+    assert ROUTER.dispatch(agent, RoutedQuery("shwo alrams"), 'alarms') == ('alarms', 'alarms True')
+    assert ROUTER.dispatch(agent, RoutedQuery("set fna to high"), 'set_fan_speed') == (None, None)
+    assert ROUTER.dispatch(agent, RoutedQuery("weather"), GENERAL_INTENT) == (None, None)
+    print("✅ Intent classifier works")
+
+def test_shipped_model_routes_documented_typos():
+    print("=== Testing shipped intent model ===")
+    classifier = load_intent_classifier()
+    assert classifier is not None, "intent_model.npz missing - run intent_classifier.py"
+    # The examples the module exists for must clear the dispatch threshold
+    for text, expected in [("show alrams", 'alarms'), ("which sensors are running out of batery", 'battery_status'),
+                           ("shwo all actve alrams", 'alarms'), ("list devices with lwo batery", 'battery_status')]:
+        label, confidence = classifier.predict(text)
+        print(f"{text!r} -> {label} ({confidence:.2f})")
+        assert label == expected and confidence >= INTENT_CLASSIFIER_THRESHOLD, (text, label, confidence)
+    print("✅ Shipped intent model routes the documented typos")
+
+if __name__ == "__main__":
+    test_classifier_routes_typos()
+    test_shipped_model_routes_documented_typos()
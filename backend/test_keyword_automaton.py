@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Test script for the multi-keyword intent prefilter
+"""
+
+import random
+
+from keyword_automaton import KeywordAutomaton
+
+def test_matches_substring_checks():
+    print("=== Testing keyword automaton ===")
+    automaton = KeywordAutomaton()
+    automaton.add('battery', ['low battery', 'battery status'])
+    automaton.add('alarm', ['alarm', 'co2', 'critical'])
+    automaton.add('hindi_temp', ['tapmaan', 'तापमान'])
+    automaton.build()
+
+    assert automaton.scan("show me low battery devices") == {'battery'}
+    assert automaton.scan("critical co2 alarm on 2f") == {'alarm'}
+    assert automaton.scan("room 50 ka तापमान kya hai") == {'hindi_temp'}
+    assert automaton.scan("hello") == set()
+
+    # Same answer as any(kw in text) per category on random overlapping keywords
+    alphabet = 'abc '
+    for _ in range(200):
+        groups = {f'g{i}': [''.join(random.choice(alphabet) for _ in range(random.randint(1, 4))) for _ in range(3)] for i in range(5)}
+        automaton = KeywordAutomaton()
+        for name, keywords in groups.items():
+            automaton.add(name, keywords)
+        text = ''.join(random.choice(alphabet) for _ in range(random.randint(0, 25)))
+        expected = {name for name, keywords in groups.items() if any(kw in text for kw in keywords)}
+        assert automaton.scan(text) == expected, (groups, text)
+    print("✅ Keyword automaton matches per-list substring checks")
+
+if __name__ == "__main__":
+    test_matches_substring_checks()
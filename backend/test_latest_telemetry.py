@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Test script for batched latest-telemetry reads and fallback key priority
+"""
+
+from enhanced_agentic_agent import EnhancedAgenticInferrixAgent
+
+DEVICE_ID = "11111111-2222-3333-4444-555555555555"
+
+def make_agent(device_keys, telemetry):
+    agent = EnhancedAgenticInferrixAgent()
+    requests = []
+
+    def make_api_request(endpoint, method="GET", data=None, token=None):
+        requests.append((endpoint, (data or {}).get("keys")))
+        return telemetry
+
+    agent._make_api_request = make_api_request
+    agent._get_available_telemetry_keys = lambda device_id, entity_type="DEVICE", refresh=False: list(device_keys)
+    agent._get_devices_list = lambda *args, **kwargs: []
+    return agent, requests
+
+def test_latest_values_follow_key_priority():
+    print("=== Testing batched latest telemetry ===")
+    # Exact match, then keys containing the name, then fallbacks present on the device - all in one request
+    agent, requests = make_agent(
+        ["Temperature", "room_temperature", "temp", "humidity"],
+        {"Temperature": [], "room_temperature": [{"ts": 2, "value": "22.5"}], "temp": [{"ts": 1, "value": "19"}]},
+    )
+    assert agent._get_device_telemetry_data(DEVICE_ID, "temperature") == "22.5"
+    assert requests == [(f"plugins/telemetry/DEVICE/{DEVICE_ID}/values/timeseries", "Temperature,room_temperature,temp")]
+
+    # A higher-priority key with data wins over later fallbacks
+    agent, _ = make_agent(["Temperature", "temp"], {"Temperature": [{"value": "21"}], "temp": [{"value": "19"}]})
+    assert agent._get_device_telemetry_data(DEVICE_ID, "temperature") == "21"
+
+    # A telemetry key literally named 'error' is data, not an API failure
+    agent, _ = make_agent(["error", "battery"], {"error": [{"ts": 1, "value": "E42"}]})
+    assert agent._get_device_telemetry_data(DEVICE_ID, "error") == "E42"
+
+    # Keys without readings, or a failed request, fall through to the diagnostic message
+    agent, _ = make_agent(["humidity", "battery"], {"humidity": [{"value": None}]})
+    missing = agent._get_device_telemetry_data(DEVICE_ID, "humidity")
+    assert "No data available" in missing and "battery" in missing
+    agent, _ = make_agent(["humidity"], {"error": "502 Bad Gateway", "message": "API request failed", "suggestion": "retry"})
+    assert "No data available" in agent._get_device_telemetry_data(DEVICE_ID, "humidity")
+    assert agent._get_latest_telemetry_values(DEVICE_ID, []) == {}
+    print("✅ Batched latest telemetry works")
+
+if __name__ == "__main__":
+    test_latest_values_follow_key_priority()
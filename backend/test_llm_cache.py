@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test script for the content-addressed LLM result cache
+"""
+
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+from llm_cache import LLMResultCache, content_key
+from llm_gateway import LLMGateway
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, messages, **kwargs):
+        self.calls += 1
+        reply = f"explanation {self.calls}"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply))], usage=None)
+
+def test_repeated_prompts_skip_the_provider():
+    print("=== Testing LLM result cache ===")
+    completions = FakeCompletions()
+    gateway = LLMGateway(provider="openai", openai_client=SimpleNamespace(chat=SimpleNamespace(completions=completions)),
+                         cache=LLMResultCache(max_entries=2, path=None))
+    prompt = [{"role": "user", "content": "Root causes for {\"total\":3}"}]
+
+    assert gateway.complete(prompt, cache_ttl=60) == "explanation 1"
+    streamed = []
+    assert gateway.complete(prompt, cache_ttl=60, on_token=streamed.append) == "explanation 1"
+    assert streamed == ["explanation 1"] and completions.calls == 1
+
+    # Different inputs or sampling parameters, and calls without cache_ttl, go to the provider
+    gateway.complete([{"role": "user", "content": "Root causes for {\"total\":4}"}], cache_ttl=60)
+    gateway.complete(prompt, temperature=0.7, cache_ttl=60)
+    gateway.complete(prompt)
+    assert completions.calls == 4
+    assert gateway.stats()["cache_hits"] == 1
+
+    # LRU eviction and TTL expiry
+    cache = LLMResultCache(max_entries=2, path=None)
+    cache.put("a", "A", ttl=60)
+    cache.put("b", "B", ttl=60)
+    cache.get("a")
+    cache.put("c", "C", ttl=60)
+    assert cache.get("b") is None and cache.get("a") == "A"
+    cache.put("d", "D", ttl=0.05)
+    time.sleep(0.1)
+    assert cache.get("d") is None
+
+    # The SQLite backing survives a restart
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "llm_cache.db")
+        key = content_key("gpt-4o", prompt, 0.3, 1000)
+        LLMResultCache(path=path).put(key, "नमस्ते", ttl=60)
+        assert LLMResultCache(path=path).get(key) == "नमस्ते"
+    print("✅ LLM result cache works")
+
+if __name__ == "__main__":
+    test_repeated_prompts_skip_the_provider()
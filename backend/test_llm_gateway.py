@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test script for the central LLM gateway (concurrency cap, deadlines, 429 retries, metrics)
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+from llm_gateway import LLMGateway, LLMUnavailable
+
+class RateLimitError(Exception):
+    status_code = 429
+
+class FakeCompletions:
+    def __init__(self, failures=0, delay=0.0):
+        self.failures = failures
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self.timeouts = []
+        self.lock = threading.Lock()
+
+    def create(self, messages, timeout=None, stream=False, **kwargs):
+        with self.lock:
+            self.calls += 1
+            self.timeouts.append(timeout)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            fail = self.failures > 0
+            self.failures -= 1
+        try:
+            time.sleep(self.delay)
+            if fail:
+                raise RateLimitError("Error code: 429 - rate limit reached")
+            usage = SimpleNamespace(prompt_tokens=12, completion_tokens=3)
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))], usage=usage)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+class SlowStream:
+    """A provider trickling one token every 0.1s; each read is fast enough for a per-read timeout"""
+
+    def __init__(self):
+        self.closed = False
+
+    def __iter__(self):
+        for _ in range(50):
+            if self.closed:
+                raise ConnectionError("stream closed")
+            time.sleep(0.1)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content="tok "))])
+
+    def close(self):
+        self.closed = True
+
+class SlowStreamingCompletions:
+    def __init__(self):
+        self.stream = SlowStream()
+
+    def create(self, messages, **kwargs):
+        return self.stream
+
+def gateway_for(completions, **kwargs):
+    return LLMGateway(provider="openai", openai_client=SimpleNamespace(chat=SimpleNamespace(completions=completions)),
+                      **kwargs)
+
+def test_gateway_limits_and_metrics():
+    print("=== Testing LLM gateway ===")
+    messages = [{"role": "user", "content": "hi"}]
+
+    # 429s are retried with backoff, and tokens/latency are counted once per call
+    completions = FakeCompletions(failures=2)
+    gateway = gateway_for(completions, retry_base_delay=0.01)
+    assert gateway.complete(messages) == "ok"
+    stats = gateway.stats()
+    assert completions.calls == 3
+    assert stats["succeeded"] == 1 and stats["rate_limited"] == 2 and stats["retries"] == 2
+    assert stats["prompt_tokens"] == 12 and stats["completion_tokens"] == 3
+    assert all(0 < t <= gateway.deadline for t in completions.timeouts)  # every attempt is bounded
+
+    # A provider that keeps rate limiting gives up with LLMUnavailable after max_retries
+    completions = FakeCompletions(failures=10)
+    gateway = gateway_for(completions, max_retries=1, retry_base_delay=0.01)
+    try:
+        gateway.complete(messages)
+        assert False, "expected LLMUnavailable"
+    except LLMUnavailable as e:
+        assert "rate_limit" in str(e)
+    assert completions.calls == 2
+
+    # No more than max_concurrency calls run at once; callers past the deadline are turned away
+    completions = FakeCompletions(delay=0.3)
+    gateway = gateway_for(completions, max_concurrency=2, deadline=0.5)
+    results = []
+
+    def call():
+        try:
+            results.append(gateway.complete(messages))
+        except LLMUnavailable as e:
+            results.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats = gateway.stats()
+    assert completions.peak == 2
+    assert results.count("ok") == stats["succeeded"] and stats["succeeded"] >= 2
+    assert stats["rejected"] + stats["deadline_exceeded"] == 6 - stats["succeeded"]
+    assert stats["in_flight"] == 0
+
+    # A slow stream is abandoned at the deadline, freeing the slot and the caller
+    completions = SlowStreamingCompletions()
+    gateway = gateway_for(completions, max_concurrency=1, deadline=0.35)
+    tokens = []
+    started = time.monotonic()
+    try:
+        gateway.complete(messages, on_token=tokens.append)
+        assert False, "expected LLMUnavailable"
+    except LLMUnavailable as e:
+        assert "timeout" in str(e)
+    assert time.monotonic() - started < 0.6
+    assert 0 < len(tokens) < 5 and completions.stream.closed
+    stats = gateway.stats()
+    assert stats["deadline_exceeded"] == 1 and stats["in_flight"] == 0
+
+    # Without a configured provider nothing is sent
+    try:
+        LLMGateway(provider=None).complete(messages)
+        assert False, "expected LLMUnavailable"
+    except LLMUnavailable:
+        pass
+    print("✅ LLM gateway works")
+
+if __name__ == "__main__":
+    test_gateway_limits_and_metrics()
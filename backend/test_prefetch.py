@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test script for speculative prefetch on query arrival
+"""
+
+import threading
+import time
+
+from prefetch import Prefetcher, join_prefetch
+from request_context import RequestContext, bind_context, current_context
+
+def test_prefetch_overlaps_routing():
+    print("=== Testing speculative prefetch ===")
+    prefetcher = Prefetcher(max_workers=2)
+    calls = []
+    released = threading.Event()
+
+    def load_directory(token):
+        calls.append(('directory', current_context().token))
+        released.wait(2)
+        # Fetches chained from a prefetch still see the query's context
+        prefetcher.start(('telemetry_keys', 'dev-1'), lambda: ['temperature'])
+        return ['dev-1']
+
+    def fail():
+        raise RuntimeError("upstream down")
+
+    with bind_context(RequestContext(token='tok')):
+        started = time.time()
+        prefetcher.start('device_directory', load_directory, 'tok')
+        prefetcher.start('device_directory', load_directory, 'tok')  # one future per name
+        prefetcher.start('active_alarms', fail)
+        assert time.time() - started < 0.5  # starting never blocks the caller
+
+        assert join_prefetch('device_directory', timeout=0.05) is None  # not ready: caller fetches itself
+        released.set()
+        assert join_prefetch('device_directory') == ['dev-1']
+        assert join_prefetch(('telemetry_keys', 'dev-1')) == ['temperature']
+        assert join_prefetch('active_alarms') is None  # failures fall back to a direct fetch
+        assert join_prefetch('never_started') is None
+    assert calls == [('directory', 'tok')]
+
+    # A prefetch still queued behind other chats' work is cancelled instead of waited for
+    busy = threading.Event()
+    queued_runs = []
+    small_pool = Prefetcher(max_workers=1)
+    with bind_context(RequestContext(token='tok')):
+        small_pool.start('other_chat', busy.wait, 2)
+        small_pool.start('active_alarms', lambda: queued_runs.append('ran'))
+        started = time.time()
+        assert join_prefetch('active_alarms') is None
+        assert time.time() - started < 0.5
+    busy.set()
+    time.sleep(0.1)
+    assert queued_runs == []
+
+    # Without a request context nothing is started
+    assert prefetcher.start('device_directory', load_directory, 'tok') is None
+    assert join_prefetch('device_directory') is None
+    print("✅ Speculative prefetch works")
+
+if __name__ == "__main__":
+    test_prefetch_overlaps_routing()
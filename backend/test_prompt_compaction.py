@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Test script for compacting telemetry and alarm payloads before LLM prompts
+"""
+
+import json
+
+from prompt_compaction import compact_payload, estimate_tokens, fit_messages, summarize_series, to_prompt_json
+
+def test_payloads_are_compacted():
+    print("=== Testing prompt payload compaction ===")
+    hour = 3_600_000
+    # Newest first, as the telemetry API returns it
+    series = [{"ts": 1_700_000_000_000 + i * hour, "value": str(20 + i)} for i in range(100)][::-1]
+    summary = summarize_series(series)
+    assert summary == {"count": 100, "min": 20.0, "max": 119.0, "mean": 69.5, "p95": 114.0, "last": 119.0,
+                       "slope_per_hour": 1.0}
+    assert summarize_series([{"ts": 1, "value": "ON"}, {"ts": 2, "value": "OFF"}]) == {"count": 2, "last": "OFF"}
+
+    alarms = [{"type": "High Temperature", "severity": "MAJOR", "originatorName": "AHU-1", "status": "ACTIVE_UNACK",
+               "createdTime": 1000 + i, "details": {"trace": "x" * 500}} for i in range(40)]
+    alarms.append({"type": "Door Open", "severity": "CRITICAL", "originatorName": "Door-3", "status": "CLEARED_ACK",
+                   "createdTime": 5})
+    compact = compact_payload({"telemetry": {"temperature": series}, "alarms": alarms})
+    assert compact["telemetry"]["temperature"]["count"] == 100
+    assert compact["alarms"]["total"] == 41
+    assert compact["alarms"]["by_severity"] == {"MAJOR": 40, "CRITICAL": 1}
+    assert [(g["device"], g["count"], g["active"]) for g in compact["alarms"]["groups"]] == [("Door-3", 1, 0), ("AHU-1", 40, 40)]
+
+    raw = json.dumps({"telemetry": {"temperature": series}, "alarms": alarms}, indent=2)
+    prompt = to_prompt_json({"telemetry": {"temperature": series}, "alarms": alarms})
+    assert estimate_tokens(prompt) * 20 < estimate_tokens(raw)
+
+    # A token budget is enforced on both payloads and whole calls
+    assert estimate_tokens(to_prompt_json(["word " * 50] * 50, max_tokens=50)) <= 50
+    messages = [{"role": "system", "content": "Be brief."}, {"role": "user", "content": "data " * 2000}]
+    fitted = fit_messages(messages, 200)
+    assert fitted[0] == messages[0]
+    assert sum(estimate_tokens(m["content"]) for m in fitted) <= 200
+    assert fitted[1]["content"].endswith("[truncated]")
+    print("✅ Prompt payload compaction works")
+
+if __name__ == "__main__":
+    test_payloads_are_compacted()
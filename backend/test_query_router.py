@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Test script for the declarative process_query routing table
+"""
+
+from query_router import QueryRouter, QueryRule, RoutedQuery, map_hindi_to_english
+
+class RecordingAgent:
+    def _route_fixed(self, query, match):
+        return "fixed"
+
+    def _route_value(self, query, match):
+        return f"value {match.group(1)}"
+
+    def _route_pass(self, query, match):
+        return None  # fall through to later rules
+
+def test_rules_fire_in_order():
+    print("=== Testing query router ===")
+    router = QueryRouter([
+        QueryRule('pass_through', '_route_pass', keywords=[('temperature',)]),
+        QueryRule('setpoint', '_route_value', patterns=[r"temperature (?:to|par) (\d+)"], on='mapped'),
+        QueryRule('troubleshooting', '_route_fixed', keywords=[('fix',), ('alarm', 'co2')]),
+        QueryRule('control_only', '_route_fixed', keywords=[('speed',)], when=lambda q: q.is_fan_speed_control),
+    ])
+    agent = RecordingAgent()
+
+    assert router.route(agent, RoutedQuery("Set temperature to 22")) == ('setpoint', 'value 22')
+    # Hindi words are mapped before 'mapped' patterns run
+    assert map_hindi_to_english("तापमान") == "temperature"
+    assert router.route(agent, RoutedQuery("तापमान पर 24")) == ('setpoint', 'value 24')
+    # Every keyword group has to hit
+    assert router.route(agent, RoutedQuery("How to fix the CO2 alarm")) == ('troubleshooting', 'fixed')
+    assert router.route(agent, RoutedQuery("fix my schedule")) == (None, None)
+    assert router.route(agent, RoutedQuery("set fan speed high"))[0] == 'control_only'
+    assert router.route(agent, RoutedQuery("what is the fan speed"))[0] is None
+    print("✅ Query router works")
+
+if __name__ == "__main__":
+    test_rules_fire_in_order()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Test script for request-scoped agent state
+"""
+
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from request_context import RequestContext, bind_context, current_context
+
+def test_contexts_are_isolated():
+    print("=== Testing request context isolation ===")
+    pool = ThreadPoolExecutor(max_workers=4)
+    barrier = threading.Barrier(8)
+    seen = {}
+
+    def handle_chat(token):
+        with bind_context(RequestContext(token=token)):
+            barrier.wait()  # every chat is in flight at the same time
+            # Nested work on a shared pool sees the caller's context
+            future = pool.submit(contextvars.copy_context().run, lambda: current_context().token)
+            seen[token] = (current_context().token, future.result())
+
+    threads = [threading.Thread(target=handle_chat, args=(f"token-{i}",)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for token, (own, nested) in seen.items():
+        assert own == token and nested == token, (token, own, nested)
+    assert current_context() is None
+    print(f"{len(seen)} concurrent chats kept their own token")
+    print("✅ Request contexts are isolated")
+
+if __name__ == "__main__":
+    test_contexts_are_isolated()
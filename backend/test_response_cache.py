@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script for the read-only chat response cache
+"""
+
+import base64
+import json
+import time
+
+from query_router import QueryRouter, QueryRule, RoutedQuery
+from response_cache import ResponseCache
+
+class CountingAgent:
+    def __init__(self):
+        self.scans = 0
+        self.commands = 0
+
+    def _route_battery(self, query, match):
+        self.scans += 1
+        time.sleep(0.05)  # stands in for a fleet scan
+        return f"🔋 Battery report #{self.scans}"
+
+    def _route_set_fan(self, query, match):
+        self.commands += 1
+        return "✅ Fan speed set"
+
+def make_token(payload, signature="signature"):
+    body = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+    return f"header.{body}.{signature}"
+
+def test_read_only_rules_are_cached():
+    print("=== Testing response cache ===")
+    router = QueryRouter([
+        QueryRule('battery_status', '_route_battery', keywords=[('low battery',)], cache_ttl=0.3),
+        QueryRule('set_fan_speed', '_route_set_fan', patterns=[r"set fan to (\w+)"]),
+    ])
+    agent = CountingAgent()
+    cache = ResponseCache()
+
+    first = router.route(agent, RoutedQuery("Show low battery devices", token="tenant-a"), cache=cache)
+    start = time.perf_counter()
+    second = router.route(agent, RoutedQuery("show  LOW battery devices", token="tenant-a"), cache=cache)
+    print(f"Cached answer in {(time.perf_counter() - start) * 1000:.2f}ms")
+    assert first == second and agent.scans == 1
+
+    # Other tenants and expired entries rescan
+    router.route(agent, RoutedQuery("show low battery devices", token="tenant-b"), cache=cache)
+    assert agent.scans == 2
+    time.sleep(0.35)
+    router.route(agent, RoutedQuery("show low battery devices", token="tenant-a"), cache=cache)
+    assert agent.scans == 3
+
+    # Control intents always run
+    for _ in range(2):
+        router.route(agent, RoutedQuery("set fan to high", token="tenant-a"), cache=cache)
+    assert agent.commands == 2
+
+    # Queries with side effects are not stored; invalidate drops a tenant
+    cache.invalidate("tenant-a")
+    router.route(agent, RoutedQuery("show low battery devices", token="tenant-a"), cache=cache, should_store=lambda: False)
+    router.route(agent, RoutedQuery("show low battery devices", token="tenant-a"), cache=cache)
+    assert agent.scans == 5
+
+    # Users of one tenant, and tokens forging a user's claims, never get each other's answers
+    cache.invalidate()
+    user_a = make_token({'tenantId': 'T1', 'customerId': 'C1'})
+    user_b = make_token({'tenantId': 'T1', 'customerId': 'C2'})
+    forged = make_token({'tenantId': 'T1', 'customerId': 'C1'}, signature="forged")
+    for token in (user_a, user_b, forged, user_a):
+        router.route(agent, RoutedQuery("show low battery devices", token=token), cache=cache)
+    assert agent.scans == 8
+
+    # A control command by one user drops the whole tenant's cached answers
+    cache.invalidate(user_b)
+    router.route(agent, RoutedQuery("show low battery devices", token=user_a), cache=cache)
+    assert agent.scans == 9
+    print("✅ Response cache works")
+
+if __name__ == "__main__":
+    test_read_only_rules_are_cached()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test script for single-flight coalescing of identical Inferrix reads
+"""
+
+import asyncio
+import base64
+import json
+import threading
+import time
+
+import inferrix_client
+
+class FakeSession:
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        with self.lock:
+            self.calls.append((method, url, kwargs.get("params")))
+        time.sleep(0.2)
+        if "broken" in url:
+            raise ConnectionError("upstream reset")
+        return object()
+
+def jwt(claims, signature):
+    payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).decode().rstrip("=")
+    return f"eyJhbGciOiJIUzUxMiJ9.{payload}.{signature}"
+
+def run_concurrently(calls):
+    results = [None] * len(calls)
+
+    def worker(i, call):
+        try:
+            results[i] = call()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i, call)) for i, call in enumerate(calls)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+def test_identical_reads_share_one_request():
+    print("=== Testing single-flight request coalescing ===")
+    session = FakeSession()
+    original_get_session = inferrix_client.get_session
+    inferrix_client.get_session = lambda: session
+    try:
+        headers = inferrix_client.auth_headers("token-a")
+        read = lambda: inferrix_client.get("user/devices", headers=headers, params={"page": 0, "pageSize": 100})
+        results = run_concurrently([read] * 5)
+        assert len(session.calls) == 1
+        assert all(r is results[0] for r in results)
+
+        # Different params, a different token and writes are never shared
+        session.calls.clear()
+        run_concurrently([
+            read,
+            lambda: inferrix_client.get("user/devices", headers=headers, params={"page": 1, "pageSize": 100}),
+            lambda: inferrix_client.get("user/devices", headers=inferrix_client.auth_headers("token-b"), params={"page": 0, "pageSize": 100}),
+            lambda: inferrix_client.post("v2/alarms", headers=headers, json={}),
+            lambda: inferrix_client.post("v2/alarms", headers=headers, json={}),
+        ])
+        assert len(session.calls) == 5
+
+        # Same tenant, different user or a forged signature: each token gets its own response
+        session.calls.clear()
+        user_a = jwt({"tenantId": "T1", "customerId": "C1"}, "real-signature")
+        user_b = jwt({"tenantId": "T1", "customerId": "C2"}, "forged")
+        results = run_concurrently([
+            lambda: inferrix_client.get("user/devices", headers=inferrix_client.auth_headers(user_a)),
+            lambda: inferrix_client.get("user/devices", headers=inferrix_client.auth_headers(user_b)),
+        ])
+        assert len(session.calls) == 2 and results[0] is not results[1]
+
+        # Errors reach every waiter, and the next call goes upstream again
+        session.calls.clear()
+        results = run_concurrently([lambda: inferrix_client.get("broken/alarms", headers=headers)] * 3)
+        assert all(isinstance(r, ConnectionError) for r in results)
+        assert len(session.calls) == 1
+        read()
+        assert len(session.calls) == 2
+    finally:
+        inferrix_client.get_session = original_get_session
+
+    upstream = []
+
+    async def fake_arequest(method, url, **kwargs):
+        upstream.append(url)
+        await asyncio.sleep(0.05)
+        return {"url": url}
+
+    async def burst():
+        headers = inferrix_client.auth_headers("token-a")
+        return await asyncio.gather(*[inferrix_client.aget("v2/alarms", headers=headers, params={"statusList": "ACTIVE"})
+                                      for _ in range(4)])
+
+    original_arequest = inferrix_client._arequest
+    inferrix_client._arequest = fake_arequest
+    try:
+        responses = asyncio.run(burst())
+    finally:
+        inferrix_client._arequest = original_arequest
+    assert len(upstream) == 1 and all(r is responses[0] for r in responses)
+    print("✅ Single-flight request coalescing works")
+
+if __name__ == "__main__":
+    test_identical_reads_share_one_request()
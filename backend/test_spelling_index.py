@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Test script for the SymSpell-style spelling index
+"""
+
+from device_index import DeviceIndex
+from spelling_index import SymSpellIndex, correct_alpha_runs, edit_distance
+
+def test_deletion_index_lookups():
+    print("=== Testing spelling index ===")
+    assert edit_distance("thermostat", "thermostta", 2) == 1  # adjacent swap counts once
+    assert edit_distance("humidity", "temperature", 2) == 3  # capped at limit + 1
+
+    index = SymSpellIndex(['temperature', 'humidity', 'thermostat', 'room', 'floor', 'तापमान'])
+    assert index.lookup('temprature') == 'temperature'
+    assert index.lookup('humdity') == 'humidity'
+    assert index.lookup('तापमन') == 'तापमान'
+    assert index.lookup('rom', max_distance=1) == 'room'
+    assert index.lookup('battery') is None
+
+    # Letters are corrected, numbers never are
+    assert correct_alpha_runs('3f-rom51-thermostta', index) == '3f-room51-thermostat'
+
+    devices = [
+        {'id': {'id': 'dev-1'}, 'name': '2F-Room50-Thermostat'},
+        {'id': {'id': 'dev-2'}, 'name': 'IAQ Sensor V2 - 300186'},
+    ]
+    device_index = DeviceIndex(devices, lambda name: name.lower())
+    corrected = device_index.correct_spelling('2F-Room50-Thermostta')
+    assert device_index.by_name[corrected] == 'dev-1'
+    assert device_index.correct_spelling('IAQ Sensr V2 - 300186') == 'iaq sensor v2 - 300186'
+    print("✅ Spelling index works")
+
+if __name__ == "__main__":
+    test_deletion_index_lookups()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test script for the per-device telemetry key catalog
+"""
+
+import time
+
+from telemetry_catalog import TelemetryKeyCatalog
+from enhanced_agentic_agent import EnhancedAgenticInferrixAgent
+
+DEVICE_ID = "11111111-2222-3333-4444-555555555555"
+
+def test_catalog_ttl_and_invalidate():
+    print("=== Testing telemetry key catalog ===")
+    catalog = TelemetryKeyCatalog(ttl=0.1, max_entries=2)
+    catalog.put("token-a", "device", "dev-1", ["temperature", "humidity"])
+    assert catalog.get("token-a", "DEVICE", "dev-1") == ["temperature", "humidity"]
+    # Entries belong to the exact token that fetched them
+    assert catalog.get("token-b", "DEVICE", "dev-1") is None
+
+    # Expired entries are dropped
+    time.sleep(0.15)
+    assert catalog.get("token-a", "DEVICE", "dev-1") is None
+
+    # Invalidating one device leaves the others cached
+    catalog.put("token-a", "DEVICE", "dev-1", ["temperature"])
+    catalog.put("token-a", "DEVICE", "dev-2", ["co2"])
+    catalog.invalidate("token-a", "DEVICE", "dev-1")
+    assert catalog.get("token-a", "DEVICE", "dev-1") is None
+    assert catalog.get("token-a", "DEVICE", "dev-2") == ["co2"]
+
+    # Least recently used entries go first once the catalog is full
+    catalog.put("token-a", "DEVICE", "dev-1", ["temperature"])
+    catalog.get("token-a", "DEVICE", "dev-2")
+    catalog.put("token-a", "DEVICE", "dev-3", ["battery"])
+    assert catalog.get("token-a", "DEVICE", "dev-1") is None
+    assert catalog.get("token-a", "DEVICE", "dev-2") == ["co2"]
+
+    catalog.invalidate()
+    assert catalog.get("token-a", "DEVICE", "dev-3") is None
+    print("✅ Telemetry key catalog works")
+
+def test_agent_refreshes_keys_on_miss():
+    print("=== Testing key refresh on catalog miss ===")
+    agent = EnhancedAgenticInferrixAgent()
+    agent.telemetry_key_catalog = TelemetryKeyCatalog(ttl=3600)
+    agent.telemetry_key_catalog.put(agent._api_token, "DEVICE", DEVICE_ID, ["humidity"])
+    requests = []
+
+    def make_api_request(endpoint, method="GET", data=None, token=None):
+        requests.append(endpoint)
+        if endpoint.endswith("/keys/timeseries"):
+            return ["humidity", "co2"]
+        return {"co2": [{"ts": 1, "value": "640"}]}
+
+    agent._make_api_request = make_api_request
+
+    # A cached key is served without a keys request
+    assert agent._get_available_telemetry_keys(DEVICE_ID) == ["humidity"]
+    assert requests == []
+
+    # A key missing from the cached list re-fetches the list once, then reads the value
+    assert agent._get_device_telemetry_data(DEVICE_ID, "co2") == "640"
+    assert requests == [
+        f"plugins/telemetry/DEVICE/{DEVICE_ID}/keys/timeseries",
+        f"plugins/telemetry/DEVICE/{DEVICE_ID}/values/timeseries",
+    ]
+    assert agent.telemetry_key_catalog.get(agent._api_token, "DEVICE", DEVICE_ID) == ["humidity", "co2"]
+    print("✅ Key refresh on catalog miss works")
+
+if __name__ == "__main__":
+    test_catalog_ttl_and_invalidate()
+    test_agent_refreshes_keys_on_miss()
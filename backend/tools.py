@@ -1,13 +1,16 @@
 import datetime
 import os
 import requests
+import inferrix_client
 import re
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage
 import json
 from fastapi import HTTPException
 from auth_db import verify_user, create_access_token
+from entity_extractor import extract_entities
+from graph_data import GraphDataLayer
+from llm_gateway import get_llm_gateway
+from prompt_compaction import to_prompt_json
 
 # Import normalization function from enhanced_agentic_agent
 try:
@@ -38,7 +41,7 @@ def get_inferrix_token_dynamic():
 def get_inferrix_access_token(refresh_token):
     """Get fresh access token using refresh token"""
     try:
-        response = requests.post(
+        response = inferrix_client.post(
             "https://cloud.inferrix.com/api/auth/refresh",
             json={"refreshToken": refresh_token},
             headers={"Content-Type": "application/json"},
@@ -58,7 +61,7 @@ def get_inferrix_access_token(refresh_token):
 def fetch_alarms_from_mcp():
     """Fetch active alarms from integrated MCP endpoints"""
     try:
-        response = requests.get(f"{MCP_BASE_URL}/inferrix/alarms", timeout=10)
+        response = inferrix_client.get(f"{MCP_BASE_URL}/inferrix/alarms", timeout=10)
         response.raise_for_status()
         return response.json()
     except Exception as e:
@@ -127,7 +130,7 @@ def acknowledge_alarm(state):
             return "❌ Please specify an alarm ID to acknowledge."
         
         alarm_id = alarm_id_match.group()
-        response = requests.post(f"{MCP_BASE_URL}/inferrix/alarms/{alarm_id}/ack", timeout=10)
+        response = inferrix_client.post(f"{MCP_BASE_URL}/inferrix/alarms/{alarm_id}/ack", timeout=10)
         
         if response.status_code == 200:
             result = f"✅ Alarm {alarm_id} acknowledged successfully"
@@ -141,7 +144,9 @@ def acknowledge_alarm(state):
         return error_msg
 
 # Utility: Use LLM to extract device, date, severity from input
-llm = ChatOpenAI(model="gpt-4o", temperature=0)
+def ask_llm(prompt):
+    """Single-prompt completion through the shared LLM gateway (deadline, concurrency cap, 429 retries)"""
+    return get_llm_gateway().complete([{"role": "user", "content": prompt}], temperature=0)
 
 def extract_alarm_filters(input_text):
     """Extract device, date, and severity from user input using LLM"""
@@ -154,7 +159,7 @@ def extract_alarm_filters(input_text):
     Query: {input_text}
     """
     try:
-        response = llm.invoke([HumanMessage(content=prompt)]).content
+        response = ask_llm(prompt)
         # Ensure response is a string before parsing
         if isinstance(response, str):
             filters = json.loads(response)
@@ -222,49 +227,47 @@ def fetch_alarms_for_device_today(state):
         print(error_msg)
         return error_msg
 
+def state_token(state):
+    """Inferrix token the graph was invoked with"""
+    return state.get("token") or get_inferrix_token()
+
+def resolve_device(state):
+    """Device id or name from the state, the parsed query, or (last) the LLM filters"""
+    device = state.get("device")
+    if device:
+        return device
+    input_text = state.get("input", "")
+    entities = extract_entities(input_text)
+    if entities.device or entities.device_name:
+        return entities.device or entities.device_name
+    return extract_alarm_filters(input_text).get('device')
+
+def device_examples(jwt_token):
+    """Dropdown hint listing a few device names from the cached directory"""
+    try:
+        devices = GRAPH_DATA.devices(jwt_token)
+        example_names = ', '.join(d.get('name', '') for d in devices[:3])
+        return f"❌ Please select a device from the dropdown above. Example devices: {example_names}."
+    except Exception:
+        return "❌ Please select a device from the dropdown above."
+
 def fetch_temperature(state):
-    """Fetch temperature data for a specific device via MCP server"""
-    print('fetch_temperature called with:', state)
+    """Fetch the latest temperature of a specific device"""
     try:
-        device = state.get("device")
-        input_text = state.get("input", "")
-        if not device:
-            filters = extract_alarm_filters(input_text)
-            device = filters.get('device')
+        jwt_token = state_token(state)
+        if not jwt_token:
+            return "❌ Inferrix API token not configured."
+        device = resolve_device(state)
         if not device:
-            try:
-                response = requests.get(f"{MCP_BASE_URL}/inferrix/devices", timeout=10)
-                response.raise_for_status()
-                devices = response.json().get("data", [])
-                example_names = ', '.join(d.get('name', '') for d in devices[:3])
-                return f"\u274c Please select a device from the dropdown above. Example devices: {example_names}."
-            except Exception:
-                return "\u274c Please select a device from the dropdown above."
-        response = requests.get(f"{MCP_BASE_URL}/inferrix/devices", timeout=10)
-        response.raise_for_status()
-        devices = response.json().get("data", [])
-        device_info = None
-        for d in devices:
-            d_id = d.get("id")
-            d_id_str = d_id.get("id") if isinstance(d_id, dict) else d_id
-            # Ensure both are strings and compare
-            if str(device).strip() == str(d_id_str).strip():
-                device_info = d
-                break
+            return device_examples(jwt_token)
+        device_info = GRAPH_DATA.find_device(jwt_token, device)
         if not device_info:
             return f"❌ Device '{device}' not found. Please check the device name or select from the dropdown above."
-        device_id = device_info.get("id")
-        # Get temperature telemetry via MCP server
-        ts_response = requests.get(f"{MCP_BASE_URL}/inferrix/plugins/telemetry/DEVICE/{device_id}/values/timeseries", 
-                                 params={"keys": "temperature"}, timeout=10)
-        ts_response.raise_for_status()
-        ts_data = ts_response.json()
-        if "temperature" in ts_data and ts_data["temperature"]:
-            value = ts_data["temperature"][0]["value"]
-            result = f"🌡️ Temperature for {device_info.get('name')}: {value}°C"
+        values = GRAPH_DATA.latest(jwt_token, GRAPH_DATA.device_id(device_info), ["temperature"])
+        if "temperature" in values:
+            result = f"🌡️ Temperature for {device_info.get('name')}: {values['temperature']}°C"
         else:
             result = f"❌ No temperature data found for {device_info.get('name')}. Please check if the device supports this metric or try another device."
-        print('fetch_temperature returning:', result)
         return str(result)
     except Exception as e:
         error_msg = f"❌ Error fetching temperature: {e}"
@@ -272,42 +275,19 @@ def fetch_temperature(state):
         return error_msg
 
 def check_health(state):
-    """Check health status of a specific device via MCP server"""
-    print('check_health called with:', state)
+    """Check health status of a specific device"""
     try:
-        device = state.get("device")
-        input_text = state.get("input", "")
-        if not device:
-            filters = extract_alarm_filters(input_text)
-            device = filters.get('device')
+        jwt_token = state_token(state)
+        if not jwt_token:
+            return "❌ Inferrix API token not configured."
+        device = resolve_device(state)
         if not device:
             return "❌ Please specify a device for health check."
-        # Get device info from MCP server
-        response = requests.get(f"{MCP_BASE_URL}/inferrix/devices", timeout=10)
-        response.raise_for_status()
-        devices = response.json().get("data", [])
-        device_info = None
-        # Match by device ID first
-        for d in devices:
-            d_id = d.get("id")
-            d_id_str = d_id.get("id") if isinstance(d_id, dict) else d_id
-            # Ensure both are strings and compare
-            if str(device).strip() == str(d_id_str).strip():
-                device_info = d
-                break
-        # Fallback to flexible name match if not found by ID
-        if not device_info:
-            norm_query = normalize_device_string(device)
-            for d in devices:
-                norm_name = normalize_device_string(d.get("name", ""))
-                if norm_query in norm_name:
-                    device_info = d
-                    break
+        device_info = GRAPH_DATA.find_device(jwt_token, device)
         if not device_info:
             return f"❌ Device '{device}' not found."
         status = device_info.get("status", "UNKNOWN")
         result = f"🏥 Device {device_info.get('name')} health status: {status.lower()}"
-        print('check_health returning:', result)
         return str(result)
     except Exception as e:
         error_msg = f"❌ Error checking health: {e}"
@@ -316,39 +296,22 @@ def check_health(state):
 
 def predict_overheat_risk(state):
     """Predict overheat risk for a device using live telemetry data and historical patterns"""
-    print('predict_overheat_risk called with:', state)
     try:
-        input_text = state.get("input", "")
-        filters = extract_alarm_filters(input_text)
-        device = filters.get('device')
-        
-        if not device:
-            return "❌ Please specify a device for overheat risk prediction."
-        
-        # Get live telemetry data for temperature analysis
-        jwt_token = get_inferrix_token()
+        jwt_token = state_token(state)
         if not jwt_token:
             return "❌ Inferrix API token not configured."
+        device = resolve_device(state)
+        if not device:
+            return "❌ Please specify a device for overheat risk prediction."
         
-        # Get device telemetry for temperature analysis
-        devices = get_devices_inferrix(jwt_token)
-        device_info = None
-        
-        for d in devices:
-            d_id = d.get("id")
-            d_id_str = d_id.get("id") if isinstance(d_id, dict) else d_id
-            if str(device).strip() == str(d_id_str).strip():
-                device_info = d
-                break
-        
+        device_info = GRAPH_DATA.find_device(jwt_token, device)
         if not device_info:
             return f"❌ Device '{device}' not found."
         
-        device_id = device_info.get("id")
-        telemetry = get_device_telemetry_inferrix(device_id, ["temperature"], jwt_token)
+        values = GRAPH_DATA.latest(jwt_token, GRAPH_DATA.device_id(device_info), ["temperature"])
         
-        if "temperature" in telemetry and telemetry["temperature"]:
-            current_temp = float(telemetry["temperature"][0].get("value", 0))
+        if "temperature" in values:
+            current_temp = float(values["temperature"] or 0)
             
             # Dynamic risk assessment based on actual temperature data
             if current_temp > 80:
@@ -375,7 +338,6 @@ def predict_overheat_risk(state):
             result += f"• Recommendation: Check device connectivity and sensor status\n"
             result += f"• Data Source: Live telemetry from Inferrix API"
         
-        print('predict_overheat_risk returning:', result)
         return str(result)
     except Exception as e:
         error_msg = f"❌ Error predicting overheat risk: {e}"
@@ -384,7 +346,6 @@ def predict_overheat_risk(state):
 
 def get_highest_severity(state):
     """Get the highest severity level among active alarms"""
-    print('get_highest_severity called with:', state)
     try:
         alarms = fetch_alarms_from_mcp()
         severities = [a.get("severity") for a in alarms.get("data", []) if a.get("severity")]
@@ -404,78 +365,50 @@ def get_highest_severity(state):
         return error_msg
 
 def fetch_all_devices(state):
-    """Fetch all devices from MCP server"""
-    print('fetch_all_devices called with:', state)
+    """Fetch all devices from the shared device directory"""
     try:
-        response = requests.get(f"{MCP_BASE_URL}/inferrix/devices", timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        devices = data.get("data", []) if isinstance(data, dict) else data
-        
-        if devices:
-            # Return the actual device objects instead of just names
-            return devices
-        else:
+        jwt_token = state_token(state)
+        if not jwt_token:
             return []
-        
+        # Return the actual device objects instead of just names
+        return list(GRAPH_DATA.devices(jwt_token))
     except Exception as e:
         error_msg = f"❌ Error fetching devices: {e}"
         print(error_msg)
         return []
 
 def fetch_device_telemetry(state):
-    """Fetch telemetry data for a specific device and sensor type via MCP server. If only device is specified, list available telemetry types."""
-    print('fetch_device_telemetry called with:', state)
+    """Fetch telemetry data for a specific device and sensor type. If only device is specified, list available telemetry types."""
     try:
-        device_query = state.get("device")
+        jwt_token = state_token(state)
+        if not jwt_token:
+            return "❌ Inferrix API token not configured."
         input_text = state.get("input", "")
+        entities = extract_entities(input_text)
+        device_query = state.get("device") or entities.device or entities.device_name
         key = None
         for k in ["temperature", "humidity", "battery", "occupancy", "motion"]:
             if k in input_text.lower():
                 key = k
                 break
         if not device_query:
-            try:
-                response = requests.get(f"{MCP_BASE_URL}/inferrix/devices", timeout=10)
-                response.raise_for_status()
-                devices = response.json().get("data", [])
-                example_names = ', '.join(d.get('name', '') for d in devices[:3])
-                return f"\u274c Please select a device from the dropdown above. Example devices: {example_names}."
-            except Exception:
-                return "\u274c Please select a device from the dropdown above."
-        response = requests.get(f"{MCP_BASE_URL}/inferrix/devices", timeout=10)
-        response.raise_for_status()
-        devices = response.json().get("data", [])
-        device_info = None
-        for d in devices:
-            d_id = d.get("id")
-            d_id_str = d_id.get("id") if isinstance(d_id, dict) else d_id
-            # Ensure both are strings and compare
-            if str(device_query).strip() == str(d_id_str).strip():
-                device_info = d
-                break
+            return device_examples(jwt_token)
+        device_info = GRAPH_DATA.find_device(jwt_token, device_query)
         if not device_info:
             return f"❌ Device '{device_query}' not found. Please check the device name or select from the dropdown above."
-        device_id = device_info.get("id")
+        device_id = GRAPH_DATA.device_id(device_info)
         # If no telemetry key specified, list available keys
         if not key:
-            ts_keys_response = requests.get(f"{MCP_BASE_URL}/inferrix/plugins/telemetry/DEVICE/{device_id}/keys/timeseries", timeout=10)
-            ts_keys_response.raise_for_status()
-            keys = ts_keys_response.json()
+            keys = GRAPH_DATA.telemetry_keys(jwt_token, device_id)
             if keys:
                 return f"ℹ️ Available telemetry types for {device_info.get('name')}: {', '.join(keys)}. Please specify one (e.g., 'Show temperature for {device_info.get('name')}')."
             else:
                 return f"❌ No telemetry data found for {device_info.get('name')}. Please check if the device is online or try another device."
-        # Get telemetry via MCP server
-        ts_response = requests.get(f"{MCP_BASE_URL}/inferrix/plugins/telemetry/DEVICE/{device_id}/values/timeseries", params={"keys": key}, timeout=10)
-        ts_response.raise_for_status()
-        ts_data = ts_response.json()
-        if key in ts_data and ts_data[key]:
-            value = ts_data[key][0]["value"]
-            result = f"📊 {key.title()} for {device_info.get('name')}: {value}"
+        values = GRAPH_DATA.latest(jwt_token, device_id, [key])
+        if key in values:
+            result = f"📊 {key.title()} for {device_info.get('name')}: {values[key]}"
         else:
             result = f"❌ No {key} data found for {device_info.get('name')}. Please check if the device supports this metric or try another device."
-        print('fetch_device_telemetry returning:', result)
         return str(result)
     except Exception as e:
         error_msg = f"❌ Error fetching telemetry: {e}"
@@ -483,42 +416,19 @@ def fetch_device_telemetry(state):
         return error_msg
 
 def check_device_online(state):
-    """Check if a specific device is online via MCP server"""
-    print('check_device_online called with:', state)
+    """Check if a specific device is online"""
     try:
-        device = state.get("device")
-        input_text = state.get("input", "")
-        if not device:
-            filters = extract_alarm_filters(input_text)
-            device = filters.get('device')
+        jwt_token = state_token(state)
+        if not jwt_token:
+            return "❌ Inferrix API token not configured."
+        device = resolve_device(state)
         if not device:
             return "❌ Please specify a device."
-        # Get device info from MCP server
-        response = requests.get(f"{MCP_BASE_URL}/inferrix/devices", timeout=10)
-        response.raise_for_status()
-        devices = response.json().get("data", [])
-        device_info = None
-        # Match by device ID first
-        for d in devices:
-            d_id = d.get("id")
-            d_id_str = d_id.get("id") if isinstance(d_id, dict) else d_id
-            # Ensure both are strings and compare
-            if str(device).strip() == str(d_id_str).strip():
-                device_info = d
-                break
-        # Fallback to flexible name match if not found by ID
-        if not device_info:
-            norm_query = normalize_device_string(device)
-            for d in devices:
-                norm_name = normalize_device_string(d.get("name", ""))
-                if norm_query in norm_name:
-                    device_info = d
-                    break
+        device_info = GRAPH_DATA.find_device(jwt_token, device)
         if not device_info:
             return f"❌ Device '{device}' not found."
         status = device_info.get("status", "UNKNOWN")
         result = f"🟢 Device {device_info.get('name')} is {status.lower()}."
-        print('check_device_online returning:', result)
         return str(result)
     except Exception as e:
         error_msg = f"❌ Error checking device status: {e}"
@@ -526,49 +436,22 @@ def check_device_online(state):
         return error_msg
 
 def check_device_telemetry_health(state):
-    """Check if a device is sending telemetry data via MCP server"""
-    print('check_device_telemetry_health called with:', state)
+    """Check if a device is sending telemetry data"""
     try:
-        device = state.get("device")
-        input_text = state.get("input", "")
-        if not device:
-            filters = extract_alarm_filters(input_text)
-            device = filters.get('device')
+        jwt_token = state_token(state)
+        if not jwt_token:
+            return "❌ Inferrix API token not configured."
+        device = resolve_device(state)
         if not device:
             return "❌ Please specify a device."
-        # Get device info from MCP server
-        response = requests.get(f"{MCP_BASE_URL}/inferrix/devices", timeout=10)
-        response.raise_for_status()
-        devices = response.json().get("data", [])
-        device_info = None
-        # Match by device ID first
-        for d in devices:
-            d_id = d.get("id")
-            d_id_str = d_id.get("id") if isinstance(d_id, dict) else d_id
-            # Ensure both are strings and compare
-            if str(device).strip() == str(d_id_str).strip():
-                device_info = d
-                break
-        # Fallback to flexible name match if not found by ID
-        if not device_info:
-            norm_query = normalize_device_string(device)
-            for d in devices:
-                norm_name = normalize_device_string(d.get("name", ""))
-                if norm_query in norm_name:
-                    device_info = d
-                    break
+        device_info = GRAPH_DATA.find_device(jwt_token, device)
         if not device_info:
             return f"❌ Device '{device}' not found. Please check the device name or select from the dropdown above."
-        device_id = device_info.get("id")
-        # Get telemetry keys via MCP server
-        ts_response = requests.get(f"{MCP_BASE_URL}/inferrix/plugins/telemetry/DEVICE/{device_id}/keys/timeseries", timeout=10)
-        ts_response.raise_for_status()
-        keys = ts_response.json()
+        keys = GRAPH_DATA.telemetry_keys(jwt_token, GRAPH_DATA.device_id(device_info))
         if keys:
             result = f"📡 Device {device_info.get('name')} is sending telemetry (keys: {', '.join(keys)})."
         else:
             result = f"❌ Device {device_info.get('name')} is NOT sending telemetry."
-        print('check_device_telemetry_health returning:', result)
         return str(result)
     except Exception as e:
         error_msg = f"❌ Error checking telemetry health: {e}"
@@ -577,7 +460,6 @@ def check_device_telemetry_health(state):
 
 def get_top_alarm_types(state):
     """Get the top 3 most common alarm types via MCP server"""
-    print('get_top_alarm_types called with:', state)
     try:
         alarms = fetch_alarms_from_mcp().get("data", [])
         from collections import Counter
@@ -598,7 +480,6 @@ def get_top_alarm_types(state):
 
 def summarize_alarms_last_24h(state):
     """Summarize alarms from the last 24 hours using LLM"""
-    print('summarize_alarms_last_24h called with:', state)
     try:
         alarms = fetch_alarms_from_mcp().get("data", [])
         now = datetime.datetime.now()
@@ -607,19 +488,9 @@ def summarize_alarms_last_24h(state):
         if not last_24h:
             result = "📋 No alarms in the last 24 hours."
         else:
-            # Format alarms in a user-friendly way before sending to LLM
-            formatted_alarms = []
-            for alarm in last_24h[:10]:  # Limit to first 10
-                t = alarm.get("createdTime", 0)
-                dt = datetime.datetime.fromtimestamp(t/1000).strftime("%Y-%m-%d %H:%M") if t else "Unknown time"
-                dev = alarm.get("originatorName", "Unknown device")
-                typ = alarm.get("type", "Unknown type")
-                sev = alarm.get("severity", "Unknown severity")
-                formatted_alarms.append(f"- {dt}: {dev} - {typ} ({sev})")
-            
-            alarm_text = "\n".join(formatted_alarms)
-            prompt = f"Summarize the following alarms from the last 24 hours in a concise, professional manner:\n{alarm_text}"
-            response = llm.invoke([HumanMessage(content=prompt)]).content
+            # Deduplicated type/severity/device tallies of every alarm, not just the first few
+            prompt = f"Summarize the following alarms from the last 24 hours in a concise, professional manner:\n{to_prompt_json(last_24h)}"
+            response = ask_llm(prompt)
             result = f"📋 Summary of alarms in last 24 hours:\n{response}"
         
         print('summarize_alarms_last_24h returning:', result)
@@ -630,31 +501,19 @@ def summarize_alarms_last_24h(state):
         return error_msg
 
 def list_low_battery_devices(state):
-    """List devices with low battery levels via MCP server"""
-    print('list_low_battery_devices called with:', state)
+    """List devices with low battery levels, reading battery across the fleet concurrently"""
     try:
-        # Get all devices from MCP server
-        response = requests.get(f"{MCP_BASE_URL}/inferrix/devices", timeout=10)
-        response.raise_for_status()
-        devices = response.json().get("data", [])
+        jwt_token = state_token(state)
+        if not jwt_token:
+            return "❌ Inferrix API token not configured."
+        devices = GRAPH_DATA.devices(jwt_token)
         
         low_battery = []
-        for device in devices:
-            d_id = device.get("id")
-            device_id = d_id.get("id") if isinstance(d_id, dict) else d_id
+        for device, value in GRAPH_DATA.latest_for_devices(jwt_token, devices, "battery"):
             try:
-                # Try to get battery telemetry via MCP server
-                ts_response = requests.get(f"{MCP_BASE_URL}/inferrix/plugins/telemetry/DEVICE/{device_id}/values/timeseries", 
-                                         params={"keys": "battery"}, timeout=1)
-                ts_response.raise_for_status()
-                ts_data = ts_response.json()
-                if "battery" in ts_data and ts_data["battery"]:
-                    value = float(ts_data["battery"][0]["value"])
-                    if value < 20:  # threshold for low battery
-                        low_battery.append(device.get("name"))
-            except Exception as e:
-                # Only log the error, do not include in user response
-                print(f"Error checking battery for device {device.get('name')}: {e}")
+                if float(value) < 20:  # threshold for low battery
+                    low_battery.append(device.get("name"))
+            except (TypeError, ValueError):
                 continue
         
         if low_battery:
@@ -662,7 +521,6 @@ def list_low_battery_devices(state):
         else:
             result = "🔋 No devices with low battery found."
         
-        print('list_low_battery_devices returning:', result)
         return str(result)
     except Exception as e:
         error_msg = f"❌ Error checking battery levels: {e}"
@@ -671,7 +529,6 @@ def list_low_battery_devices(state):
 
 def is_device_online(state):
     """Check if a specific device is online (alias for check_device_online)"""
-    print('is_device_online called with:', state)
     return check_device_online(state)
 
 def normalize_device_string(s):
@@ -685,10 +542,9 @@ def normalize_device_string(s):
 
 def energy_optimization_node(state):
     """Handle energy optimization requests like HVAC and lighting control using live Inferrix API"""
-    print('ENERGY_OPTIMIZATION NODE called with:', state)
     try:
         input_text = state.get("input", "").lower()
-        jwt_token = get_inferrix_token()
+        jwt_token = state_token(state)
         if not jwt_token:
             return "❌ Inferrix API token not configured."
         # Parse for zone and action
@@ -710,7 +566,7 @@ def energy_optimization_node(state):
         elif "dim lights" in input_text or "dim lighting" in input_text:
             action = ("lighting", "dim")
         # Find device
-        devices = get_devices_inferrix(jwt_token)
+        devices = GRAPH_DATA.devices(jwt_token)
         if not zone or not action:
             return "❌ Please specify both zone and action (e.g., 'Turn off HVAC in east wing')."
         device = next((d for d in devices if zone in d.get('name', '').lower() and action[0] in d.get('type', '').lower()), None)
@@ -751,10 +607,9 @@ def validate_temperature_range(temperature_value):
 
 def comfort_adjustment_node(state):
     """Handle real-time comfort adjustment requests using live Inferrix API"""
-    print('COMFORT_ADJUSTMENT NODE called with:', state)
     try:
         input_text = state.get("input", "").lower()
-        jwt_token = get_inferrix_token()
+        jwt_token = state_token(state)
         if not jwt_token:
             return "❌ Inferrix API token not configured."
         # Parse for location and temperature
@@ -773,7 +628,7 @@ def comfort_adjustment_node(state):
         if match:
             temp_change = int(match.group(1))
         # Find device
-        devices = get_devices_inferrix(jwt_token)
+        devices = GRAPH_DATA.devices(jwt_token)
         device = next((d for d in devices if zone and zone in d.get('name', '').lower() and 'hvac' in d.get('type', '').lower()), None)
         if not device:
             return f"❌ No HVAC device found for {zone or 'specified location'}."
@@ -814,10 +669,9 @@ def root_cause_identification_node(state):
 
 def predictive_maintenance_node(state):
     """Handle predictive maintenance inquiries using live Inferrix API data"""
-    print('PREDICTIVE_MAINTENANCE NODE called with:', state)
     try:
         input_text = state.get("input", "").lower()
-        jwt_token = get_inferrix_token()
+        jwt_token = state_token(state)
         if not jwt_token:
             return "❌ Inferrix API token not configured."
         # Determine system type(s) from input
@@ -831,7 +685,7 @@ def predictive_maintenance_node(state):
         # If none found, check for generic
         if not system_types:
             system_types = ["hvac", "lighting", "chiller"]
-        devices = get_devices_inferrix(jwt_token)
+        devices = GRAPH_DATA.devices(jwt_token)
         relevant_devices = [d for d in devices if any(st in d.get('type', '').lower() or st in d.get('name', '').lower() for st in system_types)]
         issues = []
         for d in relevant_devices:
@@ -863,7 +717,7 @@ def control_device(device_id, method, params, jwt_token):
     url = f"https://cloud.inferrix.com/api/plugins/rpc/twoway/{device_id}"
     headers = {"X-Authorization": f"Bearer {jwt_token}", "Content-Type": "application/json"}
     payload = {"method": method, "params": params}
-    resp = requests.post(url, headers=headers, json=payload)
+    resp = inferrix_client.post(url, headers=headers, json=payload)
     resp.raise_for_status()
     return resp.json()
 
@@ -871,10 +725,9 @@ def control_device(device_id, method, params, jwt_token):
 
 def security_monitoring_node(state):
     """Handle security monitoring and unauthorized access detection using live Inferrix API"""
-    print('SECURITY_MONITORING NODE called with:', state)
     try:
         input_text = state.get("input", "").lower()
-        jwt_token = get_inferrix_token()
+        jwt_token = state_token(state)
         if not jwt_token:
             return "❌ Inferrix API token not configured."
         
@@ -892,7 +745,7 @@ def security_monitoring_node(state):
             timeframe = "this_week"
         
         # Get security devices
-        devices = get_devices_inferrix(jwt_token)
+        devices = GRAPH_DATA.devices(jwt_token)
         security_devices = [d for d in devices if any(word in d.get('type', '').lower() for word in ['security', 'camera', 'access', 'surveillance'])]
         
         if not security_devices:
@@ -919,10 +772,9 @@ def security_monitoring_node(state):
 
 def access_control_node(state):
     """Handle access control management using live Inferrix API"""
-    print('ACCESS_CONTROL NODE called with:', state)
     try:
         input_text = state.get("input", "").lower()
-        jwt_token = get_inferrix_token()
+        jwt_token = state_token(state)
         if not jwt_token:
             return "❌ Inferrix API token not configured."
         
@@ -945,7 +797,7 @@ def access_control_node(state):
             return "❌ Please specify both action (grant/revoke/check access) and area."
         
         # Get access control devices
-        devices = get_devices_inferrix(jwt_token)
+        devices = GRAPH_DATA.devices(jwt_token)
         access_devices = [d for d in devices if area in d.get('name', '').lower() and 'access' in d.get('type', '').lower()]
         
         if not access_devices:
@@ -977,17 +829,13 @@ def performance_benchmarking_node(state):
     return "❌ Performance benchmarking is not supported: No such endpoint in Inferrix API."
 
 def get_devices_inferrix(jwt_token):
-    url = f"{INFERRIX_BASE_URL}/user/devices?page=0&pageSize=100"
-    headers = {"X-Authorization": f"Bearer {jwt_token}"}
-    resp = requests.get(url, headers=headers)
-    resp.raise_for_status()
-    return resp.json()["data"]
+    return list(inferrix_client.iter_devices(jwt_token))
 
 def get_device_telemetry_inferrix(device_id, keys, jwt_token):
     url = f"{INFERRIX_BASE_URL}/plugins/telemetry/DEVICE/{device_id}/values/timeseries"
     headers = {"X-Authorization": f"Bearer {jwt_token}"}
     params = {"keys": ",".join(keys)}
-    resp = requests.get(url, headers=headers, params=params)
+    resp = inferrix_client.get(url, headers=headers, params=params)
     resp.raise_for_status()
     return resp.json()
 
@@ -996,7 +844,7 @@ def get_device_alarms_inferrix(device_id, jwt_token):
     headers = {"X-Authorization": f"Bearer {jwt_token}"}
     params = {"originator": device_id}
     try:
-        resp = requests.get(url, headers=headers, params=params)
+        resp = inferrix_client.get(url, headers=headers, params=params)
         resp.raise_for_status()
         return resp.json()["data"]
     except requests.exceptions.HTTPError as e:
@@ -1007,33 +855,39 @@ def get_device_alarms_inferrix(device_id, jwt_token):
 def get_device_telemetry_keys(device_id, jwt_token):
     url = f"{INFERRIX_BASE_URL}/plugins/telemetry/DEVICE/{device_id}/keys/timeseries"
     headers = {"X-Authorization": f"Bearer {jwt_token}"}
-    resp = requests.get(url, headers=headers)
+    resp = inferrix_client.get(url, headers=headers)
     resp.raise_for_status()
     return resp.json()
 
+# Device list, key lists and latest values shared by every graph node
+GRAPH_DATA = GraphDataLayer(
+    fetch_devices=get_devices_inferrix,
+    fetch_latest=get_device_telemetry_inferrix,
+    fetch_keys=get_device_telemetry_keys,
+    normalize=normalize_device_string,
+)
+
 def get_assets_inferrix(jwt_token):
     url = f"{INFERRIX_BASE_URL}/assetInfos/all?pageSize=100&page=0&sortProperty=createdTime&sortOrder=DESC&includeCustomers=true"
     headers = {"X-Authorization": f"Bearer {jwt_token}"}
-    resp = requests.get(url, headers=headers)
+    resp = inferrix_client.get(url, headers=headers)
     resp.raise_for_status()
     return resp.json()["data"]
 
 def get_entity_views_inferrix(jwt_token):
     url = f"{INFERRIX_BASE_URL}/entityViews/all?pageSize=100&page=0&sortProperty=createdTime&sortOrder=DESC&includeCustomers=true"
     headers = {"X-Authorization": f"Bearer {jwt_token}"}
-    resp = requests.get(url, headers=headers)
+    resp = inferrix_client.get(url, headers=headers)
     resp.raise_for_status()
     return resp.json()["data"]
 
 def get_notifications_inferrix(jwt_token):
     url = f"{INFERRIX_BASE_URL}/notification/inbox?pageSize=100&page=0&sortProperty=createdTime&sortOrder=DESC"
     headers = {"X-Authorization": f"Bearer {jwt_token}"}
-    resp = requests.get(url, headers=headers)
+    resp = inferrix_client.get(url, headers=headers)
     resp.raise_for_status()
     return resp.json()["data"]
 
-import requests
-
 INFERRIX_BASE_URL = "https://cloud.inferrix.com/api"
 
 def write_device_telemetry(entity_type, entity_id, scope, telemetry_dict, token=None):
@@ -1054,7 +908,7 @@ def write_device_telemetry(entity_type, entity_id, scope, telemetry_dict, token=
     url = f"{INFERRIX_BASE_URL}/plugins/telemetry/{entity_type}/{entity_id}/timeseries/{scope}"
     headers = {"X-Authorization": f"Bearer {token}", "Content-Type": "application/json"}
     try:
-        resp = requests.post(url, headers=headers, json=telemetry_dict, timeout=10)
+        resp = inferrix_client.post(url, headers=headers, json=telemetry_dict, timeout=10)
         resp.raise_for_status()
         return resp.json() if resp.content else {"success": True}
     except Exception as e:
@@ -1,12 +1,12 @@
-import requests
 import os
+import inferrix_client
 
 # Load from .env
 MCP_BASE_URL = os.getenv("MCP_BASE_URL", "http://localhost:8001/api/inferrix")
 
 def get_critical_alarms(building_name: str):
     """Fetch alarms and filter critical ones for a building"""
-    res = requests.get(f"{MCP_BASE_URL}/user/devices")
+    res = inferrix_client.get(f"{MCP_BASE_URL}/user/devices")
     if res.status_code != 200:
         return "Error fetching device list"
 
@@ -16,7 +16,7 @@ def get_critical_alarms(building_name: str):
 
     for device in matching:
         device_id = device.get("id")
-        alarms = requests.get(f"{MCP_BASE_URL}/devices/{device_id}/events").json()
+        alarms = inferrix_client.get(f"{MCP_BASE_URL}/devices/{device_id}/events").json()
         critical = [a for a in alarms if a.get("severity") == "CRITICAL"]
         results.extend(critical)
 
@@ -26,7 +26,7 @@ def get_critical_alarms(building_name: str):
 
 def acknowledge_alarm(alarm_id: str):
     """Acknowledge a specific alarm by ID"""
-    res = requests.post(f"{MCP_BASE_URL}/alarms/{alarm_id}/ack")
+    res = inferrix_client.post(f"{MCP_BASE_URL}/alarms/{alarm_id}/ack")
     if res.status_code == 200:
         return f"✅ Alarm {alarm_id} acknowledged."
     else:
@@ -35,7 +35,7 @@ def acknowledge_alarm(alarm_id: str):
 def get_temperature(entity_type: str, entity_id: str, key="temperature"):
     """Query telemetry temperature for a given device"""
     url = f"{MCP_BASE_URL}/plugins/telemetry/{entity_type}/{entity_id}/values/timeseries"
-    res = requests.get(url, params={"keys": key})
+    res = inferrix_client.get(url, params={"keys": key})
     if res.status_code != 200:
         return "Failed to fetch telemetry."
 
@@ -48,7 +48,7 @@ def get_temperature(entity_type: str, entity_id: str, key="temperature"):
 def get_device_publish_status(device_id: str):
     """Check if device is sending telemetry"""
     url = f"{MCP_BASE_URL}/devices/{device_id}/publishTelemetryCommands"
-    res = requests.get(url)
+    res = inferrix_client.get(url)
     if res.status_code != 200:
         return "Failed to check telemetry status."
     status = res.json()
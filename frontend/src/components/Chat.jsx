@@ -508,6 +508,54 @@ function VoiceRecognition({ onTranscript, isListening, setIsListening, isSupport
   );
 }
 
+// POST to /chat/enhanced/stream and read its Server-Sent Events.
+// onText receives the answer so far after every delta; resolves with the final response,
+// or with null when the stream could not be opened (the caller then uses /chat/enhanced).
+async function streamChat(url, body, headers, onText) {
+  let res;
+  try {
+    res = await fetch(url, {
+      method: "POST",
+      headers: { ...headers, "Content-Type": "application/json", Accept: "text/event-stream" },
+      body: JSON.stringify(body)
+    });
+  } catch (e) {
+    return null;
+  }
+  if (!res.ok || !res.body) return null;
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let text = "";
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const rawEvent = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      let event = "message";
+      let data = "";
+      for (const line of rawEvent.split("\n")) {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) data += line.slice(5).trim();
+      }
+      if (!data) continue;
+      const payload = JSON.parse(data);
+      if (event === "delta") {
+        text += payload.text;
+        onText(text);
+      } else if (event === "done") {
+        return payload.response;
+      } else if (event === "error") {
+        throw new Error(payload.error);
+      }
+    }
+  }
+  throw new Error("Stream ended before the response was complete");
+}
+
 export default function Chat({ devices, selectedDeviceId, onSelectDevice, onLogout }) {
   const [query, setQuery] = useState("");
   const [messages, setMessages] = useState([]);
@@ -561,23 +609,31 @@ export default function Chat({ devices, selectedDeviceId, onSelectDevice, onLogo
           : '';
         
         const inferrixToken = localStorage.getItem("inferrix_token");
-        const res = await axios.post(
-          `${baseURL}/chat/enhanced`,
-        {
+        const body = {
           query,           // the user's query string
           user: userEmail, // dynamically extracted user email
           device: selectedDeviceId || null
-        },
-        { 
-          headers: { 
-            Authorization: "Bearer " + jwt,
-            "X-Inferrix-Token": inferrixToken || ""
-          } 
+        };
+        const headers = { 
+          Authorization: "Bearer " + jwt,
+          "X-Inferrix-Token": inferrixToken || ""
+        };
+        // Show LLM answers as they are written; the last AI message is replaced while streaming
+        const showAnswer = (text, streaming) => setMessages((msgs) => {
+          const last = msgs[msgs.length - 1];
+          const message = { sender: "AI", text, streaming };
+          return last && last.streaming ? [...msgs.slice(0, -1), message] : [...msgs, message];
+        });
+        let answer = await streamChat(`${baseURL}/chat/enhanced/stream`, body, headers, (text) => showAnswer(text, true));
+        if (answer === null) {
+          const res = await axios.post(`${baseURL}/chat/enhanced`, body, { headers });
+          answer = res.data.response;
         }
-      );
-      setMessages((msgs) => [...msgs, { sender: "AI", text: res.data.response }]);
+      showAnswer(answer, false);
       setQuery("");
     } catch (e) {
+      // Drop a partially streamed answer so it is not mistaken for a complete one
+      setMessages((msgs) => msgs.filter((m) => !m.streaming));
       setError("❌ Failed to get response from server. Please check your connection and try again.");
     } finally {
       setLoading(false);
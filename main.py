@@ -1,4 +1,6 @@
+import asyncio
 import os
+import threading
 import time
 import sys
 from collections import defaultdict
@@ -7,12 +9,18 @@ from typing import Optional
 # Add backend directory to Python path
 sys.path.append('backend')
 
+# Time every import from here on; the report is printed once the agent has warmed up
+import import_cost
+import_cost.install()
+
 from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, HTMLResponse, FileResponse
+from fastapi.responses import JSONResponse, HTMLResponse, FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
+from chat_stream import NO_ANSWER, chat_events
+
 # Try to import database components
 try:
     from database import engine, Base
@@ -78,21 +86,73 @@ except ImportError as e:
     print(f"⚠️  Warning: Database modules not available: {e}")
     DATABASE_AVAILABLE = False
 
-# Try to import AI Magic Core and Enhanced Agentic Agent
-try:
-    from ai_magic_core import (
-        conversation_memory, multi_device_processor, proactive_insights,
-        nlp_processor, rich_response, multi_lang, smart_notifications, self_healing
-    )
-    from enhanced_agentic_agent import get_enhanced_agentic_agent
-    print("✅ AI Magic Core and Enhanced Agentic Agent imported successfully")
-    AI_MAGIC_AVAILABLE = True
-except ImportError as e:
-    print(f"⚠️  Warning: AI Magic Core not available: {e}")
-    AI_MAGIC_AVAILABLE = False
+# AI Magic Core and the agent pull in the ML/LLM stack. They are imported by a
+# background warm-up started with the app (or by the first chat), so /health
+# answers as soon as uvicorn is up; AI_MAGIC_AVAILABLE stays False until then.
+# Chat handlers call load_ai_magic() and get_enhanced_agentic_agent() through
+# asyncio.to_thread: the first call imports the whole stack and later ones may
+# wait on the warm-up's lock, neither of which may block the event loop.
+AGENT_WARMUP = os.getenv("AGENT_WARMUP", "true").lower() != "false"
+AI_MAGIC_AVAILABLE = False
+conversation_memory = multi_device_processor = proactive_insights = nlp_processor = None
+rich_response = multi_lang = smart_notifications = self_healing = None
+_ai_magic_loaded = False
+_ai_magic_lock = threading.Lock()
+
+def load_ai_magic():
+    """Import AI Magic Core and the agent module once; returns AI_MAGIC_AVAILABLE"""
+    global AI_MAGIC_AVAILABLE, _ai_magic_loaded
+    global conversation_memory, multi_device_processor, proactive_insights, nlp_processor
+    global rich_response, multi_lang, smart_notifications, self_healing
+    if _ai_magic_loaded:
+        return AI_MAGIC_AVAILABLE
+    with _ai_magic_lock:
+        if _ai_magic_loaded:
+            return AI_MAGIC_AVAILABLE
+        try:
+            import ai_magic_core
+            import enhanced_agentic_agent
+            conversation_memory = ai_magic_core.conversation_memory
+            multi_device_processor = ai_magic_core.multi_device_processor
+            proactive_insights = ai_magic_core.proactive_insights
+            nlp_processor = ai_magic_core.nlp_processor
+            rich_response = ai_magic_core.rich_response
+            multi_lang = ai_magic_core.multi_lang
+            smart_notifications = ai_magic_core.smart_notifications
+            self_healing = ai_magic_core.self_healing
+            print("✅ AI Magic Core and Enhanced Agentic Agent imported successfully")
+            AI_MAGIC_AVAILABLE = True
+        except ImportError as e:
+            print(f"⚠️  Warning: AI Magic Core not available: {e}")
+            AI_MAGIC_AVAILABLE = False
+        _ai_magic_loaded = True
+    return AI_MAGIC_AVAILABLE
+
+def get_enhanced_agentic_agent():
+    """The shared chat agent; its modules are imported on first use (or by the startup warm-up)"""
+    load_ai_magic()
+    from enhanced_agentic_agent import get_enhanced_agentic_agent as get_agent
+    return get_agent()
+
+def _warm_up_agent():
+    started = time.perf_counter()
+    try:
+        if load_ai_magic():
+            get_enhanced_agentic_agent()
+        print(f"🔥 Agent warmed up in {time.perf_counter() - started:.1f}s")
+    except Exception as e:
+        print(f"⚠️ Agent warm-up failed, it will be built on the first chat: {e}")
+    import_cost.print_report()
 
 app = FastAPI(title="Inferrix AI Agent API", version="1.0.0")
 
+@app.on_event("startup")
+def start_agent_warm_up():
+    if AGENT_WARMUP:
+        threading.Thread(target=_warm_up_agent, name="agent-warmup", daemon=True).start()
+    else:
+        import_cost.print_report()
+
 # Mount static files (built React app)
 try:
     if os.path.exists("static"):
@@ -205,10 +265,10 @@ def login(user: User):
             
             # Get Inferrix token for the user
             try:
-                import requests
+                import inferrix_client
                 
                 # First, try to get Inferrix token using user's credentials
-                inferrix_response = requests.post(
+                inferrix_response = inferrix_client.post(
                     "https://cloud.inferrix.com/api/auth/login",
                     json={"username": user.email, "password": user.password},  # Use username as per Postman
                     headers={"Content-Type": "application/json"},
@@ -272,7 +332,7 @@ def login(user: User):
 
 
 @app.post("/chat")
-def chat(prompt: Prompt, current_user=Depends(get_current_user_from_auth_db)):
+async def chat(prompt: Prompt, current_user=Depends(get_current_user_from_auth_db)):
     """Process chat query through AI agent using agentic approach"""
     try:
         if not prompt.query.strip():
@@ -285,10 +345,10 @@ def chat(prompt: Prompt, current_user=Depends(get_current_user_from_auth_db)):
         print(f"  - device: '{prompt.device}'")
         
         # Use enhanced agentic agent if available
-        if AI_MAGIC_AVAILABLE and DATABASE_AVAILABLE:
+        if await asyncio.to_thread(load_ai_magic) and DATABASE_AVAILABLE:
             try:
-                agent = get_enhanced_agentic_agent()
-                response = agent.process_query(prompt.query, prompt.user, prompt.device or "")
+                agent = await asyncio.to_thread(get_enhanced_agentic_agent)
+                response = await agent.process_query_async(prompt.query, prompt.user, prompt.device or "")
                 
                 # Update conversation memory if available
                 if conversation_memory:
@@ -334,8 +394,54 @@ def chat(prompt: Prompt, current_user=Depends(get_current_user_from_auth_db)):
             status_code=500
         )
 
+def get_chat_inferrix_token(request: Optional[Request]) -> Optional[str]:
+    """The caller's Inferrix token: X-Inferrix-Token, else a Bearer Authorization header"""
+    if request is None:
+        return None
+    header_token = request.headers.get("X-Inferrix-Token")
+    if header_token:
+        print(f"[DEBUG] Enhanced chat - Token found in X-Inferrix-Token: {header_token[:20]}...")
+        return header_token
+    auth_header = request.headers.get("Authorization")
+    if auth_header and auth_header.startswith("Bearer "):
+        print(f"[DEBUG] Enhanced chat - Token from Authorization header: {auth_header[7:27]}...")
+        return auth_header[7:]
+    print("[DEBUG] Enhanced chat - No token found in headers")
+    return None
+
+def enhanced_chat_body(response: str) -> dict:
+    """The /chat/enhanced response (also the `done` event of the stream)"""
+    return {
+        "response": response, 
+        "tool": "enhanced_agentic_agent" if AI_MAGIC_AVAILABLE and DATABASE_AVAILABLE else "demo_enhanced_agent",
+        "timestamp": time.time(),
+        "features": [
+            "conversational_memory",
+            "multi_device_operations", 
+            "proactive_insights",
+            "natural_language_control",
+            "rich_responses",
+            "personalization",
+            "self_healing",
+            "smart_notifications",
+            "multi_language_support"
+        ],
+        "features_available": {
+            "ai_magic": AI_MAGIC_AVAILABLE,
+            "database": DATABASE_AVAILABLE,
+            "conversation_memory": conversation_memory is not None if AI_MAGIC_AVAILABLE else False,
+            "multi_device": multi_device_processor is not None if AI_MAGIC_AVAILABLE else False,
+            "proactive_insights": proactive_insights is not None if AI_MAGIC_AVAILABLE else False,
+            "nlp_processor": nlp_processor is not None if AI_MAGIC_AVAILABLE else False,
+            "rich_response": rich_response is not None if AI_MAGIC_AVAILABLE else False,
+            "multi_lang": multi_lang is not None if AI_MAGIC_AVAILABLE else False,
+            "smart_notifications": smart_notifications is not None if AI_MAGIC_AVAILABLE else False,
+            "self_healing": self_healing is not None if AI_MAGIC_AVAILABLE else False
+        }
+    }
+
 @app.post("/chat/enhanced")
-def enhanced_chat(prompt: Prompt, current_user=Depends(get_current_user_from_auth_db), request: Request = None):
+async def enhanced_chat(prompt: Prompt, current_user=Depends(get_current_user_from_auth_db), request: Request = None):
     """Process chat query through enhanced AI agent with AI magic features"""
     try:
         if not prompt.query.strip():
@@ -348,26 +454,14 @@ def enhanced_chat(prompt: Prompt, current_user=Depends(get_current_user_from_aut
         print(f"  - device: '{prompt.device}'")
 
         # Extract Inferrix token from headers
-        inferrix_token = None
-        if request is not None:
-            header_token = request.headers.get("X-Inferrix-Token")
-            if header_token:
-                inferrix_token = header_token
-                print(f"[DEBUG] Enhanced chat - Token found in X-Inferrix-Token: {inferrix_token[:20]}...")
-            else:
-                auth_header = request.headers.get("Authorization")
-                if auth_header and auth_header.startswith("Bearer "):
-                    inferrix_token = auth_header[7:]
-                    print(f"[DEBUG] Enhanced chat - Token from Authorization header: {inferrix_token[:20]}...")
-                else:
-                    print("[DEBUG] Enhanced chat - No token found in headers")
+        inferrix_token = get_chat_inferrix_token(request)
         
         # Use enhanced agentic agent with AI magic features
-        if AI_MAGIC_AVAILABLE and DATABASE_AVAILABLE:
+        if await asyncio.to_thread(load_ai_magic) and DATABASE_AVAILABLE:
             try:
-                agent = get_enhanced_agentic_agent()
+                agent = await asyncio.to_thread(get_enhanced_agentic_agent)
                 # Pass token into agent so downstream API calls use it
-                response = agent.process_query(prompt.query, prompt.user, prompt.device or "", inferrix_token)
+                response = await agent.process_query_async(prompt.query, prompt.user, prompt.device or "", inferrix_token)
                 
                 # Apply AI Magic Core features
                 if conversation_memory:
@@ -389,34 +483,7 @@ def enhanced_chat(prompt: Prompt, current_user=Depends(get_current_user_from_aut
         
         print(f"[DEBUG] Enhanced chat - Final response: {response[:100]}...")
         
-        return {
-            "response": response, 
-            "tool": "enhanced_agentic_agent" if AI_MAGIC_AVAILABLE and DATABASE_AVAILABLE else "demo_enhanced_agent",
-            "timestamp": time.time(),
-            "features": [
-                "conversational_memory",
-                "multi_device_operations", 
-                "proactive_insights",
-                "natural_language_control",
-                "rich_responses",
-                "personalization",
-                "self_healing",
-                "smart_notifications",
-                "multi_language_support"
-            ],
-            "features_available": {
-                "ai_magic": AI_MAGIC_AVAILABLE,
-                "database": DATABASE_AVAILABLE,
-                "conversation_memory": conversation_memory is not None if AI_MAGIC_AVAILABLE else False,
-                "multi_device": multi_device_processor is not None if AI_MAGIC_AVAILABLE else False,
-                "proactive_insights": proactive_insights is not None if AI_MAGIC_AVAILABLE else False,
-                "nlp_processor": nlp_processor is not None if AI_MAGIC_AVAILABLE else False,
-                "rich_response": rich_response is not None if AI_MAGIC_AVAILABLE else False,
-                "multi_lang": multi_lang is not None if AI_MAGIC_AVAILABLE else False,
-                "smart_notifications": smart_notifications is not None if AI_MAGIC_AVAILABLE else False,
-                "self_healing": self_healing is not None if AI_MAGIC_AVAILABLE else False
-            }
-        }
+        return enhanced_chat_body(response)
     except Exception as e:
         print(f"Enhanced chat error: {e}")
         return JSONResponse(
@@ -424,8 +491,28 @@ def enhanced_chat(prompt: Prompt, current_user=Depends(get_current_user_from_aut
             status_code=500
         )
 
+@app.post("/chat/enhanced/stream")
+async def enhanced_chat_stream(prompt: Prompt, request: Request, current_user=Depends(get_current_user_from_auth_db)):
+    """Stream a chat answer as Server-Sent Events (see backend/chat_stream.py); `done` carries the /chat/enhanced body"""
+    if not prompt.query.strip():
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+    inferrix_token = get_chat_inferrix_token(request)
+
+    async def stream():
+        if not (await asyncio.to_thread(load_ai_magic) and DATABASE_AVAILABLE):
+            yield ('done', NO_ANSWER)
+            return
+        agent = await asyncio.to_thread(get_enhanced_agentic_agent)
+        async for kind, text in agent.process_query_stream(prompt.query, prompt.user, prompt.device or "", inferrix_token):
+            if kind == 'done' and conversation_memory:
+                conversation_memory.add_to_history(prompt.user, prompt.query, text, prompt.device)
+            yield kind, text
+
+    return StreamingResponse(chat_events(stream(), enhanced_chat_body), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.get("/inferrix/alarms")
-def get_alarms(current_user=Depends(get_current_user_from_auth_db), request: Request = None):
+async def get_alarms(current_user=Depends(get_current_user_from_auth_db), request: Request = None):
     """Get alarms from Inferrix API (MCP-compatible endpoint)"""
     try:
         # Get user's Inferrix token from request header
@@ -433,7 +520,7 @@ def get_alarms(current_user=Depends(get_current_user_from_auth_db), request: Req
         if not inferrix_token:
             raise HTTPException(status_code=401, detail="No token provided")
         
-        import requests
+        import inferrix_client
         url = "https://cloud.inferrix.com/api/v2/alarms"
         params = {
             "pageSize": 1000,  # Increased to get all alarms
@@ -452,7 +539,7 @@ def get_alarms(current_user=Depends(get_current_user_from_auth_db), request: Req
                 include_cleared = True
                 params["statusList"] = "CLEARED,ACTIVE"
         
-        response = requests.get(url, headers=headers, params=params)
+        response = await inferrix_client.aget(url, headers=headers, params=params)
         response.raise_for_status()
         alarms_data = response.json()
         
@@ -464,7 +551,7 @@ def get_alarms(current_user=Depends(get_current_user_from_auth_db), request: Req
         raise HTTPException(status_code=500, detail=f"Failed to fetch alarms: {str(e)}")
 
 @app.get("/inferrix/devices")
-def get_devices(current_user=Depends(get_current_user_from_auth_db), request: Request = None):
+async def get_devices(current_user=Depends(get_current_user_from_auth_db), request: Request = None):
     """Get devices from Inferrix API (MCP-compatible endpoint)"""
     try:
         # Get user's Inferrix token from request header
@@ -472,20 +559,16 @@ def get_devices(current_user=Depends(get_current_user_from_auth_db), request: Re
         if not inferrix_token:
             raise HTTPException(status_code=401, detail="No token provided")
         
-        import requests
-        url = "https://cloud.inferrix.com/api/user/devices"
+        import inferrix_client
         params = {
-            "pageSize": 100,
-            "page": 0,
             "sortProperty": "createdTime",
             "sortOrder": "DESC",
             "includeCustomers": "true"
         }
-        headers = {"X-Authorization": f"Bearer {inferrix_token}", "Content-Type": "application/json"}
         
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        return response.json()
+        # Walk every page (next page is prefetched) and keep the Inferrix page shape
+        devices = await inferrix_client.alist_pages("user/devices", inferrix_token, params=params)
+        return {"data": devices, "totalPages": 1, "totalElements": len(devices), "hasNext": False}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch devices: {str(e)}")
 
@@ -537,6 +620,11 @@ def health():
             }
         )
 
+@app.get("/health/startup")
+def health_startup():
+    """Import cost per module since the process started"""
+    return import_cost.report()
+
 @app.get("/api/info")
 def api_info():
     """Dynamic API information endpoint"""
@@ -586,9 +674,9 @@ def debug_devices(current_user=Depends(get_current_user_from_auth_db), request:
         if not inferrix_token:
             raise HTTPException(status_code=401, detail="No token provided")
         
-        import requests
+        import inferrix_client
         headers = {"X-Authorization": f"Bearer {inferrix_token}"}
-        response = requests.get(
+        response = inferrix_client.get(
             "https://cloud.inferrix.com/api/user/devices",
             headers=headers,
             params={"page": 0, "pageSize": 50}